@@ -5,24 +5,104 @@ from PyQt5.QtWidgets import (
     QComboBox, QDialog, QMessageBox, QLineEdit
 )
 from PyQt5.QtGui import QFont, QIcon, QColor, QPalette
-from PyQt5.QtCore import Qt, QDate, QDateTime
+from PyQt5.QtCore import Qt, QDate, QDateTime, pyqtSignal
+
+from base.grade_virtual import GradeVirtual, ColunaGrade, FonteConsulta
 
 try:
-    from base.banco import execute_query
+    from base.banco import (execute_query, buscar_nome_pessoa, buscar_nome_funcionario,
+                            registrar_nomes)
 except ImportError as e:
     print(f"AVISO: Erro ao importar módulo banco: {e}")
-    # Definimos função fictícia para evitar erros
+    # Definimos funções fictícias para evitar erros
     def execute_query(query, params=None):
         print(f"Query fictícia: {query}")
         print(f"Params: {params}")
         return []
+    
+    def buscar_nome_pessoa(id_pessoa):
+        return None
+    
+    def buscar_nome_funcionario(id_funcionario):
+        return None
+    
+    def registrar_nomes(tabela, pares):
+        pass
+
+# Nomes do cliente e do vendedor vêm no mesmo SELECT da venda
+JOIN_NOMES = """
+            LEFT JOIN PESSOAS P ON P.ID = V.ID_CLIENTE
+                 AND (P.TIPO_PESSOA = 'Física' OR P.TIPO_PESSOA = 'Jurídica')
+            LEFT JOIN FUNCIONARIOS F ON F.ID = V.ID_VENDEDOR
+"""
+
+def nome_exibicao_cliente(id_cliente, nome):
+    """Texto da coluna cliente a partir do ID e do nome lido no JOIN"""
+    if not id_cliente:
+        return "Cliente não identificado"
+    return nome or f"Cliente {id_cliente}"
+
+def nome_exibicao_vendedor(id_vendedor, nome):
+    """Texto da coluna vendedor a partir do ID e do nome lido no JOIN"""
+    if not id_vendedor:
+        return "Vendedor não identificado"
+    return nome or f"Vendedor {id_vendedor}"
+
+def formatar_data(valor):
+    """Data da venda no formato DD/MM/YYYY"""
+    try:
+        # Tentar formatar a data se for um objeto date
+        if hasattr(valor, 'strftime'):
+            return valor.strftime("%d/%m/%Y")
+        # Se for string no formato YYYY-MM-DD
+        if isinstance(valor, str) and len(valor) == 10:
+            return f"{valor[8:10]}/{valor[5:7]}/{valor[0:4]}"
+    except Exception as e:
+        print(f"Erro ao formatar data: {e}")
+    return "" if valor is None else str(valor)
+
+def cor_venda(venda):
+    """Vendas canceladas em vermelho"""
+    if venda[7] == "Cancelada":
+        return QColor(255, 200, 200)
+    return None
+
+# Colunas do histórico; os índices seguem o SELECT de carregar_vendas
+COLUNAS_VENDAS = [
+    ColunaGrade("ID", 0, ordenar_por="V.ID_VENDA", fundo=cor_venda),
+    ColunaGrade("DATA", formatar=lambda v: formatar_data(v[1]),
+                ordenar_por="V.DATA_VENDA", fundo=cor_venda),
+    ColunaGrade("HORA", 2, ordenar_por="V.HORA_VENDA", fundo=cor_venda),
+    ColunaGrade("CLIENTE", formatar=lambda v: nome_exibicao_cliente(v[3], v[8]),
+                ordenar_por="P.NOME", fundo=cor_venda),
+    ColunaGrade("VENDEDOR", formatar=lambda v: nome_exibicao_vendedor(v[4], v[9]),
+                ordenar_por="F.NOME", fundo=cor_venda),
+    ColunaGrade("VALOR TOTAL", formatar=lambda v: f"R$ {float(v[5] or 0):.2f}".replace('.', ','),
+                ordenar_por="V.VALOR_FINAL", alinhamento=Qt.AlignRight | Qt.AlignVCenter,
+                fundo=cor_venda),
+    ColunaGrade("FORMA PAGAMENTO", 6, ordenar_por="V.FORMA_PAGAMENTO", fundo=cor_venda),
+]
+
+class FonteVendas(FonteConsulta):
+    """Páginas do histórico de vendas; os nomes lidos alimentam o cache do banco"""
+    
+    def buscar(self, inicio, quantidade, coluna=None, decrescente=False):
+        vendas = super().buscar(inicio, quantidade, coluna, decrescente)
+        registrar_nomes('PESSOAS', ((v[3], v[8]) for v in vendas))
+        registrar_nomes('FUNCIONARIOS', ((v[4], v[9]) for v in vendas))
+        return vendas
 
 class ListaVendasDialog(QDialog):
     """Janela para exibir a lista de vendas dos últimos 30 dias"""
     
+    # Resultado da reimpressão, emitido pela thread do spooler
+    reimpressao_concluida = pyqtSignal(dict)
+    
     def __init__(self, parent=None):
         super().__init__(parent)
         
+        self.reimpressao_concluida.connect(self.tratar_resultado_reimpressao)
+        
         self.setWindowTitle("Histórico de Vendas")
         self.setMinimumSize(900, 600)
         self.setWindowFlags(self.windowFlags() | Qt.WindowMaximizeButtonHint)
@@ -96,17 +176,11 @@ class ListaVendasDialog(QDialog):
     
     def criar_tabela_vendas(self):
         """Cria a tabela onde serão exibidas as vendas"""
-        self.table_vendas = QTableWidget()
-        self.table_vendas.setColumnCount(7)
-        self.table_vendas.setHorizontalHeaderLabels([
-            "ID", "DATA", "HORA", "CLIENTE", "VENDEDOR", "VALOR TOTAL", "FORMA PAGAMENTO"
-        ])
+        # Grade virtual: as vendas são lidas por página conforme a rolagem
+        self.table_vendas = GradeVirtual(COLUNAS_VENDAS)
         
         # Configurar a tabela
         self.table_vendas.setAlternatingRowColors(True)
-        self.table_vendas.setSelectionBehavior(QTableWidget.SelectRows)
-        self.table_vendas.setEditTriggers(QTableWidget.NoEditTriggers)
-        self.table_vendas.verticalHeader().setVisible(False)
         
         # Ajustar os tamanhos das colunas
         header = self.table_vendas.horizontalHeader()
@@ -124,13 +198,17 @@ class ListaVendasDialog(QDialog):
         # Adicionar tabela ao layout principal
         self.main_layout.addWidget(self.table_vendas)
         
-        # Botões de ação - MODIFICADO: Removidos botões Visualizar e Imprimir
+        # Botões de ação - MODIFICADO: Removido botão Visualizar
         botoes_layout = QHBoxLayout()
         
+        self.btn_reimprimir = QPushButton("Reimprimir Cupom")
+        self.btn_reimprimir.clicked.connect(self.imprimir_venda)
+        
         self.btn_fechar = QPushButton("Fechar")
         self.btn_fechar.clicked.connect(self.close)
         
         botoes_layout.addStretch(1)
+        botoes_layout.addWidget(self.btn_reimprimir)
         botoes_layout.addWidget(self.btn_fechar)
         
         self.main_layout.addLayout(botoes_layout)
@@ -139,20 +217,18 @@ class ListaVendasDialog(QDialog):
     def carregar_vendas(self):
         """Carrega as vendas de acordo com os filtros selecionados"""
         try:
-            # Limpar a tabela
-            self.table_vendas.setRowCount(0)
-            
             # Obter os filtros
             data_inicio = self.date_inicio.date().toString("yyyy-MM-dd")
             data_fim = self.date_fim.date().toString("yyyy-MM-dd")
             forma_pagamento = self.combo_forma_pagamento.currentText()
             num_venda = self.entry_num_venda.text().strip()
             
-            # Construir a query
+            # Construir a query (com os nomes de cliente e vendedor)
             query = """
-            SELECT ID_VENDA, DATA_VENDA, HORA_VENDA, ID_CLIENTE, ID_VENDEDOR, 
-                   VALOR_FINAL, FORMA_PAGAMENTO, STATUS
-            FROM VENDAS
+            SELECT V.ID_VENDA, V.DATA_VENDA, V.HORA_VENDA, V.ID_CLIENTE, V.ID_VENDEDOR, 
+                   V.VALOR_FINAL, V.FORMA_PAGAMENTO, V.STATUS, P.NOME, F.NOME
+            FROM VENDAS V
+            """ + JOIN_NOMES + """
             WHERE 1=1
             """
             
@@ -160,126 +236,45 @@ class ListaVendasDialog(QDialog):
             
             # Adicionar filtros à query
             if num_venda:
-                query += " AND ID_VENDA = ?"
+                query += " AND V.ID_VENDA = ?"
                 params.append(int(num_venda) if num_venda.isdigit() else 0)
             else:
                 # Filtros de data só se aplicam se não estiver buscando por número específico
-                query += " AND DATA_VENDA BETWEEN ? AND ?"
+                query += " AND V.DATA_VENDA BETWEEN ? AND ?"
                 params.append(data_inicio)
                 params.append(data_fim)
                 
                 # Filtro de forma de pagamento
                 if forma_pagamento != "Todas":
-                    query += " AND FORMA_PAGAMENTO LIKE ?"
+                    query += " AND V.FORMA_PAGAMENTO LIKE ?"
                     params.append(f"%{forma_pagamento}%")
             
-            # Ordenar por data e hora (mais recentes primeiro)
-            query += " ORDER BY DATA_VENDA DESC, HORA_VENDA DESC"
-            
-            # Executar a query
-            vendas = execute_query(query, tuple(params) if params else None)
-            
-            # Preencher a tabela
-            for row, venda in enumerate(vendas):
-                self.table_vendas.insertRow(row)
-                
-                # ID
-                self.table_vendas.setItem(row, 0, QTableWidgetItem(str(venda[0])))
-                
-                # DATA (converter de YYYY-MM-DD para DD/MM/YYYY)
-                data_str = venda[1]
-                try:
-                    # Tentar formatar a data se for um objeto date
-                    if hasattr(data_str, 'strftime'):
-                        data_str = data_str.strftime("%d/%m/%Y")
-                    # Se for string no formato YYYY-MM-DD
-                    elif isinstance(data_str, str) and len(data_str) == 10:
-                        data_str = f"{data_str[8:10]}/{data_str[5:7]}/{data_str[0:4]}"
-                except Exception as e:
-                    print(f"Erro ao formatar data: {e}")
-                
-                self.table_vendas.setItem(row, 1, QTableWidgetItem(data_str))
-                
-                # HORA
-                self.table_vendas.setItem(row, 2, QTableWidgetItem(str(venda[2])))
-                
-                # CLIENTE - Buscar o nome do cliente pelo ID
-                id_cliente = venda[3]
-                nome_cliente = self.buscar_nome_cliente(id_cliente) or f"Cliente {id_cliente}"
-                self.table_vendas.setItem(row, 3, QTableWidgetItem(nome_cliente))
-                
-                # VENDEDOR - Buscar o nome do vendedor pelo ID
-                id_vendedor = venda[4]
-                nome_vendedor = self.buscar_nome_vendedor(id_vendedor) or f"Vendedor {id_vendedor}"
-                self.table_vendas.setItem(row, 4, QTableWidgetItem(nome_vendedor))
-                
-                # VALOR TOTAL (formatar como moeda)
-                valor = float(venda[5])
-                valor_formatado = f"R$ {valor:.2f}".replace('.', ',')
-                valor_item = QTableWidgetItem(valor_formatado)
-                valor_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-                self.table_vendas.setItem(row, 5, valor_item)
-                
-                # FORMA PAGAMENTO
-                self.table_vendas.setItem(row, 6, QTableWidgetItem(str(venda[6])))
-                
-                # Definir cores com base no status
-                status = venda[7]
-                if status == "Cancelada":
-                    # Aplicar cor vermelha para vendas canceladas
-                    for col in range(self.table_vendas.columnCount()):
-                        item = self.table_vendas.item(row, col)
-                        if item:
-                            item.setBackground(QColor(255, 200, 200))
+            # Ordem padrão: data e hora (mais recentes primeiro); o cabeçalho
+            # permite ordenar por qualquer coluna, no banco
+            total = self.table_vendas.definir_fonte(FonteVendas(
+                query, params,
+                ordem_padrao="V.DATA_VENDA DESC, V.HORA_VENDA DESC, V.ID_VENDA DESC",
+                desempate="V.ID_VENDA DESC"
+            ))
             
             # Exibir mensagem se nenhuma venda for encontrada
-            if self.table_vendas.rowCount() == 0:
+            if total == 0:
                 QMessageBox.information(self, "Aviso", "Nenhuma venda encontrada para os filtros selecionados.")
                 
         except Exception as e:
             QMessageBox.critical(self, "Erro", f"Erro ao carregar vendas: {str(e)}")
     
     def buscar_nome_cliente(self, id_cliente):
-        """Busca o nome do cliente pelo ID"""
+        """Busca o nome do cliente pelo ID (cache compartilhado do banco)"""
         if not id_cliente or id_cliente == 0:
             return "Cliente não identificado"
-            
-        try:
-            # Buscar na tabela PESSOAS onde TIPO_PESSOA é cliente
-            query = """
-            SELECT NOME FROM PESSOAS
-            WHERE ID = ? AND (TIPO_PESSOA = 'Física' OR TIPO_PESSOA = 'Jurídica')
-            """
-            result = execute_query(query, (id_cliente,))
-            
-            if result and len(result) > 0:
-                return result[0][0]
-                
-            return None
-        except Exception as e:
-            print(f"Erro ao buscar nome do cliente: {e}")
-            return None
+        return buscar_nome_pessoa(id_cliente)
     
     def buscar_nome_vendedor(self, id_vendedor):
-        """Busca o nome do vendedor pelo ID"""
+        """Busca o nome do vendedor pelo ID (cache compartilhado do banco)"""
         if not id_vendedor or id_vendedor == 0:
             return "Vendedor não identificado"
-            
-        try:
-            # Buscar na tabela FUNCIONARIOS onde TIPO_VENDEDOR é vendedor
-            query = """
-            SELECT NOME FROM FUNCIONARIOS
-            WHERE ID = ?
-            """
-            result = execute_query(query, (id_vendedor,))
-            
-            if result and len(result) > 0:
-                return result[0][0]
-                
-            return None
-        except Exception as e:
-            print(f"Erro ao buscar nome do vendedor: {e}")
-            return None
+        return buscar_nome_funcionario(id_vendedor)
     
     def visualizar_detalhes_venda(self):
         """Abre uma janela com os detalhes da venda selecionada"""
@@ -291,14 +286,14 @@ class ListaVendasDialog(QDialog):
         
         # Obter o ID da venda
         row = selected_rows[0].row()
-        id_venda = int(self.table_vendas.item(row, 0).text())
+        id_venda = int(self.table_vendas.linha(row)[0])
         
         # Abrir a janela de detalhes
         detalhes_dialog = DetalhesVendaDialog(id_venda, self)
         detalhes_dialog.exec_()
     
     def imprimir_venda(self):
-        """Imprime a venda selecionada (comprovante)"""
+        """Reimprime o cupom da venda selecionada, exatamente como foi emitido"""
         # Obter a linha selecionada
         selected_rows = self.table_vendas.selectionModel().selectedRows()
         if not selected_rows:
@@ -307,16 +302,31 @@ class ListaVendasDialog(QDialog):
         
         # Obter o ID da venda
         row = selected_rows[0].row()
-        id_venda = int(self.table_vendas.item(row, 0).text())
+        id_venda = int(self.table_vendas.linha(row)[0])
         
         try:
-            # Aqui você pode implementar a lógica para imprimir o comprovante de venda
-            # Por enquanto, exibimos apenas uma mensagem
+            from base.banco import obter_cupom_venda
+            from spooler_impressao import spooler_impressao
+            
+            conteudo = obter_cupom_venda(id_venda)
+            if not conteudo:
+                QMessageBox.warning(self, "Aviso", 
+                                   f"O cupom da venda {id_venda} não está disponível para reimpressão.")
+                return
+            
+            spooler_impressao.enfileirar_reimpressao(
+                id_venda, conteudo, ao_concluir=self.reimpressao_concluida.emit)
             QMessageBox.information(self, "Impressão", 
-                                   f"Enviando venda {id_venda} para impressão...\n"
-                                   f"(Funcionalidade a ser implementada)")
+                                   f"Cupom da venda {id_venda} enviado para impressão.")
         except Exception as e:
             QMessageBox.critical(self, "Erro", f"Erro ao imprimir venda: {str(e)}")
+    
+    def tratar_resultado_reimpressao(self, resultado):
+        """Avisa o usuário quando a reimpressão falha"""
+        if not resultado.get('sucesso'):
+            QMessageBox.warning(self, "Erro de Impressão", 
+                               f"Não foi possível reimprimir o cupom da venda "
+                               f"{resultado.get('id_venda')}:\n{resultado.get('mensagem')}")
 
 class DetalhesVendaDialog(QDialog):
     """Janela para exibir os detalhes de uma venda"""
@@ -439,10 +449,12 @@ class DetalhesVendaDialog(QDialog):
         try:
             # Buscar dados da venda
             query_venda = """
-            SELECT DATA_VENDA, HORA_VENDA, ID_CLIENTE, ID_VENDEDOR,
-                   VALOR_TOTAL, DESCONTO, VALOR_FINAL, FORMA_PAGAMENTO, STATUS
-            FROM VENDAS
-            WHERE ID_VENDA = ?
+            SELECT V.DATA_VENDA, V.HORA_VENDA, V.ID_CLIENTE, V.ID_VENDEDOR,
+                   V.VALOR_TOTAL, V.DESCONTO, V.VALOR_FINAL, V.FORMA_PAGAMENTO, V.STATUS,
+                   P.NOME, F.NOME
+            FROM VENDAS V
+            """ + JOIN_NOMES + """
+            WHERE V.ID_VENDA = ?
             """
             
             result_venda = execute_query(query_venda, (self.id_venda,))
@@ -465,15 +477,14 @@ class DetalhesVendaDialog(QDialog):
             self.lbl_data.setText(f"Data: {data_str}")
             self.lbl_hora.setText(f"Hora: {venda[1]}")
             
-            # Buscar nome do cliente
+            # Nomes do cliente e do vendedor (vieram no JOIN)
             id_cliente = venda[2]
-            nome_cliente = self.buscar_nome_cliente(id_cliente) or f"Cliente {id_cliente}"
-            self.lbl_cliente.setText(f"Cliente: {nome_cliente}")
+            self.lbl_cliente.setText(f"Cliente: {nome_exibicao_cliente(id_cliente, venda[9])}")
             
-            # Buscar nome do vendedor
             id_vendedor = venda[3]
-            nome_vendedor = self.buscar_nome_vendedor(id_vendedor) or f"Vendedor {id_vendedor}"
-            self.lbl_vendedor.setText(f"Vendedor: {nome_vendedor}")
+            self.lbl_vendedor.setText(f"Vendedor: {nome_exibicao_vendedor(id_vendedor, venda[10])}")
+            registrar_nomes('PESSOAS', [(id_cliente, venda[9])])
+            registrar_nomes('FUNCIONARIOS', [(id_vendedor, venda[10])])
             
             # Valores
             valor_total = float(venda[4])
@@ -553,46 +564,16 @@ class DetalhesVendaDialog(QDialog):
             QMessageBox.critical(self, "Erro", f"Erro ao carregar itens da venda: {str(e)}")
     
     def buscar_nome_cliente(self, id_cliente):
-        """Busca o nome do cliente pelo ID"""
+        """Busca o nome do cliente pelo ID (cache compartilhado do banco)"""
         if not id_cliente or id_cliente == 0:
             return "Cliente não identificado"
-            
-        try:
-            # Buscar na tabela PESSOAS onde TIPO_PESSOA é cliente
-            query = """
-            SELECT NOME FROM PESSOAS
-            WHERE ID = ? AND (TIPO_PESSOA = 'Física' OR TIPO_PESSOA = 'Jurídica')
-            """
-            result = execute_query(query, (id_cliente,))
-            
-            if result and len(result) > 0:
-                return result[0][0]
-                
-            return None
-        except Exception as e:
-            print(f"Erro ao buscar nome do cliente: {e}")
-            return None
+        return buscar_nome_pessoa(id_cliente)
     
     def buscar_nome_vendedor(self, id_vendedor):
-        """Busca o nome do vendedor pelo ID"""
+        """Busca o nome do vendedor pelo ID (cache compartilhado do banco)"""
         if not id_vendedor or id_vendedor == 0:
             return "Vendedor não identificado"
-            
-        try:
-            # Buscar na tabela FUNCIONARIOS onde TIPO_VENDEDOR é vendedor
-            query = """
-            SELECT NOME FROM FUNCIONARIOS
-            WHERE ID = ?
-            """
-            result = execute_query(query, (id_vendedor,))
-            
-            if result and len(result) > 0:
-                return result[0][0]
-                
-            return None
-        except Exception as e:
-            print(f"Erro ao buscar nome do vendedor: {e}")
-            return None
+        return buscar_nome_funcionario(id_vendedor)
     
 def abrir_janela_vendas(parent=None):
     """Abre a janela de histórico de vendas"""
@@ -7,10 +7,10 @@ from PyQt5.QtWidgets import (
     QMessageBox, QDialog, QListWidget, QListWidgetItem, QScrollArea
 )
 from PyQt5.QtGui import QFont, QIcon, QPalette, QColor, QPixmap, QCursor, QPainter
-from PyQt5.QtCore import Qt, QDateTime, QTimer, QSize
+from PyQt5.QtCore import Qt, QDateTime, QTimer, QSize, pyqtSignal
 from PyQt5.QtSvg import QSvgRenderer
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-from gerador_cupom import gerar_e_imprimir_cupom
+from spooler_impressao import spooler_impressao
 try:
     pass  # Add the code to be executed here
 except Exception as e:
@@ -87,22 +87,21 @@ class BarcodeSuggestionWidget(QWidget):
         print(f"Produtos recebidos: {len(produtos)}")
         print(f"Quantidade detectada: {self.quantidade_selecionada}")
         
-        self.lista_sugestoes.clear()
-        self.produtos_data = []
-        
         if not produtos or len(produtos) == 0:
             print("❌ Nenhum produto para mostrar")
+            self.lista_sugestoes.clear()
+            self.produtos_data = []
             self.hide()
             return
         
         # Informação sobre quantidade
         quantidade_info = f" (Qtd: {self.quantidade_selecionada})" if self.quantidade_selecionada > 1 else ""
         
-        # Adicionar produtos à lista
+        # Montar as linhas antes de tocar na lista
+        linhas = []
+        produtos_data = []
         for i, produto in enumerate(produtos):
             try:
-                print(f"📦 Processando produto {i+1}: {produto}")
-                
                 # Extrair informações do produto
                 codigo_barras = str(produto[0]) if len(produto) > 0 and produto[0] else ""
                 codigo_produto = str(produto[1]) if len(produto) > 1 and produto[1] else ""
@@ -125,9 +124,6 @@ class BarcodeSuggestionWidget(QWidget):
                 else:
                     texto_item = f"📦 {codigo_produto} - {nome_produto[:40]} | {preco_formatado}{quantidade_info}"
                 
-                # Adicionar item à lista
-                item = QListWidgetItem(texto_item)
-                
                 # Tooltip informativo
                 tooltip_text = f"Código: {codigo_produto}\nNome: {nome_produto}\nPreço: {preco_formatado}"
                 if self.quantidade_selecionada > 1:
@@ -135,23 +131,40 @@ class BarcodeSuggestionWidget(QWidget):
                     tooltip_text += f"\nQuantidade a adicionar: {self.quantidade_selecionada}"
                     tooltip_text += f"\nTotal do item: R$ {total_item:.2f}"
                 
-                item.setToolTip(tooltip_text)
-                self.lista_sugestoes.addItem(item)
+                linhas.append((texto_item, tooltip_text))
                 
                 # Armazenar dados do produto
-                self.produtos_data.append({
+                produtos_data.append({
                     'codigo_barras': codigo_barras,
                     'codigo': codigo_produto,
                     'nome': nome_produto,
                     'preco_venda': preco
                 })
                 
-                print(f"  📝 Produto armazenado: {self.produtos_data[-1]}")
-                
             except Exception as e:
                 print(f"❌ Erro ao processar produto {i+1}: {e}")
                 continue
         
+        # Atualizar a lista aproveitando os itens existentes: só muda o texto das
+        # linhas que mudaram e adiciona/remove apenas a diferença
+        self.lista_sugestoes.setUpdatesEnabled(False)
+        try:
+            for row, (texto_item, tooltip_text) in enumerate(linhas):
+                item = self.lista_sugestoes.item(row)
+                if item is None:
+                    item = QListWidgetItem(texto_item)
+                    self.lista_sugestoes.addItem(item)
+                elif item.text() != texto_item:
+                    item.setText(texto_item)
+                item.setToolTip(tooltip_text)
+            
+            while self.lista_sugestoes.count() > len(linhas):
+                self.lista_sugestoes.takeItem(self.lista_sugestoes.count() - 1)
+        finally:
+            self.lista_sugestoes.setUpdatesEnabled(True)
+        
+        self.produtos_data = produtos_data
+        
         # Mostrar o widget se houver itens
         if self.lista_sugestoes.count() > 0:
             print(f"✅ Exibindo widget com {self.lista_sugestoes.count()} itens")
@@ -599,6 +612,9 @@ SVG_ICONS = {
 }
 
 class PDVWindow(QMainWindow):
+    # Resultado da impressão de um cupom, emitido pela thread do spooler
+    impressao_concluida = pyqtSignal(dict)
+
     def __init__(self):
         super().__init__()
 
@@ -699,6 +715,29 @@ class PDVWindow(QMainWindow):
         # NOVO: Conectar eventos de sugestões APÓS todos widgets serem criados
         # ========================================
         self.conectar_eventos_codigo_barras()
+        
+        # Carregar o catálogo de produtos uma vez por sessão do PDV
+        self.carregar_catalogo_produtos()
+        
+        # Cupons são impressos em segundo plano; falhas chegam por este sinal
+        self.impressao_concluida.connect(self.tratar_resultado_impressao)
+        spooler_impressao.iniciar()
+
+    def tratar_resultado_impressao(self, resultado):
+        """Avisa o operador quando um cupom enfileirado não pôde ser impresso"""
+        if not resultado.get('sucesso'):
+            from PyQt5.QtWidgets import QMessageBox
+            QMessageBox.warning(self, "Impressão",
+                f"Falha ao imprimir cupom da venda #{resultado.get('id_venda')}:\n{resultado.get('mensagem')}")
+
+    def carregar_catalogo_produtos(self):
+        """Carrega o catálogo de produtos em memória usado na leitura de códigos"""
+        try:
+            from base.catalogo_produtos import catalogo_produtos
+            catalogo_produtos.carregar()
+        except Exception as e:
+            # Sem o catálogo pré-carregado a primeira busca fará a carga
+            print(f"Erro ao carregar catálogo de produtos: {e}")
 
     def conectar_eventos_codigo_barras(self):
         """Conecta os eventos relacionados ao código de barras após widgets serem criados"""
@@ -843,8 +882,7 @@ class PDVWindow(QMainWindow):
             print(f"🔧 Configurando quantidade {quantidade_detectada} no widget de sugestões...")
             self.widget_sugestoes.quantidade_selecionada = quantidade_detectada
             
-            # ===== BUSCA NO BANCO DE DADOS =====
-            # Importar função do banco de dados
+            # ===== BUSCA NO CATÁLOGO DE PRODUTOS =====
             import os
             import sys
             
@@ -856,133 +894,15 @@ class PDVWindow(QMainWindow):
             
             print(f"📁 Diretórios no path: {current_dir}, {parent_dir}")
             
-            # Tentar importar execute_query
-            try:
-                from base.banco import execute_query
-                print("✅ execute_query importado com sucesso!")
-            except ImportError as import_error:
-                print(f"❌ Erro ao importar execute_query: {import_error}")
-                self.widget_sugestoes.hide()
-                return
-            
-            # DESCOBRIR a estrutura real da tabela
-            print(f"\n🔍 === DESCOBRINDO ESTRUTURA DA TABELA PRODUTOS ===")
-            
+            # Buscar no catálogo de produtos em memória (prefixo do código de barras
+            # e do código do produto), sem consultas LIKE a cada tecla
             try:
-                # Query para descobrir os campos da tabela PRODUTOS
-                structure_query = """
-                SELECT RDB$FIELD_NAME, RDB$FIELD_POSITION
-                FROM RDB$RELATION_FIELDS
-                WHERE RDB$RELATION_NAME = 'PRODUTOS'
-                ORDER BY RDB$FIELD_POSITION
-                """
-                
-                campos_result = execute_query(structure_query)
-                print(f"✅ Estrutura obtida! Encontrados {len(campos_result)} campos:")
-                
-                # Extrair nomes dos campos
-                nomes_campos = []
-                for campo in campos_result:
-                    nome_campo = campo[0].strip() if campo[0] else ""
-                    nomes_campos.append(nome_campo)
-                    print(f"  📋 {campo[1]}: {nome_campo}")
-                
-                # MAPEAR campos para busca
-                campos_mapeados = {
-                    'codigo_barras': None,
-                    'codigo_produto': None,
-                    'nome_produto': None,
-                    'preco_venda': None
-                }
-                
-                # Possíveis nomes para cada tipo de campo
-                mapeamento = {
-                    'codigo_barras': ['BARRAS', 'CODIGO_BARRAS', 'EAN', 'GTIN', 'COD_BARRAS', 'EAN13'],
-                    'codigo_produto': ['CODIGO', 'ID', 'ID_PRODUTO', 'PRODUTO_ID', 'COD', 'COD_PRODUTO'],
-                    'nome_produto': ['NOME', 'DESCRICAO', 'PRODUTO', 'DESCR', 'DESCRITIVO', 'NOME_PRODUTO'],
-                    'preco_venda': ['PRECO_VENDA', 'VALOR_VENDA', 'PRECO', 'VALOR', 'PRECO_VAREJO', 'VALOR_UNITARIO']
-                }
-                
-                # Encontrar os campos reais
-                for tipo, possiveis_nomes in mapeamento.items():
-                    for nome in possiveis_nomes:
-                        if nome in nomes_campos:
-                            campos_mapeados[tipo] = nome
-                            print(f"✅ {tipo} -> {nome}")
-                            break
-                    
-                    if not campos_mapeados[tipo]:
-                        print(f"⚠️ Campo {tipo} não encontrado!")
-                
-                # CONSTRUIR queries baseadas nos campos encontrados
+                from base.catalogo_produtos import catalogo_produtos
+                produtos_encontrados = catalogo_produtos.sugestoes(codigo_para_buscar, limite=10)
+                print(f"✅ Encontrados {len(produtos_encontrados)} produtos no catálogo")
+            except Exception as e:
+                print(f"❌ Erro ao buscar sugestões no catálogo: {e}")
                 produtos_encontrados = []
-                
-                # Query 1: Buscar por código de barras
-                if campos_mapeados['codigo_barras']:
-                    print(f"\n🔍 Buscando por código de barras ({campos_mapeados['codigo_barras']})...")
-                    
-                    query_barras = f"""
-                    SELECT {campos_mapeados['codigo_barras']}, {campos_mapeados['codigo_produto'] or 'NULL'}, 
-                        {campos_mapeados['nome_produto'] or 'NULL'}, {campos_mapeados['preco_venda'] or 'NULL'}
-                    FROM PRODUTOS
-                    WHERE {campos_mapeados['codigo_barras']} LIKE ?
-                    ORDER BY {campos_mapeados['codigo_barras']}
-                    FETCH FIRST 10 ROWS ONLY
-                    """
-                    
-                    try:
-                        param_busca = f"{codigo_para_buscar}%"
-                        print(f"🔍 Executando: {query_barras}")
-                        print(f"🔍 Parâmetro: {param_busca}")
-                        
-                        result_barras = execute_query(query_barras, (param_busca,))
-                        print(f"✅ Encontrados {len(result_barras)} produtos por código de barras")
-                        
-                        for produto in result_barras:
-                            if produto not in produtos_encontrados:
-                                produtos_encontrados.append(produto)
-                        
-                    except Exception as e:
-                        print(f"❌ Erro na busca por código de barras: {e}")
-                
-                # Query 2: Buscar por código do produto
-                if campos_mapeados['codigo_produto'] and len(produtos_encontrados) < 10:
-                    print(f"\n🔍 Buscando por código do produto ({campos_mapeados['codigo_produto']})...")
-                    
-                    query_codigo = f"""
-                    SELECT {campos_mapeados['codigo_barras'] or 'NULL'}, {campos_mapeados['codigo_produto']}, 
-                        {campos_mapeados['nome_produto'] or 'NULL'}, {campos_mapeados['preco_venda'] or 'NULL'}
-                    FROM PRODUTOS
-                    WHERE CAST({campos_mapeados['codigo_produto']} AS VARCHAR(50)) LIKE ?
-                    ORDER BY {campos_mapeados['codigo_produto']}
-                    FETCH FIRST 10 ROWS ONLY
-                    """
-                    
-                    try:
-                        param_busca = f"{codigo_para_buscar}%"
-                        print(f"🔍 Executando: {query_codigo}")
-                        print(f"🔍 Parâmetro: {param_busca}")
-                        
-                        result_codigo = execute_query(query_codigo, (param_busca,))
-                        print(f"✅ Encontrados {len(result_codigo)} produtos por código")
-                        
-                        for produto in result_codigo:
-                            # Evitar duplicatas
-                            codigo_produto = str(produto[1]) if len(produto) > 1 else ""
-                            if not any(str(p[1]) == codigo_produto for p in produtos_encontrados):
-                                produtos_encontrados.append(produto)
-                        
-                    except Exception as e:
-                        print(f"❌ Erro na busca por código: {e}")
-            
-            except Exception as structure_error:
-                print(f"❌ Erro ao obter estrutura da tabela: {structure_error}")
-                # Fallback com consulta simples
-                try:
-                    fallback_query = "SELECT * FROM PRODUTOS WHERE CODIGO LIKE ? LIMIT 10"
-                    produtos_encontrados = execute_query(fallback_query, (f"{codigo_para_buscar}%",))
-                except:
-                    produtos_encontrados = []
             
             # MOSTRAR RESULTADOS
             print(f"\n📊 === RESULTADOS DA BUSCA ===")
@@ -1397,6 +1317,7 @@ class PDVWindow(QMainWindow):
             
             # Importar função do banco de dados
             from base.banco import execute_query
+            from base.eventos import barramento_eventos, CAIXA_FECHADO
             
             # Obter data e hora atual
             agora = datetime.now()
@@ -1420,6 +1341,7 @@ class PDVWindow(QMainWindow):
             """
             
             execute_query(query_update, (data_fechamento, hora_fechamento, valor_fechamento, id_caixa))
+            barramento_eventos.publicar(CAIXA_FECHADO, id_caixa=id_caixa)
             
             # Mostrar mensagem de sucesso
             QMessageBox.information(
@@ -1464,74 +1386,14 @@ class PDVWindow(QMainWindow):
             return
         
         try:
-            # Importar função do banco de dados
-            import os
-            import sys
-            
-            # Adicionar diretório pai ao path para acessar a pasta base
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            parent_dir = os.path.dirname(current_dir)
-            if parent_dir not in sys.path:
-                sys.path.append(parent_dir)
+            from base.catalogo_produtos import catalogo_produtos
             
-            from base.banco import execute_query
-            
-            # Determinar as colunas para pesquisa
-            # Primeiro, obter a estrutura da tabela
-            structure_query = """
-            SELECT RDB$FIELD_NAME
-            FROM RDB$RELATION_FIELDS
-            WHERE RDB$RELATION_NAME = 'PRODUTOS'
-            ORDER BY RDB$FIELD_POSITION
-            """
-            
-            try:
-                # Tentar obter a estrutura
-                columns = execute_query(structure_query)
-                column_names = [col[0].strip() if col[0] else "" for col in columns]
-                
-                # Possíveis colunas de pesquisa com alternativas
-                possible_columns = {
-                    "NOME": ["NOME", "DESCRICAO", "PRODUTO", "DESCR"],
-                    "CODIGO": ["CODIGO", "ID", "ID_PRODUTO", "PRODUTO_ID", "COD"],
-                    "BARRAS": ["BARRAS", "CODIGO_BARRAS", "EAN", "GTIN", "COD_BARRAS"]
-                }
-                
-                # Construir a lista de colunas para pesquisa
-                search_columns = []
-                for key, alternatives in possible_columns.items():
-                    for alt in alternatives:
-                        if alt in column_names:
-                            search_columns.append(alt)
-                            break
-                
-                # Se não encontrou nenhuma coluna para pesquisa, usar consulta genérica
-                if not search_columns:
-                    query = "SELECT * FROM PRODUTOS"
-                    params = ()
-                else:
-                    # Construir a cláusula WHERE para pesquisa por texto
-                    where_clause = " OR ".join([f"{col} LIKE ?" for col in search_columns])
-                    params = tuple([f"%{texto_pesquisa}%" for _ in search_columns])
-                    
-                    query = f"""
-                    SELECT * FROM PRODUTOS
-                    WHERE {where_clause}
-                    ORDER BY NOME
-                    LIMIT 20
-                    """
-            
-            except Exception as structure_error:
-                # Consulta simplificada em caso de erro
-                print(f"Erro ao obter estrutura: {structure_error}")
-                query = "SELECT * FROM PRODUTOS LIMIT 20"
-                params = ()
-            
-            # Executar a consulta para buscar produtos
-            result = execute_query(query, params)
+            # Catálogo em memória: código, código de barras, nome ou marca,
+            # sem diferenciar acentos e tolerando erros de digitação
+            result = catalogo_produtos.pesquisar(texto_pesquisa, limite=20)
             
             # Se não encontrou resultados
-            if not result or len(result) == 0:
+            if not result:
                 self.combo_pesquisa.showPopup()  # Fecha o popup se estiver aberto
                 QMessageBox.information(self, "Pesquisa", f"Nenhum produto encontrado com '{texto_pesquisa}'")
                 return
@@ -1540,13 +1402,13 @@ class PDVWindow(QMainWindow):
             if len(result) == 1:
                 produto_encontrado = result[0]
                 
-                # Criar dicionário com os dados do produto
+                # Criar dicionário com os dados do produto (tupla no formato de CAMPOS)
                 try:
                     produto = {
                         "id": produto_encontrado[0],
-                        "codigo": produto_encontrado[1] if len(produto_encontrado) > 1 else produto_encontrado[0],
-                        "nome": produto_encontrado[2] if len(produto_encontrado) > 2 else "Produto",
-                        "preco_venda": float(produto_encontrado[3]) if len(produto_encontrado) > 3 and produto_encontrado[3] is not None else 0
+                        "codigo": produto_encontrado[1],
+                        "nome": produto_encontrado[2] or "Produto",
+                        "preco_venda": float(produto_encontrado[7] or 0)
                     }
                     
                     # Adicionar ao carrinho diretamente
@@ -1561,7 +1423,11 @@ class PDVWindow(QMainWindow):
                     print(f"Erro ao processar produto único: {e}")
             
             # Se encontrou múltiplos resultados, mostrar diálogo de seleção
-            self.mostrar_selecao_produtos(result)
+            # (código, nome, preço, estoque atual lido do banco)
+            self.mostrar_selecao_produtos([
+                (p[1], p[2], float(p[7] or 0), float(p[8] or 0))
+                for p in catalogo_produtos.com_estoque_atual(result)
+            ])
             
         except Exception as e:
             QMessageBox.critical(self, "Erro", f"Erro ao pesquisar produto: {str(e)}")
@@ -2220,14 +2086,19 @@ class PDVWindow(QMainWindow):
             print(f"Buscando produto com código: {codigo_barras}, código limpo: {codigo_limpo}")
             
             try:
-                from base.banco import buscar_produto_por_barras, buscar_produto_por_codigo
+                # Catálogo em memória: o produto é encontrado sem consultar o banco
+                from base.catalogo_produtos import catalogo_produtos
+                buscar_produto_por_barras = catalogo_produtos.buscar_por_barras
+                buscar_produto_por_codigo = catalogo_produtos.buscar_por_codigo
             except ImportError as e:
                 print(f"Erro ao importar funções do banco: {e}")
                 try:
                     import sys
                     import os
                     sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-                    from base.banco import buscar_produto_por_barras, buscar_produto_por_codigo
+                    from base.catalogo_produtos import catalogo_produtos
+                    buscar_produto_por_barras = catalogo_produtos.buscar_por_barras
+                    buscar_produto_por_codigo = catalogo_produtos.buscar_por_codigo
                 except ImportError as e2:
                     print(f"Erro ao importar módulos alternativos: {e2}")
                     def buscar_produto_por_barras(codigo): return None
@@ -3380,31 +3251,16 @@ class PDVWindow(QMainWindow):
     def testar_conexao_banco(self):
         """Testa a conexão com o banco e a estrutura das tabelas necessárias"""
         try:
-            from base.banco import execute_query
+            from base.esquema import registro_esquema
             
             print("\n🔍 === TESTANDO CONEXÃO E ESTRUTURA DO BANCO ===")
             
-            # Teste 1: Conexão básica
-            try:
-                result = execute_query("SELECT 1 FROM RDB$DATABASE")
-                print("✅ Conexão com banco estabelecida")
-            except Exception as e:
-                print(f"❌ Erro de conexão: {e}")
-                return False
-            
-            # Teste 2: Existência das tabelas
+            # A estrutura vem do registro de esquema: só a primeira chamada acessa o banco
             tabelas_necessarias = ['VENDAS', 'VENDAS_ITENS', 'PRODUTOS']
             
             for tabela in tabelas_necessarias:
                 try:
-                    query = f"""
-                    SELECT COUNT(*) FROM RDB$RELATIONS 
-                    WHERE RDB$RELATION_NAME = '{tabela}' 
-                    AND RDB$RELATION_TYPE = 0
-                    """
-                    result = execute_query(query)
-                    
-                    if result and result[0][0] > 0:
+                    if registro_esquema.colunas(tabela):
                         print(f"✅ Tabela {tabela} existe")
                     else:
                         print(f"❌ Tabela {tabela} não encontrada")
@@ -3552,33 +3408,26 @@ class PDVWindow(QMainWindow):
                 troco = 0.0  # Não há troco para essas formas de pagamento
                 print(f"💰 Pagamento sem troco: Total={total:.2f}, Valor Recebido={valor_recebido:.2f}")
 
-            # 5️⃣ Verificar estoque (código existente mantido)
+            # 5️⃣ Verificar estoque de todos os itens com uma única consulta
+            permitir_estoque_negativo = False
             try:
-                from base.banco import execute_query
-                structure_query = """
-                    SELECT RDB$FIELD_NAME
-                    FROM RDB$RELATION_FIELDS
-                    WHERE RDB$RELATION_NAME = 'PRODUTOS'
-                    ORDER BY RDB$FIELD_POSITION
-                """
-                produtos_fields = execute_query(structure_query)
-                alternativas = ["ESTOQUE","QUANTIDADE_ESTOQUE","ESTOQUE_ATUAL","QTD","QUANTIDADE","SALDO","SALDO_ESTOQUE"]
-                estoque_field = next((f[0].strip() for f in produtos_fields if f[0] and f[0].strip().upper() in alternativas), None)
-                if estoque_field:
-                    sem_estoque = []
-                    for row in range(self.table_itens.rowCount()):
-                        id_prod = self.table_itens.item(row,1).text()
-                        qtd = self.table_itens.cellWidget(row,3).get_value()
-                        nome = self.table_itens.item(row,2).text()
-                        q = execute_query(f"SELECT {estoque_field} FROM PRODUTOS WHERE CODIGO = ?", (id_prod,))
-                        if q and q[0][0] is not None and float(q[0][0]) < qtd:
-                            sem_estoque.append((nome, float(q[0][0]), qtd))
-                    if sem_estoque:
-                        from PyQt5.QtWidgets import QMessageBox
-                        msg = "Estoque insuficiente:\n" + '\n'.join(f"{n}: disp {e}, ped {p}" for n,e,p in sem_estoque)
-                        escolha = QMessageBox.question(self, "Estoque Insuficiente", msg, QMessageBox.Yes|QMessageBox.No, QMessageBox.No)
-                        if escolha == QMessageBox.No:
-                            return
+                from base.banco import verificar_estoque_itens
+                sem_estoque = [
+                    falta for falta in verificar_estoque_itens([
+                        (self.table_itens.item(row,1).text(), self.table_itens.cellWidget(row,3).get_value())
+                        for row in range(self.table_itens.rowCount())
+                    ])
+                    if falta['disponivel'] is not None
+                ]
+                if sem_estoque:
+                    from PyQt5.QtWidgets import QMessageBox
+                    msg = "Estoque insuficiente:\n" + '\n'.join(
+                        f"{f['nome'] or f['codigo']}: disp {f['disponivel']}, ped {f['solicitado']}" for f in sem_estoque)
+                    escolha = QMessageBox.question(self, "Estoque Insuficiente", msg, QMessageBox.Yes|QMessageBox.No, QMessageBox.No)
+                    if escolha == QMessageBox.No:
+                        return
+                    # O operador autorizou vender sem saldo
+                    permitir_estoque_negativo = True
             except Exception as e:
                 print(f"Erro ao verificar estoque: {e}")
 
@@ -3605,11 +3454,11 @@ class PDVWindow(QMainWindow):
                 total,                       # total primeiro, como o método espera
                 forma_pagamento,             # forma de pagamento segundo
                 itens,                       # lista de itens terceiro
-                cpf if tipo=='COM_CPF' else None
+                cpf if tipo=='COM_CPF' else None,
+                permitir_estoque_negativo=permitir_estoque_negativo
             )
 
-            # 8️⃣ MODIFICADO: Gerar e imprimir cupom fiscal COM TROCO
-            from gerador_cupom import gerar_e_imprimir_cupom
+            # 8️⃣ Enviar o cupom para a fila de impressão (COM TROCO)
             from datetime import datetime
             
             # Log dos valores que serão passados para impressão
@@ -3618,7 +3467,10 @@ class PDVWindow(QMainWindow):
             if troco is not None:
                 print(f"💰 Enviando para impressão: Troco=R${troco:.2f}")
             
-            resultado = gerar_e_imprimir_cupom(
+            # A impressão acontece na thread do spooler: o caixa já pode iniciar
+            # a próxima venda e eventuais falhas chegam por impressao_concluida
+            spooler_impressao.enfileirar_cupom(
+                ao_concluir=self.impressao_concluida.emit,
                 id_venda=id_venda,
                 tipo_cupom='FISCAL' if tipo=='COM_CPF' else 'NAO_FISCAL',
                 cpf=cpf,
@@ -3626,14 +3478,9 @@ class PDVWindow(QMainWindow):
                 itens=itens,
                 total=total,
                 forma_pagamento=forma_pagamento,
-                imprimir_automaticamente=True,
-                valor_recebido=valor_recebido,  # 🆕 NOVO PARÂMETRO!
-                troco=troco                     # 🆕 NOVO PARÂMETRO!
+                valor_recebido=valor_recebido,
+                troco=troco
             )
-            
-            if not resultado['sucesso']:
-                from PyQt5.QtWidgets import QMessageBox
-                QMessageBox.warning(self, "Impressão", f"Falha ao imprimir cupom:\n{resultado['mensagem']}")
 
             # 9️⃣ Confirmação e limpeza
             from PyQt5.QtWidgets import QMessageBox
@@ -3657,10 +3504,14 @@ class PDVWindow(QMainWindow):
             QMessageBox.critical(self, "Erro", f"Erro ao finalizar venda:\n{e}\nVeja console para debug.")
 
 
-    def registrar_venda_no_banco(self, total, forma_pagamento, itens, tipo_cupom="SEM_CUPOM", cpf=""):
+    def registrar_venda_no_banco(self, total, forma_pagamento, itens, tipo_cupom="SEM_CUPOM", cpf="",
+                                 permitir_estoque_negativo=False):
         """Registra a venda na tabela VENDAS do banco de dados - SEM CUPOM"""
         try:
-            from base.banco import execute_query
+            from base.banco import transacao, baixar_estoque_itens
+            from base.esquema import registro_esquema, MAPEAMENTOS
+            from base.vendas_diarias import acumular as acumular_vendas_diarias, categorias_produtos
+            from base.eventos import barramento_eventos, VENDA_FINALIZADA
             from datetime import datetime
             
             # Imprimir informações para debug
@@ -3675,374 +3526,103 @@ class PDVWindow(QMainWindow):
             data_venda = now.strftime("%Y-%m-%d")  # Formato para o banco: YYYY-MM-DD
             hora_venda = now.strftime("%H:%M:%S")  # Formato para o banco: HH:MM:SS
             
-            print("\n----- REGISTRANDO A VENDA PRINCIPAL -----")
-            
-            # Primeiro, descobrir a estrutura da tabela VENDAS
-            structure_query_vendas = """
-            SELECT RDB$FIELD_NAME
-            FROM RDB$RELATION_FIELDS
-            WHERE RDB$RELATION_NAME = 'VENDAS'
-            ORDER BY RDB$FIELD_POSITION
-            """
-            
-            try:
-                vendas_fields = execute_query(structure_query_vendas)
-                print(f"✅ Colunas encontradas na tabela VENDAS:")
-                
-                # Listar todas as colunas disponíveis
-                available_vendas_columns = []
-                for field in vendas_fields:
-                    field_name = field[0].strip() if field[0] else ""
-                    available_vendas_columns.append(field_name)
-                    print(f"  - {field_name}")
-                
-                # Mapear possíveis nomes para cada coluna da tabela VENDAS
-                vendas_column_mapping = {
-                    'data_venda': ['DATA_VENDA', 'DATA', 'DT_VENDA'],
-                    'hora_venda': ['HORA_VENDA', 'HORA', 'HR_VENDA'],
-                    'id_cliente': ['ID_CLIENTE', 'CLIENTE_ID', 'CLIENTE'],
-                    'id_vendedor': ['ID_VENDEDOR', 'VENDEDOR_ID', 'VENDEDOR'],
-                    'valor_total': ['VALOR_TOTAL', 'TOTAL', 'VL_TOTAL'],
-                    'desconto': ['DESCONTO', 'VL_DESCONTO', 'VALOR_DESCONTO'],
-                    'valor_final': ['VALOR_FINAL', 'VL_FINAL', 'TOTAL_FINAL'],
-                    'forma_pagamento': ['FORMA_PAGAMENTO', 'FORMA_PGTO', 'PAGAMENTO'],
-                    'status': ['STATUS', 'SITUACAO', 'ST_VENDA']
-                }
-                
-                # Encontrar os nomes reais das colunas para VENDAS
-                real_vendas_columns = {}
-                vendas_values = []
-                vendas_placeholders = []
-                
-                for logical_name, alternatives in vendas_column_mapping.items():
-                    found = False
-                    for alt in alternatives:
-                        if alt in available_vendas_columns:
-                            real_vendas_columns[logical_name] = alt
-                            print(f"✅ {logical_name} -> {alt}")
-                            found = True
-                            break
-                    
-                    if not found:
-                        print(f"⚠️ Coluna não encontrada para {logical_name}, pulando...")
-                        continue
-                    
-                    # Adicionar valor correspondente
-                    if logical_name == 'data_venda':
-                        vendas_values.append(data_venda)
-                    elif logical_name == 'hora_venda':
-                        vendas_values.append(hora_venda)
-                    elif logical_name == 'id_cliente':
-                        vendas_values.append(0)
-                    elif logical_name == 'id_vendedor':
-                        vendas_values.append(0)
-                    elif logical_name == 'valor_total':
-                        vendas_values.append(total + self.valor_desconto - self.valor_acrescimo)
-                    elif logical_name == 'desconto':
-                        vendas_values.append(self.valor_desconto)
-                    elif logical_name == 'valor_final':
-                        vendas_values.append(total)
-                    elif logical_name == 'forma_pagamento':
-                        vendas_values.append(forma_pagamento)
-                    elif logical_name == 'status':
-                        vendas_values.append("Finalizada")
-                    
-                    vendas_placeholders.append("?")
-                
-                # Construir a query de inserção dinamicamente
-                column_names = ", ".join(real_vendas_columns.values())
-                placeholders = ", ".join(vendas_placeholders)
-                
-                query_venda = f"""
-                INSERT INTO VENDAS ({column_names}) VALUES ({placeholders})
-                """
-                
-                print(f"📝 Query de venda construída: {query_venda}")
-                print(f"📝 Valores: {vendas_values}")
-                
-                # Executar a inserção da venda
-                execute_query(query_venda, vendas_values)
-                
-            except Exception as vendas_error:
-                print(f"❌ Erro ao inserir venda com estrutura dinâmica: {vendas_error}")
-                print("🔄 Tentando com estrutura padrão...")
-                
-                # FALLBACK: usar estrutura padrão
-                query_venda = """
-                INSERT INTO VENDAS (
-                    DATA_VENDA, HORA_VENDA, ID_CLIENTE, ID_VENDEDOR, 
-                    VALOR_TOTAL, DESCONTO, VALOR_FINAL, FORMA_PAGAMENTO, STATUS
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """
-                
-                params = [data_venda, hora_venda, 0, 0, 
-                        total + self.valor_desconto - self.valor_acrescimo, 
-                        self.valor_desconto, total, forma_pagamento, "Finalizada"]
-                
-                print(f"Executando query de inserção de venda (fallback): {query_venda}")
-                print(f"Parâmetros: {params}")
-                
-                # Executar a inserção da venda
-                execute_query(query_venda, params)
-            
-            # Obter o ID da venda inserida - melhorado
-            try:
-                # Primeiro tentar descobrir o nome da coluna ID
-                id_column_query = """
-                SELECT RDB$FIELD_NAME
-                FROM RDB$RELATION_FIELDS
-                WHERE RDB$RELATION_NAME = 'VENDAS'
-                AND (RDB$FIELD_NAME LIKE '%ID%' OR RDB$FIELD_NAME LIKE '%VENDA%')
-                ORDER BY RDB$FIELD_POSITION
-                """
-                
-                id_columns = execute_query(id_column_query)
-                id_field_name = None
-                
-                for col in id_columns:
-                    field_name = col[0].strip()
-                    if any(keyword in field_name.upper() for keyword in ['ID_VENDA', 'IDVENDA', 'ID']):
-                        id_field_name = field_name
-                        break
-                
-                if not id_field_name:
-                    id_field_name = "ID_VENDA"  # fallback
-                
-                query_id = f"SELECT MAX({id_field_name}) FROM VENDAS"
-                print(f"🔍 Buscando ID da venda com query: {query_id}")
-                
-                result = execute_query(query_id)
-                id_venda = result[0][0] if result and result[0][0] else 0
-                print(f"✅ ID da venda registrada: {id_venda}")
-                
-            except Exception as id_error:
-                print(f"❌ Erro ao obter ID da venda: {id_error}")
-                # Tentar fallback
-                try:
-                    query_id = "SELECT MAX(ID_VENDA) FROM VENDAS"
-                    result = execute_query(query_id)
-                    id_venda = result[0][0] if result and result[0][0] else 0
-                    print(f"✅ ID da venda (fallback): {id_venda}")
-                except:
-                    print("❌ Não foi possível obter ID da venda")
-                    id_venda = 1  # ID genérico para continuar
-            
-            print("\n----- REGISTRANDO OS ITENS DA VENDA -----")
-            
-            # Descobrir a estrutura real da tabela VENDAS_ITENS
-            structure_query_itens = """
-            SELECT RDB$FIELD_NAME
-            FROM RDB$RELATION_FIELDS
-            WHERE RDB$RELATION_NAME = 'VENDAS_ITENS'
-            ORDER BY RDB$FIELD_POSITION
-            """
+            # Colunas reais das tabelas, lidas uma única vez pelo registro de esquema
+            mapa_vendas = registro_esquema.mapa('VENDAS')
+            mapa_itens = registro_esquema.mapa('VENDAS_ITENS')
+            
+            if not any(mapa_vendas.values()):
+                # Estrutura desconhecida: usar os nomes padrão
+                print("⚠️ Estrutura de VENDAS não encontrada, usando colunas padrão")
+                mapa_vendas = {logico: alternativas[0] for logico, alternativas in MAPEAMENTOS['VENDAS'].items()}
+            
+            # Para colunas de itens não encontradas, usar o primeiro nome da lista
+            for logico, alternativas in MAPEAMENTOS['VENDAS_ITENS'].items():
+                if not mapa_itens.get(logico):
+                    mapa_itens[logico] = alternativas[0]
+            
+            valores_venda = {
+                'data_venda': data_venda,
+                'hora_venda': hora_venda,
+                'id_cliente': 0,
+                'id_vendedor': 0,
+                'valor_total': total + self.valor_desconto - self.valor_acrescimo,
+                'desconto': self.valor_desconto,
+                'valor_final': total,
+                'forma_pagamento': forma_pagamento,
+                'status': "Finalizada"
+            }
+            colunas_venda = [logico for logico in valores_venda if mapa_vendas.get(logico)]
             
-            try:
-                vendas_itens_fields = execute_query(structure_query_itens)
-                print(f"✅ Colunas encontradas na tabela VENDAS_ITENS:")
-                
-                # Listar todas as colunas disponíveis
-                available_columns = []
-                for field in vendas_itens_fields:
-                    field_name = field[0].strip() if field[0] else ""
-                    available_columns.append(field_name)
-                    print(f"  - {field_name}")
-                
-                # Mapear possíveis nomes para cada tipo de coluna necessária
-                column_mapping = {
-                    'id_venda': ['ID_VENDA', 'VENDA_ID', 'IDVENDA'],
-                    'id_produto': ['ID_PRODUTO', 'CODIGO', 'PRODUTO_ID', 'ID_PROD', 'PRODUTO', 'CODIGO_PRODUTO', 'COD_PRODUTO'],
-                    'quantidade': ['QUANTIDADE', 'QTD', 'QTDE', 'QTD_VENDIDA'],
-                    'valor_unitario': ['VALOR_UNITARIO', 'PRECO_UNITARIO', 'VALOR_UNIT', 'PRECO_UNIT', 'VALOR'],
-                    'valor_total': ['VALOR_TOTAL', 'TOTAL', 'VALOR_ITEM', 'SUBTOTAL']
-                }
-                
-                # Encontrar os nomes reais das colunas
-                real_columns = {}
-                for logical_name, alternatives in column_mapping.items():
-                    found = False
-                    for alt in alternatives:
-                        if alt in available_columns:
-                            real_columns[logical_name] = alt
-                            print(f"✅ {logical_name} -> {alt}")
-                            found = True
-                            break
-                    
-                    if not found:
-                        print(f"❌ Não foi possível encontrar coluna para {logical_name}")
-                        # Para colunas críticas, usar o primeiro nome da lista como fallback
-                        real_columns[logical_name] = alternatives[0]
-                        print(f"⚠️ Usando fallback: {logical_name} -> {alternatives[0]}")
-                
-                # Construir a query de inserção dinamicamente
-                query_item = f"""
+            query_venda = registro_esquema.sql('pdv_insert_venda', lambda: f"""
+                INSERT INTO VENDAS ({', '.join(mapa_vendas[c] for c in colunas_venda)})
+                VALUES ({', '.join('?' for _ in colunas_venda)})
+                """)
+            query_item = registro_esquema.sql('pdv_insert_item', lambda: f"""
                 INSERT INTO VENDAS_ITENS (
-                    {real_columns['id_venda']}, 
-                    {real_columns['id_produto']}, 
-                    {real_columns['quantidade']}, 
-                    {real_columns['valor_unitario']}, 
-                    {real_columns['valor_total']}
+                    {mapa_itens['id_venda']}, {mapa_itens['id_produto']}, {mapa_itens['quantidade']},
+                    {mapa_itens['valor_unitario']}, {mapa_itens['valor_total']}
                 ) VALUES (?, ?, ?, ?, ?)
-                """
-                
-                print(f"📝 Query construída: {query_item}")
-                
-                # Registrar os itens da venda
-                for item in itens:
-                    try:
-                        # Calcular o valor total do item
-                        valor_unitario = float(item['valor_unitario'])
-                        quantidade = int(item['quantidade'])
-                        valor_total = valor_unitario * quantidade
-                        
-                        # Obter o código do produto
-                        codigo_produto = item['id_produto']
-                        
-                        print(f"📦 Inserindo item: ID_VENDA={id_venda}, {real_columns['id_produto']}={codigo_produto}, QTD={quantidade}, VALOR_UNIT={valor_unitario}, TOTAL={valor_total}")
-                        
-                        # Executar a inserção do item
-                        execute_query(query_item, (
-                            id_venda, codigo_produto, quantidade, valor_unitario, valor_total
-                        ))
-                        
-                        print(f"✅ Item inserido com sucesso: {codigo_produto}")
-                        
-                    except Exception as item_error:
-                        print(f"❌ Erro ao inserir item {codigo_produto}: {item_error}")
-                        # Continuar com os próximos itens mesmo se um falhar
-                        continue
-                        
-            except Exception as structure_error:
-                print(f"❌ Erro ao obter estrutura de VENDAS_ITENS: {structure_error}")
-                
-                # FALLBACK: Tentar com nomes mais comuns
-                print("🔄 Tentando fallback com nomes comuns...")
-                
-                # Tentar diferentes combinações de nomes de colunas
-                fallback_combinations = [
-                    # Combinação 1: Nomes mais comuns
-                    {
-                        'query': """
-                        INSERT INTO VENDAS_ITENS (ID_VENDA, CODIGO, QUANTIDADE, VALOR_UNITARIO, VALOR_TOTAL) 
-                        VALUES (?, ?, ?, ?, ?)
-                        """,
-                        'description': 'ID_VENDA, CODIGO, QUANTIDADE, VALOR_UNITARIO, VALOR_TOTAL'
-                    },
-                    # Combinação 2: Variação com PRODUTO_ID
-                    {
-                        'query': """
-                        INSERT INTO VENDAS_ITENS (ID_VENDA, PRODUTO_ID, QUANTIDADE, VALOR_UNITARIO, VALOR_TOTAL) 
-                        VALUES (?, ?, ?, ?, ?)
-                        """,
-                        'description': 'ID_VENDA, PRODUTO_ID, QUANTIDADE, VALOR_UNITARIO, VALOR_TOTAL'
-                    },
-                    # Combinação 3: Variação com QTD
-                    {
-                        'query': """
-                        INSERT INTO VENDAS_ITENS (ID_VENDA, CODIGO, QTD, VALOR_UNITARIO, VALOR_TOTAL) 
-                        VALUES (?, ?, ?, ?, ?)
-                        """,
-                        'description': 'ID_VENDA, CODIGO, QTD, VALOR_UNITARIO, VALOR_TOTAL'
-                    }
-                ]
-                
-                # Tentar cada combinação até uma funcionar
-                for i, combination in enumerate(fallback_combinations):
-                    try:
-                        print(f"🧪 Testando combinação {i+1}: {combination['description']}")
-                        
-                        # Testar com o primeiro item
-                        if itens:
-                            test_item = itens[0]
-                            valor_unitario = float(test_item['valor_unitario'])
-                            quantidade = int(test_item['quantidade'])
-                            valor_total = valor_unitario * quantidade
-                            codigo_produto = test_item['id_produto']
-                            
-                            execute_query(combination['query'], (
-                                id_venda, codigo_produto, quantidade, valor_unitario, valor_total
-                            ))
-                            
-                            print(f"✅ Combinação {i+1} funcionou! Inserindo todos os itens...")
-                            
-                            # Se funcionou, inserir todos os itens restantes
-                            for item in itens[1:]:  # Pular o primeiro que já foi inserido
-                                valor_unitario = float(item['valor_unitario'])
-                                quantidade = int(item['quantidade'])
-                                valor_total = valor_unitario * quantidade
-                                codigo_produto = item['id_produto']
-                                
-                                execute_query(combination['query'], (
-                                    id_venda, codigo_produto, quantidade, valor_unitario, valor_total
-                                ))
-                                
-                                print(f"✅ Item inserido: {codigo_produto}")
-                            
-                            break  # Sair do loop se deu certo
-                            
-                    except Exception as combination_error:
-                        print(f"❌ Combinação {i+1} falhou: {combination_error}")
-                        continue
-                else:
-                    # Se nenhuma combinação funcionou
-                    raise Exception("Não foi possível inserir itens na tabela VENDAS_ITENS. Verifique a estrutura da tabela.")
-            
-            print("\n----- ATUALIZANDO ESTOQUE DOS PRODUTOS -----")
-
-            # Verificar a estrutura da tabela PRODUTOS para encontrar o campo de estoque
-            structure_query_produtos = """
-            SELECT RDB$FIELD_NAME
-            FROM RDB$RELATION_FIELDS
-            WHERE RDB$RELATION_NAME = 'PRODUTOS'
-            ORDER BY RDB$FIELD_POSITION
-            """
-
-            try:
-                produtos_fields = execute_query(structure_query_produtos)
-                
-                # Possíveis nomes para o campo de estoque
-                estoque_alternatives = ["ESTOQUE", "QUANTIDADE_ESTOQUE", "ESTOQUE_ATUAL", "QTD", "QUANTIDADE", "SALDO", "SALDO_ESTOQUE"]
-                
-                # Encontrar o nome real da coluna de estoque
-                estoque_field = None
-                for field in produtos_fields:
-                    field_name = field[0].strip() if field[0] else ""
-                    
-                    # Verificar se este campo corresponde a alguma alternativa para estoque
-                    if field_name.upper() in [alt.upper() for alt in estoque_alternatives]:
-                        estoque_field = field_name
-                        print(f"  >>> Campo de estoque encontrado: {estoque_field}")
-                        break
-                
-                if not estoque_field:
-                    raise Exception("Não foi possível identificar o campo de estoque na tabela PRODUTOS")
+                """)
+            id_field_name = mapa_vendas.get('id_venda') or "ID_VENDA"
+            
+            # Grupos dos produtos para o resumo diário, resolvidos fora da transação
+            categorias = categorias_produtos([item['id_produto'] for item in itens])
+            
+            # Venda, itens e baixa de estoque em uma única transação:
+            # ou tudo é gravado, ou nada é
+            with transacao() as tx:
+                print("\n----- REGISTRANDO A VENDA PRINCIPAL -----")
+                print(f"📝 Query de venda: {query_venda}")
+                # O ID da venda volta na própria instrução (RETURNING), sem SELECT MAX
+                id_venda = tx.inserir(
+                    f"{query_venda.rstrip()}\n                RETURNING {id_field_name}",
+                    [valores_venda[c] for c in colunas_venda]
+                ) or 0
+                print(f"✅ ID da venda registrada: {id_venda}")
                 
-                # Agora vamos atualizar o estoque para cada item vendido
+                print("\n----- REGISTRANDO OS ITENS DA VENDA -----")
+                # Registrar os itens da venda com uma única instrução preparada.
+                # Se algum item falhar, a transação inteira é desfeita.
+                params_itens = []
                 for item in itens:
-                    codigo_produto = item['id_produto']
+                    valor_unitario = float(item['valor_unitario'])
                     quantidade = int(item['quantidade'])
-                    
-                    # Query para atualizar o estoque
-                    query_update_estoque = f"""
-                    UPDATE PRODUTOS
-                    SET {estoque_field} = {estoque_field} - ?
-                    WHERE CODIGO = ?
-                    """
-                    
-                    print(f"Atualizando estoque do produto {codigo_produto}: reduzindo em {quantidade} unidades")
-                    print(f"Query: {query_update_estoque}")
-                    
-                    # Executar a atualização
-                    execute_query(query_update_estoque, (quantidade, codigo_produto))
-                    print(f"Estoque atualizado com sucesso para o produto {codigo_produto}")
-                    
+                    codigo_produto = item['id_produto']
+                    params_itens.append((
+                        id_venda, codigo_produto, quantidade, valor_unitario, valor_unitario * quantidade
+                    ))
+                    print(f"📦 Item: ID_VENDA={id_venda}, {mapa_itens['id_produto']}={codigo_produto}, QTD={quantidade}, VALOR_UNIT={valor_unitario}")
+                
+                tx.executemany(query_item, params_itens)
+                print(f"✅ {len(params_itens)} itens inseridos")
+                
+                # Resumo diário por produto dos relatórios, na mesma transação
+                acumular_vendas_diarias(data_venda, [
+                    (item['id_produto'], item.get('produto'), categorias[item['id_produto']],
+                     int(item['quantidade']), float(item['valor_unitario']) * int(item['quantidade']))
+                    for item in itens
+                ])
+                
+                print("\n----- ATUALIZANDO ESTOQUE DOS PRODUTOS -----")
+                # Baixa condicionada ao saldo, na mesma transação da venda.
+                # Um erro aqui sai do "with" e desfaz a venda inteira.
+                faltas = baixar_estoque_itens(
+                    [(item['id_produto'], int(item['quantidade'])) for item in itens],
+                    permitir_negativo=permitir_estoque_negativo
+                )
                 print("\n===== ESTOQUE ATUALIZADO COM SUCESSO =====")
                 
-            except Exception as e:
-                print(f"\n***** ERRO AO ATUALIZAR ESTOQUE *****")
-                print(f"Erro detalhado: {e}")
-                import traceback
-                traceback.print_exc()
+                # Saldo consumido por outra estação depois da conferência:
+                # desfazer a venda inteira em vez de deixar o estoque negativo
+                faltas = [f for f in faltas if f['disponivel'] is not None]
+                if faltas and not permitir_estoque_negativo:
+                    raise Exception("Estoque insuficiente:\n" + '\n'.join(
+                        f"{f['nome'] or f['codigo']}: disp {f['disponivel']}, ped {f['solicitado']}" for f in faltas))
+                
+                # Entregue aos caches e telas (ex: contador de vendas) após o commit
+                barramento_eventos.publicar(VENDA_FINALIZADA, id_venda=id_venda,
+                                            valor_total=valores_venda['valor_total'],
+                                            data_venda=data_venda)
 
             print("\n===== VENDA FINALIZADA COM SUCESSO (SEM CUPOM) =====")
             return id_venda
@@ -4455,27 +4035,9 @@ class PDVWindow(QMainWindow):
                 print(f"Erro na consulta simples: {simple_query_error}")
                 
                 # Se a consulta simples falhar, tentar a abordagem dinâmica
-                structure_query = """
-                SELECT RDB$FIELD_NAME
-                FROM RDB$RELATION_FIELDS
-                WHERE RDB$RELATION_NAME = 'PRODUTOS'
-                ORDER BY RDB$FIELD_POSITION
-                """
-                
-                # Tentar obter a estrutura da tabela
-                columns = execute_query(structure_query)
-                print("Colunas encontradas na tabela PRODUTOS:")
-                
-                # Lista para armazenar os nomes das colunas
-                column_names = []
-                
-                for col in columns:
-                    # Firebird retorna nomes de coluna com espaços, então vamos remover esses espaços
-                    col_name = col[0].strip() if col[0] else ""
-                    column_names.append(col_name)
-                    print(f"  - {col_name}")
-                
-                print(f"Total de colunas: {len(column_names)}")
+                from base.esquema import registro_esquema
+                column_names = registro_esquema.colunas('PRODUTOS')
+                print(f"Colunas encontradas na tabela PRODUTOS: {column_names}")
                 
                 # Mapeamento de colunas com possíveis nomes
                 column_mapping = {
@@ -4572,92 +4134,16 @@ class PDVWindow(QMainWindow):
             # Limpar tabela
             table.setRowCount(0)
             
-            # Importar função do banco de dados
-            import os
-            import sys
-            
-            # Adicionar diretório pai ao path para acessar a pasta base
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            parent_dir = os.path.dirname(current_dir)
-            if parent_dir not in sys.path:
-                sys.path.append(parent_dir)
-            
-            from base.banco import execute_query
+            from base.catalogo_produtos import catalogo_produtos
             
-            # Consulta simples primeiro
-            try:
-                simple_query = """
-                SELECT CODIGO, NOME, MARCA, PRECO_VENDA, ESTOQUE, GRUPO
-                FROM PRODUTOS
-                WHERE (CODIGO LIKE ?) OR (NOME LIKE ?) OR (MARCA LIKE ?)
-                ORDER BY NOME
-                """
-                
-                params = (f"%{termo}%", f"%{termo}%", f"%{termo}%")
-                result = execute_query(simple_query, params)
-                
-            except Exception as simple_query_error:
-                print(f"Erro na busca simples: {simple_query_error}")
-                
-                # Se falhar, usar consulta dinâmica
-                structure_query = """
-                SELECT RDB$FIELD_NAME
-                FROM RDB$RELATION_FIELDS
-                WHERE RDB$RELATION_NAME = 'PRODUTOS'
-                ORDER BY RDB$FIELD_POSITION
-                """
-                
-                columns = execute_query(structure_query)
-                column_names = [col[0].strip() if col[0] else "" for col in columns]
-                
-                # Possíveis colunas de pesquisa com alternativas
-                search_mapping = {
-                    "CODIGO": ["CODIGO", "ID", "ID_PRODUTO", "PRODUTO_ID", "COD"],
-                    "NOME": ["NOME", "DESCRICAO", "PRODUTO", "DESCR", "DESCRITIVO"],
-                    "MARCA": ["MARCA", "FABRICANTE", "FORNECEDOR", "MARCA_PRODUTO"],
-                    "BARRAS": ["BARRAS", "CODIGO_BARRAS", "EAN", "GTIN", "COD_BARRAS"]
-                }
-                
-                # Tentar encontrar as colunas reais
-                def find_real_column(alternatives):
-                    for alt in alternatives:
-                        if alt in column_names:
-                            return alt
-                    return None
-                
-                # Construir a cláusula WHERE
-                search_columns = []
-                for field, alternatives in search_mapping.items():
-                    real_column = find_real_column(alternatives)
-                    if real_column:
-                        search_columns.append(real_column)
-                
-                # Se não encontrou nenhuma coluna para pesquisa, usar todas as de texto
-                if not search_columns:
-                    query = """
-                    SELECT *
-                    FROM PRODUTOS
-                    """
-                    result = execute_query(query)
-                else:
-                    # Construir a cláusula WHERE
-                    where_clause = " OR ".join([f"{col} LIKE ?" for col in search_columns])
-                    
-                    # Construir a consulta completa
-                    query = f"""
-                    SELECT *
-                    FROM PRODUTOS
-                    WHERE {where_clause}
-                    """
-                    
-                    # Preparar os parâmetros
-                    params = tuple([f"%{termo}%" for _ in search_columns])
-                    
-                    print(f"Consulta de busca: {query}")
-                    print(f"Parâmetros: {params}")
-                    
-                    # Executar a consulta
-                    result = execute_query(query, params)
+            # Catálogo em memória, em ordem de relevância, nas colunas da
+            # tabela: CODIGO, NOME, MARCA, PRECO_VENDA, ESTOQUE, GRUPO
+            # (o estoque é lido do banco, em uma consulta)
+            result = [
+                (p[1], p[2], p[4], p[7], p[8], p[5])
+                for p in catalogo_produtos.com_estoque_atual(
+                    catalogo_produtos.pesquisar(termo, limite=500))
+            ]
             
             # Preencher a tabela com os resultados
             for row, produto in enumerate(result):
@@ -0,0 +1,168 @@
+"""
+Montagem do cupom do PDV em ESC/POS
+
+O cupom inteiro (cabeçalho, itens, totais com troco, rodapé e corte) é montado
+como um único bloco de bytes, enviado à impressora em uma só escrita. Os
+blocos fixos da empresa (cabeçalho e rodapé) são montados uma vez e
+reaproveitados entre os cupons. O mesmo bloco pode ser guardado e reenviado
+depois para reimprimir a venda.
+"""
+
+import unicodedata
+from functools import lru_cache
+
+LARGURA = 32  # Colunas da bobina de 58 mm (fonte A)
+
+# Comandos ESC/POS
+RESET = b'\x1B\x40'            # ESC @
+CENTRALIZAR = b'\x1B\x61\x01'  # ESC a 1
+CORTE = b'\n' * 6 + b'\x1D\x56\x00'  # Avanço + GS V 0 (corte total)
+
+LINHA_DUPLA = "=" * LARGURA + "\n"
+LINHA_SIMPLES = "-" * LARGURA + "\n"
+
+
+def _bytes(texto):
+    """Converte o texto para os bytes enviados à impressora (sem acentos)"""
+    texto = unicodedata.normalize("NFKD", texto)
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return texto.encode("ascii", errors="replace")
+
+
+def _moeda(valor):
+    return f"{valor:6.2f}".replace('.', ',')
+
+
+@lru_cache(maxsize=32)
+def _cabecalho(nome_empresa, cnpj, tipo_cupom):
+    """Bloco fixo do início do cupom (montado uma vez por empresa e tipo)"""
+    texto = (
+        "\n"
+        f"{nome_empresa}\n"
+        f"CNPJ: {cnpj}\n"
+        "VILA SANTANA\n"
+        "EMILIO FERRARI, 110\n"
+        "ITAPEVA - SP\n\n"
+        f"CUPOM {tipo_cupom.replace('_', ' ')}\n"
+        "\n" + LINHA_DUPLA
+    )
+    return RESET + CENTRALIZAR + _bytes(texto)
+
+
+@lru_cache(maxsize=32)
+def _rodape(nome_empresa, tipo_cupom):
+    """Bloco fixo do fim do cupom, antes da data"""
+    texto = ""
+    if tipo_cupom == "NAO_FISCAL":
+        texto += ("SEM VALOR FISCAL\n"
+                  "Documento emitido em ambiente\n"
+                  "de homologacao\n\n")
+    texto += ("Agradecemos a preferencia!\n"
+              f"{nome_empresa}\n")
+    return _bytes(texto)
+
+
+def calcular_troco(total, valor_recebido=None, troco=None):
+    """
+    Completa valor recebido e troco como o cupom sempre fez
+
+    Returns:
+        tuple: (valor_recebido, troco) como float
+    """
+    if valor_recebido is not None and troco is None:
+        troco = valor_recebido - float(total)
+
+    # Sem valor recebido: pagamento exato
+    if valor_recebido is None:
+        valor_recebido = float(total)
+        troco = 0.0
+
+    if troco is None:
+        troco = 0.0
+
+    return float(valor_recebido), float(troco)
+
+
+def montar_cupom(id_venda, tipo_cupom, cpf, data_venda, itens, total,
+                 forma_pagamento, nome_empresa="MB SISTEMA",
+                 cnpj="00.000.000/0001-00", valor_recebido=None, troco=None):
+    """
+    Monta o cupom completo em ESC/POS
+
+    Args:
+        id_venda: ID da venda
+        tipo_cupom: Tipo de cupom (FISCAL, NAO_FISCAL, CONTA_CREDITO)
+        cpf: CPF do cliente (pode ser vazio)
+        data_venda: Data da venda (datetime)
+        itens: Lista de dicionários com produto, quantidade e valor_unitario
+        total: Valor total da venda
+        forma_pagamento: Forma de pagamento utilizada
+        nome_empresa: Nome da empresa
+        cnpj: CNPJ da empresa
+        valor_recebido: Valor recebido do cliente
+        troco: Valor do troco (calculado se não informado)
+
+    Returns:
+        bytes: Cupom pronto para ser enviado à impressora
+    """
+    valor_recebido, troco = calcular_troco(total, valor_recebido, troco)
+    total = float(total)
+
+    partes = [_cabecalho(nome_empresa, cnpj, tipo_cupom)]
+
+    # ---------- INFORMAÇÕES DA VENDA ----------
+    linhas = [
+        f"Venda #{id_venda}\n",
+        f"Data: {data_venda.strftime('%d/%m/%Y %H:%M:%S')}\n",
+        f"CPF: {cpf}\n" if cpf and cpf.strip() else "CONSUMIDOR NAO IDENTIFICADO\n",
+        "\n" + LINHA_SIMPLES,
+    ]
+
+    # ---------- ITENS ----------
+    linhas.append("ITEM  QTD  VALOR    TOTAL\n")
+    linhas.append(LINHA_SIMPLES)
+    for i, item in enumerate(itens, 1):
+        nome_produto = str(item['produto'])[:20]
+        quantidade = float(item['quantidade'])
+        valor_unitario = float(item['valor_unitario'])
+        valor_total_item = quantidade * valor_unitario
+        linhas.append(f"{i:02d} - {nome_produto}\n")
+        linhas.append(f"{quantidade:3.0f} x {_moeda(valor_unitario)} = {_moeda(valor_total_item)}\n")
+        linhas.append(LINHA_SIMPLES)
+
+    # ---------- TOTAIS ----------
+    linhas.append(f"Subtotal: R$ {_moeda(total)}\n")
+    linhas.append("Desconto: R$   0,00\n")
+    linhas.append("Acrescimo: R$   0,00\n")
+    linhas.append(LINHA_DUPLA)
+    linhas.append(f"TOTAL: R$ {_moeda(total)}\n")
+    linhas.append(LINHA_DUPLA)
+
+    # Valor recebido e troco só para dinheiro ou quando o valor recebido difere do total
+    linhas.append(f"Pagamento: {forma_pagamento}\n")
+    if "dinheiro" in forma_pagamento.lower() or valor_recebido != total:
+        linhas.append(f"Valor Recebido: R$ {_moeda(valor_recebido)}\n")
+        linhas.append(f"Troco: R$ {_moeda(troco)}\n")
+        linhas.append(LINHA_SIMPLES)
+    else:
+        linhas.append("Troco: R$   0,00\n")
+
+    partes.append(_bytes("".join(linhas)))
+
+    # ---------- RODAPÉ ----------
+    partes.append(_rodape(nome_empresa, tipo_cupom))
+    partes.append(_bytes(f"{data_venda.strftime('%d/%m/%Y')}\n\n"))
+    partes.append(CORTE)
+
+    return b"".join(partes)
+
+
+def enviar_cupom(printer, conteudo):
+    """
+    Envia o cupom montado à impressora em uma única escrita
+
+    Args:
+        printer: Objeto de impressora do python-escpos
+        conteudo (bytes): Cupom gerado por montar_cupom
+    """
+    printer._raw(conteudo)
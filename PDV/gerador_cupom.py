@@ -7,6 +7,8 @@ import time
 
 # Importar funções do banco de dados
 from base.banco import execute_query
+from base.cache_impressora import cache_impressora
+from cupom_escpos import montar_cupom, enviar_cupom
 
 def verificar_e_instalar_escpos():
     """Verifica se python-escpos está instalado e tenta instalar se não estiver"""
@@ -27,6 +29,23 @@ def verificar_e_instalar_escpos():
 
 
 def obter_impressora_pdv():
+    """
+    Retorna a impressora PDV desta estação, consultando o banco apenas
+    quando ela ainda não está no cache (memória / arquivo local).
+    Returns:
+        str | None: Nome da impressora ou None se não houver.
+    """
+    nome = cache_impressora.obter_impressora()
+    if nome:
+        print(f"✅ Impressora PDV (cache da estação): {nome}")
+        return nome
+    
+    nome = buscar_impressora_pdv_no_banco()
+    if nome:
+        cache_impressora.salvar_impressora(nome)
+    return nome
+
+def buscar_impressora_pdv_no_banco():
     """
     Busca a impressora configurada como 'PDV' no banco.
     Aceita qualquer categoria que contenha 'PDV' (case-insensitive).
@@ -122,90 +141,103 @@ def obter_impressora_pdv():
         traceback.print_exc()
         return None
 
+def _abrir_transporte(nome_impressora, tipo, args):
+    """
+    Abre a impressora por um meio de conexão e envia um reset como teste
+    Args:
+        nome_impressora (str): Nome da impressora (usado pelo Win32Raw)
+        tipo (str): "win32raw", "usb", "serial" ou "network"
+        args (list): Argumentos do meio de conexão
+    Returns:
+        object: Objeto da impressora conectada (lança exceção se falhar)
+    """
+    from escpos.printer import Win32Raw, Usb, Serial, Network
+    
+    if tipo == "win32raw":
+        printer = Win32Raw(nome_impressora)
+    elif tipo == "usb":
+        printer = Usb(args[0], args[1])
+    elif tipo == "serial":
+        printer = Serial(args[0], baudrate=9600)
+    elif tipo == "network":
+        printer = Network(args[0], port=9100)
+    else:
+        raise Exception(f"Meio de conexão desconhecido: {tipo}")
+    
+    printer._raw(b'\x1B\x40')  # ESC @ - Reset (teste de conexão)
+    return printer
+
+def _transportes_candidatos(nome_impressora):
+    """Meios de conexão na ordem em que são testados"""
+    # Tentativa Win32Raw no Windows (método mais comum para impressoras instaladas)
+    if platform.system() == "Windows":
+        yield "win32raw", []
+    
+    # Se o nome contém informações sobre USB, tenta primeiro os IDs comuns da Elgin
+    if "ELGIN" in nome_impressora.upper() or "i9" in nome_impressora.upper():
+        for vid in [0x20d1, 0x0483, 0x0519]:
+            yield "usb", [vid, 0x0001]
+            yield "usb", [vid, 0x0002]
+    
+    # Tentativa USB genérica
+    for vid in [0x20d1, 0x0dd4, 0x0519, 0x0483]:
+        yield "usb", [vid, 0x0001]
+        yield "usb", [vid, 0x0002]
+    
+    # Tentativa Serial
+    for porta in ['COM1','COM2','COM3','COM4','COM5','COM6','/dev/ttyUSB0','/dev/ttyS0']:
+        if os.path.exists(porta) or porta.startswith('COM'):
+            yield "serial", [porta]
+    
+    # Tentativa Network
+    for ip in ['192.168.1.100','192.168.0.100','10.0.0.100','127.0.0.1']:
+        yield "network", [ip]
+
+def _descrever_transporte(tipo, args):
+    if tipo == "usb":
+        return f"USB (vendor:{hex(args[0])}, product:{hex(args[1])})"
+    if tipo == "win32raw":
+        return "Win32Raw"
+    return f"{tipo.capitalize()}: {args[0]}"
+
 def conectar_impressora(nome_impressora):
     """
     Conecta com a impressora térmica usando diferentes métodos
+    
+    O meio de conexão que funcionou fica guardado no cache da estação e é
+    tentado primeiro nas próximas vezes, sem testar todos os outros.
     Args:
         nome_impressora (str): Nome da impressora
     Returns:
         object | None: Objeto da impressora conectada ou None
     """
     try:
-        from escpos.printer import Win32Raw, Usb, Serial, Network
+        import escpos.printer  # noqa: F401 - apenas verifica a instalação
         
         print(f"Tentando conectar com a impressora: {nome_impressora}")
         
-        # Tentativa Win32Raw no Windows (método mais comum para impressoras instaladas)
-        if platform.system() == "Windows":
+        # Meio de conexão que já funcionou nesta estação
+        transporte = cache_impressora.obter_transporte(nome_impressora)
+        if transporte:
+            tipo, args = transporte["tipo"], transporte["args"]
             try:
-                print(f"Tentando Win32Raw com: {nome_impressora}")
-                printer = Win32Raw(nome_impressora)
-                
-                # Teste básico de conexão
-                printer._raw(b'\x1B\x40')  # ESC @ - Reset
-                print(f"✅ Conectado via Win32Raw: {nome_impressora}")
+                printer = _abrir_transporte(nome_impressora, tipo, args)
+                print(f"✅ Conectado via {_descrever_transporte(tipo, args)} (cache da estação)")
                 return printer
             except Exception as e:
-                print(f"❌ Erro Win32Raw: {e}")
-        
-        # Se o nome contém informações sobre USB, tenta extrair vendor ID
-        if "ELGIN" in nome_impressora.upper() or "i9" in nome_impressora.upper():
-            # IDs comuns da Elgin
-            vendor_ids = [0x20d1, 0x0483, 0x0519]
-            for vid in vendor_ids:
-                try:
-                    printer = Usb(vid, 0x0001)
-                    printer._raw(b'\x1B\x40')  # Teste de conexão
-                    print(f"✅ Conectado via USB Elgin (vendor:{hex(vid)})")
-                    return printer
-                except:
-                    try:
-                        printer = Usb(vid, 0x0002)
-                        printer._raw(b'\x1B\x40')  # Teste de conexão
-                        print(f"✅ Conectado via USB Elgin (vendor:{hex(vid)}, product:0x0002)")
-                        return printer
-                    except:
-                        continue
-        
-        # Tentativa USB genérica
-        vendor_ids = [0x20d1, 0x0dd4, 0x0519, 0x0483]
-        for vid in vendor_ids:
-            try:
-                printer = Usb(vid, 0x0001)
-                printer._raw(b'\x1B\x40')  # Teste de conexão
-                print(f"✅ Conectado via USB (vendor:{hex(vid)})")
-                return printer
-            except:
-                try:
-                    printer = Usb(vid, 0x0002)
-                    printer._raw(b'\x1B\x40')  # Teste de conexão
-                    print(f"✅ Conectado via USB (vendor:{hex(vid)}, product:0x0002)")
-                    return printer
-                except:
-                    continue
-        
-        # Tentativa Serial
-        portas_serial = ['COM1','COM2','COM3','COM4','COM5','COM6','/dev/ttyUSB0','/dev/ttyS0']
-        for porta in portas_serial:
-            try:
-                if os.path.exists(porta) or porta.startswith('COM'):
-                    printer = Serial(porta, baudrate=9600)
-                    printer._raw(b'\x1B\x40')  # Teste de conexão
-                    print(f"✅ Conectado via Serial: {porta}")
-                    return printer
-            except:
-                continue
+                print(f"❌ Meio de conexão em cache falhou ({e}), testando os demais...")
+                cache_impressora.descartar_transporte()
         
-        # Tentativa Network
-        ips_rede = ['192.168.1.100','192.168.0.100','10.0.0.100','127.0.0.1']
-        for ip in ips_rede:
+        for tipo, args in _transportes_candidatos(nome_impressora):
             try:
-                printer = Network(ip, port=9100)
-                printer._raw(b'\x1B\x40')  # Teste de conexão
-                print(f"✅ Conectado via Network: {ip}")
-                return printer
-            except:
+                printer = _abrir_transporte(nome_impressora, tipo, args)
+            except Exception as e:
+                if tipo == "win32raw":
+                    print(f"❌ Erro Win32Raw: {e}")
                 continue
+            print(f"✅ Conectado via {_descrever_transporte(tipo, args)}")
+            cache_impressora.salvar_transporte(nome_impressora, tipo, args)
+            return printer
         
         print("❌ Não foi possível conectar com a impressora pelos métodos disponíveis")
         return None
@@ -223,119 +255,16 @@ def gerar_cupom_escpos_seguro(printer, id_venda, tipo_cupom, cpf, data_venda, it
                              forma_pagamento, nome_empresa="MB SISTEMA", 
                              cnpj="00.000.000/0001-00", valor_recebido=None, troco=None):
     """
-    Versão mais segura da função de impressão com tratamento robusto de erros e com
-    **todos** os textos centralizados via ESC a 1. AGORA COM SUPORTE A TROCO.
+    Monta o cupom inteiro (com troco) em um único bloco ESC/POS e o envia
+    à impressora em uma só escrita.
     """
     try:
-        print("🖨️ [PASSO 1] Iniciando impressão do cupom...")
-        
-        # Calcular troco se necessário
-        if valor_recebido is not None and troco is None:
-            troco = valor_recebido - float(total)
-        
-        # Se não tiver valor recebido, definir como igual ao total (pagamento exato)
-        if valor_recebido is None:
-            valor_recebido = float(total)
-            troco = 0.0
-        
-        # Se troco não estiver definido, calcular
-        if troco is None:
-            troco = 0.0
-        
-        print(f"💰 Valores calculados: Total={total}, Valor Recebido={valor_recebido}, Troco={troco}")
-        
-        # Reset e selecionar alinhamento central para todo o cupom
-        printer._raw(b'\x1B\x40')  # ESC @ - Reset
-        time.sleep(0.2)
-        printer._raw(b'\x1B\x61\x01')  # ESC a 1 - Center
-
-        # ---------- CABEÇALHO ----------
-        print("📝 [PASSO 2] Imprimindo cabeçalho...")
-        printer.text("\n")
-        printer.text(f"{nome_empresa}\n")
-        printer.text(f"CNPJ: {cnpj}\n")
-        printer.text("VILA SANTANA\n")
-        printer.text("EMILIO FERRARI, 110\n")
-        printer.text("ITAPEVA - SP\n\n")
-        printer.text(f"CUPOM {tipo_cupom.replace('_', ' ')}\n")
-        printer.text("\n" + "=" * 32 + "\n")
-        print("✅ [PASSO 2] Cabeçalho OK")
-
-        # ---------- INFORMAÇÕES DA VENDA ----------
-        print("📝 [PASSO 3] Imprimindo informações da venda...")
-        printer.text(f"Venda #{id_venda}\n")
-        printer.text(f"Data: {data_venda.strftime('%d/%m/%Y %H:%M:%S')}\n")
-        if cpf and cpf.strip():
-            printer.text(f"CPF: {cpf}\n")
-        else:
-            printer.text("CONSUMIDOR NAO IDENTIFICADO\n")
-        
-        printer.text("\n" + "-" * 32 + "\n")
-        print("✅ [PASSO 3] Informações da venda OK")
-
-        # ---------- ITENS ----------
-        print("📝 [PASSO 4] Imprimindo itens...")
-        printer.text("ITEM  QTD  VALOR    TOTAL\n")
-        printer.text("-" * 32 + "\n")
-        for i, item in enumerate(itens, 1):
-            nome_produto = str(item['produto'])[:20]
-            quantidade = float(item['quantidade'])
-            valor_unitario = float(item['valor_unitario'])
-            valor_total_item = quantidade * valor_unitario
-            printer.text(f"{i:02d} - {nome_produto}\n")
-            linha_valores = f"{quantidade:3.0f} x {valor_unitario:6.2f} = {valor_total_item:6.2f}\n"
-            printer.text(linha_valores.replace('.', ','))
-            printer.text("-" * 32 + "\n")
-            print(f"✅ [PASSO 4.{i}] Item {nome_produto} OK")
-        print("✅ [PASSO 4] Todos os itens OK")
-
-        # ---------- TOTAIS (AGORA COM TROCO REAL) ----------
-        print("📝 [PASSO 5] Imprimindo totais...")
-        total_float = float(total)
-        valor_recebido_float = float(valor_recebido)
-        troco_float = float(troco)
-        
-        # Subtotal e outros valores
-        printer.text(f"Subtotal: R$ {total_float:6.2f}\n".replace('.', ','))
-        printer.text(f"Desconto: R$   0,00\n")
-        printer.text(f"Acrescimo: R$   0,00\n")
-        printer.text("=" * 32 + "\n")
-        printer.text(f"TOTAL: R$ {total_float:6.2f}\n".replace('.', ','))
-        printer.text("=" * 32 + "\n")
-        
-        # Informações de pagamento (só mostrar se for dinheiro ou se houver valor recebido diferente do total)
-        printer.text(f"Pagamento: {forma_pagamento}\n")
-        if "dinheiro" in forma_pagamento.lower() or valor_recebido_float != total_float:
-            printer.text(f"Valor Recebido: R$ {valor_recebido_float:6.2f}\n".replace('.', ','))
-            printer.text(f"Troco: R$ {troco_float:6.2f}\n".replace('.', ','))
-            printer.text("-" * 32 + "\n")
-        else:
-            # Para outras formas de pagamento, mostrar apenas que não há troco
-            printer.text(f"Troco: R$   0,00\n")
+        print("🖨️ Montando cupom...")
+        conteudo = montar_cupom(id_venda, tipo_cupom, cpf, data_venda, itens, total,
+                                forma_pagamento, nome_empresa, cnpj, valor_recebido, troco)
+        print(f"✅ Cupom montado: {len(itens)} itens, {len(conteudo)} bytes")
         
-        print(f"✅ [PASSO 5] Totais OK - Valor Recebido: {valor_recebido_float}, Troco: {troco_float}")
-
-        # ---------- RODAPÉ ----------
-        print("📝 [PASSO 6] Imprimindo rodapé...")
-        if tipo_cupom == "NAO_FISCAL":
-            printer.text("SEM VALOR FISCAL\n")
-            printer.text("Documento emitido em ambiente\n")
-            printer.text("de homologacao\n\n")
-        printer.text("Agradecemos a preferencia!\n")
-        printer.text(f"{nome_empresa}\n")
-        printer.text(f"{data_venda.strftime('%d/%m/%Y')}\n\n")
-        print("✅ [PASSO 6] Rodapé OK")
-
-        # ---------- FINALIZAÇÃO ----------
-        print("✂️ [PASSO 7] Finalizando impressão...")
-        try:
-            printer.cut()
-            print("✅ [PASSO 7.1] Papel cortado")
-        except:
-            printer.text("\n" * 4)
-            print("⚠️ [PASSO 7.1] Corte não suportado, alimentando papel")
-        print("✅ [PASSO 7] Finalização OK")
-
+        enviar_cupom(printer, conteudo)
         print("🎉 Cupom impresso com sucesso!")
         return True
 
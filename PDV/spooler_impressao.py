@@ -0,0 +1,230 @@
+"""
+Fila de impressão de cupons do PDV
+
+Os cupons são impressos por uma thread própria, de modo que o caixa pode
+iniciar a próxima venda enquanto o cupom anterior ainda está sendo impresso.
+A conexão com a impressora é resolvida uma vez e reaproveitada entre os
+cupons; em caso de falha ela é descartada e o trabalho é repetido.
+
+Cada cupom é montado uma única vez (cupom_escpos.montar_cupom) e guardado no
+banco para reimpressão; as novas tentativas reenviam os mesmos bytes.
+"""
+
+import threading
+import queue
+import time
+import atexit
+import itertools
+
+from gerador_cupom import obter_impressora_pdv, conectar_impressora
+from cupom_escpos import montar_cupom, enviar_cupom
+from base.cache_impressora import cache_impressora
+
+MAX_TENTATIVAS = 3             # Tentativas por cupom antes de desistir
+ESPERA_ENTRE_TENTATIVAS = 2    # Segundos (multiplicado pelo número da tentativa)
+
+
+class ImpressoraNaoConfigurada(Exception):
+    """Nenhuma impressora PDV configurada: não adianta repetir"""
+
+
+class SpoolerImpressao:
+    """
+    Fila de cupons processada em segundo plano
+
+    Cada trabalho recebe os mesmos dados de gerar_e_imprimir_cupom ou um
+    cupom já montado (reimpressão). Ao final, o callback ao_concluir (se
+    informado) recebe o dicionário de resultado no mesmo formato de
+    gerar_e_imprimir_cupom, mais o ID da venda. O callback é chamado na
+    thread do spooler; em janelas Qt, use o emit de um sinal.
+    """
+    _instance = None
+    _initialized = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(SpoolerImpressao, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        self._initialized = True
+        self._fila = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._contador = itertools.count(1)
+        self._printer = None
+        self._nome_impressora = None
+        self._versao_cache = None
+        atexit.register(self.parar)
+
+    def iniciar(self):
+        """Inicia a thread do spooler (chamadas repetidas não têm efeito)"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._executar, name="SpoolerImpressao", daemon=True)
+            self._thread.start()
+            print("Spooler de impressão iniciado")
+
+    def parar(self):
+        """Encerra a thread depois dos trabalhos já enfileirados"""
+        if self._thread is not None and self._thread.is_alive():
+            self._fila.put(None)
+            self._thread.join(timeout=10)
+        self._fechar_impressora()
+
+    def enfileirar_cupom(self, ao_concluir=None, **dados):
+        """
+        Coloca um cupom na fila e retorna imediatamente
+
+        Args:
+            ao_concluir (callable, optional): Recebe o dicionário de resultado
+            **dados: Argumentos de montar_cupom (id_venda, tipo_cupom, cpf,
+                data_venda, itens, total, forma_pagamento, valor_recebido, troco...)
+
+        Returns:
+            int: Número do trabalho na fila
+        """
+        return self._enfileirar(dados.get('id_venda'), dados, None, ao_concluir)
+
+    def enfileirar_reimpressao(self, id_venda, conteudo, ao_concluir=None):
+        """
+        Coloca na fila um cupom já montado (reimpressão)
+
+        Args:
+            id_venda (int): ID da venda
+            conteudo (bytes): Cupom guardado por salvar_cupom_venda
+            ao_concluir (callable, optional): Recebe o dicionário de resultado
+
+        Returns:
+            int: Número do trabalho na fila
+        """
+        return self._enfileirar(id_venda, None, conteudo, ao_concluir)
+
+    def _enfileirar(self, id_venda, dados, conteudo, ao_concluir):
+        self.iniciar()
+        numero = next(self._contador)
+        self._fila.put((numero, id_venda, dados, conteudo, ao_concluir))
+        print(f"🖨️ Cupom da venda #{id_venda} enfileirado (trabalho {numero}, "
+              f"{self._fila.qsize()} na fila)")
+        return numero
+
+    def pendentes(self):
+        """Quantidade aproximada de cupons aguardando impressão"""
+        return self._fila.qsize()
+
+    def _executar(self):
+        """Laço principal da thread do spooler"""
+        while True:
+            trabalho = self._fila.get()
+            try:
+                if trabalho is None:
+                    return
+                numero, id_venda, dados, conteudo, ao_concluir = trabalho
+                resultado = self._imprimir(numero, id_venda, dados, conteudo)
+                if ao_concluir:
+                    try:
+                        ao_concluir(resultado)
+                    except Exception as e:
+                        print(f"Erro no retorno do trabalho de impressão {numero}: {e}")
+            except Exception as e:
+                print(f"Erro no spooler de impressão: {e}")
+            finally:
+                self._fila.task_done()
+
+    def _imprimir(self, numero, id_venda, dados, conteudo):
+        """Imprime um cupom, reconectando e repetindo em caso de falha"""
+        resultado = {
+            'sucesso': False,
+            'impressao_sucesso': False,
+            'mensagem': '',
+            'impressora_utilizada': None,
+            'erro_detalhado': None,
+            'id_venda': id_venda
+        }
+
+        if conteudo is None:
+            try:
+                conteudo = montar_cupom(**dados)
+            except Exception as e:
+                resultado['mensagem'] = f'Falha ao gerar o conteúdo do cupom: {e}'
+                resultado['erro_detalhado'] = str(e)
+                print(f"❌ Trabalho {numero}: {resultado['mensagem']}")
+                return resultado
+            self._guardar_cupom(id_venda, conteudo)
+
+        for tentativa in range(1, MAX_TENTATIVAS + 1):
+            try:
+                printer = self._obter_impressora()
+                enviar_cupom(printer, conteudo)
+
+                resultado['sucesso'] = True
+                resultado['impressao_sucesso'] = True
+                resultado['impressora_utilizada'] = self._nome_impressora
+                resultado['mensagem'] = f'Cupom impresso com sucesso em {self._nome_impressora}'
+                print(f"🎉 Trabalho {numero}: {resultado['mensagem']}")
+                return resultado
+
+            except ImpressoraNaoConfigurada as e:
+                resultado['mensagem'] = str(e)
+                resultado['erro_detalhado'] = 'Verifique a tabela CONFIGURACAO_IMPRESSORAS'
+                print(f"❌ Trabalho {numero}: {resultado['mensagem']}")
+                return resultado
+
+            except Exception as e:
+                resultado['mensagem'] = str(e)
+                resultado['erro_detalhado'] = str(e)
+                print(f"❌ Trabalho {numero}, tentativa {tentativa}/{MAX_TENTATIVAS}: {e}")
+                # A conexão pode ter caído (impressora desligada, cabo solto): reconectar
+                self._fechar_impressora()
+                if tentativa < MAX_TENTATIVAS:
+                    time.sleep(ESPERA_ENTRE_TENTATIVAS * tentativa)
+
+        return resultado
+
+    def _guardar_cupom(self, id_venda, conteudo):
+        """Guarda o cupom montado para reimpressão (falha aqui não impede a impressão)"""
+        if not id_venda:
+            return
+        try:
+            from base.banco import salvar_cupom_venda
+            salvar_cupom_venda(id_venda, conteudo)
+        except Exception as e:
+            print(f"⚠️ Cupom da venda #{id_venda} não foi guardado para reimpressão: {e}")
+
+    def _obter_impressora(self):
+        """Retorna a conexão aberta, resolvendo e conectando apenas quando necessário"""
+        if self._printer is not None:
+            if self._versao_cache == cache_impressora.versao:
+                return self._printer
+            # Configuração de impressoras alterada: abrir a conexão de novo
+            self._fechar_impressora()
+
+        versao = cache_impressora.versao
+        nome = obter_impressora_pdv()
+        if not nome:
+            raise ImpressoraNaoConfigurada('Nenhuma impressora PDV configurada no banco de dados')
+
+        printer = conectar_impressora(nome)
+        if not printer:
+            raise Exception(f'Não foi possível conectar com a impressora: {nome}')
+
+        self._printer = printer
+        self._nome_impressora = nome
+        self._versao_cache = versao
+        return printer
+
+    def _fechar_impressora(self):
+        printer, self._printer = self._printer, None
+        if printer is not None:
+            try:
+                printer.close()
+            except Exception as e:
+                print(f"⚠️ Aviso ao fechar conexão: {e}")
+
+
+# Criar instância global
+spooler_impressao = SpoolerImpressao()
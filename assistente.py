@@ -1,11 +1,9 @@
 # assistente.py - Versão integrada com banco de dados
 import json
-import requests
 from datetime import datetime
 import os
 import sys
 import re
-from dotenv import load_dotenv  
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTextEdit, 
                             QLineEdit, QPushButton, QLabel, QApplication,
                             QDockWidget, QMainWindow, QMessageBox, QFrame, 
@@ -26,7 +24,6 @@ except ImportError:
     print("Erro ao importar funções do banco de dados")
     execute_query = None
 
-load_dotenv()
 
 class BancoDadosAssistente:
     """Classe para consultar dados do banco e responder perguntas"""
@@ -371,6 +368,9 @@ class AssistenteAPI(QThread):
     
     def __init__(self):
         super().__init__()
+        # Lê o .env aqui (e não na importação do módulo)
+        from dotenv import load_dotenv
+        load_dotenv()
         self.api_key = os.getenv('API_KEY')
         if not self.api_key:
             raise ValueError("❌ API_KEY não encontrada no arquivo .env. Verifique se o arquivo .env está na pasta correta e contém a variável API_KEY.")
@@ -387,6 +387,8 @@ class AssistenteAPI(QThread):
         
     def run(self):
         """Executa a requisição otimizada à API"""
+        # requests só é importado na primeira pergunta enviada à API
+        import requests
         try:
             # Primeiro, verificar se é uma pergunta sobre dados do sistema
             eh_pergunta_dados, resposta_dados = self.banco_assistente.processar_pergunta(self.mensagem)
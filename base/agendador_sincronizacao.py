@@ -0,0 +1,155 @@
+"""
+Módulo singleton que agenda a sincronização e o backup do banco em segundo plano
+"""
+
+import threading
+import time
+import atexit
+
+# Intervalos (em segundos) do agendador
+INTERVALO_CONECTIVIDADE = 60   # Nova verificação de internet
+INTERVALO_BACKUP = 300         # Mínimo entre dois backups completos
+INTERVALO_CICLO = 15           # Frequência com que o agendador acorda
+TEMPO_LIMITE_RESTAURACAO = 2   # Espera máxima pela rede antes da primeira conexão
+
+
+class AgendadorSincronizacao:
+    """
+    Concentra toda a rotina de sincronização fora do caminho das consultas
+
+    Uma única thread em segundo plano verifica a conectividade e cria backups
+    em sua própria cadência. A abertura de conexões apenas consulta o estado
+    em cache e nunca espera por rede. A restauração do backup acontece uma
+    única vez, antes da primeira conexão (restaurar_antes_de_conectar).
+    """
+    _instance = None
+    _initialized = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(AgendadorSincronizacao, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        self._initialized = True
+        self._thread = None
+        self._lock = threading.Lock()
+        self._lock_backup = threading.Lock()
+        self._parar = threading.Event()
+        self._online = False
+        self._ultima_verificacao = 0
+        self._ultimo_backup = 0
+        self._restauracao_verificada = False
+        atexit.register(self.parar)
+
+    def iniciar(self):
+        """Inicia a thread do agendador (chamadas repetidas não têm efeito)"""
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._executar, name="AgendadorSincronizacao", daemon=True)
+            self._thread.start()
+            print("Agendador de sincronização iniciado")
+
+    def parar(self):
+        """Sinaliza para a thread encerrar"""
+        self._parar.set()
+
+    def esta_online(self):
+        """
+        Retorna o último estado de conectividade conhecido, sem acessar a rede
+
+        Returns:
+            bool: True se a última verificação encontrou internet
+        """
+        return self._online
+
+    def atualizar_conectividade(self, timeout=3):
+        """Verifica a conectividade agora e atualiza o estado em cache"""
+        from base.banco import verificar_conectividade
+        self._online = verificar_conectividade(timeout)
+        self._ultima_verificacao = time.time()
+        return self._online
+
+    def restaurar_antes_de_conectar(self):
+        """
+        Restaura o backup, se for mais recente que o banco, antes da primeira conexão
+
+        Chamada por base.banco.obter_pool ao criar o pool, quando ainda não
+        existe nenhuma conexão com o arquivo. Usa o último estado de
+        conectividade conhecido; se a rede ainda não foi verificada, verifica
+        agora (até TEMPO_LIMITE_RESTAURACAO segundos). Só é executada uma vez.
+
+        Returns:
+            bool: True se o backup foi restaurado
+        """
+        if self._restauracao_verificada:
+            return False
+
+        if self._ultima_verificacao == 0:
+            # A thread do agendador ainda não respondeu: verificar aqui mesmo
+            self.atualizar_conectividade(TEMPO_LIMITE_RESTAURACAO)
+        self._restauracao_verificada = True
+
+        if not self._online:
+            print("Sem conectividade, restauração de backup ignorada")
+            return False
+
+        from base.banco import restaurar_backup
+        return restaurar_backup()
+
+    def solicitar_backup(self, force=False):
+        """
+        Cria um backup se não houver outro em andamento e o intervalo mínimo passou
+
+        Args:
+            force (bool): Ignorar conectividade e intervalo mínimo
+
+        Returns:
+            bool: True se um backup foi criado
+        """
+        if not force:
+            if not self._online:
+                return False
+            if time.time() - self._ultimo_backup < INTERVALO_BACKUP:
+                return False
+
+        # Nunca executar duas cópias completas do banco ao mesmo tempo
+        if not self._lock_backup.acquire(blocking=False):
+            return False
+        try:
+            from base.banco import criar_backup_banco
+            sucesso = criar_backup_banco()
+            if sucesso:
+                self._ultimo_backup = time.time()
+            return sucesso
+        finally:
+            self._lock_backup.release()
+
+    def _executar(self):
+        """Laço principal da thread do agendador"""
+        from base.banco import controlar_sincronizacao
+
+        try:
+            self.atualizar_conectividade()
+        except Exception as e:
+            print(f"Erro ao verificar conectividade: {e}")
+
+        while not self._parar.wait(INTERVALO_CICLO):
+            try:
+                if time.time() - self._ultima_verificacao >= INTERVALO_CONECTIVIDADE:
+                    self.atualizar_conectividade()
+
+                self.solicitar_backup()
+                controlar_sincronizacao()
+            except Exception as e:
+                print(f"Erro no agendador de sincronização: {e}")
+
+
+# Criar instância global
+agendador_sincronizacao = AgendadorSincronizacao()
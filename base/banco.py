@@ -7,7 +7,6 @@ from datetime import date
 import os
 import sys
 import fdb  # Módulo para conexão com Firebird
-from PyQt5.QtWidgets import QMessageBox
 import hashlib
 import base64
 import time
@@ -15,6 +14,8 @@ import random
 import string
 import threading
 import atexit
+from contextlib import contextmanager
+from functools import wraps
 
 # Variáveis globais para controle de sincronização (adicione junto às outras variáveis globais)
 SINCRONIZACAO_ATIVA = False
@@ -240,9 +241,17 @@ DB_PASSWORD = "masterkey"
 DB_HOST = "localhost"
 DB_PORT = 3050
 
-def get_connection():
+# Configurações do pool de conexões
+POOL_TAMANHO_MIN = 1
+POOL_TAMANHO_MAX = 8
+POOL_TEMPO_OCIOSO = 300  # segundos até encerrar conexões ociosas excedentes
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def _criar_conexao():
     """
-    Retorna uma conexão com o banco de dados Firebird
+    Abre uma nova conexão física com o banco de dados Firebird
     """
     try:
         print(f"Tentando conectar ao banco de dados: {DB_PATH}")
@@ -259,48 +268,349 @@ def get_connection():
         print(f"Erro de conexão: {e}")
         raise Exception(f"Erro ao conectar ao banco de dados: {str(e)}")
 
+def obter_pool():
+    """
+    Retorna o pool de conexões do processo, criando-o no primeiro uso
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # Nenhuma conexão com o arquivo ainda: momento seguro para restaurar o backup
+                try:
+                    from base.agendador_sincronizacao import agendador_sincronizacao
+                    agendador_sincronizacao.restaurar_antes_de_conectar()
+                except Exception as e:
+                    print(f"Erro ao verificar restauração de backup: {e}")
+
+                from base.pool_conexoes import PoolConexoes
+                _pool = PoolConexoes(
+                    _criar_conexao,
+                    tamanho_min=POOL_TAMANHO_MIN,
+                    tamanho_max=POOL_TAMANHO_MAX,
+                    tempo_ocioso=POOL_TEMPO_OCIOSO
+                )
+                atexit.register(_pool.fechar_todas)
+    return _pool
+
+def obter_estatisticas_pool():
+    """
+    Retorna as estatísticas do pool de conexões (checkouts, esperas, reconexões)
+    
+    Returns:
+        dict: Contadores de uso do pool
+    """
+    return obter_pool().estatisticas()
+
 def execute_query(query, params=None, commit=True, verificar_sync=True):
     """
     Executa uma query no banco de dados com suporte a sincronização
+    
+    A conexão vem do pool; se ela tiver sido perdida (por exemplo, o Firebird
+    foi reiniciado), a query é repetida uma vez em uma conexão nova.
     """
-    conn = None
-    cursor = None
-    try:
-        conn = get_connection(verificar_sync=verificar_sync)
-        cursor = conn.cursor()
-        
-        if params:
-            print(f"Executando query com parâmetros: {params}")
-            cursor.execute(query, params)
-        else:
-            cursor.execute(query)
+    from base.pool_conexoes import erro_de_conexao
+    
+    # Dentro de um bloco "with transacao()" a query entra na transação da thread
+    tx = transacao_ativa()
+    if tx is not None:
+        return tx.execute(query, params)
+    
+    tentativas = 2
+    while True:
+        tentativas -= 1
+        conn = None
+        cursor = None
+        try:
+            conn = get_connection(verificar_sync=verificar_sync)
+            cursor = conn.cursor()
             
-        # Se for um SELECT, retorna os resultados
-        if query.strip().upper().startswith("SELECT"):
-            results = cursor.fetchall()
-            return results
+            if params:
+                print(f"Executando query com parâmetros: {params}")
+                cursor.execute(query, params)
+            else:
+                cursor.execute(query)
+                
+            # Se for um SELECT, retorna os resultados
+            if query.strip().upper().startswith("SELECT"):
+                results = cursor.fetchall()
+                return results
+            
+            # Se precisar fazer commit
+            if commit:
+                conn.commit()
+                
+            return True
+        except Exception as e:
+            perdida = erro_de_conexao(e)
+            if conn is not None:
+                if perdida:
+                    conn.descartar()
+                elif commit:
+                    conn.rollback()
+            if perdida and tentativas > 0:
+                print(f"Conexão perdida, repetindo query: {str(e)}")
+                continue
+            print(f"Erro na execução da query: {str(e)}")
+            raise Exception(f"Erro ao executar query: {str(e)}")
+        finally:
+            if cursor:
+                try:
+                    cursor.close()
+                except Exception:
+                    pass
+            if conn:
+                conn.close()
+
+_transacao_local = threading.local()
+
+class Transacao:
+    """
+    Unidade de trabalho: várias instruções em uma única conexão e um único commit
+    
+    Use através de transacao(); não deve ser instanciada diretamente.
+    """
+    
+    def __init__(self, conn):
+        self.conn = conn
+        self.cursor = conn.cursor()
+        self._apos_commit = []
+    
+    def apos_commit(self, funcao):
+        """
+        Agenda uma função para depois do commit (ex: avisos de base.eventos)
         
-        # Se precisar fazer commit
-        if commit:
-            conn.commit()
+        Se a transação for desfeita, a função não é chamada.
+        """
+        self._apos_commit.append(funcao)
+    
+    def _executar_apos_commit(self):
+        for funcao in self._apos_commit:
+            try:
+                funcao()
+            except Exception as e:
+                print(f"Erro após o commit da transação: {e}")
+        self._apos_commit = []
+    
+    def execute(self, query, params=None):
+        """
+        Executa uma instrução na transação, sem commit
+        
+        Returns:
+            list | bool: Linhas para SELECT, True para as demais instruções
+        """
+        try:
+            if params:
+                print(f"Executando query com parâmetros: {params}")
+                self.cursor.execute(query, params)
+            else:
+                self.cursor.execute(query)
             
-        return True
+            if query.strip().upper().startswith("SELECT"):
+                return self.cursor.fetchall()
+            return True
+        except Exception as e:
+            # O Firebird desfaz apenas a instrução que falhou; a transação continua válida
+            print(f"Erro na execução da query: {str(e)}")
+            raise Exception(f"Erro ao executar query: {str(e)}")
+    
+    def inserir(self, query, params=None):
+        """
+        Executa um INSERT ... RETURNING e devolve o valor retornado
+        """
+        try:
+            if params:
+                print(f"Executando query com parâmetros: {params}")
+                self.cursor.execute(query, params)
+            else:
+                self.cursor.execute(query)
+            row = self.cursor.fetchone()
+            return row[0] if row else None
+        except Exception as e:
+            print(f"Erro na execução da query: {str(e)}")
+            raise Exception(f"Erro ao executar query: {str(e)}")
+    
+    def executar_retornando(self, query, params=None):
+        """
+        Executa uma instrução com RETURNING e devolve a linha retornada
+        
+        Returns:
+            tuple: Linha retornada, ou None se nenhuma linha foi afetada
+        """
+        try:
+            if params:
+                print(f"Executando query com parâmetros: {params}")
+                self.cursor.execute(query, params)
+            else:
+                self.cursor.execute(query)
+            row = self.cursor.fetchone()
+            return tuple(row) if row else None
+        except Exception as e:
+            print(f"Erro na execução da query: {str(e)}")
+            raise Exception(f"Erro ao executar query: {str(e)}")
+    
+    def executemany(self, query, lista_params):
+        """
+        Executa a mesma instrução preparada para cada conjunto de parâmetros
+        """
+        try:
+            self.cursor.executemany(query, lista_params)
+            return True
+        except Exception as e:
+            print(f"Erro na execução em lote: {str(e)}")
+            raise Exception(f"Erro ao executar query: {str(e)}")
+    
+    def fechar(self):
+        try:
+            self.cursor.close()
+        except Exception:
+            pass
+
+def transacao_ativa():
+    """Retorna a transação aberta pela thread atual, ou None"""
+    return getattr(_transacao_local, "tx", None)
+
+@contextmanager
+def transacao():
+    """
+    Abre uma transação para executar várias instruções com um único commit
+    
+    Todas as chamadas a execute_query feitas pela mesma thread dentro do bloco
+    usam a mesma conexão. Em caso de exceção tudo é desfeito. Blocos aninhados
+    participam da transação mais externa.
+    
+    Exemplo:
+        with transacao() as tx:
+            tx.execute("INSERT INTO ...", (...))
+            registrar_movimento(...)
+    """
+    externa = transacao_ativa()
+    if externa is not None:
+        yield externa
+        return
+    
+    from base.pool_conexoes import erro_de_conexao
+    
+    conn = get_connection()
+    tx = Transacao(conn)
+    _transacao_local.tx = tx
+    try:
+        yield tx
+        conn.commit()
     except Exception as e:
-        if conn and commit:
-            conn.rollback()
-        print(f"Erro na execução da query: {str(e)}")
-        raise Exception(f"Erro ao executar query: {str(e)}")
+        if erro_de_conexao(e):
+            conn.descartar()
+        else:
+            try:
+                conn.rollback()
+            except Exception:
+                conn.descartar()
+        raise
     finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+        _transacao_local.tx = None
+        tx.fechar()
+        conn.close()
+    
+    # Fora do bloco: o que for executado aqui já não entra na transação
+    tx._executar_apos_commit()
+
+# Gerador de IDs de cada tabela (incrementado pelos triggers BEFORE INSERT)
+GERADORES_TABELAS = {
+    'USUARIOS': 'GEN_USUARIOS_ID',
+    'EMPRESAS': 'GEN_EMPRESAS_ID',
+    'PESSOAS': 'GEN_PESSOAS_ID',
+    'FUNCIONARIOS': 'GEN_FUNCIONARIOS_ID',
+    'PRODUTOS': 'GEN_PRODUTOS_ID',
+    'FORNECEDORES': 'GEN_FORNECEDORES_ID',
+    'PEDIDOS_VENDA': 'GEN_PEDIDOS_VENDA_ID',
+    'RECEBIMENTOS_CLIENTES': 'GEN_RECEBIMENTOS_ID',
+    'CAIXA_CONTROLE': 'GEN_CAIXA_CONTROLE_ID',
+    'CAIXA_MOVIMENTOS': 'GEN_CAIXA_MOVIMENTOS_ID',
+    'VENDAS_PRODUTOS': 'GEN_VENDAS_PRODUTOS_ID',
+    'CONTAS_CORRENTES': 'GEN_CONTAS_CORRENTES_ID',
+    'CLASSES_FINANCEIRAS': 'GEN_CLASSES_FINANCEIRAS_ID',
+    'CONFIGURACAO_IMPRESSORAS': 'GEN_CONFIG_IMPRESSORAS_ID',
+}
+_geradores_sincronizados = set()
+_geradores_lock = threading.Lock()
+
+def sincronizar_gerador(tabela, coluna_id="ID"):
+    """
+    Garante que o gerador da tabela esteja à frente do maior ID já gravado
+    
+    Registros antigos foram inseridos com ID = MAX(ID) + 1, sem passar pelo
+    gerador. Executado uma vez por tabela em cada processo; GEN_ID só avança,
+    então é seguro com várias estações ao mesmo tempo.
+    """
+    tabela = tabela.upper()
+    gerador = GERADORES_TABELAS.get(tabela)
+    if not gerador or tabela in _geradores_sincronizados:
+        return
+    with _geradores_lock:
+        if tabela in _geradores_sincronizados:
+            return
+        try:
+            result = execute_query(f"""
+            SELECT COALESCE(MAX({coluna_id}), 0), GEN_ID({gerador}, 0)
+            FROM {tabela}
+            """)
+            maior_id, atual = result[0] if result else (0, 0)
+            if maior_id and maior_id > atual:
+                execute_query(f"SELECT GEN_ID({gerador}, {int(maior_id - atual)}) FROM RDB$DATABASE")
+                print(f"Gerador {gerador} ajustado para {maior_id}")
+            _geradores_sincronizados.add(tabela)
+        except Exception as e:
+            print(f"Aviso: não foi possível sincronizar o gerador {gerador}: {e}")
+
+def proximo_id(tabela, coluna_id="ID"):
+    """
+    Reserva o próximo valor do gerador da tabela
+    
+    Para os casos em que o ID é necessário antes do INSERT (por exemplo, quando
+    ele também é usado como código). O valor é exclusivo mesmo com várias
+    estações gravando ao mesmo tempo.
+    
+    Returns:
+        int: ID reservado
+    """
+    sincronizar_gerador(tabela, coluna_id)
+    gerador = GERADORES_TABELAS[tabela.upper()]
+    return execute_query(f"SELECT GEN_ID({gerador}, 1) FROM RDB$DATABASE")[0][0]
+
+def inserir_retornando_id(query, params=None, coluna_id="ID"):
+    """
+    Executa um INSERT e devolve a chave gerada na mesma instrução
+    
+    Usa INSERT ... RETURNING, de modo que o ID vem do gerador da própria linha
+    inserida (sem SELECT MAX posterior, que devolve o ID errado quando duas
+    estações gravam ao mesmo tempo). A coluna de ID deve ser omitida do INSERT.
+    
+    Args:
+        query (str): Instrução INSERT sem a cláusula RETURNING
+        params (tuple, optional): Parâmetros da instrução
+        coluna_id (str): Coluna cujo valor gerado será devolvido
+        
+    Returns:
+        int: Valor gerado para a coluna de ID
+    """
+    import re
+    tabela = re.search(r"INSERT\s+INTO\s+(\w+)", query, re.IGNORECASE)
+    if tabela:
+        sincronizar_gerador(tabela.group(1), coluna_id)
+    
+    sql = f"{query.rstrip().rstrip(';')}\n    RETURNING {coluna_id}"
+    
+    tx = transacao_ativa()
+    if tx is not None:
+        return tx.inserir(sql, params)
+    with transacao() as tx:
+        return tx.inserir(sql, params)
 
-def verificar_conectividade():
+def verificar_conectividade(timeout=3):
     """Verifica se há conexão com a internet"""
     try:
         import socket
-        socket.create_connection(("www.google.com", 80), timeout=3)
+        socket.create_connection(("www.google.com", 80), timeout=timeout)
         return True
     except OSError:
         return False
@@ -335,8 +645,9 @@ def controlar_sincronizacao():
         # Marcar como ativa
         SINCRONIZACAO_ATIVA = True
         
-        # Verificar conectividade
-        if not verificar_conectividade():
+        # Verificar conectividade (estado em cache mantido pelo agendador)
+        from base.agendador_sincronizacao import agendador_sincronizacao
+        if not agendador_sincronizacao.esta_online():
             print("Sem conectividade para sincronização")
             SINCRONIZACAO_ATIVA = False
             return False
@@ -379,18 +690,10 @@ def controlar_sincronizacao():
         # Garantir que o status seja atualizado
         SINCRONIZACAO_ATIVA = False
 
-# Função para executar em uma thread separada
-def monitor_sincronizacao():
-    """Thread que monitora e executa sincronizações periódicas"""
-    while True:
-        # Verificar a cada 2 minutos
-        time.sleep(120)
-        if not banco_em_uso():
-            controlar_sincronizacao()
-
 def sincronizar_ao_encerrar():
     """Realiza sincronização ao encerrar o programa"""
-    if verificar_conectividade() and not banco_em_uso():
+    from base.agendador_sincronizacao import agendador_sincronizacao
+    if agendador_sincronizacao.esta_online() and not banco_em_uso():
         print("Sincronizando banco antes de encerrar...")
         # O Syncthing detectará as alterações e sincronizará
         caminho_banco = get_db_path()
@@ -479,51 +782,47 @@ def restaurar_backup():
         return False
 
 def sincronizar_banco(force=False):
-    """Verifica e sincroniza o banco de dados"""
-    online = verificar_conectividade()
-    
-    # Se online, criar backup para sincronização
-    if online or force:
-        return criar_backup_banco()
-    
-    return False
+    """Verifica e sincroniza o banco de dados (nunca executa duas cópias ao mesmo tempo)"""
+    from base.agendador_sincronizacao import agendador_sincronizacao
+    return agendador_sincronizacao.solicitar_backup(force=force)
 
-# Modifique a função get_connection para verificar sincronização
 def get_connection(verificar_sync=True):
     """
     Retorna uma conexão com o banco de dados Firebird
-    E realiza sincronização se necessário
+    
+    A sincronização (conectividade e backup) fica a cargo do agendador em
+    segundo plano; aqui apenas garantimos que ele está rodando. A restauração
+    do backup é feita por obter_pool, antes da primeira conexão.
     """
     try:
-        # Verificar se há um backup mais recente para restaurar
-        if verificar_sync and verificar_conectividade():
-            restaurar_backup()
-        
-        # Obter caminho do banco atual
-        db_path = get_db_path()
-        print(f"Tentando conectar ao banco de dados: {db_path}")
-        
-        # Conectar ao banco
-        conn = fdb.connect(
-            host=DB_HOST,
-            database=db_path,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            port=DB_PORT,
-            charset='UTF8'
-        )
-        
-        # Após a conexão bem-sucedida, verificar sincronização
         if verificar_sync:
-            # Executar em background para não bloquear
-            import threading
-            threading.Thread(target=sincronizar_banco).start()
+            from base.agendador_sincronizacao import agendador_sincronizacao
+            agendador_sincronizacao.iniciar()
+        
+        # Obter uma conexão do pool (reutilizada entre as consultas)
+        conn = obter_pool().obter()
             
         return conn
     except Exception as e:
         print(f"Erro de conexão: {e}")
         raise Exception(f"Erro ao conectar ao banco de dados: {str(e)}")
 
+def verificacao_de_esquema(funcao):
+    """
+    Marca uma função verificar_tabela_* coberta pelas migrações (base.migracoes)
+
+    Depois que as migrações foram aplicadas na inicialização, a função retorna
+    True sem consultar o banco. Antes disso (ex: scripts avulsos) ela é
+    executada normalmente.
+    """
+    @wraps(funcao)
+    def verificar(*args, **kwargs):
+        from base.migracoes import esquema_atualizado
+        if esquema_atualizado():
+            return True
+        return funcao(*args, **kwargs)
+    return verificar
+
 #LOGIN 
 def validar_login(usuario, senha, empresa):
     """
@@ -567,6 +866,163 @@ def validar_login(usuario, senha, empresa):
         raise Exception(f"Erro ao validar login: {str(e)}")
 
 
+class SessaoUsuario:
+    """
+    Dados do usuário logado, lidos uma única vez no login (iniciar_sessao)
+
+    Atributos:
+        autenticado (bool): Usuário e senha conferem
+        id_usuario, usuario, empresa: Registro de USUARIOS
+        bloqueado (bool), motivo_bloqueio (str): Bloqueio do usuário ou da conta principal
+        precisa_codigo_licenca (bool): Validade do usuário ou da conta principal vencida
+        id_funcionario, nome_funcionario: Funcionário vinculado (ou None)
+        permissoes (dict): Módulo -> True/False do funcionário vinculado
+    """
+
+    def __init__(self):
+        self.autenticado = False
+        self.id_usuario = None
+        self.usuario = None
+        self.empresa = None
+        self.bloqueado = False
+        self.motivo_bloqueio = ""
+        self.precisa_codigo_licenca = False
+        self.id_funcionario = None
+        self.nome_funcionario = None
+        self.permissoes = {}
+
+    def tem_permissao(self, modulo):
+        """Usuário sem funcionário vinculado tem acesso total"""
+        if not self.id_funcionario:
+            return True
+        return self.permissoes.get(modulo, False)
+
+
+# Sessão do usuário logado (definida por iniciar_sessao)
+sessao_atual = None
+
+def obter_sessao():
+    """
+    Returns:
+        SessaoUsuario: Sessão do usuário logado, ou None antes do login
+    """
+    return sessao_atual
+
+def _sql_sessao():
+    """
+    Consulta do login: usuário, conta principal, funcionário vinculado e
+    permissões em uma única ida ao banco (uma linha por permissão)
+
+    As colunas de bloqueio e validade de USUARIOS são criadas pela ferramenta
+    de usuários; sem elas, o usuário é tratado como liberado.
+    """
+    from base.esquema import registro_esquema
+
+    def montar():
+        def coluna(tabela, nome, tipo):
+            if registro_esquema.tem_coluna('USUARIOS', nome):
+                return f"{tabela}.{nome}"
+            return f"CAST(NULL AS {tipo})"
+
+        tem_master = registro_esquema.tem_coluna('USUARIOS', 'USUARIO_MASTER')
+        join_master = "LEFT JOIN USUARIOS M ON M.ID = U.USUARIO_MASTER" if tem_master \
+            else "LEFT JOIN USUARIOS M ON 1 = 0"
+        return f"""
+        SELECT U.ID, U.USUARIO, U.EMPRESA,
+               IIF(U.SENHA = ?, 1, 0) AS SENHA_OK,
+               IIF(U.EMPRESA = ?, 1, 0) AS EMPRESA_OK,
+               {coluna('U', 'BLOQUEADO', 'CHAR(1)')}, {coluna('U', 'MOTIVO_BLOQUEIO', 'VARCHAR(100)')},
+               {coluna('U', 'DATA_EXPIRACAO', 'DATE')},
+               M.ID, {coluna('M', 'BLOQUEADO', 'CHAR(1)')}, {coluna('M', 'MOTIVO_BLOQUEIO', 'VARCHAR(100)')},
+               {coluna('M', 'DATA_EXPIRACAO', 'DATE')},
+               F.ID, F.NOME, P.MODULO, P.TEM_ACESSO
+        FROM USUARIOS U
+        {join_master}
+        LEFT JOIN FUNCIONARIOS F ON F.ID = (
+            SELECT FIRST 1 F2.ID FROM FUNCIONARIOS F2
+            WHERE F2.ID_USUARIO = U.ID OR F2.NOME_USUARIO = U.USUARIO
+            ORDER BY IIF(F2.ID_USUARIO = U.ID, 0, 1), F2.ID
+        )
+        LEFT JOIN PERMISSOES_SISTEMA P ON P.ID_FUNCIONARIO = F.ID
+        WHERE U.USUARIO = ? AND (U.EMPRESA = ? OR U.SENHA = ?)
+        """
+    return registro_esquema.sql('banco_sessao_usuario', montar)
+
+def iniciar_sessao(usuario, senha, empresa):
+    """
+    Autentica o usuário e carrega tudo o que o login e a janela principal usam
+
+    Substitui, em uma única consulta, verificar_usuario_bloqueado, validar_login,
+    autenticar_por_funcionario, obter_id_usuario,
+    verificar_necessidade_codigo_licenca, buscar_funcionario_por_usuario e a
+    leitura das permissões do funcionário. Como em autenticar_por_funcionario,
+    a senha também é aceita quando a empresa informada não confere; a empresa
+    da sessão é a do cadastro do usuário.
+
+    Quando o usuário é autenticado e não está bloqueado, a sessão fica guardada
+    em obter_sessao() (e em get_usuario_logado()) até o fim da execução.
+
+    Args:
+        usuario (str): Nome de usuário
+        senha (str): Senha do usuário
+        empresa (str): Nome da empresa
+
+    Returns:
+        SessaoUsuario: Resultado do login (ver autenticado e bloqueado)
+    """
+    global sessao_atual
+    try:
+        result = execute_query(_sql_sessao(), (senha, empresa, usuario, empresa, senha))
+
+        # Registro usado: o da empresa informada com a senha correta; senão
+        # qualquer um com a senha correta; senão o da empresa (só para o bloqueio)
+        registros = {}
+        for row in result:
+            registros.setdefault(row[0], []).append(row)
+        candidatos = sorted(registros.values(), key=lambda linhas: (-linhas[0][3], -linhas[0][4], linhas[0][0]))
+
+        sessao = SessaoUsuario()
+        if not candidatos:
+            return sessao
+
+        linhas = candidatos[0]
+        (id_usuario, nome_usuario, empresa_usuario, senha_ok, _empresa_ok,
+         bloqueado, motivo, data_expiracao,
+         id_master, bloqueado_master, motivo_master, data_expiracao_master,
+         id_funcionario, nome_funcionario, _modulo, _tem_acesso) = linhas[0]
+
+        if bloqueado and bloqueado.upper() == 'S':
+            sessao.bloqueado = True
+            sessao.motivo_bloqueio = motivo or "Usuário bloqueado. Entre em contato com o suporte."
+        elif id_master and bloqueado_master and bloqueado_master.upper() == 'S':
+            sessao.bloqueado = True
+            sessao.motivo_bloqueio = motivo_master or "Conta principal bloqueada. Entre em contato com o suporte."
+
+        if not senha_ok:
+            return sessao
+
+        hoje = date.today()
+        sessao.autenticado = True
+        sessao.id_usuario = id_usuario
+        sessao.usuario = nome_usuario
+        sessao.empresa = empresa_usuario
+        sessao.precisa_codigo_licenca = bool(
+            (data_expiracao and hoje > data_expiracao)
+            or (id_master and data_expiracao_master and hoje > data_expiracao_master))
+        sessao.id_funcionario = id_funcionario
+        sessao.nome_funcionario = nome_funcionario
+        sessao.permissoes = {row[14]: row[15] == 'S' for row in linhas if row[14]}
+
+        if not sessao.bloqueado:
+            sessao_atual = sessao
+            usuario_logado["id"] = id_usuario
+            usuario_logado["nome"] = nome_usuario
+            usuario_logado["empresa"] = empresa_usuario
+        return sessao
+    except Exception as e:
+        print(f"Erro ao iniciar sessão: {e}")
+        raise Exception(f"Erro ao validar login: {str(e)}")
+
 def criar_usuario(usuario, senha, empresa):
     """
     Cria um novo usuário no banco de dados
@@ -590,18 +1046,12 @@ def criar_usuario(usuario, senha, empresa):
         if result[0][0] > 0:
             raise Exception("Usuário já existe para esta empresa")
         
-        # Obter o próximo ID
-        query_nextid = """
-        SELECT COALESCE(MAX(ID), 0) + 1 FROM USUARIOS
-        """
-        next_id = execute_query(query_nextid)[0][0]
-        
-        # Inserir novo usuário com ID explícito
+        # Inserir novo usuário (ID gerado pelo gerador da tabela)
         query_insert = """
-        INSERT INTO USUARIOS (ID, USUARIO, SENHA, EMPRESA) 
-        VALUES (?, ?, ?, ?)
+        INSERT INTO USUARIOS (USUARIO, SENHA, EMPRESA) 
+        VALUES (?, ?, ?)
         """
-        execute_query(query_insert, (next_id, usuario, senha, empresa))
+        inserir_retornando_id(query_insert, (usuario, senha, empresa))
         
         return True
     except Exception as e:
@@ -787,6 +1237,7 @@ def atualizar_data_expiracao(id_usuario, nova_data):
         print(f"Erro ao atualizar data de expiração: {e}")
         raise Exception(f"Erro ao atualizar data de expiração: {str(e)}")
 
+@verificacao_de_esquema
 def verificar_tabela_licencas():
     """Verifica se a tabela de licenças existe e a cria se não existir"""
     try:
@@ -1012,6 +1463,7 @@ def verificar_usuario_bloqueado(usuario, empresa):
         return False, "Erro ao verificar status do usuário"
     
 
+@verificacao_de_esquema
 def verificar_tabela_usuarios():
     """
     Verifica se a tabela USUARIOS existe e a cria se não existir
@@ -1099,6 +1551,7 @@ def listar_usuarios():
         print(f"Erro ao listar usuários: {e}")
         raise Exception(f"Erro ao listar usuários: {str(e)}")
 
+@verificacao_de_esquema
 def verificar_tabela_empresas():
     """
     Verifica se a tabela EMPRESAS existe e a cria se não existir
@@ -1273,12 +1726,6 @@ def criar_empresa(nome_empresa, nome_pessoa, documento, tipo_documento, regime,
             if empresa_existente:
                 raise Exception(f"Já existe uma empresa cadastrada com este {tipo_documento}")
         
-        # Obter o próximo ID
-        query_nextid = """
-        SELECT COALESCE(MAX(ID), 0) + 1 FROM EMPRESAS
-        """
-        next_id = execute_query(query_nextid)[0][0]
-        
         # Sanitizar e limitar tamanho dos campos - tratamento mais rigoroso
         nome_empresa = str(nome_empresa or "").strip()[:100]
         nome_pessoa = str(nome_pessoa or "").strip()[:100]
@@ -1295,7 +1742,6 @@ def criar_empresa(nome_empresa, nome_pessoa, documento, tipo_documento, regime,
         
         # Após o tratamento, imprimir novamente os valores
         print("\n--- Dados tratados para inserção ---")
-        print(f"ID: {next_id} (tipo: {type(next_id)})")
         print(f"nome_empresa: '{nome_empresa}' (tipo: {type(nome_empresa)})")
         print(f"nome_pessoa: '{nome_pessoa}' (tipo: {type(nome_pessoa)})")
         print(f"documento_limpo: '{documento_limpo}' (tipo: {type(documento_limpo)})")
@@ -1312,13 +1758,13 @@ def criar_empresa(nome_empresa, nome_pessoa, documento, tipo_documento, regime,
         # Inserir a empresa
         query = """
         INSERT INTO EMPRESAS (
-            ID, NOME_EMPRESA, NOME_PESSOA, DOCUMENTO, TIPO_DOCUMENTO, 
+            NOME_EMPRESA, NOME_PESSOA, DOCUMENTO, TIPO_DOCUMENTO, 
             REGIME, TELEFONE, CEP, RUA, NUMERO, BAIRRO, CIDADE, ESTADO
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """
         
         params = (
-            next_id, nome_empresa, nome_pessoa, documento_limpo, tipo_documento,
+            nome_empresa, nome_pessoa, documento_limpo, tipo_documento,
             regime, telefone, cep, rua, numero, bairro, cidade, estado
         )
         
@@ -1330,7 +1776,8 @@ def criar_empresa(nome_empresa, nome_pessoa, documento, tipo_documento, regime,
                 params = tuple(params_list)
                 print(f"AVISO: Parâmetro na posição {i} era None, foi substituído por string vazia")
         
-        execute_query(query, params)
+        # O ID vem do gerador da tabela, devolvido pelo próprio INSERT
+        next_id = inserir_retornando_id(query, params)
         
         return next_id
     except Exception as e:
@@ -1513,6 +1960,7 @@ def testar_insercao_simples():
 
 # Adicione estas funções ao seu arquivo banco.py
 
+@verificacao_de_esquema
 def verificar_tabela_pessoas():
     """
     Verifica se a tabela PESSOAS existe e a cria se não existir
@@ -1656,12 +2104,23 @@ def buscar_pessoa_por_documento(documento):
         print(f"Erro ao buscar pessoa por documento: {e}")
         raise Exception(f"Erro ao buscar pessoa por documento: {str(e)}")
 
+def _publicar(evento, **dados):
+    """
+    Publica um evento de base.eventos (caches e janelas abertas se atualizam)
+    
+    Dentro de uma transação o evento só é entregue depois do commit.
+    """
+    from base.eventos import barramento_eventos
+    barramento_eventos.publicar(evento, **dados)
+
 def criar_pessoa(nome, tipo_pessoa, documento, telefone, data_cadastro,
                cep, rua, bairro, cidade, estado, observacao=None):
     """
     Cria uma nova pessoa no banco de dados
     """
     try:
+        from base import eventos
+        
         # Depuração: Imprimir valores recebidos
         print("\n--- Dados recebidos para inserção de pessoa ---")
         print(f"nome: '{nome}' (tipo: {type(nome)})")
@@ -1685,12 +2144,6 @@ def criar_pessoa(nome, tipo_pessoa, documento, telefone, data_cadastro,
             if pessoa_existente:
                 raise Exception(f"Já existe uma pessoa cadastrada com este documento")
         
-        # Obter o próximo ID
-        query_nextid = """
-        SELECT COALESCE(MAX(ID), 0) + 1 FROM PESSOAS
-        """
-        next_id = execute_query(query_nextid)[0][0]
-        
         # Sanitizar e limitar tamanho dos campos
         nome = str(nome or "").strip()[:100]
         tipo_pessoa = str(tipo_pessoa or "Física").strip()[:8]
@@ -1717,7 +2170,6 @@ def criar_pessoa(nome, tipo_pessoa, documento, telefone, data_cadastro,
         
         # Após o tratamento, imprimir novamente os valores
         print("\n--- Dados tratados para inserção de pessoa ---")
-        print(f"ID: {next_id} (tipo: {type(next_id)})")
         print(f"nome: '{nome}' (tipo: {type(nome)})")
         print(f"tipo_pessoa: '{tipo_pessoa}' (tipo: {type(tipo_pessoa)})")
         print(f"documento_limpo: '{documento_limpo}' (tipo: {type(documento_limpo)})")
@@ -1733,13 +2185,13 @@ def criar_pessoa(nome, tipo_pessoa, documento, telefone, data_cadastro,
         # Inserir a pessoa
         query = """
         INSERT INTO PESSOAS (
-            ID, NOME, TIPO_PESSOA, DOCUMENTO, TELEFONE, 
+            NOME, TIPO_PESSOA, DOCUMENTO, TELEFONE, 
             DATA_CADASTRO, CEP, RUA, BAIRRO, CIDADE, ESTADO, OBSERVACAO
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """
         
         params = (
-            next_id, nome, tipo_pessoa, documento_limpo, telefone,
+            nome, tipo_pessoa, documento_limpo, telefone,
             data_cadastro, cep, rua, bairro, cidade, estado, observacao
         )
         
@@ -1751,7 +2203,9 @@ def criar_pessoa(nome, tipo_pessoa, documento, telefone, data_cadastro,
                 params = tuple(params_list)
                 print(f"AVISO: Parâmetro na posição {i} era None, foi substituído por string vazia")
         
-        execute_query(query, params)
+        # O ID vem do gerador da tabela, devolvido pelo próprio INSERT
+        next_id = inserir_retornando_id(query, params)
+        _publicar(eventos.PESSOA_ALTERADA, id_pessoa=next_id, acao=eventos.INCLUIDO)
         
         return next_id
     except Exception as e:
@@ -1764,6 +2218,8 @@ def atualizar_pessoa(id_pessoa, nome, tipo_pessoa, documento, telefone, data_cad
     Atualiza os dados de uma pessoa existente
     """
     try:
+        from base import eventos
+        
         # Depuração: Imprimir valores recebidos
         print("\n--- Dados recebidos para atualização de pessoa ---")
         print(f"id_pessoa: {id_pessoa} (tipo: {type(id_pessoa)})")
@@ -1862,6 +2318,8 @@ def atualizar_pessoa(id_pessoa, nome, tipo_pessoa, documento, telefone, data_cad
                 print(f"AVISO: Parâmetro na posição {i} era None, foi substituído por string vazia")
         
         execute_query(query, params)
+        invalidar_cache_nomes('PESSOAS', id_pessoa)
+        _publicar(eventos.PESSOA_ALTERADA, id_pessoa=id_pessoa, acao=eventos.ALTERADO)
         
         return True
     except Exception as e:
@@ -1879,6 +2337,8 @@ def excluir_pessoa(id_pessoa):
         bool: True se a exclusão foi bem-sucedida
     """
     try:
+        from base import eventos
+        
         # Verificar se a pessoa existe
         pessoa = buscar_pessoa_por_id(id_pessoa)
         if not pessoa:
@@ -1890,6 +2350,8 @@ def excluir_pessoa(id_pessoa):
         WHERE ID = ?
         """
         execute_query(query, (id_pessoa,))
+        invalidar_cache_nomes('PESSOAS', id_pessoa)
+        _publicar(eventos.PESSOA_ALTERADA, id_pessoa=id_pessoa, acao=eventos.EXCLUIDO)
         
         return True
     except Exception as e:
@@ -1898,6 +2360,7 @@ def excluir_pessoa(id_pessoa):
 
 # Adicione estas funções ao seu arquivo banco.py
 
+@verificacao_de_esquema
 def verificar_tabela_funcionarios():
     """
     Verifica se a tabela FUNCIONARIOS existe e a cria se não existir
@@ -2075,12 +2538,6 @@ def criar_funcionario(nome, tipo_vendedor, telefone, tipo_pessoa, data_cadastro,
                 documento_tipo = "CPF" if len(cpf_cnpj_limpo) <= 11 else "CNPJ"
                 raise Exception(f"Já existe um funcionário cadastrado com este {documento_tipo}")
         
-        # Obter o próximo ID
-        query_nextid = """
-        SELECT COALESCE(MAX(ID), 0) + 1 FROM FUNCIONARIOS
-        """
-        next_id = execute_query(query_nextid)[0][0]
-        
         # Sanitizar e limitar tamanho dos campos
         nome = str(nome or "").strip()[:100]
         tipo_vendedor = str(tipo_vendedor or "Interno").strip()[:15]
@@ -2109,7 +2566,6 @@ def criar_funcionario(nome, tipo_vendedor, telefone, tipo_pessoa, data_cadastro,
         
         # Após o tratamento, imprimir novamente os valores
         print("\n--- Dados tratados para inserção de funcionário ---")
-        print(f"ID: {next_id} (tipo: {type(next_id)})")
         print(f"nome: '{nome}' (tipo: {type(nome)})")
         print(f"tipo_vendedor: '{tipo_vendedor}' (tipo: {type(tipo_vendedor)})")
         print(f"telefone: '{telefone}' (tipo: {type(telefone)})")
@@ -2127,13 +2583,13 @@ def criar_funcionario(nome, tipo_vendedor, telefone, tipo_pessoa, data_cadastro,
         # Inserir o funcionário
         query = """
         INSERT INTO FUNCIONARIOS (
-            ID, NOME, TIPO_VENDEDOR, TELEFONE, TIPO_PESSOA, 
+            NOME, TIPO_VENDEDOR, TELEFONE, TIPO_PESSOA, 
             DATA_CADASTRO, CPF_CNPJ, SEXO, CEP, RUA, BAIRRO, CIDADE, ESTADO, OBSERVACAO
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """
         
         params = (
-            next_id, nome, tipo_vendedor, telefone, tipo_pessoa,
+            nome, tipo_vendedor, telefone, tipo_pessoa,
             data_cadastro, cpf_cnpj_limpo, sexo, cep, rua, bairro, cidade, estado, observacao
         )
         
@@ -2145,7 +2601,8 @@ def criar_funcionario(nome, tipo_vendedor, telefone, tipo_pessoa, data_cadastro,
                 params = tuple(params_list)
                 print(f"AVISO: Parâmetro na posição {i} era None, foi substituído por string vazia")
         
-        execute_query(query, params)
+        # O ID vem do gerador da tabela, devolvido pelo próprio INSERT
+        next_id = inserir_retornando_id(query, params)
         
         return next_id
     except Exception as e:
@@ -2267,6 +2724,7 @@ def atualizar_funcionario(id_funcionario, nome, tipo_vendedor, telefone, tipo_pe
                 print(f"AVISO: Parâmetro na posição {i} era None, foi substituído por string vazia")
         
         execute_query(query, params)
+        invalidar_cache_nomes('FUNCIONARIOS', id_funcionario)
         
         return True
     except Exception as e:
@@ -2295,14 +2753,117 @@ def excluir_funcionario(id_funcionario):
         WHERE ID = ?
         """
         execute_query(query, (id_funcionario,))
+        invalidar_cache_nomes('FUNCIONARIOS', id_funcionario)
         
         return True
     except Exception as e:
         print(f"Erro ao excluir funcionário: {e}")
         raise Exception(f"Erro ao excluir funcionário: {str(e)}")
 
+# Cache ID -> nome de PESSOAS e FUNCIONARIOS, usado pelas telas que mostram
+# o cliente e o vendedor de cada venda. O {} recebe os marcadores do IN.
+_CONSULTAS_NOMES = {
+    'PESSOAS': """
+        SELECT ID, NOME FROM PESSOAS
+        WHERE ID IN ({}) AND (TIPO_PESSOA = 'Física' OR TIPO_PESSOA = 'Jurídica')
+    """,
+    'FUNCIONARIOS': """
+        SELECT ID, NOME FROM FUNCIONARIOS
+        WHERE ID IN ({})
+    """,
+}
+_cache_nomes = {tabela: {} for tabela in _CONSULTAS_NOMES}
+_cache_nomes_lock = threading.Lock()
+
+def buscar_nomes(tabela, ids):
+    """
+    Busca os nomes de vários registros de PESSOAS ou FUNCIONARIOS
+    
+    Os nomes já conhecidos vêm do cache; os demais são lidos em uma única
+    consulta (em lotes de LIMITE_ITENS_IN IDs) e guardados no cache.
+    
+    Args:
+        tabela (str): 'PESSOAS' ou 'FUNCIONARIOS'
+        ids (iterable): IDs procurados (None e 0 são ignorados)
+        
+    Returns:
+        dict: ID -> nome, apenas para os IDs encontrados
+    """
+    tabela = tabela.upper()
+    cache = _cache_nomes[tabela]
+    ids = {i for i in ids if i}
+    
+    with _cache_nomes_lock:
+        nomes = {i: cache[i] for i in ids if i in cache}
+    faltantes = sorted(ids - nomes.keys())
+    
+    try:
+        for inicio in range(0, len(faltantes), LIMITE_ITENS_IN):
+            lote = faltantes[inicio:inicio + LIMITE_ITENS_IN]
+            marcadores = ", ".join("?" for _ in lote)
+            result = execute_query(_CONSULTAS_NOMES[tabela].format(marcadores), tuple(lote))
+            encontrados = {row[0]: row[1] for row in result}
+            nomes.update(encontrados)
+            with _cache_nomes_lock:
+                cache.update(encontrados)
+    except Exception as e:
+        print(f"Erro ao buscar nomes em {tabela}: {e}")
+    
+    return nomes
+
+def buscar_nome_pessoa(id_pessoa):
+    """
+    Args:
+        id_pessoa (int): ID do cliente
+        
+    Returns:
+        str: Nome do cliente ou None se não encontrado
+    """
+    return buscar_nomes('PESSOAS', [id_pessoa]).get(id_pessoa)
+
+def buscar_nome_funcionario(id_funcionario):
+    """
+    Args:
+        id_funcionario (int): ID do funcionário
+        
+    Returns:
+        str: Nome do funcionário ou None se não encontrado
+    """
+    return buscar_nomes('FUNCIONARIOS', [id_funcionario]).get(id_funcionario)
+
+def registrar_nomes(tabela, pares):
+    """
+    Guarda no cache nomes já obtidos por outra consulta (ex: um JOIN)
+    
+    Args:
+        tabela (str): 'PESSOAS' ou 'FUNCIONARIOS'
+        pares (iterable): Tuplas (ID, nome); nomes vazios são ignorados
+    """
+    cache = _cache_nomes[tabela.upper()]
+    with _cache_nomes_lock:
+        for id_registro, nome in pares:
+            if id_registro and nome:
+                cache[id_registro] = nome
+
+def invalidar_cache_nomes(tabela=None, id_registro=None):
+    """
+    Descarta nomes do cache depois de uma alteração no cadastro
+    
+    Args:
+        tabela (str, optional): 'PESSOAS' ou 'FUNCIONARIOS'. Default: todas
+        id_registro (int, optional): ID alterado. Default: toda a tabela
+    """
+    tabelas = [tabela.upper()] if tabela else list(_cache_nomes)
+    with _cache_nomes_lock:
+        for nome_tabela in tabelas:
+            if id_registro is None:
+                _cache_nomes[nome_tabela].clear()
+            else:
+                _cache_nomes[nome_tabela].pop(id_registro, None)
+
 # Adicione estas funções ao arquivo banco.py
 
+@verificacao_de_esquema
 def verificar_tabela_produtos():
     """
     Verifica se a tabela PRODUTOS existe e a cria se não existir
@@ -2338,6 +2899,12 @@ def verificar_tabela_produtos():
             execute_query(query_create)
             print("Tabela PRODUTOS criada com sucesso.")
             
+            # A estrutura mudou: descartar o esquema em cache
+            from base.esquema import registro_esquema
+            from base.catalogo_produtos import catalogo_produtos
+            registro_esquema.invalidar('PRODUTOS')
+            catalogo_produtos.invalidar()
+            
             # Criar o gerador de IDs (sequence)
             try:
                 query_generator = """
@@ -2465,6 +3032,8 @@ def criar_produto(codigo, nome, codigo_barras=None, marca=None, grupo=None,
         int: ID do produto criado
     """
     try:
+        from base import eventos
+        
         # Verificar se já existe um produto com o mesmo código
         produto_existente = buscar_produto_por_codigo(codigo)
         if produto_existente:
@@ -2500,14 +3069,11 @@ def criar_produto(codigo, nome, codigo_barras=None, marca=None, grupo=None,
             preco_custo, preco_venda, quantidade_estoque
         )
         
-        execute_query(query, params)
-        
-        # Retornar o ID do produto inserido
-        produto_inserido = buscar_produto_por_codigo(codigo)
-        if produto_inserido:
-            return produto_inserido[0]  # ID é o primeiro item da tupla
+        # O ID gerado volta na própria instrução (RETURNING)
+        id_produto = inserir_retornando_id(query, params)
+        _publicar(eventos.PRODUTO_ALTERADO, id_produto=id_produto, acao=eventos.INCLUIDO)
         
-        return None
+        return id_produto
     except Exception as e:
         print(f"Erro ao criar produto: {e}")
         raise Exception(f"Erro ao criar produto: {str(e)}")
@@ -2532,6 +3098,8 @@ def atualizar_produto(id_produto, codigo, nome, codigo_barras=None, marca=None,
         bool: True se a atualização foi bem-sucedida
     """
     try:
+        from base import eventos
+        
         # Verificar se o produto existe
         produto = buscar_produto_por_id(id_produto)
         if not produto:
@@ -2581,6 +3149,7 @@ def atualizar_produto(id_produto, codigo, nome, codigo_barras=None, marca=None,
         )
         
         execute_query(query, params)
+        _publicar(eventos.PRODUTO_ALTERADO, id_produto=id_produto, acao=eventos.ALTERADO)
         
         return True
     except Exception as e:
@@ -2598,6 +3167,8 @@ def excluir_produto(id_produto):
         bool: True se a exclusão foi bem-sucedida
     """
     try:
+        from base import eventos
+        
         # Verificar se o produto existe
         produto = buscar_produto_por_id(id_produto)
         if not produto:
@@ -2609,6 +3180,7 @@ def excluir_produto(id_produto):
         WHERE ID = ?
         """
         execute_query(query, (id_produto,))
+        _publicar(eventos.PRODUTO_ALTERADO, id_produto=id_produto, acao=eventos.EXCLUIDO)
         
         return True
     except Exception as e:
@@ -2658,7 +3230,7 @@ def buscar_produtos_por_filtro(codigo="", nome="", codigo_barras="", grupo="", m
     
     Args:
         codigo (str, optional): Código do produto
-        nome (str, optional): Nome do produto (busca parcial)
+        nome (str, optional): Início do nome do produto (com * no início, qualquer parte)
         codigo_barras (str, optional): Código de barras do produto
         grupo (str, optional): Grupo/categoria do produto
         marca (str, optional): Marca do produto
@@ -2666,6 +3238,7 @@ def buscar_produtos_por_filtro(codigo="", nome="", codigo_barras="", grupo="", m
     Returns:
         list: Lista de produtos que correspondem aos filtros
     """
+    from base.filtros import aplicar, filtro_igual, filtro_texto
     try:
         # Construir consulta SQL base
         query = """
@@ -2679,25 +3252,12 @@ def buscar_produtos_por_filtro(codigo="", nome="", codigo_barras="", grupo="", m
         params = []
         
         # Adicionar condições conforme os filtros fornecidos
-        if codigo:
-            query += " AND CODIGO = ?"
-            params.append(codigo)
-            
-        if nome:
-            query += " AND UPPER(NOME) LIKE UPPER(?)"
-            params.append(f"%{nome}%")  # Busca parcial, case-insensitive
-            
-        if codigo_barras:
-            query += " AND CODIGO_BARRAS = ?"
-            params.append(codigo_barras)
-            
-        if grupo:
-            query += " AND UPPER(GRUPO) = UPPER(?)"
-            params.append(grupo)
-            
-        if marca:
-            query += " AND UPPER(MARCA) = UPPER(?)"
-            params.append(marca)
+        # Condições que usam os índices das pesquisas (ver base.filtros)
+        query = aplicar(query, params, filtro_igual("CODIGO", codigo))
+        query = aplicar(query, params, filtro_texto("NOME", nome))
+        query = aplicar(query, params, filtro_igual("CODIGO_BARRAS", codigo_barras))
+        query = aplicar(query, params, filtro_igual("GRUPO", grupo, maiusculas=True))
+        query = aplicar(query, params, filtro_igual("MARCA", marca, maiusculas=True))
         
         # Adicionar ordenação
         query += " ORDER BY CODIGO"
@@ -2712,6 +3272,7 @@ def buscar_produtos_por_filtro(codigo="", nome="", codigo_barras="", grupo="", m
         raise Exception(f"Erro ao buscar produtos: {str(e)}")
 # Adicione estas funções ao arquivo banco.py
 
+@verificacao_de_esquema
 def verificar_tabela_marcas():
     """
     Verifica se a tabela MARCAS existe e a cria se não existir
@@ -2789,6 +3350,7 @@ def verificar_tabela_marcas():
         print(f"Erro ao verificar/criar tabela: {e}")
         raise Exception(f"Erro ao verificar/criar tabela de marcas: {str(e)}")
 
+@verificacao_de_esquema
 def verificar_tabela_grupos():
     """
     Verifica se a tabela GRUPOS existe e a cria se não existir
@@ -2951,6 +3513,8 @@ def atualizar_marca(nome_antigo, nome_novo):
         bool: True se a operação foi bem-sucedida
     """
     try:
+        from base import eventos
+        
         # Verificar se a marca existe
         query_check = """
         SELECT COUNT(*) FROM MARCAS
@@ -2984,6 +3548,7 @@ def atualizar_marca(nome_antigo, nome_novo):
         WHERE UPPER(MARCA) = UPPER(?)
         """
         execute_query(query_update_produtos, (nome_novo, nome_antigo))
+        _publicar(eventos.PRODUTO_ALTERADO, id_produto=None, acao=eventos.ALTERADO)
         
         print(f"Marca atualizada de '{nome_antigo}' para '{nome_novo}'")
         return True
@@ -3002,6 +3567,8 @@ def excluir_marca(nome):
         bool: True se a operação foi bem-sucedida
     """
     try:
+        from base import eventos
+        
         # Verificar se a marca existe
         query_check = """
         SELECT COUNT(*) FROM MARCAS
@@ -3028,6 +3595,7 @@ def excluir_marca(nome):
             WHERE UPPER(MARCA) = UPPER(?)
             """
             execute_query(query_update_produtos, (nome,))
+            _publicar(eventos.PRODUTO_ALTERADO, id_produto=None, acao=eventos.ALTERADO)
             print(f"Atualizado {result[0][0]} produtos que usavam a marca '{nome}'")
         
         # Excluir a marca
@@ -3089,6 +3657,8 @@ def atualizar_grupo(nome_antigo, nome_novo):
         bool: True se a operação foi bem-sucedida
     """
     try:
+        from base import eventos
+        
         # Verificar se o grupo existe
         query_check = """
         SELECT COUNT(*) FROM GRUPOS
@@ -3122,6 +3692,7 @@ def atualizar_grupo(nome_antigo, nome_novo):
         WHERE UPPER(GRUPO) = UPPER(?)
         """
         execute_query(query_update_produtos, (nome_novo, nome_antigo))
+        _publicar(eventos.PRODUTO_ALTERADO, id_produto=None, acao=eventos.ALTERADO)
         
         print(f"Grupo atualizado de '{nome_antigo}' para '{nome_novo}'")
         return True
@@ -3140,6 +3711,8 @@ def excluir_grupo(nome):
         bool: True se a operação foi bem-sucedida
     """
     try:
+        from base import eventos
+        
         # Verificar se o grupo existe
         query_check = """
         SELECT COUNT(*) FROM GRUPOS
@@ -3166,6 +3739,7 @@ def excluir_grupo(nome):
             WHERE UPPER(GRUPO) = UPPER(?)
             """
             execute_query(query_update_produtos, (nome,))
+            _publicar(eventos.PRODUTO_ALTERADO, id_produto=None, acao=eventos.ALTERADO)
             print(f"Atualizado {result[0][0]} produtos que usavam o grupo '{nome}'")
         
         # Excluir o grupo
@@ -3183,6 +3757,7 @@ def excluir_grupo(nome):
 
 
 
+@verificacao_de_esquema
 def verificar_tabela_fornecedores():
     """
     Verifica se a tabela FORNECEDORES existe e a cria se não existir
@@ -3373,11 +3948,8 @@ def criar_fornecedor(codigo, nome, fantasia=None, tipo=None, cnpj=None,
         int: ID do fornecedor criado
     """
     try:
-        # Gerar código automático baseado no próximo ID
-        query_nextid = """
-        SELECT COALESCE(MAX(ID), 0) + 1 FROM FORNECEDORES
-        """
-        next_id = execute_query(query_nextid)[0][0]
+        # Gerar código automático reservando o próximo ID no gerador
+        next_id = proximo_id('FORNECEDORES')
         codigo_gerado = str(next_id)  # Usamos o ID como código
         
         # Sanitizar e converter dados
@@ -3416,24 +3988,19 @@ def criar_fornecedor(codigo, nome, fantasia=None, tipo=None, cnpj=None,
         # Inserir o fornecedor com o código gerado
         query = """
         INSERT INTO FORNECEDORES (
-            CODIGO, NOME, FANTASIA, TIPO, CNPJ,
+            ID, CODIGO, NOME, FANTASIA, TIPO, CNPJ,
             DATA_CADASTRO, CEP, RUA, BAIRRO, CIDADE, ESTADO
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """
         
         params = (
-            codigo_gerado, nome, fantasia, tipo, cnpj_limpo,
+            next_id, codigo_gerado, nome, fantasia, tipo, cnpj_limpo,
             data_cadastro, cep, rua, bairro, cidade, estado
         )
         
         execute_query(query, params)
         
-        # Retornar o ID do fornecedor inserido
-        fornecedor_inserido = buscar_fornecedor_por_codigo(codigo_gerado)
-        if fornecedor_inserido:
-            return fornecedor_inserido[0]  # ID é o primeiro item da tupla
-        
-        return None
+        return next_id
     except Exception as e:
         print(f"Erro ao criar fornecedor: {e}")
         raise Exception(f"Erro ao criar fornecedor: {str(e)}")
@@ -3444,6 +4011,7 @@ def criar_fornecedor(codigo, nome, fantasia=None, tipo=None, cnpj=None,
 
 def mostrar_mensagem(self, titulo, texto):
     """Exibe uma caixa de mensagem"""
+    from PyQt5.QtWidgets import QMessageBox
     msg_box = QMessageBox()
     if "Aviso" in titulo:
         msg_box.setIcon(QMessageBox.Warning)
@@ -3692,13 +4260,14 @@ def buscar_fornecedores_por_filtro(codigo="", nome="", cnpj="", tipo=""):
     
     Args:
         codigo (str, optional): Código do fornecedor
-        nome (str, optional): Nome do fornecedor (busca parcial)
-        cnpj (str, optional): CNPJ do fornecedor (busca parcial)
+        nome (str, optional): Início do nome do fornecedor (com * no início, qualquer parte)
+        cnpj (str, optional): CNPJ do fornecedor (completo ou início)
         tipo (str, optional): Tipo do fornecedor
         
     Returns:
         list: Lista de fornecedores que correspondem aos filtros
     """
+    from base.filtros import aplicar, filtro_documento, filtro_igual, filtro_texto
     try:
         # Construir consulta SQL base
         query = """
@@ -3711,20 +4280,10 @@ def buscar_fornecedores_por_filtro(codigo="", nome="", cnpj="", tipo=""):
         params = []
         
         # Adicionar condições conforme os filtros fornecidos
-        if codigo:
-            query += " AND CODIGO = ?"
-            params.append(codigo)
-            
-        if nome:
-            query += " AND UPPER(NOME) LIKE UPPER(?)"
-            params.append(f"%{nome}%")  # Busca parcial, case-insensitive
-            
-        if cnpj:
-            # Remover caracteres não numéricos para busca
-            cnpj_limpo = ''.join(filter(str.isdigit, cnpj))
-            if cnpj_limpo:
-                query += " AND CNPJ LIKE ?"
-                params.append(f"%{cnpj_limpo}%")
+        # Condições que usam os índices das pesquisas (ver base.filtros)
+        query = aplicar(query, params, filtro_igual("CODIGO", codigo))
+        query = aplicar(query, params, filtro_texto("NOME", nome))
+        query = aplicar(query, params, filtro_documento("CNPJ", cnpj))
         
         # Filtrar pelo tipo de fornecedor
         if tipo and tipo != "Todos":
@@ -3742,6 +4301,7 @@ def buscar_fornecedores_por_filtro(codigo="", nome="", cnpj="", tipo=""):
         print(f"Erro ao buscar fornecedores por filtro: {e}")
         raise Exception(f"Erro ao buscar fornecedores: {str(e)}")
 
+@verificacao_de_esquema
 def verificar_tabela_tipos_fornecedores():
     """
     Verifica se a tabela TIPOS_FORNECEDORES existe e a cria se não existir
@@ -3979,6 +4539,7 @@ def excluir_tipo_fornecedor(id_tipo):
 
 # Adicione estas funções ao seu arquivo banco.py
 
+@verificacao_de_esquema
 def verificar_tabela_pedidos_venda():
     """
     Verifica se a tabela PEDIDOS_VENDA existe e a cria se não existir
@@ -4152,10 +4713,6 @@ def criar_pedido(id=None, cliente=None, cliente_id=None, vendedor=None, vendedor
         # Gerar o próximo número de pedido
         numero_pedido = gerar_numero_pedido()
         
-        # Gerar ID explícito
-        query_id = "SELECT COALESCE(MAX(ID), 0) + 1 FROM PEDIDOS_VENDA"
-        proximo_id = execute_query(query_id)[0][0]
-        
         # Sanitizar e converter dados
         cliente = str(cliente).strip()[:100]
         vendedor = str(vendedor).strip()[:100]
@@ -4182,20 +4739,20 @@ def criar_pedido(id=None, cliente=None, cliente_id=None, vendedor=None, vendedor
                 print(f"Erro ao converter data: {e}")
                 data_pedido = None
         
-        # Inserir o pedido com ID explícito
+        # Inserir o pedido (ID gerado pelo gerador da tabela)
         query = """
         INSERT INTO PEDIDOS_VENDA (
-            ID, NUMERO_PEDIDO, CLIENTE, CLIENTE_ID, VENDEDOR, VENDEDOR_ID,
+            NUMERO_PEDIDO, CLIENTE, CLIENTE_ID, VENDEDOR, VENDEDOR_ID,
             VALOR, PRODUTO, PRODUTO_ID, DATA_PEDIDO, CIDADE, STATUS, OBSERVACAO
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """
         
         params = (
-            proximo_id, numero_pedido, cliente, cliente_id, vendedor, vendedor_id,
+            numero_pedido, cliente, cliente_id, vendedor, vendedor_id,
             valor_float, produto, produto_id, data_pedido, cidade, status, observacao
         )
         
-        execute_query(query, params)
+        inserir_retornando_id(query, params)
         
         return numero_pedido
     except Exception as e:
@@ -4352,9 +4909,9 @@ def buscar_pedidos_por_filtro(vendedor="", cliente="", cidade="", data_inicial=N
     Busca pedidos de venda no banco de dados com base em filtros específicos
     
     Args:
-        vendedor (str, optional): Nome do vendedor (busca parcial)
-        cliente (str, optional): Nome do cliente (busca parcial)
-        cidade (str, optional): Cidade do cliente (busca parcial)
+        vendedor (str, optional): Início do nome do vendedor (com * no início, qualquer parte)
+        cliente (str, optional): Início do nome do cliente (com * no início, qualquer parte)
+        cidade (str, optional): Início da cidade do cliente (com * no início, qualquer parte)
         data_inicial (date, optional): Data inicial para filtro
         data_final (date, optional): Data final para filtro
         status (str, optional): Status do pedido
@@ -4362,6 +4919,7 @@ def buscar_pedidos_por_filtro(vendedor="", cliente="", cidade="", data_inicial=N
     Returns:
         list: Lista de pedidos que correspondem aos filtros
     """
+    from base.filtros import aplicar, filtro_texto
     try:
         # Construir consulta SQL base
         query = """
@@ -4374,17 +4932,10 @@ def buscar_pedidos_por_filtro(vendedor="", cliente="", cidade="", data_inicial=N
         params = []
         
         # Adicionar condições conforme os filtros fornecidos
-        if vendedor:
-            query += " AND UPPER(VENDEDOR) LIKE UPPER(?)"
-            params.append(f"%{vendedor}%")  # Busca parcial, case-insensitive
-            
-        if cliente:
-            query += " AND UPPER(CLIENTE) LIKE UPPER(?)"
-            params.append(f"%{cliente}%")  # Busca parcial, case-insensitive
-            
-        if cidade:
-            query += " AND UPPER(CIDADE) LIKE UPPER(?)"
-            params.append(f"%{cidade}%")  # Busca parcial, case-insensitive
+        # Condições que usam os índices das pesquisas (ver base.filtros)
+        query = aplicar(query, params, filtro_texto("VENDEDOR", vendedor))
+        query = aplicar(query, params, filtro_texto("CLIENTE", cliente))
+        query = aplicar(query, params, filtro_texto("CIDADE", cidade))
             
         if data_inicial:
             # Converter data para formato do banco (se for string)
@@ -4492,6 +5043,7 @@ def obter_cidades_pedidos():
 
 # Adicione estas funções ao arquivo base/banco.py
 
+@verificacao_de_esquema
 def verificar_tabela_recebimentos_clientes():
     """
     Verifica se a tabela RECEBIMENTOS_CLIENTES existe e a cria se não existir
@@ -4674,10 +5226,6 @@ def dar_baixa_recebimento(id_recebimento, valor_pago, data_pagamento, criar_novo
     try:
         # Se deve criar um novo registro para o pagamento
         if criar_novo:
-            # Gerar ID explícito para o registro de pagamento
-            query_id = "SELECT COALESCE(MAX(ID), 0) + 1 FROM RECEBIMENTOS_CLIENTES"
-            proximo_id = execute_query(query_id)[0][0]
-            
             # Buscar dados do recebimento original
             recebimento = buscar_recebimento_por_id(id_recebimento)
             if not recebimento:
@@ -4691,15 +5239,16 @@ def dar_baixa_recebimento(id_recebimento, valor_pago, data_pagamento, criar_novo
             # Inserir registro de pagamento
             query = """
             INSERT INTO RECEBIMENTOS_CLIENTES (
-                ID, CODIGO, CLIENTE, CLIENTE_ID, VENCIMENTO, VALOR, DATA_RECEBIMENTO, STATUS
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, 'Recebido')
+                CODIGO, CLIENTE, CLIENTE_ID, VENCIMENTO, VALOR, DATA_RECEBIMENTO, STATUS
+            ) VALUES (?, ?, ?, ?, ?, ?, 'Recebido')
             """
             
             params = (
-                proximo_id, codigo, cliente, cliente_id, data_pagamento, valor_pago, data_pagamento
+                codigo, cliente, cliente_id, data_pagamento, valor_pago, data_pagamento
             )
             
-            execute_query(query, params)
+            # ID gerado pelo gerador da tabela
+            inserir_retornando_id(query, params)
             
             # Atualizar status do recebimento original
             query_update = """
@@ -4774,6 +5323,7 @@ def listar_recebimentos(filtro_status=None, data_inicial=None, data_final=None):
         print(f"Erro ao listar recebimentos: {e}")
         raise Exception(f"Erro ao listar recebimentos: {str(e)}")
     
+@verificacao_de_esquema
 def verificar_tabela_recebimentos_clientes():
     """Verifica se a tabela RECEBIMENTOS_CLIENTES existe e cria se necessário"""
     try:
@@ -5066,10 +5616,6 @@ def criar_recebimento(codigo, cliente, cliente_id=None, vencimento=None, valor=0
         int: ID do recebimento criado
     """
     try:
-        # Gerar ID explícito
-        query_id = "SELECT COALESCE(MAX(ID), 0) + 1 FROM RECEBIMENTOS_CLIENTES"
-        proximo_id = execute_query(query_id)[0][0]
-        
         # Sanitizar e converter dados
         codigo = str(codigo).strip()[:20]
         cliente = str(cliente).strip()[:100]
@@ -5091,18 +5637,18 @@ def criar_recebimento(codigo, cliente, cliente_id=None, vencimento=None, valor=0
                 print(f"Erro ao converter data: {e}")
                 vencimento = None
         
-        # Inserir o recebimento com ID explícito
+        # Inserir o recebimento (ID gerado pelo gerador da tabela)
         query = """
         INSERT INTO RECEBIMENTOS_CLIENTES (
-            ID, CODIGO, CLIENTE, CLIENTE_ID, VENCIMENTO, VALOR, STATUS
-        ) VALUES (?, ?, ?, ?, ?, ?, 'Pendente')
+            CODIGO, CLIENTE, CLIENTE_ID, VENCIMENTO, VALOR, STATUS
+        ) VALUES (?, ?, ?, ?, ?, 'Pendente')
         """
         
         params = (
-            proximo_id, codigo, cliente, cliente_id, vencimento, valor_float
+            codigo, cliente, cliente_id, vencimento, valor_float
         )
         
-        execute_query(query, params)
+        proximo_id = inserir_retornando_id(query, params)
         
         return proximo_id
     except Exception as e:
@@ -5305,12 +5851,10 @@ def dar_baixa_recebimento(id_recebimento, valor_pago, data_pagamento, criar_novo
         criar_novo (bool, optional): Se deve criar um novo registro para o pagamento. Defaults to True.
     """
     try:
+        from base import eventos
+        
         # Se deve criar um novo registro para o pagamento
         if criar_novo:
-            # Gerar ID explícito para o registro de pagamento
-            query_id = "SELECT COALESCE(MAX(ID), 0) + 1 FROM RECEBIMENTOS_CLIENTES"
-            proximo_id = execute_query(query_id)[0][0]
-            
             # Buscar dados do recebimento original
             recebimento = buscar_recebimento_por_id(id_recebimento)
             if not recebimento:
@@ -5324,15 +5868,16 @@ def dar_baixa_recebimento(id_recebimento, valor_pago, data_pagamento, criar_novo
             # Inserir registro de pagamento
             query = """
             INSERT INTO RECEBIMENTOS_CLIENTES (
-                ID, CODIGO, CLIENTE, CLIENTE_ID, VENCIMENTO, VALOR, DATA_RECEBIMENTO, STATUS
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, 'Recebido')
+                CODIGO, CLIENTE, CLIENTE_ID, VENCIMENTO, VALOR, DATA_RECEBIMENTO, STATUS
+            ) VALUES (?, ?, ?, ?, ?, ?, 'Recebido')
             """
             
             params = (
-                proximo_id, codigo, cliente, cliente_id, data_pagamento, valor_pago, data_pagamento
+                codigo, cliente, cliente_id, data_pagamento, valor_pago, data_pagamento
             )
             
-            execute_query(query, params)
+            # ID gerado pelo gerador da tabela
+            inserir_retornando_id(query, params)
             
             # Atualizar status do recebimento original
             query_update = """
@@ -5355,7 +5900,8 @@ def dar_baixa_recebimento(id_recebimento, valor_pago, data_pagamento, criar_novo
             """
             
             execute_query(query, (data_pagamento, valor_pago, data_pagamento, id_recebimento))
-            
+        
+        _publicar(eventos.RECEBIMENTO_BAIXADO, id_recebimento=id_recebimento, valor_pago=valor_pago)
         return True
     except Exception as e:
         print(f"Erro ao dar baixa no recebimento: {e}")
@@ -5575,10 +6121,6 @@ def criar_recebimento(codigo, cliente, cliente_id=None, vencimento=None, valor=0
         int: ID do recebimento criado
     """
     try:
-        # Gerar ID explícito
-        query_id = "SELECT COALESCE(MAX(ID), 0) + 1 FROM RECEBIMENTOS_CLIENTES"
-        proximo_id = execute_query(query_id)[0][0]
-        
         # Sanitizar e converter dados
         codigo = str(codigo).strip()[:20]
         cliente = str(cliente).strip()[:100]
@@ -5604,18 +6146,18 @@ def criar_recebimento(codigo, cliente, cliente_id=None, vencimento=None, valor=0
                 print(f"Erro ao converter data: {e}")
                 vencimento = None
         
-        # Inserir o recebimento com ID explícito
+        # Inserir o recebimento (ID gerado pelo gerador da tabela)
         query = """
         INSERT INTO RECEBIMENTOS_CLIENTES (
-            ID, CODIGO, CLIENTE, CLIENTE_ID, VENCIMENTO, VALOR, STATUS, VALOR_ORIGINAL
-        ) VALUES (?, ?, ?, ?, ?, ?, 'Pendente', ?)
+            CODIGO, CLIENTE, CLIENTE_ID, VENCIMENTO, VALOR, STATUS, VALOR_ORIGINAL
+        ) VALUES (?, ?, ?, ?, ?, 'Pendente', ?)
         """
         
         params = (
-            proximo_id, codigo, cliente, cliente_id, vencimento, valor_float, valor_original
+            codigo, cliente, cliente_id, vencimento, valor_float, valor_original
         )
         
-        execute_query(query, params)
+        proximo_id = inserir_retornando_id(query, params)
         
         return proximo_id
     except Exception as e:
@@ -5761,6 +6303,7 @@ def buscar_recebimento_por_codigo(codigo):
         return None
 def excluir(self):
     """Ação do botão excluir"""
+    from PyQt5.QtWidgets import QMessageBox
     selected_items = self.tabela.selectedItems()
     if not selected_items:
         self.mostrar_mensagem("Atenção", "Selecione um recebimento para excluir!")
@@ -5857,6 +6400,7 @@ def resetar_id_recebimentos():
         print(f"Erro ao resetar ID: {e}")
         raise Exception(f"Erro ao resetar ID: {str(e)}")
     
+@verificacao_de_esquema
 def verificar_e_corrigir_tabela_recebimentos():
     """Verifica e corrige a estrutura da tabela RECEBIMENTOS_CLIENTES, adicionando a coluna VALOR_ORIGINAL se necessário"""
     try:
@@ -5987,6 +6531,7 @@ def get_usuario_logado():
 
 # Funções para o sistema de caixa
 
+@verificacao_de_esquema
 def verificar_tabelas_caixa():
     """
     Verifica se as tabelas do sistema de caixa existem e as cria se não existirem
@@ -6153,6 +6698,8 @@ def abrir_caixa(codigo, data_abertura, hora_abertura, valor_abertura, estacao, o
         int: ID do caixa aberto
     """
     try:
+        from base import eventos
+        
         # Verificar se o usuário está logado
         if not usuario_logado["id"]:
             raise Exception("Nenhum usuário logado. Faça login antes de abrir o caixa.")
@@ -6171,43 +6718,38 @@ def abrir_caixa(codigo, data_abertura, hora_abertura, valor_abertura, estacao, o
         data_parts = data_abertura.split('/')
         data_iso = f"{data_parts[2]}-{data_parts[1]}-{data_parts[0]}"
         
-        # Inserir registro de abertura de caixa
-        query_insert = """
-        INSERT INTO CAIXA_CONTROLE (
-            CODIGO, DATA_ABERTURA, HORA_ABERTURA, VALOR_ABERTURA, 
-            ESTACAO, ID_USUARIO, USUARIO, STATUS, OBSERVACAO_ABERTURA
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, 'A', ?)
-        """
-        execute_query(query_insert, (
-            codigo, data_iso, hora_abertura, valor_abertura,
-            estacao, usuario_logado["id"], usuario_logado["nome"], observacao
-        ))
-        
-        # Obter o ID do caixa recém-aberto
-        query_id = """
-        SELECT MAX(ID) FROM CAIXA_CONTROLE 
-        WHERE CODIGO = ? AND STATUS = 'A'
-        """
-        result = execute_query(query_id, (codigo,))
-        
-        if result and len(result) > 0 and result[0][0]:
-            caixa_id = result[0][0]
-            
-            # Registrar a entrada inicial como movimento
-            if valor_abertura > 0:
-                registrar_movimento(
-                    id_caixa=caixa_id,
-                    tipo='E',  # Entrada
-                    data=data_abertura,
-                    hora=hora_abertura,
-                    valor=valor_abertura,
-                    motivo="Abertura de Caixa",
-                    observacao=observacao
-                )
+        # Caixa e movimento de abertura gravados na mesma transação
+        with transacao():
+            # Inserir registro de abertura de caixa
+            query_insert = """
+            INSERT INTO CAIXA_CONTROLE (
+                CODIGO, DATA_ABERTURA, HORA_ABERTURA, VALOR_ABERTURA, 
+                ESTACAO, ID_USUARIO, USUARIO, STATUS, OBSERVACAO_ABERTURA
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, 'A', ?)
+            """
+            caixa_id = inserir_retornando_id(query_insert, (
+                codigo, data_iso, hora_abertura, valor_abertura,
+                estacao, usuario_logado["id"], usuario_logado["nome"], observacao
+            ))
             
-            return caixa_id
-        else:
-            raise Exception("Erro ao obter o ID do caixa aberto.")
+            if caixa_id:
+                
+                # Registrar a entrada inicial como movimento
+                if valor_abertura > 0:
+                    registrar_movimento(
+                        id_caixa=caixa_id,
+                        tipo='E',  # Entrada
+                        data=data_abertura,
+                        hora=hora_abertura,
+                        valor=valor_abertura,
+                        motivo="Abertura de Caixa",
+                        observacao=observacao
+                    )
+                
+                _publicar(eventos.CAIXA_ABERTO, id_caixa=caixa_id, estacao=estacao)
+                return caixa_id
+            else:
+                raise Exception("Erro ao obter o ID do caixa aberto.")
     except Exception as e:
         print(f"Erro ao abrir caixa: {e}")
         raise Exception(f"Erro ao abrir caixa: {str(e)}")
@@ -6227,6 +6769,8 @@ def fechar_caixa(id_caixa, data_fechamento, hora_fechamento, valor_fechamento, o
         bool: True se o caixa foi fechado com sucesso
     """
     try:
+        from base import eventos
+        
         # Verificar se o usuário está logado
         if not usuario_logado["id"]:
             raise Exception("Nenhum usuário logado. Faça login antes de fechar o caixa.")
@@ -6248,40 +6792,44 @@ def fechar_caixa(id_caixa, data_fechamento, hora_fechamento, valor_fechamento, o
         data_parts = data_fechamento.split('/')
         data_iso = f"{data_parts[2]}-{data_parts[1]}-{data_parts[0]}"
         
-        # Atualizar registro para fechar o caixa
-        query_update = """
-        UPDATE CAIXA_CONTROLE SET
-            DATA_FECHAMENTO = ?,
-            HORA_FECHAMENTO = ?,
-            VALOR_FECHAMENTO = ?,
-            STATUS = 'F',
-            OBSERVACAO_FECHAMENTO = ?
-        WHERE ID = ?
-        """
-        execute_query(query_update, (
-            data_iso, hora_fechamento, valor_fechamento,
-            observacao, id_caixa
-        ))
-        
-        # Registrar o fechamento como movimento (se houver diferença)
-        diferenca = valor_fechamento - valor_abertura
-        
-        if diferenca != 0:
-            tipo = 'E' if diferenca > 0 else 'S'  # Entrada ou Saída
-            valor_movimento = abs(diferenca)
-            motivo = "Fechamento de Caixa"
-            
-            registrar_movimento(
-                id_caixa=id_caixa,
-                tipo=tipo,
-                data=data_fechamento,
-                hora=hora_fechamento,
-                valor=valor_movimento,
-                motivo=motivo,
-                observacao=observacao
-            )
-        
-        return True
+        # Fechamento e movimento de diferença gravados na mesma transação
+        with transacao():
+            # Registrar o fechamento como movimento (se houver diferença)
+            # antes de mudar o status, pois o movimento exige o caixa aberto
+            diferenca = valor_fechamento - valor_abertura
+            
+            if diferenca != 0:
+                tipo = 'E' if diferenca > 0 else 'S'  # Entrada ou Saída
+                valor_movimento = abs(diferenca)
+                motivo = "Fechamento de Caixa"
+                
+                registrar_movimento(
+                    id_caixa=id_caixa,
+                    tipo=tipo,
+                    data=data_fechamento,
+                    hora=hora_fechamento,
+                    valor=valor_movimento,
+                    motivo=motivo,
+                    observacao=observacao
+                )
+            
+            # Atualizar registro para fechar o caixa
+            query_update = """
+            UPDATE CAIXA_CONTROLE SET
+                DATA_FECHAMENTO = ?,
+                HORA_FECHAMENTO = ?,
+                VALOR_FECHAMENTO = ?,
+                STATUS = 'F',
+                OBSERVACAO_FECHAMENTO = ?
+            WHERE ID = ?
+            """
+            execute_query(query_update, (
+                data_iso, hora_fechamento, valor_fechamento,
+                observacao, id_caixa
+            ))
+            
+            _publicar(eventos.CAIXA_FECHADO, id_caixa=id_caixa)
+            return True
     except Exception as e:
         print(f"Erro ao fechar caixa: {e}")
         raise Exception(f"Erro ao fechar caixa: {str(e)}")
@@ -6308,43 +6856,38 @@ def registrar_movimento(id_caixa, tipo, data, hora, valor, motivo, observacao=No
         if not usuario_logado["id"]:
             raise Exception("Nenhum usuário logado. Faça login antes de registrar movimentos.")
         
-        # Verificar se o caixa existe e está aberto
-        query_check = """
-        SELECT ID FROM CAIXA_CONTROLE 
-        WHERE ID = ? AND STATUS = 'A'
-        """
-        result = execute_query(query_check, (id_caixa,))
-        
-        if not result or len(result) == 0:
-            raise Exception(f"Caixa com ID {id_caixa} não encontrado ou já está fechado.")
-        
-        # Converter data para o formato do banco (YYYY-MM-DD)
-        data_parts = data.split('/')
-        data_iso = f"{data_parts[2]}-{data_parts[1]}-{data_parts[0]}"
-        
-        # Inserir registro de movimento
-        query_insert = """
-        INSERT INTO CAIXA_MOVIMENTOS (
-            ID_CAIXA, TIPO, DATA, HORA, VALOR, 
-            MOTIVO, ID_USUARIO, USUARIO, OBSERVACAO
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """
-        execute_query(query_insert, (
-            id_caixa, tipo, data_iso, hora, valor,
-            motivo, usuario_logado["id"], usuario_logado["nome"], observacao
-        ))
-        
-        # Obter o ID do movimento recém-registrado
-        query_id = """
-        SELECT MAX(ID) FROM CAIXA_MOVIMENTOS 
-        WHERE ID_CAIXA = ?
-        """
-        result = execute_query(query_id, (id_caixa,))
-        
-        if result and len(result) > 0 and result[0][0]:
-            return result[0][0]
-        else:
-            raise Exception("Erro ao obter o ID do movimento registrado.")
+        # Verificação, inserção e leitura do ID na mesma conexão
+        with transacao():
+            # Verificar se o caixa existe e está aberto
+            query_check = """
+            SELECT ID FROM CAIXA_CONTROLE 
+            WHERE ID = ? AND STATUS = 'A'
+            """
+            result = execute_query(query_check, (id_caixa,))
+            
+            if not result or len(result) == 0:
+                raise Exception(f"Caixa com ID {id_caixa} não encontrado ou já está fechado.")
+            
+            # Converter data para o formato do banco (YYYY-MM-DD)
+            data_parts = data.split('/')
+            data_iso = f"{data_parts[2]}-{data_parts[1]}-{data_parts[0]}"
+            
+            # Inserir registro de movimento
+            query_insert = """
+            INSERT INTO CAIXA_MOVIMENTOS (
+                ID_CAIXA, TIPO, DATA, HORA, VALOR, 
+                MOTIVO, ID_USUARIO, USUARIO, OBSERVACAO
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """
+            movimento_id = inserir_retornando_id(query_insert, (
+                id_caixa, tipo, data_iso, hora, valor,
+                motivo, usuario_logado["id"], usuario_logado["nome"], observacao
+            ))
+            
+            if movimento_id:
+                return movimento_id
+            else:
+                raise Exception("Erro ao obter o ID do movimento registrado.")
     except Exception as e:
         print(f"Erro ao registrar movimento: {e}")
         raise Exception(f"Erro ao registrar movimento: {str(e)}")
@@ -6581,6 +7124,7 @@ def obter_proximo_codigo_caixa():
 #Baco de relatorio de vendas
 # Funções para o sistema de relatório de vendas de produtos
 
+@verificacao_de_esquema
 def verificar_tabela_vendas_produtos():
     """
     Verifica se as tabelas do sistema de vendas de produtos existem e as cria se não existirem
@@ -6668,6 +7212,143 @@ def verificar_tabela_vendas_produtos():
         print(f"Erro ao verificar/criar tabelas de vendas de produtos: {e}")
         raise Exception(f"Erro ao verificar/criar tabelas de vendas de produtos: {str(e)}")
 
+# Máximo de parâmetros em um IN (o Firebird aceita até 1500)
+LIMITE_ITENS_IN = 1000
+
+def _colunas_estoque():
+    """Colunas reais de código, nome e estoque da tabela PRODUTOS"""
+    from base.esquema import registro_esquema
+    return (
+        registro_esquema.coluna('PRODUTOS', 'codigo_produto', 'CODIGO'),
+        registro_esquema.coluna('PRODUTOS', 'nome_produto', 'NOME'),
+        registro_esquema.coluna('PRODUTOS', 'estoque', 'QUANTIDADE_ESTOQUE'),
+    )
+
+def _sql_baixa_estoque():
+    """
+    UPDATE que baixa o estoque de um produto somente se houver saldo suficiente
+    
+    A conferência e a baixa acontecem na mesma instrução, então duas estações
+    vendendo o mesmo produto ao mesmo tempo não conseguem deixá-lo negativo.
+    """
+    from base.esquema import registro_esquema
+    codigo, nome, estoque = _colunas_estoque()
+    id_col = registro_esquema.coluna('PRODUTOS', 'id', 'ID')
+    return registro_esquema.sql('banco_baixa_estoque', lambda: f"""
+        UPDATE PRODUTOS
+        SET {estoque} = COALESCE({estoque}, 0) - ?
+        WHERE {codigo} = ? AND COALESCE({estoque}, 0) >= ?
+        RETURNING {id_col}, {nome}, {estoque}
+        """)
+
+def _agrupar_itens(itens):
+    """
+    Soma as quantidades de itens repetidos
+    
+    Args:
+        itens (list): Pares (código do produto, quantidade)
+        
+    Returns:
+        dict: Código -> quantidade total, na ordem em que apareceram
+    """
+    agrupados = {}
+    for codigo, quantidade in itens:
+        codigo = str(codigo).strip()
+        agrupados[codigo] = agrupados.get(codigo, 0) + quantidade
+    return agrupados
+
+def verificar_estoque_itens(itens):
+    """
+    Confere o estoque de todos os itens de uma venda com uma única consulta
+    
+    Args:
+        itens (list): Pares (código do produto, quantidade)
+        
+    Returns:
+        list: Dicionários com codigo, nome, disponivel e solicitado dos itens
+              sem saldo suficiente (disponivel é None se o produto não existe)
+    """
+    try:
+        agrupados = _agrupar_itens(itens)
+        if not agrupados:
+            return []
+        
+        codigo_col, nome_col, estoque_col = _colunas_estoque()
+        encontrados = {}
+        codigos = list(agrupados)
+        for inicio in range(0, len(codigos), LIMITE_ITENS_IN):
+            lote = codigos[inicio:inicio + LIMITE_ITENS_IN]
+            query = f"""
+            SELECT {codigo_col}, {nome_col}, COALESCE({estoque_col}, 0)
+            FROM PRODUTOS
+            WHERE {codigo_col} IN ({', '.join('?' for _ in lote)})
+            """
+            for codigo, nome, estoque in execute_query(query, tuple(lote)):
+                encontrados[str(codigo).strip()] = (nome, float(estoque))
+        
+        faltas = []
+        for codigo, solicitado in agrupados.items():
+            nome, disponivel = encontrados.get(codigo, (None, None))
+            if disponivel is None or disponivel < solicitado:
+                faltas.append({
+                    "codigo": codigo,
+                    "nome": nome,
+                    "disponivel": disponivel,
+                    "solicitado": solicitado
+                })
+        return faltas
+    except Exception as e:
+        print(f"Erro ao verificar estoque dos itens: {e}")
+        raise Exception(f"Erro ao verificar estoque dos itens: {str(e)}")
+
+def baixar_estoque_itens(itens, permitir_negativo=False):
+    """
+    Baixa o estoque de todos os itens de uma venda em uma única transação
+    
+    Cada produto recebe um UPDATE condicionado ao saldo disponível. Os itens
+    sem saldo não são baixados (a não ser com permitir_negativo) e são
+    devolvidos na lista de faltas. Se já houver uma transação aberta (por
+    exemplo, o registro da venda), a baixa participa dela.
+    
+    Args:
+        itens (list): Pares (código do produto, quantidade)
+        permitir_negativo (bool): Baixar mesmo sem saldo (venda já autorizada)
+        
+    Returns:
+        list: Itens sem saldo suficiente, no formato de verificar_estoque_itens
+    """
+    try:
+        agrupados = _agrupar_itens(itens)
+        if not agrupados:
+            return []
+        
+        query_baixa = _sql_baixa_estoque()
+        sem_saldo = []
+        with transacao() as tx:
+            for codigo, quantidade in agrupados.items():
+                if tx.executar_retornando(query_baixa, (quantidade, codigo, quantidade)) is None:
+                    sem_saldo.append((codigo, quantidade))
+            
+            if not sem_saldo:
+                return []
+            
+            faltas = verificar_estoque_itens(sem_saldo)
+            
+            if permitir_negativo:
+                codigo_col, _, estoque_col = _colunas_estoque()
+                tx.executemany(f"""
+                    UPDATE PRODUTOS
+                    SET {estoque_col} = COALESCE({estoque_col}, 0) - ?
+                    WHERE {codigo_col} = ?
+                    """, [(falta["solicitado"], falta["codigo"])
+                          for falta in faltas if falta["disponivel"] is not None])
+        
+        print(f"Itens sem estoque suficiente: {[f['codigo'] for f in faltas]}")
+        return faltas
+    except Exception as e:
+        print(f"Erro ao baixar estoque dos itens: {e}")
+        raise Exception(f"Erro ao baixar estoque dos itens: {str(e)}")
+
 def atualizar_estoque_apos_venda(codigo_produto, quantidade_vendida):
     """
     Atualiza o estoque de um produto após uma venda
@@ -6681,34 +7362,24 @@ def atualizar_estoque_apos_venda(codigo_produto, quantidade_vendida):
         dict: Informações sobre o estoque após a atualização, incluindo avisos se necessário
     """
     try:
-        # Buscar o produto pelo código
-        produto = buscar_produto_por_codigo(codigo_produto)
+        # Conferência e baixa em uma única instrução
+        with transacao() as tx:
+            produto = tx.executar_retornando(
+                _sql_baixa_estoque(), (quantidade_vendida, codigo_produto, quantidade_vendida))
         
         if not produto:
+            faltas = verificar_estoque_itens([(codigo_produto, quantidade_vendida)])
+            if faltas and faltas[0]["disponivel"] is not None:
+                raise Exception(f"Estoque insuficiente. Disponível: {faltas[0]['disponivel']}, Solicitado: {quantidade_vendida}")
             raise Exception(f"Produto com código {codigo_produto} não encontrado")
         
-        # Obter o estoque atual e calcular o novo estoque
-        id_produto = produto[0]
-        estoque_atual = produto[8] or 0  # Índice 8 é QUANTIDADE_ESTOQUE
-        
-        if estoque_atual < quantidade_vendida:
-            raise Exception(f"Estoque insuficiente. Disponível: {estoque_atual}, Solicitado: {quantidade_vendida}")
-        
-        novo_estoque = estoque_atual - quantidade_vendida
-        
-        # Atualizar o estoque do produto
-        query = """
-        UPDATE PRODUTOS
-        SET QUANTIDADE_ESTOQUE = ?
-        WHERE ID = ?
-        """
-        
-        execute_query(query, (novo_estoque, id_produto))
+        id_produto, nome_produto, novo_estoque = produto
+        estoque_atual = novo_estoque + quantidade_vendida
         
         # Verificar se o estoque está baixo
         resultado = {
             "sucesso": True,
-            "produto": produto[2],  # Nome do produto
+            "produto": nome_produto,
             "estoque_anterior": estoque_atual,
             "estoque_atual": novo_estoque,
             "estoque_baixo": False,
@@ -6720,10 +7391,10 @@ def atualizar_estoque_apos_venda(codigo_produto, quantidade_vendida):
         
         if novo_estoque <= limite_estoque_baixo:
             resultado["estoque_baixo"] = True
-            resultado["mensagem"] = f"ATENÇÃO: Estoque baixo para o produto {produto[2]}. Restam apenas {novo_estoque} unidades. É necessário repor!"
+            resultado["mensagem"] = f"ATENÇÃO: Estoque baixo para o produto {nome_produto}. Restam apenas {novo_estoque} unidades. É necessário repor!"
             
             # Registrar o alerta de estoque baixo (opcional)
-            registrar_alerta_estoque_baixo(produto[0], produto[2], novo_estoque)
+            registrar_alerta_estoque_baixo(id_produto, nome_produto, novo_estoque)
         
         return resultado
     
@@ -6879,6 +7550,8 @@ def registrar_venda_produto(data, codigo_produto, produto, categoria, quantidade
         int: ID da venda registrada
     """
     try:
+        from base.vendas_diarias import acumular
+        
         # Inserir a venda
         query = """
         INSERT INTO VENDAS_PRODUTOS (
@@ -6887,19 +7560,14 @@ def registrar_venda_produto(data, codigo_produto, produto, categoria, quantidade
         ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
         """
         
-        execute_query(query, (
-            data, codigo_produto, produto, categoria, quantidade,
-            valor_unitario, valor_total, cliente, vendedor
-        ))
-        
-        # Obter o ID da venda recém-registrada
-        query_id = "SELECT MAX(ID) FROM VENDAS_PRODUTOS"
-        result = execute_query(query_id)
-        
-        if result and len(result) > 0 and result[0][0]:
-            return result[0][0]
-        
-        return None
+        # A venda e o resumo diário dos relatórios em uma única transação
+        with transacao():
+            id_venda = inserir_retornando_id(query, (
+                data, codigo_produto, produto, categoria, quantidade,
+                valor_unitario, valor_total, cliente, vendedor
+            ))
+            acumular(data, [(codigo_produto, produto, categoria, quantidade, valor_total)])
+        return id_venda
     except Exception as e:
         print(f"Erro ao registrar venda: {e}")
         raise Exception(f"Erro ao registrar venda: {str(e)}")
@@ -6917,11 +7585,12 @@ def obter_vendas_por_periodo(data_inicial, data_final, categoria=None):
         list: Lista de dicionários com os dados das vendas
     """
     try:
-        # Construir a query
+        # Resumo diário (VENDAS_DIARIAS_PRODUTO): uma linha por dia e produto,
+        # somando as estações
         query = """
         SELECT 
-            PRODUTO, CATEGORIA, DATA, QUANTIDADE, VALOR_TOTAL
-        FROM VENDAS_PRODUTOS
+            MAX(PRODUTO), MAX(CATEGORIA), DATA, SUM(QUANTIDADE), SUM(VALOR_TOTAL)
+        FROM VENDAS_DIARIAS_PRODUTO
         WHERE DATA BETWEEN ? AND ?
         """
         
@@ -6933,7 +7602,7 @@ def obter_vendas_por_periodo(data_inicial, data_final, categoria=None):
             params.append(categoria)
         
         # Ordenar por data e produto
-        query += " ORDER BY DATA, PRODUTO"
+        query += " GROUP BY DATA, CODIGO_PRODUTO ORDER BY 3, 1"
         
         # Executar a query
         result = execute_query(query, tuple(params))
@@ -6967,14 +7636,14 @@ def obter_resumo_vendas_por_periodo(data_inicial, data_final, categoria=None):
         list: Lista de dicionários com o resumo das vendas
     """
     try:
-        # Construir a query
+        # Somas já prontas do resumo diário (VENDAS_DIARIAS_PRODUTO)
         query = """
         SELECT 
-            PRODUTO, CATEGORIA, 
+            MAX(PRODUTO), CATEGORIA, 
             SUM(QUANTIDADE) as QUANTIDADE_TOTAL, 
             SUM(VALOR_TOTAL) as VALOR_TOTAL,
-            COUNT(*) as NUM_VENDAS
-        FROM VENDAS_PRODUTOS
+            SUM(NUM_VENDAS) as NUM_VENDAS
+        FROM VENDAS_DIARIAS_PRODUTO
         WHERE DATA BETWEEN ? AND ?
         """
         
@@ -6986,7 +7655,7 @@ def obter_resumo_vendas_por_periodo(data_inicial, data_final, categoria=None):
             params.append(categoria)
         
         # Agrupar por produto e categoria
-        query += " GROUP BY PRODUTO, CATEGORIA"
+        query += " GROUP BY CODIGO_PRODUTO, CATEGORIA"
         
         # Ordenar por quantidade total (decrescente)
         query += " ORDER BY QUANTIDADE_TOTAL DESC"
@@ -7013,6 +7682,7 @@ def obter_resumo_vendas_por_periodo(data_inicial, data_final, categoria=None):
 #Conta Corrente
 # Add this function to your banco.py file
 
+@verificacao_de_esquema
 def verificar_tabela_contas_correntes():
     """
     Verifica se a tabela CONTAS_CORRENTES existe e a cria se não existir
@@ -7373,6 +8043,7 @@ def filtrar_contas_correntes(codigo="", descricao=""):
         raise Exception(f"Erro ao filtrar contas correntes: {str(e)}")
 
 #Classes Financeiras 
+@verificacao_de_esquema
 def verificar_tabela_classes_financeiras():
     """
     Verifica se a tabela CLASSES_FINANCEIRAS existe e a cria se não existir
@@ -7615,6 +8286,7 @@ def excluir_classe_financeira(id_classe):
         raise Exception(f"Erro ao excluir classe financeira: {str(e)}")
 
 #Impressora 
+@verificacao_de_esquema
 def verificar_tabela_configuracao_impressoras():
     """
     Verifica se a tabela CONFIGURACAO_IMPRESSORAS existe e a cria se não existir
@@ -7691,6 +8363,8 @@ def salvar_configuracao_impressora(categoria, impressora, estacao=None):
         bool: True se a operação foi bem-sucedida
     """
     try:
+        from base import eventos
+        
         # Verificar se já existe uma configuração para esta categoria
         query_check = """
         SELECT ID FROM CONFIGURACAO_IMPRESSORAS 
@@ -7738,6 +8412,9 @@ def salvar_configuracao_impressora(categoria, impressora, estacao=None):
                 categoria, impressora, estacao, data_atual, id_usuario, nome_usuario
             ))
         
+        # A impressora resolvida pelas estações pode ter mudado
+        _publicar(eventos.IMPRESSORAS_ALTERADAS)
+        
         print(f"Configuração de impressora para {categoria} salva com sucesso!")
         return True
     except Exception as e:
@@ -7797,11 +8474,15 @@ def excluir_configuracao_impressora(id_config):
         bool: True se a exclusão foi bem-sucedida
     """
     try:
+        from base import eventos
+        
         query = """
         DELETE FROM CONFIGURACAO_IMPRESSORAS
         WHERE ID = ?
         """
         execute_query(query, (id_config,))
+        
+        _publicar(eventos.IMPRESSORAS_ALTERADAS)
         return True
     except Exception as e:
         print(f"Erro ao excluir configuração de impressora: {e}")
@@ -7822,6 +8503,97 @@ def obter_estacao_atual():
         return "Estação Desconhecida"
 
 
+_tabela_cupons_verificada = False
+
+@verificacao_de_esquema
+def verificar_tabela_cupons_venda():
+    """
+    Verifica se a tabela CUPONS_VENDA existe e a cria se não existir
+    
+    A tabela guarda o cupom de cada venda exatamente como foi enviado à
+    impressora (bytes ESC/POS), para reimpressão.
+    """
+    global _tabela_cupons_verificada
+    if _tabela_cupons_verificada:
+        return True
+    try:
+        query_check = """
+        SELECT COUNT(*) FROM RDB$RELATIONS 
+        WHERE RDB$RELATION_NAME = 'CUPONS_VENDA'
+        """
+        result = execute_query(query_check)
+        
+        if result[0][0] == 0:
+            print("Tabela CUPONS_VENDA não encontrada. Criando...")
+            query_create = """
+            CREATE TABLE CUPONS_VENDA (
+                ID_VENDA INTEGER NOT NULL PRIMARY KEY,
+                CONTEUDO BLOB SUB_TYPE 0,
+                DATA_IMPRESSAO TIMESTAMP
+            )
+            """
+            execute_query(query_create)
+            print("Tabela CUPONS_VENDA criada com sucesso.")
+        
+        _tabela_cupons_verificada = True
+        return True
+    except Exception as e:
+        print(f"Erro ao verificar/criar tabela: {e}")
+        raise Exception(f"Erro ao verificar/criar tabela de cupons de venda: {str(e)}")
+
+def salvar_cupom_venda(id_venda, conteudo):
+    """
+    Guarda o cupom ESC/POS de uma venda (substitui o anterior, se houver)
+    
+    Args:
+        id_venda (int): ID da venda
+        conteudo (bytes): Cupom montado para a impressora
+        
+    Returns:
+        bool: True se a operação foi bem-sucedida
+    """
+    try:
+        verificar_tabela_cupons_venda()
+        query = """
+        UPDATE OR INSERT INTO CUPONS_VENDA (ID_VENDA, CONTEUDO, DATA_IMPRESSAO)
+        VALUES (?, ?, CURRENT_TIMESTAMP)
+        MATCHING (ID_VENDA)
+        """
+        execute_query(query, (id_venda, conteudo))
+        return True
+    except Exception as e:
+        print(f"Erro ao salvar cupom da venda: {e}")
+        raise Exception(f"Erro ao salvar cupom da venda: {str(e)}")
+
+def obter_cupom_venda(id_venda):
+    """
+    Busca o cupom ESC/POS guardado de uma venda
+    
+    Args:
+        id_venda (int): ID da venda
+        
+    Returns:
+        bytes: Cupom pronto para reimpressão ou None se não houver
+    """
+    try:
+        verificar_tabela_cupons_venda()
+        query = """
+        SELECT CONTEUDO FROM CUPONS_VENDA
+        WHERE ID_VENDA = ?
+        """
+        result = execute_query(query, (id_venda,))
+        if result and result[0][0]:
+            conteudo = result[0][0]
+            # BLOBs grandes podem vir como leitor em vez de bytes
+            if hasattr(conteudo, 'read'):
+                conteudo = conteudo.read()
+            return bytes(conteudo)
+        return None
+    except Exception as e:
+        print(f"Erro ao buscar cupom da venda: {e}")
+        raise Exception(f"Erro ao buscar cupom da venda: {str(e)}")
+
+
 # cadastrar funcionario para login
 def verificar_usuario_existente(nome_usuario):
     """
@@ -7871,6 +8643,7 @@ def vincular_usuario_funcionario(id_funcionario, id_usuario, nome_usuario):
         print(f"Erro ao vincular usuário a funcionário: {e}")
         raise Exception(f"Erro ao vincular usuário a funcionário: {str(e)}")
 
+@verificacao_de_esquema
 def verificar_tabela_funcionarios_atualizacao():
     """
     Verifica se a tabela FUNCIONARIOS tem as colunas necessárias 
@@ -7995,19 +8768,13 @@ def criar_usuario(usuario, senha, empresa, usuario_master=None, data_expiracao=N
         if result[0][0] > 0:
             raise Exception("Usuário já existe para esta empresa")
         
-        # Obter o próximo ID
-        query_nextid = """
-        SELECT COALESCE(MAX(ID), 0) + 1 FROM USUARIOS
-        """
-        next_id = execute_query(query_nextid)[0][0]
-        
-        # Inserir novo usuário com ID explícito
+        # Inserir novo usuário (ID gerado pelo gerador da tabela)
         query_insert = """
         INSERT INTO USUARIOS (
-            ID, USUARIO, SENHA, EMPRESA, BLOQUEADO, USUARIO_MASTER, DATA_EXPIRACAO
-        ) VALUES (?, ?, ?, ?, 'N', ?, ?)
+            USUARIO, SENHA, EMPRESA, BLOQUEADO, USUARIO_MASTER, DATA_EXPIRACAO
+        ) VALUES (?, ?, ?, 'N', ?, ?)
         """
-        execute_query(query_insert, (next_id, usuario, senha, empresa, usuario_master, data_expiracao))
+        next_id = inserir_retornando_id(query_insert, (usuario, senha, empresa, usuario_master, data_expiracao))
         
         return next_id
     except Exception as e:
@@ -8314,8 +9081,8 @@ def buscar_historico_pagamentos(codigo):
 def iniciar_sincronizacao():
     """Inicia o sistema de sincronização"""
     try:
-        t = threading.Thread(target=monitor_sincronizacao, daemon=True)
-        t.start()
+        from base.agendador_sincronizacao import agendador_sincronizacao
+        agendador_sincronizacao.iniciar()
         print("Sistema de sincronização iniciado")
         
         # Registrar função para ser executada no encerramento do programa
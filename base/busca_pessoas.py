@@ -0,0 +1,132 @@
+"""
+Módulo da busca de pessoas (clientes) em memória
+
+Os nomes e documentos da tabela PESSOAS são lidos uma vez e indexados pelo
+IndiceBusca: a pesquisa por nome ignora acentos e tolera erros de digitação
+("joao" e "jaoo" encontram "João"), sem LIKE '%...%' no Firebird.
+
+Inclusões, alterações e exclusões feitas nesta estação atualizam apenas a
+pessoa alterada (evento PESSOA_ALTERADA de base.eventos). Para
+cadastros feitos em outras estações o índice é relido no máximo a cada
+INTERVALO_RECARGA segundos.
+"""
+
+import threading
+import time
+
+from base.eventos import barramento_eventos, PESSOA_ALTERADA
+from base.indice_busca import IndiceBusca
+
+INTERVALO_RECARGA = 300  # Segundos entre releituras completas no banco
+
+QUERY_PESSOAS = "SELECT ID, NOME, TIPO_PESSOA, DOCUMENTO FROM PESSOAS"
+
+
+def _texto_busca(pessoa):
+    """Texto indexado: nome e documento (só números)"""
+    return " ".join(str(v) for v in (pessoa[1], pessoa[3]) if v)
+
+
+class BuscaPessoas:
+    """
+    Pessoas em memória para a pesquisa por nome e documento
+
+    As linhas seguem o formato de QUERY_PESSOAS: (ID, NOME, TIPO_PESSOA, DOCUMENTO).
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._pessoas = {}   # id -> tupla no formato de QUERY_PESSOAS
+        self._indice = IndiceBusca()
+        self._carregado = False
+        self._ultima_recarga = 0
+
+    def carregar(self):
+        """
+        Lê todas as pessoas e reconstrói o índice
+
+        Returns:
+            int: Quantidade de pessoas carregadas
+        """
+        from base.banco import execute_query
+
+        inicio = time.perf_counter()
+        result = execute_query(QUERY_PESSOAS)
+
+        pessoas = {row[0]: tuple(row) for row in result}
+        indice = IndiceBusca()
+        indice.indexar((id_pessoa, _texto_busca(p)) for id_pessoa, p in pessoas.items())
+
+        with self._lock:
+            self._pessoas = pessoas
+            self._indice = indice
+            self._carregado = True
+            self._ultima_recarga = time.monotonic()
+
+        print(f"Busca de pessoas carregada: {len(pessoas)} pessoas "
+              f"em {(time.perf_counter() - inicio) * 1000:.0f} ms")
+        return len(pessoas)
+
+    def invalidar(self):
+        """Descarta o índice; ele será recarregado na próxima pesquisa"""
+        with self._lock:
+            self._carregado = False
+
+    def registrar_alteracao(self, id_pessoa):
+        """
+        Atualiza uma pessoa incluída, alterada ou excluída nesta estação
+
+        Args:
+            id_pessoa (int): ID da pessoa
+        """
+        with self._lock:
+            if not self._carregado:
+                return
+        try:
+            from base.banco import execute_query
+            result = execute_query(f"{QUERY_PESSOAS} WHERE ID = ?", (id_pessoa,))
+        except Exception as e:
+            print(f"Erro ao atualizar a busca de pessoas: {e}")
+            self.invalidar()
+            return
+
+        with self._lock:
+            if result:
+                pessoa = tuple(result[0])
+                self._pessoas[pessoa[0]] = pessoa
+                self._indice.atualizar(pessoa[0], _texto_busca(pessoa))
+            else:
+                self._pessoas.pop(id_pessoa, None)
+                self._indice.remover(id_pessoa)
+
+    def pesquisar(self, texto, limite=200):
+        """
+        Pesquisa pessoas por nome ou documento
+
+        Args:
+            texto (str): Parte do nome ou do documento
+            limite (int): Máximo de resultados
+
+        Returns:
+            list: Tuplas (ID, NOME, TIPO_PESSOA, DOCUMENTO) em ordem de relevância
+        """
+        if not str(texto or "").strip():
+            return []
+
+        if self._precisa_recarregar():
+            self.carregar()
+
+        with self._lock:
+            return [self._pessoas[id_pessoa]
+                    for id_pessoa, _pontuacao in self._indice.buscar(texto, limite)]
+
+    def _precisa_recarregar(self):
+        with self._lock:
+            return (not self._carregado
+                    or time.monotonic() - self._ultima_recarga >= INTERVALO_RECARGA)
+
+
+# Criar instância global
+busca_pessoas = BuscaPessoas()
+
+barramento_eventos.assinar(PESSOA_ALTERADA, lambda evento: busca_pessoas.registrar_alteracao(evento.id_pessoa))
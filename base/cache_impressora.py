@@ -0,0 +1,160 @@
+"""
+Módulo de cache da impressora do PDV por estação
+
+Guarda, em memória e em um arquivo local, a impressora resolvida para esta
+estação (nome configurado no banco) e o meio de conexão que funcionou
+(Win32Raw, USB com vendor/product ID, porta serial ou IP). Assim cada cupom
+não precisa repetir as consultas a CONFIGURACAO_IMPRESSORAS nem testar todos
+os meios de conexão.
+
+O cache só é descartado quando a configuração de impressoras é alterada
+(evento IMPRESSORAS_ALTERADAS de base.eventos, inclusive vindo de outra
+estação) ou quando
+o meio de conexão guardado deixa de funcionar.
+"""
+
+import os
+import sys
+import json
+import socket
+import threading
+
+from base.eventos import barramento_eventos, IMPRESSORAS_ALTERADAS, TABELA_ALTERADA
+
+NOME_ARQUIVO = "cache_impressora.json"
+
+
+def _caminho_arquivo():
+    """Arquivo do cache, na pasta da aplicação (ao lado do executável)"""
+    if getattr(sys, 'frozen', False):
+        base_dir = os.path.dirname(sys.executable)
+    else:
+        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base_dir, NOME_ARQUIVO)
+
+
+class CacheImpressora:
+    """
+    Impressora e meio de conexão resolvidos para a estação atual
+
+    O arquivo guarda uma entrada por estação, de modo que pode ficar em uma
+    pasta compartilhada sem que uma estação use a impressora da outra.
+    """
+
+    def __init__(self, caminho=None):
+        self.caminho = caminho or _caminho_arquivo()
+        self._lock = threading.Lock()
+        self._dados = None  # estação -> {"impressora": str, "transporte": dict}
+        self.versao = 0     # Incrementada a cada invalidação (conexões abertas ficam obsoletas)
+        try:
+            self.estacao = socket.gethostname()
+        except Exception:
+            self.estacao = "Estação Desconhecida"
+
+    def obter_impressora(self):
+        """
+        Returns:
+            str | None: Nome da impressora guardado para esta estação
+        """
+        return self._entrada().get("impressora")
+
+    def obter_transporte(self, nome_impressora):
+        """
+        Retorna o meio de conexão que funcionou para a impressora
+
+        Args:
+            nome_impressora (str): Nome da impressora
+
+        Returns:
+            dict | None: {"tipo": "win32raw"|"usb"|"serial"|"network", "args": [...]}
+        """
+        entrada = self._entrada()
+        if entrada.get("impressora") != nome_impressora:
+            return None
+        return entrada.get("transporte")
+
+    def salvar_impressora(self, nome_impressora):
+        """Guarda o nome da impressora resolvido para esta estação"""
+        with self._lock:
+            dados = self._carregar()
+            entrada = dados.get(self.estacao, {})
+            if entrada.get("impressora") != nome_impressora:
+                # Outra impressora: o meio de conexão anterior não vale mais
+                entrada = {"impressora": nome_impressora}
+            dados[self.estacao] = entrada
+            self._gravar(dados)
+
+    def salvar_transporte(self, nome_impressora, tipo, args):
+        """
+        Guarda o meio de conexão que funcionou para a impressora
+
+        Args:
+            nome_impressora (str): Nome da impressora
+            tipo (str): "win32raw", "usb", "serial" ou "network"
+            args (list): Argumentos do construtor (ex: [vendor_id, product_id])
+        """
+        with self._lock:
+            dados = self._carregar()
+            dados[self.estacao] = {
+                "impressora": nome_impressora,
+                "transporte": {"tipo": tipo, "args": list(args)}
+            }
+            self._gravar(dados)
+
+    def descartar_transporte(self):
+        """Esquece o meio de conexão (ele falhou), mantendo a impressora"""
+        with self._lock:
+            dados = self._carregar()
+            entrada = dados.get(self.estacao)
+            if entrada and "transporte" in entrada:
+                del entrada["transporte"]
+                self._gravar(dados)
+
+    def invalidar(self):
+        """Descarta o cache desta estação (configuração de impressoras alterada)"""
+        with self._lock:
+            dados = self._carregar()
+            if dados.pop(self.estacao, None) is not None:
+                self._gravar(dados)
+            self.versao += 1
+            print("Cache de impressora da estação descartado")
+
+    def _entrada(self):
+        with self._lock:
+            return dict(self._carregar().get(self.estacao, {}))
+
+    def _carregar(self):
+        """Lê o arquivo na primeira vez; depois usa a cópia em memória"""
+        if self._dados is None:
+            try:
+                with open(self.caminho, 'r', encoding='utf-8') as f:
+                    self._dados = json.load(f)
+                if not isinstance(self._dados, dict):
+                    self._dados = {}
+            except FileNotFoundError:
+                self._dados = {}
+            except Exception as e:
+                print(f"Aviso: cache de impressora ilegível, ignorando: {e}")
+                self._dados = {}
+        return self._dados
+
+    def _gravar(self, dados):
+        self._dados = dados
+        try:
+            temporario = self.caminho + ".tmp"
+            with open(temporario, 'w', encoding='utf-8') as f:
+                json.dump(dados, f, ensure_ascii=False, indent=2)
+            os.replace(temporario, self.caminho)
+        except Exception as e:
+            # Sem disco o cache continua valendo em memória
+            print(f"Aviso: não foi possível gravar o cache de impressora: {e}")
+
+
+# Criar instância global
+cache_impressora = CacheImpressora()
+
+barramento_eventos.assinar(IMPRESSORAS_ALTERADAS, lambda evento: cache_impressora.invalidar())
+
+# Configuração alterada em outra estação (POST_EVENT, base.eventos_banco)
+barramento_eventos.assinar(TABELA_ALTERADA, lambda evento: cache_impressora.invalidar()
+                           if evento.tabela == 'CONFIGURACAO_IMPRESSORAS' else None)
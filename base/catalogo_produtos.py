@@ -0,0 +1,477 @@
+"""
+Módulo de cache do catálogo de produtos usado pelo PDV
+
+O catálogo inteiro é lido uma vez por sessão e indexado por código de barras
+e por código do produto. Cada leitura de código de barras e cada tecla digitada
+no PDV passam a ser resolvidas em memória, sem consultas LIKE no Firebird.
+
+As gravações de produto desta estação chegam pelo evento PRODUTO_ALTERADO
+(base.eventos) e atualizam só o produto alterado.
+
+Para perceber alterações feitas em outras estações, toda gravação de produto
+incrementa o gerador GEN_CATALOGO_PRODUTOS (o marcador de alteração). O cache
+compara o valor do marcador com o que foi carregado e recarrega quando ele
+mudou. A comparação é feita quando chega o aviso de alteração da tabela
+PRODUTOS (POST_EVENT, base.eventos_banco); sem o ouvinte de eventos
+conectado, no máximo a cada INTERVALO_VERIFICACAO segundos. Renomear ou
+excluir uma marca ou grupo altera vários produtos de uma vez: o evento chega
+sem produto (id_produto None) e o catálogo é relido inteiro.
+
+O estoque guardado no catálogo não acompanha as vendas: a baixa de estoque
+não altera o marcador, para que cada venda não faça as outras estações
+recarregarem o catálogo. As telas que mostram o estoque o leem do banco
+com com_estoque_atual().
+"""
+
+import threading
+import time
+
+from base.eventos import barramento_eventos, PRODUTO_ALTERADO, TABELA_ALTERADA
+from base.indice_busca import IndiceBusca
+from base.motor_sugestoes import MotorSugestoes
+
+GERADOR_MARCADOR = "GEN_CATALOGO_PRODUTOS"
+INTERVALO_VERIFICACAO = 5  # Segundos entre consultas ao marcador de alteração
+
+# Ordem das colunas nas tuplas do catálogo (a mesma de listar_produtos)
+CAMPOS = ('id', 'codigo_produto', 'nome_produto', 'codigo_barras', 'marca',
+          'grupo', 'preco_custo', 'preco_venda', 'estoque')
+
+
+def _texto_busca(produto):
+    """Texto indexado para a busca por nome: nome e marca do produto"""
+    return " ".join(str(v) for v in (produto[2], produto[4]) if v)
+
+
+def _chave(valor):
+    """Normaliza um código para uso como chave dos índices"""
+    if valor is None:
+        return ""
+    return str(valor).strip()
+
+
+class CatalogoProdutos:
+    """
+    Catálogo de produtos em memória
+
+    Índices mantidos:
+        - dicionário por código de barras
+        - dicionário por código do produto
+        - motor de sugestões (códigos e códigos de barras, por prefixo)
+        - índice de busca por nome e marca (sem acento, tolerante a erros)
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._produtos = {}      # id -> tupla no formato de CAMPOS
+        self._por_barras = {}    # código de barras -> id
+        self._por_codigo = {}    # código do produto -> id
+        self._motor = MotorSugestoes()
+        self._busca = IndiceBusca()
+        self._carregado = False
+        self._marcador = None
+        self._ultima_verificacao = 0
+        self._aviso_alteracao = False  # PRODUTOS alterada (evento do banco)
+        self._gerador_verificado = False
+        self._query_select = None
+
+    # ------------------------------------------------------------------
+    # Carga e atualização
+    # ------------------------------------------------------------------
+
+    def carregar(self):
+        """
+        Lê todo o catálogo e reconstrói os índices
+
+        Returns:
+            int: Quantidade de produtos carregados
+        """
+        from base.banco import execute_query
+
+        inicio = time.perf_counter()
+        marcador = self._ler_marcador()
+        result = execute_query(self._montar_select())
+
+        with self._lock:
+            self._produtos = {}
+            for row in result:
+                self._produtos[row[0]] = tuple(row)
+            self._reconstruir_indices()
+            self._marcador = marcador
+            self._ultima_verificacao = time.monotonic()
+            self._carregado = True
+
+        print(f"Catálogo de produtos carregado: {len(result)} produtos "
+              f"em {(time.perf_counter() - inicio) * 1000:.0f} ms")
+        return len(result)
+
+    def aviso_alteracao(self):
+        """
+        PRODUTOS foi alterada (por esta ou outra estação)
+
+        O marcador é comparado no próximo acesso; a alteração feita por esta
+        estação já está no cache e não causa recarga.
+        """
+        self._aviso_alteracao = True
+
+    def invalidar(self):
+        """Descarta o catálogo; ele será recarregado no próximo acesso"""
+        with self._lock:
+            self._carregado = False
+            self._query_select = None
+
+    def registrar_alteracao(self, id_produto):
+        """
+        Informa que um produto foi criado, alterado ou excluído nesta estação
+
+        Incrementa o marcador de alteração (para que as demais estações
+        recarreguem) e atualiza apenas a entrada do produto no cache local.
+
+        Args:
+            id_produto (int): ID do produto alterado
+        """
+        try:
+            from base.banco import execute_query
+
+            self._garantir_gerador()
+            result = execute_query(
+                f"SELECT GEN_ID({GERADOR_MARCADOR}, 1) FROM RDB$DATABASE")
+            novo_marcador = result[0][0]
+
+            with self._lock:
+                if not self._carregado:
+                    return
+                if self._marcador is not None and novo_marcador != self._marcador + 1:
+                    # Outra estação também alterou o catálogo: recarregar tudo
+                    self._carregado = False
+                    return
+                self._marcador = novo_marcador
+
+            self._recarregar_produto(id_produto)
+        except Exception as e:
+            print(f"Erro ao registrar alteração no catálogo de produtos: {e}")
+            self.invalidar()
+
+    def registrar_alteracao_geral(self):
+        """
+        Informa que vários produtos foram alterados nesta estação (ex: marca renomeada)
+
+        Incrementa o marcador de alteração e descarta o catálogo local, que é
+        relido inteiro no próximo acesso.
+        """
+        try:
+            from base.banco import execute_query
+
+            self._garantir_gerador()
+            execute_query(f"SELECT GEN_ID({GERADOR_MARCADOR}, 1) FROM RDB$DATABASE")
+        except Exception as e:
+            print(f"Erro ao registrar alteração no catálogo de produtos: {e}")
+        self.invalidar()
+
+    def _recarregar_produto(self, id_produto):
+        """Relê um único produto e atualiza os índices"""
+        from base.banco import execute_query
+
+        coluna_id = self._coluna('id') or "ID"
+        result = execute_query(f"{self._montar_select()} WHERE {coluna_id} = ?", (id_produto,))
+
+        with self._lock:
+            anterior = self._produtos.pop(id_produto, None)
+            if anterior is not None:
+                self._remover_dos_indices(anterior)
+            if result:
+                self._incluir_nos_indices(tuple(result[0]))
+
+    def _incluir_nos_indices(self, produto):
+        """Inclui um produto no cache sem reconstruir os índices"""
+        self._produtos[produto[0]] = produto
+        barras = _chave(produto[3])
+        codigo = _chave(produto[1])
+        if barras:
+            self._por_barras.setdefault(barras, produto[0])
+        if codigo:
+            self._por_codigo.setdefault(codigo, produto[0])
+        self._motor.atualizar(produto[0], produto[1], produto[3])
+        self._busca.atualizar(produto[0], _texto_busca(produto))
+
+    def _remover_dos_indices(self, produto):
+        barras = _chave(produto[3])
+        codigo = _chave(produto[1])
+        if self._por_barras.get(barras) == produto[0]:
+            del self._por_barras[barras]
+        if self._por_codigo.get(codigo) == produto[0]:
+            del self._por_codigo[codigo]
+        self._motor.remover(produto[0])
+        self._busca.remover(produto[0])
+
+    def _verificar_atualizacao(self):
+        """Carrega o catálogo se necessário e recarrega se o marcador mudou"""
+        if not self._carregado:
+            self.carregar()
+            return
+
+        from base.eventos_banco import ouvinte_eventos_banco
+        if ouvinte_eventos_banco.ativo:
+            # As outras estações avisam pelo evento do banco: sem consulta periódica
+            if not self._aviso_alteracao:
+                return
+        elif time.monotonic() - self._ultima_verificacao < INTERVALO_VERIFICACAO:
+            return
+        self._aviso_alteracao = False
+
+        try:
+            marcador = self._ler_marcador()
+        except Exception as e:
+            print(f"Erro ao verificar marcador do catálogo: {e}")
+            return
+
+        with self._lock:
+            self._ultima_verificacao = time.monotonic()
+            desatualizado = marcador != self._marcador
+        if desatualizado:
+            print("Catálogo de produtos alterado em outra estação, recarregando...")
+            self.carregar()
+
+    def _reconstruir_indices(self):
+        por_barras = {}
+        por_codigo = {}
+        for id_produto, produto in self._produtos.items():
+            barras = _chave(produto[3])
+            codigo = _chave(produto[1])
+            if barras:
+                por_barras.setdefault(barras, id_produto)
+            if codigo:
+                por_codigo.setdefault(codigo, id_produto)
+
+        # Os nomes ficam no índice de busca; o motor indexa só os códigos
+        motor = MotorSugestoes()
+        motor.indexar((p[0], p[1], p[3]) for p in self._produtos.values())
+        busca = IndiceBusca()
+        busca.indexar((p[0], _texto_busca(p)) for p in self._produtos.values())
+
+        self._por_barras = por_barras
+        self._por_codigo = por_codigo
+        self._motor = motor
+        self._busca = busca
+
+    def _coluna(self, logico):
+        from base.esquema import registro_esquema
+        return registro_esquema.coluna('PRODUTOS', logico)
+
+    def _montar_select(self):
+        """Monta o SELECT do catálogo com as colunas reais da tabela PRODUTOS"""
+        if self._query_select is None:
+            colunas = [self._coluna(campo) or "NULL" for campo in CAMPOS]
+            self._query_select = f"SELECT {', '.join(colunas)} FROM PRODUTOS"
+        return self._query_select
+
+    def _ler_marcador(self):
+        from base.banco import execute_query
+
+        self._garantir_gerador()
+        result = execute_query(f"SELECT GEN_ID({GERADOR_MARCADOR}, 0) FROM RDB$DATABASE")
+        return result[0][0]
+
+    def _garantir_gerador(self):
+        """Cria o gerador usado como marcador de alteração, se ainda não existir"""
+        if self._gerador_verificado:
+            return
+        from base.banco import execute_query
+
+        result = execute_query(
+            "SELECT COUNT(*) FROM RDB$GENERATORS WHERE RDB$GENERATOR_NAME = ?",
+            (GERADOR_MARCADOR,))
+        if result[0][0] == 0:
+            try:
+                execute_query(f"CREATE GENERATOR {GERADOR_MARCADOR}")
+                print(f"Gerador {GERADOR_MARCADOR} criado com sucesso.")
+            except Exception as e:
+                print(f"Aviso: Gerador pode já existir: {e}")
+        self._gerador_verificado = True
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def buscar_por_barras(self, codigo_barras):
+        """
+        Busca um produto pelo código de barras
+
+        Args:
+            codigo_barras (str): Código de barras
+
+        Returns:
+            dict: Dados do produto (mesmo formato de buscar_produto_por_barras) ou None
+        """
+        produto = self._buscar(self._por_barras, codigo_barras, 'codigo_barras')
+        if produto is None:
+            return None
+        return {
+            "id": produto[0],
+            "codigo": produto[1],
+            "nome": produto[2],
+            "barras": produto[3],
+            "marca": produto[4],
+            "grupo": produto[5],
+            "preco_compra": produto[6],
+            "preco_venda": produto[7],
+            "estoque": produto[8]
+        }
+
+    def buscar_por_codigo(self, codigo):
+        """
+        Busca um produto pelo código
+
+        Args:
+            codigo (str): Código do produto
+
+        Returns:
+            tuple: Dados do produto (mesmo formato de buscar_produto_por_codigo) ou None
+        """
+        return self._buscar(self._por_codigo, codigo, 'codigo_produto')
+
+    def sugestoes(self, texto, limite=10):
+        """
+        Retorna os produtos mais relevantes para o texto digitado
+
+        Mesma ordem de pesquisar().
+
+        Args:
+            texto (str): Código parcial ou parte do nome
+            limite (int): Máximo de resultados
+
+        Returns:
+            list: Tuplas (código de barras, código, nome, preço de venda)
+        """
+        return [(p[3], p[1], p[2], p[7]) for p in self.pesquisar(texto, limite)]
+
+    def pesquisar(self, texto, limite=50):
+        """
+        Pesquisa produtos por código, código de barras, nome ou marca
+
+        Códigos exatos primeiro, depois códigos de barras e códigos que começam
+        com o texto e, por fim, produtos cujo nome ou marca tem as palavras
+        digitadas, sem diferenciar acentos e tolerando erros de digitação
+        ("acucar" e "acucra" encontram "Açúcar").
+
+        Args:
+            texto (str): Código parcial ou parte do nome
+            limite (int): Máximo de resultados
+
+        Returns:
+            list: Tuplas no formato de CAMPOS, em ordem de relevância
+        """
+        texto = _chave(texto)
+        if not texto:
+            return []
+
+        self._verificar_atualizacao()
+
+        with self._lock:
+            ids = self._motor.buscar(texto, limite)
+            if len(ids) < limite:
+                vistos = set(ids)
+                for id_produto, _pontuacao in self._busca.buscar(texto, limite):
+                    if id_produto not in vistos and len(ids) < limite:
+                        ids.append(id_produto)
+            return [self._produtos[i] for i in ids]
+
+    def com_estoque_atual(self, produtos):
+        """
+        Substitui o estoque das tuplas do catálogo pelo saldo atual no banco
+
+        Uma única consulta para todos os produtos (em lotes de LIMITE_ITENS_IN).
+
+        Args:
+            produtos (list): Tuplas no formato de CAMPOS (ex: resultado de pesquisar)
+
+        Returns:
+            list: As mesmas tuplas, com o estoque lido do banco
+        """
+        if not produtos:
+            return []
+        from base.banco import execute_query, LIMITE_ITENS_IN
+
+        coluna_id = self._coluna('id') or "ID"
+        coluna_estoque = self._coluna('estoque')
+        if not coluna_estoque:
+            return list(produtos)
+
+        ids = list({p[0] for p in produtos})
+        estoques = {}
+        for inicio in range(0, len(ids), LIMITE_ITENS_IN):
+            lote = ids[inicio:inicio + LIMITE_ITENS_IN]
+            result = execute_query(
+                f"SELECT {coluna_id}, {coluna_estoque} FROM PRODUTOS "
+                f"WHERE {coluna_id} IN ({', '.join('?' for _ in lote)})", tuple(lote))
+            estoques.update((row[0], row[1]) for row in result)
+
+        return [p[:8] + (estoques.get(p[0], p[8]),) + p[9:] for p in produtos]
+
+    def _buscar(self, indice, codigo, logico):
+        codigo = _chave(codigo)
+        if not codigo:
+            return None
+
+        self._verificar_atualizacao()
+
+        with self._lock:
+            id_produto = indice.get(codigo)
+            if id_produto is not None:
+                return self._produtos[id_produto]
+
+        # Não está no cache: pode ter sido cadastrado agora em outra estação
+        from base.banco import execute_query
+
+        coluna = self._coluna(logico)
+        if not coluna:
+            return None
+        try:
+            result = execute_query(f"{self._montar_select()} WHERE {coluna} = ?", (codigo,))
+        except Exception as e:
+            print(f"Erro ao buscar produto fora do catálogo: {e}")
+            return None
+        if not result:
+            return None
+
+        produto = tuple(result[0])
+        with self._lock:
+            anterior = self._produtos.pop(produto[0], None)
+            if anterior is not None:
+                self._remover_dos_indices(anterior)
+            self._incluir_nos_indices(produto)
+        return produto
+
+    def estatisticas(self):
+        """
+        Returns:
+            dict: Quantidade de produtos e entradas em cada índice
+        """
+        with self._lock:
+            return {
+                "carregado": self._carregado,
+                "produtos": len(self._produtos),
+                "codigos_barras": len(self._por_barras),
+                "codigos": len(self._por_codigo),
+                "marcador": self._marcador,
+            }
+
+
+# Criar instância global
+catalogo_produtos = CatalogoProdutos()
+
+
+def _produto_alterado(evento):
+    if evento.id_produto is None:
+        catalogo_produtos.registrar_alteracao_geral()
+    else:
+        catalogo_produtos.registrar_alteracao(evento.id_produto)
+
+
+def _tabela_alterada(evento):
+    if evento.tabela == 'PRODUTOS':
+        catalogo_produtos.aviso_alteracao()
+
+
+barramento_eventos.assinar(PRODUTO_ALTERADO, _produto_alterado)
+barramento_eventos.assinar(TABELA_ALTERADA, _tabela_alterada)
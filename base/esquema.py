@@ -0,0 +1,174 @@
+"""
+Módulo de registro do esquema do banco de dados
+
+As tabelas VENDAS, VENDAS_ITENS e PRODUTOS variam de nome de coluna entre
+instalações. Em vez de consultar RDB$RELATION_FIELDS a cada venda ou tecla,
+o registro lê as colunas de todas as tabelas conhecidas uma única vez, guarda
+o mapeamento nome lógico -> coluna real e o texto SQL montado a partir dele.
+"""
+
+import threading
+
+# Nomes alternativos de cada coluna lógica, em ordem de preferência
+MAPEAMENTOS = {
+    'PRODUTOS': {
+        'id': ['ID', 'ID_PRODUTO', 'PRODUTO_ID'],
+        'codigo_barras': ['BARRAS', 'CODIGO_BARRAS', 'EAN', 'GTIN', 'COD_BARRAS', 'EAN13'],
+        'codigo_produto': ['CODIGO', 'ID', 'ID_PRODUTO', 'PRODUTO_ID', 'COD', 'COD_PRODUTO'],
+        'nome_produto': ['NOME', 'DESCRICAO', 'PRODUTO', 'DESCR', 'DESCRITIVO', 'NOME_PRODUTO'],
+        'marca': ['MARCA', 'FABRICANTE', 'FORNECEDOR', 'MARCA_PRODUTO'],
+        'grupo': ['GRUPO', 'CATEGORIA', 'DEPARTAMENTO', 'TIPO', 'CATEGORIA_PRODUTO'],
+        'preco_custo': ['PRECO_CUSTO', 'VALOR_CUSTO', 'CUSTO', 'PRECO_COMPRA'],
+        'preco_venda': ['PRECO_VENDA', 'VALOR_VENDA', 'PRECO', 'VALOR', 'PRECO_VAREJO', 'VALOR_UNITARIO'],
+        'estoque': ['QUANTIDADE_ESTOQUE', 'ESTOQUE', 'ESTOQUE_ATUAL', 'QTD', 'QUANTIDADE', 'SALDO', 'SALDO_ESTOQUE'],
+    },
+    'VENDAS': {
+        'id_venda': ['ID_VENDA', 'IDVENDA', 'ID'],
+        'data_venda': ['DATA_VENDA', 'DATA_EMISSAO', 'DATA', 'DT_VENDA', 'DT_EMISSAO', 'DATA_REGISTRO'],
+        'hora_venda': ['HORA_VENDA', 'HORA', 'HR_VENDA'],
+        'id_cliente': ['ID_CLIENTE', 'CLIENTE_ID', 'CLIENTE'],
+        'id_vendedor': ['ID_VENDEDOR', 'VENDEDOR_ID', 'VENDEDOR'],
+        'valor_total': ['VALOR_TOTAL', 'TOTAL', 'VL_TOTAL'],
+        'desconto': ['DESCONTO', 'VL_DESCONTO', 'VALOR_DESCONTO'],
+        'valor_final': ['VALOR_FINAL', 'VL_FINAL', 'TOTAL_FINAL'],
+        'forma_pagamento': ['FORMA_PAGAMENTO', 'FORMA_PGTO', 'PAGAMENTO'],
+        'status': ['STATUS', 'SITUACAO', 'ST_VENDA'],
+    },
+    'VENDAS_ITENS': {
+        'id_venda': ['ID_VENDA', 'VENDA_ID', 'IDVENDA'],
+        'id_produto': ['ID_PRODUTO', 'CODIGO', 'PRODUTO_ID', 'ID_PROD', 'PRODUTO', 'CODIGO_PRODUTO', 'COD_PRODUTO'],
+        'quantidade': ['QUANTIDADE', 'QTD', 'QTDE', 'QTD_VENDIDA'],
+        'valor_unitario': ['VALOR_UNITARIO', 'PRECO_UNITARIO', 'VALOR_UNIT', 'PRECO_UNIT', 'VALOR'],
+        'valor_total': ['VALOR_TOTAL', 'TOTAL', 'VALOR_ITEM', 'SUBTOTAL'],
+    },
+}
+
+
+class RegistroEsquema:
+    """
+    Cache das colunas das tabelas e do SQL construído a partir delas
+
+    As colunas de todas as tabelas registradas são lidas em uma única consulta
+    no primeiro acesso (ou em carregar()). Depois disso nenhuma chamada toca as
+    tabelas de sistema até que invalidar() seja chamado após uma migração.
+    """
+
+    def __init__(self, mapeamentos=None):
+        self.mapeamentos = mapeamentos or MAPEAMENTOS
+        self._lock = threading.RLock()
+        self._colunas = {}   # tabela -> lista de colunas na ordem de RDB$FIELD_POSITION
+        self._mapas = {}     # tabela -> {nome lógico: coluna real ou None}
+        self._sql = {}       # chave -> texto SQL
+
+    def carregar(self, tabelas=None):
+        """
+        Lê as colunas das tabelas informadas (ou de todas as registradas)
+
+        Args:
+            tabelas (list, optional): Nomes das tabelas. Default: todas do mapeamento
+        """
+        from base.banco import execute_query
+
+        tabelas = [t.upper() for t in (tabelas or self.mapeamentos.keys())]
+        placeholders = ", ".join("?" for _ in tabelas)
+        query = f"""
+        SELECT TRIM(RDB$RELATION_NAME), TRIM(RDB$FIELD_NAME)
+        FROM RDB$RELATION_FIELDS
+        WHERE RDB$RELATION_NAME IN ({placeholders})
+        ORDER BY RDB$RELATION_NAME, RDB$FIELD_POSITION
+        """
+        result = execute_query(query, tuple(tabelas))
+
+        colunas = {tabela: [] for tabela in tabelas}
+        for tabela, coluna in result:
+            colunas[tabela.strip()].append(coluna.strip())
+
+        with self._lock:
+            for tabela, lista in colunas.items():
+                self._colunas[tabela] = lista
+                self._mapas.pop(tabela, None)
+            # O SQL montado pode depender de qualquer tabela recarregada
+            self._sql.clear()
+
+        print(f"Esquema carregado: {', '.join(f'{t} ({len(c)} colunas)' for t, c in colunas.items())}")
+
+    def invalidar(self, tabela=None):
+        """
+        Descarta o cache (de uma tabela ou de todas), por exemplo após uma migração
+        """
+        with self._lock:
+            if tabela is None:
+                self._colunas.clear()
+                self._mapas.clear()
+            else:
+                self._colunas.pop(tabela.upper(), None)
+                self._mapas.pop(tabela.upper(), None)
+            self._sql.clear()
+
+    def colunas(self, tabela):
+        """
+        Retorna as colunas da tabela na ordem física
+
+        Returns:
+            list: Nomes das colunas (lista vazia se a tabela não existir)
+        """
+        tabela = tabela.upper()
+        with self._lock:
+            if tabela not in self._colunas:
+                # Primeiro acesso: carregar todas as tabelas conhecidas de uma vez
+                pendentes = [t for t in self.mapeamentos if t not in self._colunas]
+                if tabela not in pendentes:
+                    pendentes.append(tabela)
+                self.carregar(pendentes)
+            return list(self._colunas[tabela])
+
+    def tem_coluna(self, tabela, coluna):
+        return coluna.upper() in self.colunas(tabela)
+
+    def mapa(self, tabela):
+        """
+        Retorna o mapeamento nome lógico -> coluna real da tabela
+
+        Returns:
+            dict: Coluna real de cada nome lógico, ou None quando não existe
+        """
+        tabela = tabela.upper()
+        with self._lock:
+            if tabela not in self._mapas:
+                existentes = set(self.colunas(tabela))
+                mapa = {}
+                for logico, alternativas in self.mapeamentos.get(tabela, {}).items():
+                    mapa[logico] = next((alt for alt in alternativas if alt in existentes), None)
+                self._mapas[tabela] = mapa
+            return dict(self._mapas[tabela])
+
+    def coluna(self, tabela, logico, padrao=None):
+        """
+        Retorna a coluna real de um nome lógico
+
+        Args:
+            tabela (str): Nome da tabela
+            logico (str): Nome lógico (ex: 'estoque', 'data_venda')
+            padrao (str, optional): Valor retornado quando nenhuma alternativa existe
+        """
+        return self.mapa(tabela).get(logico) or padrao
+
+    def sql(self, chave, construtor):
+        """
+        Retorna o SQL guardado para a chave, montando-o na primeira vez
+
+        Args:
+            chave (str): Identificador do SQL
+            construtor (callable): Função sem argumentos que monta o texto SQL
+
+        Returns:
+            str: Texto SQL
+        """
+        with self._lock:
+            if chave not in self._sql:
+                self._sql[chave] = construtor()
+            return self._sql[chave]
+
+
+# Criar instância global
+registro_esquema = RegistroEsquema()
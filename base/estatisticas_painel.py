@@ -0,0 +1,203 @@
+"""
+Módulo dos contadores da tela inicial (clientes, produtos e vendas do dia)
+
+Os contadores ficam em memória e são ajustados pelos eventos do sistema
+(base.eventos): venda finalizada, pessoa ou produto incluído/excluído. Assim,
+a atualização periódica da tela inicial não consulta o banco.
+
+O banco só é lido na primeira consulta, na virada do dia e, como garantia
+(vendas e cadastros feitos em outras estações), no máximo a cada
+INTERVALO_RECARGA segundos. O total do dia usa DATA_VENDA = CURRENT_DATE,
+que aproveita o índice da coluna, e a soma é feita no próprio Firebird.
+"""
+
+import threading
+import time
+from datetime import date
+
+from base.eventos import (barramento_eventos, VENDA_FINALIZADA, PRODUTO_ALTERADO,
+                          PESSOA_ALTERADA, INCLUIDO, EXCLUIDO)
+
+INTERVALO_RECARGA = 300  # Segundos entre releituras completas no banco
+
+
+class EstatisticasPainel:
+    """
+    Contadores da tela inicial mantidos por eventos
+
+    Os ouvintes registrados em conectar() são chamados (sem argumentos)
+    sempre que algum contador muda.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clientes = 0
+        self._produtos = 0
+        self._vendas_dia = 0.0
+        self._data = None           # Dia a que _vendas_dia se refere
+        self._ultima_recarga = 0
+        self._ouvintes = []
+
+    # ------------------------------------------------------------------
+    # Consulta
+    # ------------------------------------------------------------------
+
+    def obter(self):
+        """
+        Retorna os contadores, relendo o banco apenas quando necessário
+
+        Returns:
+            dict: {'clientes': int, 'produtos': int, 'vendas_dia': float}
+        """
+        if self._precisa_recarregar():
+            try:
+                self.recarregar()
+            except Exception as e:
+                # Sem banco, continuar com os valores em memória
+                print(f"Erro ao recarregar contadores da tela inicial: {e}")
+        with self._lock:
+            return {
+                'clientes': self._clientes,
+                'produtos': self._produtos,
+                'vendas_dia': self._vendas_dia
+            }
+
+    def recarregar(self):
+        """Relê os três contadores no banco (uma consulta por contador)"""
+        from base.banco import execute_query
+
+        clientes = self._escalar(execute_query("SELECT COUNT(*) FROM PESSOAS"))
+        produtos = self._escalar(execute_query("SELECT COUNT(*) FROM PRODUTOS"))
+        vendas_dia = float(self._escalar(execute_query(self._sql_vendas_dia())) or 0)
+
+        with self._lock:
+            self._clientes = int(clientes or 0)
+            self._produtos = int(produtos or 0)
+            self._vendas_dia = vendas_dia
+            self._data = date.today()
+            self._ultima_recarga = time.monotonic()
+        print(f"Contadores da tela inicial recarregados: {clientes} clientes, "
+              f"{produtos} produtos, vendas do dia R$ {vendas_dia:.2f}")
+
+    def invalidar(self):
+        """Força a releitura no banco na próxima consulta"""
+        with self._lock:
+            self._data = None
+
+    # ------------------------------------------------------------------
+    # Eventos
+    # ------------------------------------------------------------------
+
+    def venda_registrada(self, valor, data_venda=None):
+        """
+        Soma uma venda ao total do dia
+
+        Args:
+            valor (float): Valor total da venda
+            data_venda (date, optional): Data da venda (padrão: hoje)
+        """
+        self._somar_venda(valor, data_venda)
+
+    def pessoa_incluida(self):
+        self._ajustar('_clientes', 1)
+
+    def pessoa_excluida(self):
+        self._ajustar('_clientes', -1)
+
+    def produto_incluido(self):
+        self._ajustar('_produtos', 1)
+
+    def produto_excluido(self):
+        self._ajustar('_produtos', -1)
+
+    def conectar(self, ouvinte):
+        """Registra uma função chamada sempre que algum contador muda"""
+        with self._lock:
+            if ouvinte not in self._ouvintes:
+                self._ouvintes.append(ouvinte)
+
+    def desconectar(self, ouvinte):
+        with self._lock:
+            if ouvinte in self._ouvintes:
+                self._ouvintes.remove(ouvinte)
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+
+    def _precisa_recarregar(self):
+        with self._lock:
+            return (self._data != date.today()
+                    or time.monotonic() - self._ultima_recarga >= INTERVALO_RECARGA)
+
+    def _somar_venda(self, valor, data_venda):
+        if isinstance(data_venda, str):
+            try:
+                data_venda = date.fromisoformat(data_venda[:10])
+            except ValueError:
+                data_venda = None
+        elif data_venda is not None and hasattr(data_venda, 'date'):
+            data_venda = data_venda.date()
+
+        with self._lock:
+            # Contadores ainda não carregados ou venda de outro dia: nada a ajustar
+            if self._data is None or self._data != (data_venda or date.today()):
+                return
+            self._vendas_dia += float(valor or 0)
+        self._avisar()
+
+    def _ajustar(self, atributo, delta):
+        with self._lock:
+            if self._data is None:
+                return
+            setattr(self, atributo, max(0, getattr(self, atributo) + delta))
+        self._avisar()
+
+    def _avisar(self):
+        with self._lock:
+            ouvintes = list(self._ouvintes)
+        for ouvinte in ouvintes:
+            try:
+                ouvinte()
+            except Exception as e:
+                print(f"Erro ao avisar alteração dos contadores: {e}")
+
+    @staticmethod
+    def _escalar(resultado):
+        return resultado[0][0] if resultado and resultado[0] else 0
+
+    @staticmethod
+    def _sql_vendas_dia():
+        """SUM do dia com filtro de igualdade na coluna de data (usa o índice)"""
+        from base.esquema import registro_esquema
+
+        def construir():
+            coluna_data = registro_esquema.coluna('VENDAS', 'data_venda', 'DATA_VENDA')
+            coluna_valor = registro_esquema.coluna('VENDAS', 'valor_total', 'VALOR_TOTAL')
+            return (f"SELECT COALESCE(SUM({coluna_valor}), 0) FROM VENDAS "
+                    f"WHERE {coluna_data} = CURRENT_DATE")
+
+        return registro_esquema.sql('painel_vendas_dia', construir)
+
+
+# Criar instância global
+estatisticas_painel = EstatisticasPainel()
+
+
+def _tratar_evento(evento):
+    if evento.nome == VENDA_FINALIZADA:
+        estatisticas_painel.venda_registrada(evento.valor_total, evento.data_venda)
+    elif evento.nome == PESSOA_ALTERADA:
+        if evento.acao == INCLUIDO:
+            estatisticas_painel.pessoa_incluida()
+        elif evento.acao == EXCLUIDO:
+            estatisticas_painel.pessoa_excluida()
+    elif evento.nome == PRODUTO_ALTERADO:
+        if evento.acao == INCLUIDO:
+            estatisticas_painel.produto_incluido()
+        elif evento.acao == EXCLUIDO:
+            estatisticas_painel.produto_excluido()
+
+
+for _evento in (VENDA_FINALIZADA, PESSOA_ALTERADA, PRODUTO_ALTERADO):
+    barramento_eventos.assinar(_evento, _tratar_evento)
@@ -0,0 +1,170 @@
+"""
+Módulo do barramento de eventos do sistema (publicar/assinar no próprio processo)
+
+As funções de gravação de base.banco publicam o que mudou (venda finalizada,
+produto alterado, caixa aberto...) e os caches em memória e as janelas abertas
+assinam os eventos que lhes interessam. Assim cada cache descarta exatamente a
+entrada alterada, em vez de esperar um intervalo de recarga ou reler tudo.
+
+Os eventos e seus campos são declarados em EVENTOS; publicar um evento
+desconhecido ou com campos diferentes dos declarados é erro de programação e
+gera exceção.
+
+Um evento publicado dentro de um "with transacao()" só é entregue depois do
+commit (e descartado no rollback): quem recebe o evento sempre encontra os
+dados já gravados no banco.
+
+Os ouvintes são chamados na thread que publicou o evento. Janelas Qt devem
+assinar com o emit de um pyqtSignal(object), para tratar o evento na thread
+da tela:
+
+    self.produto_alterado.connect(self.carregar_produtos)
+    self._ouvinte_produtos = self.produto_alterado.emit
+    barramento_eventos.assinar(PRODUTO_ALTERADO, self._ouvinte_produtos)
+    ...
+    barramento_eventos.cancelar(PRODUTO_ALTERADO, self._ouvinte_produtos)  # ao fechar
+"""
+
+import importlib
+import threading
+
+# Eventos
+VENDA_FINALIZADA = "venda_finalizada"
+PRODUTO_ALTERADO = "produto_alterado"
+PESSOA_ALTERADA = "pessoa_alterada"
+CAIXA_ABERTO = "caixa_aberto"
+CAIXA_FECHADO = "caixa_fechado"
+RECEBIMENTO_BAIXADO = "recebimento_baixado"
+IMPRESSORAS_ALTERADAS = "impressoras_alteradas"
+# Tabela alterada por qualquer estação (POST_EVENT do Firebird, base.eventos_banco).
+# Não diz quais registros mudaram e também chega à estação que gravou.
+TABELA_ALTERADA = "tabela_alterada"
+
+# Valores do campo "acao" de PRODUTO_ALTERADO e PESSOA_ALTERADA
+INCLUIDO = "incluido"
+ALTERADO = "alterado"
+EXCLUIDO = "excluido"
+
+# Módulos cujos caches assinam os eventos ao serem importados. São importados
+# na primeira publicação, para que a gravação sempre alcance esses caches (o
+# catálogo avisa as outras estações e o cache de impressora fica em arquivo),
+# mesmo que esta estação ainda não os tenha usado.
+MODULOS_OUVINTES = (
+    "base.catalogo_produtos",
+    "base.busca_pessoas",
+    "base.estatisticas_painel",
+    "base.cache_impressora",
+)
+
+# Evento -> campos obrigatórios
+EVENTOS = {
+    VENDA_FINALIZADA: ("id_venda", "valor_total", "data_venda"),
+    PRODUTO_ALTERADO: ("id_produto", "acao"),
+    PESSOA_ALTERADA: ("id_pessoa", "acao"),
+    CAIXA_ABERTO: ("id_caixa", "estacao"),
+    CAIXA_FECHADO: ("id_caixa",),
+    RECEBIMENTO_BAIXADO: ("id_recebimento", "valor_pago"),
+    IMPRESSORAS_ALTERADAS: (),
+    TABELA_ALTERADA: ("tabela",),
+}
+
+
+class Evento:
+    """Evento publicado: nome e campos (acessíveis como atributos)"""
+
+    def __init__(self, nome, dados):
+        self.nome = nome
+        self.dados = dados
+
+    def __getattr__(self, campo):
+        try:
+            return self.__dict__['dados'][campo]
+        except KeyError:
+            raise AttributeError(campo)
+
+    def __repr__(self):
+        return f"Evento({self.nome}, {self.dados})"
+
+
+class BarramentoEventos:
+    """
+    Registro dos ouvintes de cada evento
+
+    Um ouvinte é uma função que recebe o Evento. Erros no ouvinte são
+    apenas registrados no console: não desfazem a gravação que publicou o
+    evento nem impedem a entrega aos demais ouvintes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ouvintes = {}  # evento -> lista de funções
+        self._modulos_importados = False
+
+    def assinar(self, nome, ouvinte):
+        """Registra uma função chamada a cada publicação do evento"""
+        self._validar_nome(nome)
+        with self._lock:
+            ouvintes = self._ouvintes.setdefault(nome, [])
+            if ouvinte not in ouvintes:
+                ouvintes.append(ouvinte)
+
+    def cancelar(self, nome, ouvinte):
+        """Remove uma função registrada em assinar()"""
+        with self._lock:
+            ouvintes = self._ouvintes.get(nome, [])
+            if ouvinte in ouvintes:
+                ouvintes.remove(ouvinte)
+
+    def publicar(self, nome, **dados):
+        """
+        Publica um evento
+
+        Dentro de uma transação, a entrega fica para depois do commit.
+
+        Args:
+            nome (str): Um dos eventos de EVENTOS
+            **dados: Campos declarados para o evento
+        """
+        self._validar_nome(nome)
+        campos = set(EVENTOS[nome])
+        if set(dados) != campos:
+            raise Exception(f"Campos inválidos para o evento {nome}: "
+                            f"esperado {sorted(campos)}, recebido {sorted(dados)}")
+
+        evento = Evento(nome, dados)
+
+        from base.banco import transacao_ativa
+        tx = transacao_ativa()
+        if tx is not None:
+            tx.apos_commit(lambda: self._entregar(evento))
+        else:
+            self._entregar(evento)
+
+    def _entregar(self, evento):
+        self._importar_modulos_ouvintes()
+        with self._lock:
+            ouvintes = list(self._ouvintes.get(evento.nome, ()))
+        for ouvinte in ouvintes:
+            try:
+                ouvinte(evento)
+            except Exception as e:
+                print(f"Erro ao tratar o evento {evento.nome}: {e}")
+
+    def _importar_modulos_ouvintes(self):
+        if self._modulos_importados:
+            return
+        self._modulos_importados = True
+        for modulo in MODULOS_OUVINTES:
+            try:
+                importlib.import_module(modulo)
+            except Exception as e:
+                print(f"Aviso: ouvintes de {modulo} não registrados: {e}")
+
+    @staticmethod
+    def _validar_nome(nome):
+        if nome not in EVENTOS:
+            raise Exception(f"Evento desconhecido: {nome}")
+
+
+# Criar instância global
+barramento_eventos = BarramentoEventos()
@@ -0,0 +1,191 @@
+"""
+Módulo do ouvinte de eventos do Firebird (POST_EVENT) entre estações
+
+Várias estações (PDVs e retaguarda) usam o mesmo banco. Triggers nas tabelas
+de TABELAS_MONITORADAS executam POST_EVENT a cada inclusão, alteração ou
+exclusão; o Firebird entrega o evento, após o commit, a todas as conexões que
+o aguardam. O ouvinte mantém uma conexão própria (fora do pool) esperando
+esses eventos em uma thread e publica TABELA_ALTERADA no barramento local
+(base.eventos), onde os caches descartam o que ficou desatualizado. Assim as
+estações ficam sabendo das alterações sem consultar o banco periodicamente.
+
+O evento do Firebird diz apenas qual tabela mudou (não quais registros).
+Também é recebido pela própria estação que gravou.
+
+Se a conexão cair, o ouvinte reconecta com espera crescente; ao reconectar
+publica TABELA_ALTERADA para todas as tabelas, pois eventos podem ter sido
+perdidos. Enquanto estiver desconectado (ativo = False), os caches voltam a
+verificar o banco por conta própria.
+
+Para testar entre dois processos (com o servidor Firebird local):
+
+    python -m base.eventos_banco              (processo 1: mostra os eventos)
+    python -m base.eventos_banco PRODUTOS     (processo 2: posta um evento)
+"""
+
+import sys
+import atexit
+import threading
+import time
+
+# Tabela -> evento postado pelos triggers
+TABELAS_MONITORADAS = {
+    'PRODUTOS': 'ALTERACAO_PRODUTOS',
+    'CONFIGURACAO_IMPRESSORAS': 'ALTERACAO_IMPRESSORAS',
+    'CAIXA_CONTROLE': 'ALTERACAO_CAIXA_CONTROLE',
+    'PERMISSOES_SISTEMA': 'ALTERACAO_PERMISSOES',
+}
+
+TEMPO_ESPERA = 1.0         # Segundos de cada espera (para perceber o pedido de parada)
+INTERVALO_VERIFICACAO = 30  # Segundos entre testes da conexão (queda sem aviso)
+ESPERA_RECONEXAO_MAX = 30  # Segundos entre tentativas de reconexão, no máximo
+
+
+def _nome_trigger(tabela):
+    return f"EVT_{tabela}"[:31]
+
+
+def criar_triggers():
+    """Cria (ou atualiza) os triggers que postam os eventos de TABELAS_MONITORADAS"""
+    from base.banco import execute_query
+
+    for tabela, evento in TABELAS_MONITORADAS.items():
+        result = execute_query(
+            "SELECT COUNT(*) FROM RDB$RELATIONS WHERE RDB$RELATION_NAME = ?", (tabela,))
+        if not (result and result[0][0]):
+            print(f"Tabela {tabela} não existe, trigger de evento ignorado")
+            continue
+        execute_query(f"""
+        CREATE OR ALTER TRIGGER {_nome_trigger(tabela)} FOR {tabela}
+        ACTIVE AFTER INSERT OR UPDATE OR DELETE POSITION 100
+        AS
+        BEGIN
+            POST_EVENT '{evento}';
+        END
+        """)
+        print(f"Trigger {_nome_trigger(tabela)} criado (evento {evento})")
+
+
+def postar_evento(tabela):
+    """Posta o evento de uma tabela sem alterá-la (teste entre estações)"""
+    from base.banco import execute_query
+    execute_query(f"EXECUTE BLOCK AS BEGIN POST_EVENT '{TABELAS_MONITORADAS[tabela]}'; END")
+
+
+class OuvinteEventosBanco:
+    """
+    Thread que aguarda os eventos do Firebird e os repassa ao barramento local
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        self._thread = None
+        self._registrado_atexit = False
+        self.ativo = False  # True enquanto a conexão de eventos estiver aberta
+        self.tabelas_por_evento = {evento: tabela for tabela, evento in TABELAS_MONITORADAS.items()}
+
+    def iniciar(self):
+        """Inicia a thread do ouvinte (sem efeito se ela já estiver rodando)"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._executar, name="OuvinteEventosBanco",
+                                            daemon=True)
+            self._thread.start()
+            if not self._registrado_atexit:
+                atexit.register(self.parar)
+                self._registrado_atexit = True
+
+    def parar(self, tempo_limite=5):
+        """Pede a parada da thread e aguarda o fechamento da conexão"""
+        self._parar.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(tempo_limite)
+
+    def _executar(self):
+        espera = 1
+        conectou_antes = False
+        while not self._parar.is_set():
+            conn = None
+            conduit = None
+            try:
+                from base.banco import _criar_conexao
+
+                conn = _criar_conexao()
+                conduit = conn.event_conduit(list(self.tabelas_por_evento))
+                conduit.begin()
+                self.ativo = True
+                espera = 1
+                print("Ouvinte de eventos do banco conectado")
+
+                if conectou_antes:
+                    # Alterações feitas enquanto estava desconectado não geraram aviso
+                    self._publicar(TABELAS_MONITORADAS)
+                conectou_antes = True
+
+                ultima_verificacao = time.monotonic()
+                while not self._parar.is_set():
+                    contagens = conduit.wait(TEMPO_ESPERA) or {}
+                    tabelas = [self.tabelas_por_evento[evento]
+                               for evento, quantidade in contagens.items()
+                               if quantidade and evento in self.tabelas_por_evento]
+                    if tabelas:
+                        self._publicar(tabelas)
+
+                    # Se o servidor cair, a espera apenas expira: testar a conexão
+                    if time.monotonic() - ultima_verificacao >= INTERVALO_VERIFICACAO:
+                        self._testar_conexao(conn)
+                        ultima_verificacao = time.monotonic()
+            except Exception as e:
+                if not self._parar.is_set():
+                    print(f"Ouvinte de eventos do banco desconectado: {e}")
+            finally:
+                self.ativo = False
+                for recurso in (conduit, conn):
+                    if recurso is not None:
+                        try:
+                            recurso.close()
+                        except Exception:
+                            pass
+
+            if self._parar.wait(espera):
+                break
+            espera = min(espera * 2, ESPERA_RECONEXAO_MAX)
+
+    @staticmethod
+    def _testar_conexao(conn):
+        """Consulta trivial; o commit evita deixar uma transação aberta"""
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT 1 FROM RDB$DATABASE")
+            cursor.fetchall()
+        finally:
+            cursor.close()
+        conn.commit()
+
+    @staticmethod
+    def _publicar(tabelas):
+        from base.eventos import barramento_eventos, TABELA_ALTERADA
+        for tabela in tabelas:
+            print(f"Tabela {tabela} alterada (evento do banco)")
+            barramento_eventos.publicar(TABELA_ALTERADA, tabela=tabela)
+
+
+# Criar instância global
+ouvinte_eventos_banco = OuvinteEventosBanco()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        postar_evento(sys.argv[1].upper())
+        print(f"Evento de {sys.argv[1].upper()} postado")
+    else:
+        ouvinte_eventos_banco.iniciar()
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            ouvinte_eventos_banco.parar()
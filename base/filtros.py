@@ -0,0 +1,176 @@
+"""
+Módulo das condições usadas nos filtros de pesquisa
+
+Os filtros usavam UPPER(NOME) LIKE '%texto%' e DOCUMENTO LIKE '%123%', que
+obrigam o Firebird a ler a tabela inteira (NATURAL no plano). As funções deste
+módulo montam condições que aproveitam os índices criados pela migração
+"Índices das pesquisas" (base.migracoes):
+
+    UPPER(NOME) STARTING WITH UPPER(?)   -> índice COMPUTED BY (UPPER(NOME))
+    DOCUMENTO STARTING WITH ?            -> índice em DOCUMENTO (só números)
+    CODIGO_BARRAS = ?                    -> índice em CODIGO_BARRAS
+
+A busca em qualquer parte do texto continua disponível: basta o usuário
+começar o filtro com * ou % (ex: *parafuso). Essa forma não usa índice.
+
+Para comparar o plano das condições antigas e novas no banco configurado:
+
+    python -m base.filtros
+"""
+
+import time
+
+CURINGAS = ("*", "%")
+TAMANHOS_DOCUMENTO = (11, 14)  # CPF e CNPJ completos
+
+
+def somente_numeros(texto):
+    """Remove tudo que não for dígito (pontos, traços, barras do CPF/CNPJ)"""
+    return ''.join(filter(str.isdigit, str(texto or "")))
+
+
+def filtro_texto(coluna, valor):
+    """
+    Condição para filtrar uma coluna de texto sem diferenciar maiúsculas
+
+    Args:
+        coluna (str): Coluna (ex: NOME)
+        valor (str): Texto digitado; começando com * ou % busca em qualquer parte
+
+    Returns:
+        tuple: (condição SQL, lista de parâmetros) ou ("", []) se valor vazio
+    """
+    valor = str(valor or "").strip()
+    if valor.startswith(CURINGAS):
+        valor = valor.lstrip("*%").strip()
+        if not valor:
+            return "", []
+        return f"{coluna} CONTAINING ?", [valor]  # CONTAINING já ignora maiúsculas
+    if not valor:
+        return "", []
+    return f"UPPER({coluna}) STARTING WITH UPPER(?)", [valor]
+
+
+def filtro_igual(coluna, valor, maiusculas=False):
+    """
+    Condição de igualdade (ex: CODIGO_BARRAS = ?, UPPER(GRUPO) = UPPER(?))
+
+    Returns:
+        tuple: (condição SQL, lista de parâmetros) ou ("", []) se valor vazio
+    """
+    valor = str(valor or "").strip()
+    if not valor:
+        return "", []
+    if maiusculas:
+        return f"UPPER({coluna}) = UPPER(?)", [valor]
+    return f"{coluna} = ?", [valor]
+
+
+def filtro_documento(coluna, valor):
+    """
+    Condição para CPF/CNPJ gravado somente com números
+
+    O documento completo usa igualdade; parte inicial usa STARTING WITH.
+
+    Returns:
+        tuple: (condição SQL, lista de parâmetros) ou ("", []) se não houver dígitos
+    """
+    numeros = somente_numeros(valor)
+    if not numeros:
+        return "", []
+    if len(numeros) in TAMANHOS_DOCUMENTO:
+        return f"{coluna} = ?", [numeros]
+    return f"{coluna} STARTING WITH ?", [numeros]
+
+
+def aplicar(query, params, condicao):
+    """
+    Acrescenta uma condição (de uma das funções acima) ao WHERE da consulta
+
+    Returns:
+        str: Consulta com " AND condição" (ou inalterada se a condição for vazia)
+    """
+    sql, valores = condicao
+    if not sql:
+        return query
+    params.extend(valores)
+    return query + f" AND {sql}"
+
+
+# ----------------------------------------------------------------------
+# Comparação dos planos
+# ----------------------------------------------------------------------
+
+# (descrição, consulta antiga, parâmetros antigos, consulta nova, parâmetros novos)
+CONSULTAS_COMPARACAO = [
+    ("Produtos por nome",
+     "SELECT ID FROM PRODUTOS WHERE UPPER(NOME) LIKE UPPER(?)", ("%CA%",),
+     "SELECT ID FROM PRODUTOS WHERE UPPER(NOME) STARTING WITH UPPER(?)", ("CA",)),
+    ("Produtos por código de barras",
+     "SELECT ID FROM PRODUTOS WHERE CODIGO_BARRAS = ?", ("7891000000000",),
+     "SELECT ID FROM PRODUTOS WHERE CODIGO_BARRAS = ?", ("7891000000000",)),
+    ("Produtos por grupo",
+     "SELECT ID FROM PRODUTOS WHERE UPPER(GRUPO) = UPPER(?)", ("BEBIDAS",),
+     "SELECT ID FROM PRODUTOS WHERE UPPER(GRUPO) = UPPER(?)", ("BEBIDAS",)),
+    ("Pessoas por nome",
+     "SELECT ID FROM PESSOAS WHERE UPPER(NOME) LIKE UPPER(?)", ("%MA%",),
+     "SELECT ID FROM PESSOAS WHERE UPPER(NOME) STARTING WITH UPPER(?)", ("MA",)),
+    ("Pessoas por documento",
+     "SELECT ID FROM PESSOAS WHERE DOCUMENTO LIKE ?", ("%123%",),
+     "SELECT ID FROM PESSOAS WHERE DOCUMENTO STARTING WITH ?", ("123",)),
+    ("Fornecedores por CNPJ",
+     "SELECT ID FROM FORNECEDORES WHERE CNPJ LIKE ?", ("%123%",),
+     "SELECT ID FROM FORNECEDORES WHERE CNPJ STARTING WITH ?", ("123",)),
+    ("Pedidos por cidade",
+     "SELECT ID FROM PEDIDOS_VENDA WHERE UPPER(CIDADE) LIKE UPPER(?)", ("%SAO%",),
+     "SELECT ID FROM PEDIDOS_VENDA WHERE UPPER(CIDADE) STARTING WITH UPPER(?)", ("SAO",)),
+    ("Pedidos por período",
+     "SELECT ID FROM PEDIDOS_VENDA WHERE DATA_PEDIDO >= CURRENT_DATE - 30", (),
+     "SELECT ID FROM PEDIDOS_VENDA WHERE DATA_PEDIDO >= CURRENT_DATE - 30", ()),
+]
+
+
+def _medir(cursor, query, params):
+    """Plano e tempo (ms) de uma consulta, lendo todas as linhas"""
+    preparada = cursor.prep(query)
+    inicio = time.perf_counter()
+    cursor.execute(preparada, params)
+    linhas = len(cursor.fetchall())
+    return (preparada.plan or "").strip(), (time.perf_counter() - inicio) * 1000, linhas
+
+
+def comparar_planos(consultas=None):
+    """
+    Mostra o plano e o tempo das condições antigas e novas de cada filtro
+
+    Rode antes e depois de aplicar as migrações para ver a troca de
+    PLAN (... NATURAL) por PLAN (... INDEX (...)).
+
+    Returns:
+        list: [(descrição, (plano, ms, linhas) antigo, (plano, ms, linhas) novo)]
+    """
+    from base.banco import get_connection
+
+    resultados = []
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        for descricao, antiga, params_antiga, nova, params_nova in (consultas or CONSULTAS_COMPARACAO):
+            try:
+                antes = _medir(cursor, antiga, params_antiga)
+                depois = _medir(cursor, nova, params_nova)
+            except Exception as e:
+                print(f"{descricao}: não foi possível comparar ({e})")
+                continue
+            resultados.append((descricao, antes, depois))
+            print(f"\n=== {descricao} ===")
+            print(f"Antes:  {antes[0]}  [{antes[1]:.1f} ms, {antes[2]} linhas]")
+            print(f"Depois: {depois[0]}  [{depois[1]:.1f} ms, {depois[2]} linhas]")
+        conn.commit()
+    finally:
+        conn.close()
+    return resultados
+
+
+if __name__ == "__main__":
+    comparar_planos()
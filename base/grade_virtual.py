@@ -0,0 +1,337 @@
+"""
+Módulo da grade virtual usada nas telas de listagem
+
+As telas de listagem criavam um QTableWidgetItem por célula para o resultado
+inteiro, o que trava a tela e consome muita memória com dezenas de milhares
+de linhas. A GradeVirtual usa um QAbstractTableModel que guarda apenas as
+tuplas já lidas e formata cada célula somente quando ela é desenhada.
+
+As linhas chegam em páginas (canFetchMore/fetchMore) conforme o usuário rola
+a tabela. Com uma FonteConsulta, cada página é um SELECT ... ROWS m TO n e a
+ordenação pelo cabeçalho vira ORDER BY no banco; com uma FonteLista (dados já
+carregados em memória) a ordenação é feita localmente.
+"""
+
+from PyQt5.QtWidgets import QTableView, QAbstractItemView
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QVariant, pyqtSignal
+
+TAMANHO_PAGINA = 200  # Linhas lidas por vez
+
+
+class ColunaGrade:
+    """
+    Definição de uma coluna da grade
+
+    Args:
+        titulo (str): Texto do cabeçalho
+        indice (int, optional): Posição do valor na tupla da linha (exibição e
+            ordenação em memória)
+        formatar (callable, optional): Recebe a tupla da linha e retorna o texto
+        ordenar_por (str, optional): Expressão SQL do ORDER BY desta coluna
+            (sem ela a coluna não é ordenável em uma FonteConsulta)
+        alinhamento (Qt.Alignment, optional): Alinhamento do texto
+        fundo (callable, optional): Recebe a tupla da linha e retorna QColor ou None
+        cor (callable, optional): Recebe a tupla da linha e retorna QColor ou None
+    """
+
+    def __init__(self, titulo, indice=None, formatar=None, ordenar_por=None,
+                 alinhamento=None, fundo=None, cor=None):
+        self.titulo = titulo
+        self.indice = indice
+        self.formatar = formatar
+        self.ordenar_por = ordenar_por
+        self.alinhamento = alinhamento
+        self.fundo = fundo
+        self.cor = cor
+
+    def texto(self, linha):
+        if self.formatar is not None:
+            return self.formatar(linha)
+        valor = linha[self.indice]
+        return "" if valor is None else str(valor)
+
+
+class FonteConsulta:
+    """
+    Linhas lidas do banco por página, ordenadas no servidor
+
+    Args:
+        query (str): SELECT sem ORDER BY (os filtros já aplicados)
+        params (tuple, optional): Parâmetros do SELECT
+        ordem_padrao (str, optional): ORDER BY usado quando nenhuma coluna foi escolhida
+        desempate (str, optional): Expressão única (ex: a chave primária) acrescentada
+            ao ORDER BY para que as páginas não repitam nem pulem linhas
+    """
+
+    def __init__(self, query, params=None, ordem_padrao=None, desempate=None):
+        self.query = query
+        self.params = tuple(params or ())
+        self.ordem_padrao = ordem_padrao
+        self.desempate = desempate
+
+    def ordenavel(self, coluna):
+        return bool(coluna.ordenar_por)
+
+    def buscar(self, inicio, quantidade, coluna=None, decrescente=False):
+        """
+        Returns:
+            list: Linhas de inicio até inicio + quantidade - 1 (base 0)
+        """
+        from base.banco import execute_query
+
+        if coluna is not None and coluna.ordenar_por:
+            ordem = f"{coluna.ordenar_por} {'DESC' if decrescente else 'ASC'}"
+            if self.desempate:
+                ordem += f", {self.desempate}"
+        else:
+            ordem = self.ordem_padrao
+
+        query = self.query
+        if ordem:
+            query += f"\nORDER BY {ordem}"
+        query += "\nROWS ? TO ?"
+        return execute_query(query, self.params + (inicio + 1, inicio + quantidade))
+
+
+class FonteLista:
+    """
+    Linhas já carregadas em memória, ordenadas localmente
+
+    Args:
+        linhas (iterable): Tuplas das linhas
+    """
+
+    def __init__(self, linhas):
+        self.original = list(linhas)
+        self.linhas = self.original
+        self._ordem = None
+
+    def ordenavel(self, coluna):
+        return coluna.indice is not None
+
+    def buscar(self, inicio, quantidade, coluna=None, decrescente=False):
+        ordem = (coluna.indice, decrescente) if coluna is not None and coluna.indice is not None else None
+        if ordem != self._ordem:
+            self._ordenar(ordem)
+        return self.linhas[inicio:inicio + quantidade]
+
+    def remover(self, linha):
+        """Remove uma linha também da lista original"""
+        for lista in (self.original, self.linhas):
+            for posicao, item in enumerate(lista):
+                if item is linha:
+                    del lista[posicao]
+                    break
+
+    def _ordenar(self, ordem):
+        self._ordem = ordem
+        if ordem is None:
+            self.linhas = self.original
+            return
+        indice, decrescente = ordem
+
+        def chave(linha):
+            valor = linha[indice]
+            return (valor is None, valor)
+
+        try:
+            self.linhas = sorted(self.original, key=chave, reverse=decrescente)
+        except TypeError:
+            # Valores de tipos diferentes na mesma coluna: comparar como texto
+            self.linhas = sorted(self.original, key=lambda l: str(l[indice] or ""),
+                                 reverse=decrescente)
+
+
+class ModeloGradeVirtual(QAbstractTableModel):
+    """Modelo que lê as linhas da fonte por página e formata sob demanda"""
+
+    def __init__(self, colunas, parent=None, tamanho_pagina=TAMANHO_PAGINA):
+        super().__init__(parent)
+        self.colunas = list(colunas)
+        self.tamanho_pagina = tamanho_pagina
+        self._fonte = FonteLista([])
+        self._linhas = []
+        self._fim = True
+        self._coluna_ordem = None
+        self._decrescente = False
+
+    # ------------------------------------------------------------------
+    # Fonte de dados
+    # ------------------------------------------------------------------
+
+    def definir_fonte(self, fonte):
+        """
+        Troca a fonte de dados e lê a primeira página
+
+        Returns:
+            int: Quantidade de linhas lidas na primeira página
+        """
+        self.beginResetModel()
+        try:
+            self._fonte = fonte
+            self._linhas = []
+            self._fim = False
+            self._linhas.extend(self._ler_pagina())
+        finally:
+            self.endResetModel()
+        return len(self._linhas)
+
+    def recarregar(self):
+        """Lê a fonte atual novamente desde o início"""
+        return self.definir_fonte(self._fonte)
+
+    def linha(self, row):
+        """Tupla original da linha (ou None se fora do intervalo)"""
+        if 0 <= row < len(self._linhas):
+            return self._linhas[row]
+        return None
+
+    def remover_linha(self, row):
+        """Remove uma linha da grade (sem tocar no banco)"""
+        if not 0 <= row < len(self._linhas):
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        linha = self._linhas.pop(row)
+        self.endRemoveRows()
+        if isinstance(self._fonte, FonteLista):
+            self._fonte.remover(linha)
+
+    def _ler_pagina(self):
+        """Lê a próxima página da fonte (sem avisar a visão)"""
+        pagina = list(self._fonte.buscar(len(self._linhas), self.tamanho_pagina,
+                                         self._coluna_ordem, self._decrescente) or [])
+        if len(pagina) < self.tamanho_pagina:
+            self._fim = True
+        return pagina
+
+    # ------------------------------------------------------------------
+    # Interface do QAbstractTableModel
+    # ------------------------------------------------------------------
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._linhas)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.colunas)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return QVariant()
+        linha = self._linhas[index.row()]
+        coluna = self.colunas[index.column()]
+
+        if role == Qt.DisplayRole:
+            return coluna.texto(linha)
+        if role == Qt.UserRole:
+            return linha
+        if role == Qt.TextAlignmentRole and coluna.alinhamento is not None:
+            return int(coluna.alinhamento)
+        if role == Qt.BackgroundRole and coluna.fundo is not None:
+            cor = coluna.fundo(linha)
+            return cor if cor is not None else QVariant()
+        if role == Qt.ForegroundRole and coluna.cor is not None:
+            cor = coluna.cor(linha)
+            return cor if cor is not None else QVariant()
+        return QVariant()
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal and 0 <= section < len(self.colunas):
+            return self.colunas[section].titulo
+        return QVariant()
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._fim
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._fim:
+            return
+        try:
+            pagina = self._ler_pagina()
+        except Exception as e:
+            print(f"Erro ao carregar mais linhas da grade: {e}")
+            self._fim = True
+            return
+        if pagina:
+            inicio = len(self._linhas)
+            self.beginInsertRows(QModelIndex(), inicio, inicio + len(pagina) - 1)
+            self._linhas.extend(pagina)
+            self.endInsertRows()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """Ordena pela coluna (no banco ou em memória, conforme a fonte) e relê"""
+        coluna = self.colunas[column] if 0 <= column < len(self.colunas) else None
+        if coluna is not None and not self._fonte.ordenavel(coluna):
+            return
+        self._coluna_ordem = coluna
+        self._decrescente = order == Qt.DescendingOrder
+        try:
+            self.definir_fonte(self._fonte)
+        except Exception as e:
+            print(f"Erro ao ordenar a grade: {e}")
+
+
+class GradeVirtual(QTableView):
+    """
+    Tabela somente leitura baseada no ModeloGradeVirtual
+
+    Emite selecao_alterada quando a linha selecionada muda.
+    """
+    selecao_alterada = pyqtSignal()
+
+    def __init__(self, colunas, parent=None, tamanho_pagina=TAMANHO_PAGINA):
+        super().__init__(parent)
+        self.modelo = ModeloGradeVirtual(colunas, self, tamanho_pagina)
+        self.setModel(self.modelo)
+        self.selectionModel().selectionChanged.connect(lambda *args: self.selecao_alterada.emit())
+
+        self.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.verticalHeader().setVisible(False)
+
+        # Sem indicador inicial: a primeira carga usa a ordem padrão da fonte
+        self.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.setSortingEnabled(True)
+
+    def definir_fonte(self, fonte):
+        """
+        Returns:
+            int: Quantidade de linhas lidas na primeira página
+        """
+        return self.modelo.definir_fonte(fonte)
+
+    def definir_linhas(self, linhas):
+        """Exibe linhas já carregadas em memória"""
+        return self.modelo.definir_fonte(FonteLista(linhas))
+
+    def limpar(self):
+        self.modelo.definir_fonte(FonteLista([]))
+
+    def recarregar(self):
+        return self.modelo.recarregar()
+
+    def total_linhas(self):
+        """Quantidade de linhas já carregadas"""
+        return self.modelo.rowCount()
+
+    def linha(self, row):
+        return self.modelo.linha(row)
+
+    def linha_atual(self):
+        """
+        Returns:
+            int: Índice da linha selecionada ou -1
+        """
+        selecionadas = self.selectionModel().selectedRows()
+        if selecionadas:
+            return selecionadas[0].row()
+        return self.currentIndex().row() if self.currentIndex().isValid() else -1
+
+    def linha_selecionada(self):
+        """
+        Returns:
+            tuple: Tupla da linha selecionada ou None
+        """
+        return self.modelo.linha(self.linha_atual())
+
+    def remover_linha(self, row):
+        self.modelo.remover_linha(row)
@@ -0,0 +1,208 @@
+"""
+Módulo do índice de busca por nome tolerante a acentos e erros de digitação
+
+Os nomes são normalizados (sem acento, minúsculos) e divididos em palavras.
+Cada palavra distinta entra em dois índices:
+    - vocabulário ordenado, para achar por busca binária as palavras que
+      começam com o termo digitado ("acu" -> "acucar")
+    - trigramas (trechos de 3 letras), para achar palavras parecidas quando
+      há erro de digitação ("acucra" -> "acucar")
+
+A busca procura os termos no vocabulário (algumas dezenas de milhares de
+palavras), e não nos registros, por isso responde em poucos milissegundos
+mesmo com 100 mil produtos. Os resultados vêm ordenados pela pontuação:
+palavra exata, depois início de palavra, depois palavra parecida.
+"""
+
+from bisect import bisect_left, insort
+
+from base.motor_sugestoes import tokens
+
+PONTUACAO_EXATA = 1.0
+PONTUACAO_PREFIXO = 0.9
+PESO_APROXIMADO = 0.8       # Palavra parecida vale no máximo 0.8
+SIMILARIDADE_MINIMA = 0.4   # Coeficiente de Dice mínimo entre os trigramas
+TAMANHO_MINIMO_APROXIMADO = 3  # Termos menores só casam por início de palavra
+MAX_PALAVRAS_PREFIXO = 500  # Palavras do vocabulário aceitas por início, por termo
+MAX_CANDIDATOS = 5000       # Registros examinados por consulta
+
+
+def trigramas(palavra):
+    """Trechos de 3 caracteres da palavra, com espaços marcando início e fim"""
+    texto = f"  {palavra} "
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+class IndiceBusca:
+    """
+    Índice em memória de textos por palavra e por trigrama
+
+    Não é protegido por lock: quem o usa (catálogo, busca de pessoas) já
+    serializa os acessos.
+    """
+
+    def __init__(self, similaridade_minima=SIMILARIDADE_MINIMA):
+        self.similaridade_minima = similaridade_minima
+        self._palavras_item = {}  # id -> tupla de palavras do texto
+        self._ordem = {}          # id -> palavras do texto (desempate)
+        self._itens_palavra = {}  # palavra -> conjunto de ids
+        self._vocabulario = []    # palavras distintas, ordenadas
+        self._palavras_trigrama = {}  # trigrama -> conjunto de palavras
+        self._qtd_trigramas = {}  # palavra -> quantidade de trigramas
+
+    def __len__(self):
+        return len(self._palavras_item)
+
+    def indexar(self, itens):
+        """
+        Reconstrói o índice
+
+        Args:
+            itens (iterable): Tuplas (id, texto)
+        """
+        self.__init__(self.similaridade_minima)
+        for id_item, texto in itens:
+            self._incluir(id_item, texto, ordenar=False)
+        self._vocabulario.sort()
+
+    def atualizar(self, id_item, texto):
+        """Inclui ou substitui o texto de um item"""
+        self.remover(id_item)
+        self._incluir(id_item, texto)
+
+    def remover(self, id_item):
+        """Remove um item (sem efeito se ele não estiver indexado)"""
+        palavras = self._palavras_item.pop(id_item, None)
+        if palavras is None:
+            return
+        self._ordem.pop(id_item, None)
+        for palavra in palavras:
+            ids = self._itens_palavra.get(palavra)
+            if ids is None:
+                continue
+            ids.discard(id_item)
+            if not ids:
+                self._descartar_palavra(palavra)
+
+    def buscar(self, texto, limite=20):
+        """
+        Retorna os IDs mais relevantes para o texto digitado
+
+        Todos os termos precisam casar com alguma palavra do item (exata, pelo
+        início ou parecida). A pontuação do item é a média da melhor
+        pontuação de cada termo.
+
+        Args:
+            texto (str): Texto digitado
+            limite (int): Máximo de resultados
+
+        Returns:
+            list: Tuplas (id, pontuação) em ordem de relevância
+        """
+        termos = tokens(texto)
+        if not termos or limite <= 0:
+            return []
+
+        candidatos = [self._palavras_candidatas(termo) for termo in termos]
+        if not all(candidatos):
+            return []
+
+        # Percorrer os itens pelo termo com menos ocorrências e conferir os demais
+        candidatos.sort(key=self._ocorrencias)
+        principal, outros = candidatos[0], candidatos[1:]
+
+        pontos = {}
+        for palavra, nota in sorted(principal.items(), key=lambda p: -p[1]):
+            for id_item in self._itens_palavra.get(palavra, ()):
+                if nota > pontos.get(id_item, 0):
+                    pontos[id_item] = nota
+            if len(pontos) >= MAX_CANDIDATOS:
+                break
+
+        resultado = []
+        for id_item, nota in pontos.items():
+            total = nota
+            palavras = self._palavras_item[id_item]
+            for termo in outros:
+                melhor = max((termo.get(p, 0) for p in palavras), default=0)
+                if not melhor:
+                    break
+                total += melhor
+            else:
+                resultado.append((id_item, total / len(termos)))
+
+        resultado.sort(key=lambda r: (-r[1], self._ordem.get(r[0], "")))
+        return resultado[:limite]
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+
+    def _incluir(self, id_item, texto, ordenar=True):
+        palavras = tuple(dict.fromkeys(tokens(texto)))
+        self._palavras_item[id_item] = palavras
+        self._ordem[id_item] = " ".join(palavras)
+        for palavra in palavras:
+            ids = self._itens_palavra.get(palavra)
+            if ids is None:
+                ids = self._itens_palavra[palavra] = set()
+                self._registrar_palavra(palavra, ordenar)
+            ids.add(id_item)
+
+    def _registrar_palavra(self, palavra, ordenar):
+        if ordenar:
+            insort(self._vocabulario, palavra)
+        else:
+            self._vocabulario.append(palavra)
+        trechos = trigramas(palavra)
+        self._qtd_trigramas[palavra] = len(trechos)
+        for trecho in trechos:
+            self._palavras_trigrama.setdefault(trecho, set()).add(palavra)
+
+    def _descartar_palavra(self, palavra):
+        del self._itens_palavra[palavra]
+        self._qtd_trigramas.pop(palavra, None)
+        posicao = bisect_left(self._vocabulario, palavra)
+        if posicao < len(self._vocabulario) and self._vocabulario[posicao] == palavra:
+            del self._vocabulario[posicao]
+        for trecho in trigramas(palavra):
+            palavras = self._palavras_trigrama.get(trecho)
+            if palavras is not None:
+                palavras.discard(palavra)
+                if not palavras:
+                    del self._palavras_trigrama[trecho]
+
+    def _palavras_candidatas(self, termo):
+        """
+        Returns:
+            dict: palavra do vocabulário -> pontuação para o termo
+        """
+        candidatas = {}
+
+        posicao = bisect_left(self._vocabulario, termo)
+        while posicao < len(self._vocabulario) and len(candidatas) < MAX_PALAVRAS_PREFIXO:
+            palavra = self._vocabulario[posicao]
+            if not palavra.startswith(termo):
+                break
+            candidatas[palavra] = PONTUACAO_EXATA if palavra == termo else PONTUACAO_PREFIXO
+            posicao += 1
+
+        # Palavra digitada corretamente (existe no vocabulário): sem aproximação
+        if len(termo) < TAMANHO_MINIMO_APROXIMADO or termo in self._itens_palavra:
+            return candidatas
+
+        trechos = trigramas(termo)
+        comuns = {}
+        for trecho in trechos:
+            for palavra in self._palavras_trigrama.get(trecho, ()):
+                comuns[palavra] = comuns.get(palavra, 0) + 1
+        for palavra, quantidade in comuns.items():
+            if palavra in candidatas:
+                continue
+            similaridade = 2 * quantidade / (len(trechos) + self._qtd_trigramas[palavra])
+            if similaridade >= self.similaridade_minima:
+                candidatas[palavra] = similaridade * PESO_APROXIMADO
+        return candidatas
+
+    def _ocorrencias(self, candidatas):
+        return sum(len(self._itens_palavra.get(p, ())) for p in candidatas)
@@ -0,0 +1,187 @@
+"""
+Módulo das tarefas de inicialização executadas durante a tela de carregamento
+
+As tarefas rodam em paralelo: a conexão com o banco é aberta primeiro e, assim
+que ela fica pronta, as migrações do esquema e a carga do catálogo de
+produtos seguem juntas. A verificação do Syncthing não depende do banco e
+começa imediatamente.
+
+O tempo de cada tarefa e o tempo até a tela de login são gravados em
+tempos_inicializacao.jsonl (uma linha JSON por inicialização), para acompanhar a
+evolução entre as versões.
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+NOME_ARQUIVO_TEMPOS = "tempos_inicializacao.jsonl"
+
+
+def _caminho_arquivo_tempos():
+    """Arquivo dos tempos, na pasta da aplicação (ao lado do executável)"""
+    if getattr(sys, 'frozen', False):
+        base_dir = os.path.dirname(sys.executable)
+    else:
+        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base_dir, NOME_ARQUIVO_TEMPOS)
+
+
+# ----------------------------------------------------------------------
+# Tarefas
+# ----------------------------------------------------------------------
+
+def conectar_banco():
+    """Abre a primeira conexão do pool (attach ao banco)"""
+    from base.banco import get_connection
+    conn = get_connection()
+    conn.close()  # Devolve ao pool, já aberta para o login
+
+
+def verificar_esquema():
+    """Aplica as migrações pendentes e lê as colunas das tabelas mapeadas"""
+    from base.migracoes import aplicar_migracoes
+    from base.esquema import registro_esquema
+    aplicar_migracoes()
+    registro_esquema.carregar()
+
+
+def carregar_catalogo():
+    """Carrega o catálogo de produtos usado pelo PDV"""
+    from base.catalogo_produtos import catalogo_produtos
+    catalogo_produtos.carregar()
+
+
+def iniciar_ouvinte_eventos():
+    """Inicia a thread que recebe os avisos de alteração das outras estações"""
+    from base.eventos_banco import ouvinte_eventos_banco
+    ouvinte_eventos_banco.iniciar()
+
+
+def verificar_syncthing():
+    """Inicia o Syncthing se necessário e limpa arquivos de conflito"""
+    from base.banco import iniciar_syncthing_se_necessario, limpar_arquivos_conflito
+    iniciado = iniciar_syncthing_se_necessario()
+    limpar_arquivos_conflito()
+    if not iniciado:
+        raise Exception("Syncthing não foi iniciado")
+
+
+# (nome, texto exibido na tela de carregamento, função, depende do banco)
+TAREFAS_INICIALIZACAO = [
+    ("banco", "Conectando ao banco de dados...", conectar_banco, False),
+    ("syncthing", "Verificando Syncthing...", verificar_syncthing, False),
+    ("esquema", "Verificando estrutura do banco...", verificar_esquema, True),
+    ("catalogo", "Carregando catálogo de produtos...", carregar_catalogo, True),
+    ("eventos", "Conectando aos avisos entre estações...", iniciar_ouvinte_eventos, True),
+]
+
+
+def executar_tarefas(ao_iniciar=None, ao_concluir=None, tarefas=None, max_threads=4):
+    """
+    Executa as tarefas de inicialização em paralelo
+
+    A tarefa "banco" é executada antes das que dependem do banco; se ela
+    falhar, essas tarefas são ignoradas (o login mostra o erro de conexão).
+
+    Args:
+        ao_iniciar (callable, optional): Recebe (nome, texto) quando uma tarefa começa
+        ao_concluir (callable, optional): Recebe (nome, sucesso, concluidas, total)
+        tarefas (list, optional): Lista no formato de TAREFAS_INICIALIZACAO
+        max_threads (int): Máximo de tarefas simultâneas
+
+    Returns:
+        dict: nome -> {'ms': float, 'sucesso': bool, 'erro': str | None}
+    """
+    tarefas = list(tarefas or TAREFAS_INICIALIZACAO)
+    total = len(tarefas)
+    tempos = {}
+
+    def executar(nome, texto, funcao):
+        if ao_iniciar:
+            ao_iniciar(nome, texto)
+        inicio = time.perf_counter()
+        erro = None
+        try:
+            funcao()
+        except Exception as e:
+            erro = str(e)
+            print(f"Erro na tarefa de inicialização '{nome}': {e}")
+        return nome, {'ms': round((time.perf_counter() - inicio) * 1000, 1),
+                      'sucesso': erro is None, 'erro': erro}
+
+    def concluir(futuro):
+        nome, tempo = futuro.result()
+        tempos[nome] = tempo
+        if ao_concluir:
+            ao_concluir(nome, tempo['sucesso'], len(tempos), total)
+        return tempo['sucesso']
+
+    independentes = [t for t in tarefas if not t[3]]
+    dependentes = [t for t in tarefas if t[3]]
+
+    with ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix="Inicializacao") as executor:
+        pendentes = {executor.submit(executar, nome, texto, funcao): nome
+                     for nome, texto, funcao, _ in independentes}
+        banco_pronto = not any(nome == "banco" for nome, *_ in independentes)
+
+        if banco_pronto:
+            pendentes.update({executor.submit(executar, nome, texto, funcao): nome
+                              for nome, texto, funcao, _ in dependentes})
+            dependentes = []
+
+        while pendentes:
+            futuro = next(as_completed(pendentes))
+            nome = pendentes.pop(futuro)
+            sucesso = concluir(futuro)
+            if nome == "banco" and dependentes:
+                if sucesso:
+                    pendentes.update({executor.submit(executar, n, texto, funcao): n
+                                      for n, texto, funcao, _ in dependentes})
+                else:
+                    for n, *_ in dependentes:
+                        tempos[n] = {'ms': 0.0, 'sucesso': False, 'erro': 'Banco indisponível'}
+                        if ao_concluir:
+                            ao_concluir(n, False, len(tempos), total)
+                dependentes = []
+
+    return tempos
+
+
+def registrar_tempos(versao, tempos, tempo_total_ms, tempo_login_ms=None):
+    """
+    Acrescenta os tempos desta inicialização ao arquivo de tempos
+
+    Args:
+        versao (str): Versão do sistema
+        tempos (dict): Resultado de executar_tarefas
+        tempo_total_ms (float): Duração das tarefas (em paralelo)
+        tempo_login_ms (float, optional): Tempo desde o início do processo até a tela de login
+    """
+    try:
+        estacao = socket.gethostname()
+    except Exception:
+        estacao = "Estação Desconhecida"
+
+    registro = {
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'versao': versao,
+        'estacao': estacao,
+        'tarefas_ms': round(tempo_total_ms, 1),
+        'login_ms': round(tempo_login_ms, 1) if tempo_login_ms is not None else None,
+        'tarefas': tempos,
+    }
+    print("Tempos de inicialização: " + ", ".join(
+        f"{nome} {t['ms']:.0f} ms" for nome, t in tempos.items()) +
+        f" | total {tempo_total_ms:.0f} ms" +
+        (f" | tela de login em {tempo_login_ms:.0f} ms" if tempo_login_ms is not None else ""))
+
+    try:
+        with open(_caminho_arquivo_tempos(), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+    except Exception as e:
+        print(f"Aviso: não foi possível gravar os tempos de inicialização: {e}")
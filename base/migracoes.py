@@ -0,0 +1,278 @@
+"""
+Módulo de migrações do esquema do banco de dados
+
+As tabelas eram verificadas (consulta a RDB$RELATIONS e, às vezes, DDL) pelas
+funções verificar_tabela_* a cada abertura de tela. Agora cada alteração de
+esquema é uma migração numerada, aplicada uma única vez, em ordem, na
+inicialização do sistema. A versão aplicada fica registrada na tabela
+SCHEMA_VERSION, compartilhada por todas as estações.
+
+Depois de aplicar_migracoes(), as funções de verificação marcadas com
+verificacao_de_esquema (base.banco) retornam sem consultar o banco; abrir uma
+tela não toca mais nas tabelas de sistema.
+
+Para alterar o esquema, acrescente uma migração no fim de MIGRACOES com o
+próximo número. As migrações devem ser idempotentes (verificar antes de
+criar), pois bancos antigos já podem ter parte da estrutura.
+"""
+
+import socket
+import threading
+from datetime import datetime
+
+TABELA_VERSAO = "SCHEMA_VERSION"
+
+_lock = threading.Lock()
+_esquema_atualizado = False
+
+
+def _banco(nome_funcao):
+    """Migração que executa uma função de verificação de base.banco"""
+    def executar():
+        import base.banco
+        return getattr(base.banco, nome_funcao)()
+    executar.__name__ = nome_funcao
+    return executar
+
+
+def _permissoes():
+    from ferramentas.configuracao_sistema import ConfiguracaoSistemaBackend
+    return ConfiguracaoSistemaBackend().verificar_tabela_permissoes()
+
+
+def _tabela_existe(tabela):
+    from base.banco import execute_query
+    result = execute_query(
+        "SELECT COUNT(*) FROM RDB$RELATIONS WHERE RDB$RELATION_NAME = ?", (tabela,))
+    return bool(result and result[0][0])
+
+
+def _criar_indice(nome, tabela, definicao):
+    """
+    Cria um índice se a tabela existir e o índice ainda não existir
+
+    Args:
+        nome (str): Nome do índice (até 31 caracteres)
+        tabela (str): Tabela
+        definicao (str): Colunas entre parênteses ou COMPUTED BY (expressão)
+    """
+    from base.banco import execute_query
+
+    if not _tabela_existe(tabela):
+        print(f"Tabela {tabela} não existe, índice {nome} ignorado")
+        return
+    result = execute_query(
+        "SELECT COUNT(*) FROM RDB$INDICES WHERE RDB$INDEX_NAME = ?", (nome,))
+    if result and result[0][0]:
+        return
+    execute_query(f"CREATE INDEX {nome} ON {tabela} {definicao}")
+    print(f"Índice {nome} criado")
+
+
+# Documentos gravados com máscara por versões antigas: (tabela, coluna)
+COLUNAS_DOCUMENTO = [
+    ("PESSOAS", "DOCUMENTO"),
+    ("FORNECEDORES", "CNPJ"),
+    ("FUNCIONARIOS", "CPF_CNPJ"),
+    ("EMPRESAS", "DOCUMENTO"),
+]
+
+
+def _documentos_somente_numeros():
+    """Remove pontos, traços, barras e espaços dos CPF/CNPJ já gravados"""
+    from base.banco import execute_query
+
+    for tabela, coluna in COLUNAS_DOCUMENTO:
+        if not _tabela_existe(tabela):
+            continue
+        try:
+            execute_query(f"""
+            UPDATE {tabela}
+            SET {coluna} = REPLACE(REPLACE(REPLACE(REPLACE({coluna}, '.', ''), '-', ''), '/', ''), ' ', '')
+            WHERE {coluna} CONTAINING '.' OR {coluna} CONTAINING '-'
+               OR {coluna} CONTAINING '/' OR {coluna} CONTAINING ' '
+            """)
+        except Exception as e:
+            # Ex: dois cadastros que só diferiam pela máscara; a pesquisa por
+            # prefixo não encontra esses, mas não impede os índices
+            print(f"Aviso: não foi possível normalizar {tabela}.{coluna}: {e}")
+
+
+# (nome, tabela, definição) dos índices usados pelos filtros (base.filtros)
+INDICES_PESQUISA = [
+    ("IDX_PRODUTOS_NOME_UPPER", "PRODUTOS", "COMPUTED BY (UPPER(NOME))"),
+    ("IDX_PRODUTOS_CODIGO_BARRAS", "PRODUTOS", "(CODIGO_BARRAS)"),
+    ("IDX_PRODUTOS_GRUPO_UPPER", "PRODUTOS", "COMPUTED BY (UPPER(GRUPO))"),
+    ("IDX_PRODUTOS_MARCA_UPPER", "PRODUTOS", "COMPUTED BY (UPPER(MARCA))"),
+    ("IDX_PESSOAS_NOME_UPPER", "PESSOAS", "COMPUTED BY (UPPER(NOME))"),
+    ("IDX_PESSOAS_DOCUMENTO", "PESSOAS", "(DOCUMENTO)"),
+    ("IDX_FORNECEDORES_NOME_UPPER", "FORNECEDORES", "COMPUTED BY (UPPER(NOME))"),
+    ("IDX_FORNECEDORES_CNPJ", "FORNECEDORES", "(CNPJ)"),
+    ("IDX_FUNCIONARIOS_CPF_CNPJ", "FUNCIONARIOS", "(CPF_CNPJ)"),
+    ("IDX_PEDIDOS_CLIENTE_UPPER", "PEDIDOS_VENDA", "COMPUTED BY (UPPER(CLIENTE))"),
+    ("IDX_PEDIDOS_VENDEDOR_UPPER", "PEDIDOS_VENDA", "COMPUTED BY (UPPER(VENDEDOR))"),
+    ("IDX_PEDIDOS_CIDADE_UPPER", "PEDIDOS_VENDA", "COMPUTED BY (UPPER(CIDADE))"),
+    ("IDX_PEDIDOS_DATA_PEDIDO", "PEDIDOS_VENDA", "(DATA_PEDIDO)"),
+    ("IDX_RECEBIMENTOS_VENCIMENTO", "RECEBIMENTOS_CLIENTES", "(VENCIMENTO)"),
+]
+
+
+def _indices_pesquisa():
+    """Índices das colunas usadas nos filtros das telas de pesquisa"""
+    from base.esquema import registro_esquema
+
+    for nome, tabela, definicao in INDICES_PESQUISA:
+        _criar_indice(nome, tabela, definicao)
+
+    # A coluna de data da tabela VENDAS varia entre instalações
+    registro_esquema.invalidar('VENDAS')
+    coluna_data = registro_esquema.coluna('VENDAS', 'data_venda')
+    if coluna_data:
+        _criar_indice("IDX_VENDAS_DATA", "VENDAS", f"({coluna_data})")
+
+
+def _indices_vendas_itens():
+    """Índices da junção VENDAS -> VENDAS_ITENS -> PRODUTOS dos relatórios"""
+    from base.esquema import registro_esquema
+
+    registro_esquema.invalidar('VENDAS_ITENS')
+    coluna_venda = registro_esquema.coluna('VENDAS_ITENS', 'id_venda')
+    coluna_produto = registro_esquema.coluna('VENDAS_ITENS', 'id_produto')
+    if coluna_venda:
+        _criar_indice("IDX_VENDAS_ITENS_VENDA", "VENDAS_ITENS", f"({coluna_venda})")
+    if coluna_produto:
+        _criar_indice("IDX_VENDAS_ITENS_PRODUTO", "VENDAS_ITENS", f"({coluna_produto})")
+
+
+def _vendas_diarias():
+    """Tabela do resumo diário de vendas por produto, já preenchida com o histórico"""
+    from base import vendas_diarias
+
+    vendas_diarias.verificar_tabela()
+    vendas_diarias.reconstruir()
+
+
+def _triggers_eventos():
+    """Triggers POST_EVENT que avisam as outras estações (base.eventos_banco)"""
+    from base.eventos_banco import criar_triggers
+    criar_triggers()
+
+
+# (versão, descrição, função). Nunca renumerar nem remover uma migração já publicada.
+MIGRACOES = [
+    (1, "Tabela USUARIOS", _banco("verificar_tabela_usuarios")),
+    (2, "Tabela LICENCAS", _banco("verificar_tabela_licencas")),
+    (3, "Tabela EMPRESAS", _banco("verificar_tabela_empresas")),
+    (4, "Tabela PESSOAS", _banco("verificar_tabela_pessoas")),
+    (5, "Tabela FUNCIONARIOS", _banco("verificar_tabela_funcionarios")),
+    (6, "Colunas de usuário em FUNCIONARIOS", _banco("verificar_tabela_funcionarios_atualizacao")),
+    (7, "Tabela PRODUTOS", _banco("verificar_tabela_produtos")),
+    (8, "Tabela MARCAS", _banco("verificar_tabela_marcas")),
+    (9, "Tabela GRUPOS", _banco("verificar_tabela_grupos")),
+    (10, "Tabela TIPOS_FORNECEDORES", _banco("verificar_tabela_tipos_fornecedores")),
+    (11, "Tabela FORNECEDORES", _banco("verificar_tabela_fornecedores")),
+    (12, "Tabela PEDIDOS_VENDA", _banco("verificar_tabela_pedidos_venda")),
+    (13, "Tabela RECEBIMENTOS_CLIENTES", _banco("verificar_tabela_recebimentos_clientes")),
+    (14, "Coluna VALOR_ORIGINAL em RECEBIMENTOS_CLIENTES", _banco("verificar_e_corrigir_tabela_recebimentos")),
+    (15, "Tabelas do controle de caixa", _banco("verificar_tabelas_caixa")),
+    (16, "Tabela VENDAS_PRODUTOS", _banco("verificar_tabela_vendas_produtos")),
+    (17, "Tabela CONTAS_CORRENTES", _banco("verificar_tabela_contas_correntes")),
+    (18, "Tabela CLASSES_FINANCEIRAS", _banco("verificar_tabela_classes_financeiras")),
+    (19, "Tabela CONFIGURACAO_IMPRESSORAS", _banco("verificar_tabela_configuracao_impressoras")),
+    (20, "Tabela CUPONS_VENDA", _banco("verificar_tabela_cupons_venda")),
+    (21, "Tabela PERMISSOES_SISTEMA", _permissoes),
+    (22, "CPF/CNPJ somente com números", _documentos_somente_numeros),
+    (23, "Índices das pesquisas", _indices_pesquisa),
+    (24, "Índices de VENDAS_ITENS", _indices_vendas_itens),
+    (25, "Tabela VENDAS_DIARIAS_PRODUTO", _vendas_diarias),
+    (26, "Triggers de eventos entre estações", _triggers_eventos),
+]
+
+
+def esquema_atualizado():
+    """
+    Returns:
+        bool: True se as migrações já foram aplicadas neste processo
+    """
+    return _esquema_atualizado
+
+
+def verificar_tabela_versao():
+    """Cria a tabela SCHEMA_VERSION se ela não existir (única consulta a RDB$RELATIONS)"""
+    from base.banco import execute_query
+
+    result = execute_query(
+        "SELECT COUNT(*) FROM RDB$RELATIONS WHERE RDB$RELATION_NAME = ?", (TABELA_VERSAO,))
+    if result and result[0][0]:
+        return
+    print(f"Tabela {TABELA_VERSAO} não encontrada. Criando...")
+    execute_query(f"""
+    CREATE TABLE {TABELA_VERSAO} (
+        VERSAO INTEGER NOT NULL PRIMARY KEY,
+        DESCRICAO VARCHAR(200),
+        DATA_APLICACAO TIMESTAMP,
+        ESTACAO VARCHAR(100)
+    )
+    """)
+
+
+def versao_atual():
+    """
+    Returns:
+        int: Maior versão registrada em SCHEMA_VERSION (0 se nenhuma)
+    """
+    from base.banco import execute_query
+    result = execute_query(f"SELECT COALESCE(MAX(VERSAO), 0) FROM {TABELA_VERSAO}")
+    return int(result[0][0]) if result else 0
+
+
+def aplicar_migracoes(migracoes=None):
+    """
+    Aplica, em ordem, as migrações com versão maior que a registrada no banco
+
+    Uma migração que falha interrompe as seguintes (que podem depender dela);
+    ela será tentada novamente na próxima inicialização.
+
+    Args:
+        migracoes (list, optional): Lista no formato de MIGRACOES
+
+    Returns:
+        int: Quantidade de migrações aplicadas agora
+    """
+    global _esquema_atualizado
+    from base.banco import execute_query
+
+    migracoes = sorted(migracoes or MIGRACOES, key=lambda m: m[0])
+
+    with _lock:
+        verificar_tabela_versao()
+        atual = versao_atual()
+        pendentes = [m for m in migracoes if m[0] > atual]
+        if not pendentes:
+            print(f"Esquema do banco atualizado (versão {atual})")
+            _esquema_atualizado = True
+            return 0
+
+        try:
+            estacao = socket.gethostname()
+        except Exception:
+            estacao = "Estação Desconhecida"
+
+        for versao, descricao, funcao in pendentes:
+            print(f"Aplicando migração {versao}: {descricao}...")
+            try:
+                if funcao() is False:
+                    raise Exception("a verificação retornou falha")
+            except Exception as e:
+                raise Exception(f"Erro ao aplicar migração {versao} ({descricao}): {str(e)}")
+
+            # Outra estação pode ter registrado a mesma versão ao mesmo tempo
+            execute_query(f"""
+            UPDATE OR INSERT INTO {TABELA_VERSAO} (VERSAO, DESCRICAO, DATA_APLICACAO, ESTACAO)
+            VALUES (?, ?, ?, ?)
+            MATCHING (VERSAO)
+            """, (versao, descricao[:200], datetime.now(), estacao[:100]))
+
+        print(f"Esquema do banco atualizado da versão {atual} para {pendentes[-1][0]}")
+        _esquema_atualizado = True
+        return len(pendentes)
@@ -0,0 +1,169 @@
+"""
+Módulo do motor de sugestões de produtos do PDV
+
+Mantém dois índices ordenados em memória, consultados por busca binária
+(bisect), de modo que cada consulta custa O(log n + resultados) mesmo em
+catálogos com centenas de milhares de itens:
+    - códigos de barras
+    - códigos do produto
+
+A busca por nome fica com base.indice_busca (sem acento e tolerante a erros
+de digitação), que usa as funções normalizar() e tokens() deste módulo.
+"""
+
+import re
+import unicodedata
+from bisect import bisect_left, insort
+
+_SEPARADORES = re.compile(r"[^0-9a-z]+")
+
+
+def normalizar(texto):
+    """
+    Normaliza um texto para comparação: sem acentos, minúsculo e sem espaços nas pontas
+
+    Args:
+        texto (str): Texto original
+
+    Returns:
+        str: Texto normalizado
+    """
+    if texto is None:
+        return ""
+    texto = unicodedata.normalize("NFKD", str(texto))
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return texto.lower().strip()
+
+
+def _texto(valor):
+    return "" if valor is None else str(valor).strip()
+
+
+def tokens(texto):
+    """Divide um texto normalizado em palavras"""
+    return [t for t in _SEPARADORES.split(normalizar(texto)) if t]
+
+
+class MotorSugestoes:
+    """
+    Índices ordenados de códigos de barras e códigos
+    """
+
+    def __init__(self):
+        self._barras = []   # lista ordenada de (código de barras, id)
+        self._codigos = []  # lista ordenada de (código, id)
+        self._chaves = {}   # id -> (código, código de barras) indexados
+
+    def indexar(self, itens):
+        """
+        Reconstrói os índices
+
+        Args:
+            itens (iterable): Tuplas (id, código, código de barras)
+        """
+        barras = []
+        codigos = []
+        chaves = {}
+        for id_item, codigo, codigo_barras in itens:
+            codigo, codigo_barras = _texto(codigo), _texto(codigo_barras)
+            if codigo_barras:
+                barras.append((codigo_barras, id_item))
+            if codigo:
+                codigos.append((codigo, id_item))
+            chaves[id_item] = (codigo, codigo_barras)
+
+        barras.sort()
+        codigos.sort()
+        self._barras = barras
+        self._codigos = codigos
+        self._chaves = chaves
+
+    def atualizar(self, id_item, codigo, codigo_barras):
+        """
+        Inclui ou substitui um único item sem reconstruir os índices
+
+        Args:
+            id_item: ID do item
+            codigo (str): Código
+            codigo_barras (str): Código de barras
+        """
+        self.remover(id_item)
+        codigo, codigo_barras = _texto(codigo), _texto(codigo_barras)
+        if codigo_barras:
+            insort(self._barras, (codigo_barras, id_item))
+        if codigo:
+            insort(self._codigos, (codigo, id_item))
+        self._chaves[id_item] = (codigo, codigo_barras)
+
+    def remover(self, id_item):
+        """Remove um item dos índices (sem efeito se ele não estiver indexado)"""
+        if id_item not in self._chaves:
+            return
+        codigo, codigo_barras = self._chaves.pop(id_item)
+        if codigo_barras:
+            self._remover_entrada(self._barras, (codigo_barras, id_item))
+        if codigo:
+            self._remover_entrada(self._codigos, (codigo, id_item))
+
+    def buscar(self, texto, limite=10):
+        """
+        Retorna os IDs mais relevantes para o texto digitado
+
+        A ordem é: código de barras exato, código exato, códigos de barras que
+        começam com o texto e códigos que começam com o texto.
+
+        Args:
+            texto (str): Código parcial
+            limite (int): Máximo de resultados
+
+        Returns:
+            list: IDs em ordem de relevância, sem repetição
+        """
+        texto = "" if texto is None else str(texto).strip()
+        if not texto or limite <= 0:
+            return []
+
+        resultado = []
+        vistos = set()
+
+        def adicionar(ids):
+            for id_item in ids:
+                if len(resultado) >= limite:
+                    return
+                if id_item not in vistos:
+                    vistos.add(id_item)
+                    resultado.append(id_item)
+
+        adicionar(self._exatos(self._barras, texto))
+        adicionar(self._exatos(self._codigos, texto))
+        adicionar(self._com_prefixo(self._barras, texto, limite))
+        adicionar(self._com_prefixo(self._codigos, texto, limite))
+
+        return resultado
+
+    @staticmethod
+    def _remover_entrada(lista, entrada):
+        posicao = bisect_left(lista, entrada)
+        if posicao < len(lista) and lista[posicao] == entrada:
+            del lista[posicao]
+
+    @staticmethod
+    def _exatos(lista, chave):
+        ids = []
+        posicao = bisect_left(lista, (chave,))
+        while posicao < len(lista) and lista[posicao][0] == chave:
+            ids.append(lista[posicao][1])
+            posicao += 1
+        return ids
+
+    @staticmethod
+    def _com_prefixo(lista, prefixo, limite):
+        ids = []
+        posicao = bisect_left(lista, (prefixo,))
+        while posicao < len(lista) and len(ids) < limite:
+            chave, id_item = lista[posicao]
+            if not chave.startswith(prefixo):
+                break
+            ids.append(id_item)
+            posicao += 1
+        return ids
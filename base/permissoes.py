@@ -0,0 +1,95 @@
+"""
+Módulo do mapa de permissões dos funcionários em memória
+
+A tabela PERMISSOES_SISTEMA é lida inteira uma única vez (uma linha por
+funcionário e módulo, poucas centenas de linhas) e guardada como
+funcionário -> frozenset dos módulos liberados. Cada verificação de
+permissão passa a ser uma consulta a um dicionário, sem ir ao banco.
+
+O mapa nunca é alterado no lugar: cada carga monta um dicionário novo e troca
+a referência. Ele é descartado e relido no próximo acesso quando as
+permissões são gravadas (ConfiguracaoSistemaBackend.definir_permissao) ou
+quando chega o aviso de alteração da tabela PERMISSOES_SISTEMA de outra
+estação (TABELA_ALTERADA, base.eventos_banco).
+"""
+
+import threading
+import time
+
+from base.eventos import barramento_eventos, TABELA_ALTERADA
+
+QUERY_PERMISSOES = """
+    SELECT ID_FUNCIONARIO, MODULO
+    FROM PERMISSOES_SISTEMA
+    WHERE TEM_ACESSO = 'S'
+    """
+
+
+class MapaPermissoes:
+    """
+    Módulos liberados de cada funcionário
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._mapa = None  # id_funcionario -> frozenset dos módulos liberados
+
+    def carregar(self):
+        """
+        Lê todas as permissões liberadas
+
+        Returns:
+            int: Quantidade de funcionários com alguma permissão
+        """
+        return len(self._ler())
+
+    def _ler(self):
+        from base.banco import execute_query
+
+        inicio = time.perf_counter()
+        modulos = {}
+        for id_funcionario, modulo in execute_query(QUERY_PERMISSOES):
+            modulos.setdefault(id_funcionario, set()).add(modulo.strip())
+        mapa = {id_funcionario: frozenset(lista) for id_funcionario, lista in modulos.items()}
+
+        with self._lock:
+            self._mapa = mapa
+
+        print(f"Permissões carregadas: {len(mapa)} funcionários "
+              f"em {(time.perf_counter() - inicio) * 1000:.0f} ms")
+        return mapa
+
+    def invalidar(self):
+        """Descarta o mapa; ele será relido na próxima verificação"""
+        with self._lock:
+            self._mapa = None
+
+    def modulos_liberados(self, id_funcionario):
+        """
+        Returns:
+            frozenset: Módulos com acesso liberado ao funcionário
+        """
+        mapa = self._mapa
+        if mapa is None:
+            mapa = self._ler()
+        return mapa.get(id_funcionario, frozenset())
+
+    def tem_acesso(self, id_funcionario, modulo):
+        """
+        Verifica se o funcionário tem acesso ao módulo
+
+        Sem registro na tabela, o acesso é negado.
+        """
+        return modulo in self.modulos_liberados(id_funcionario)
+
+
+# Criar instância global
+mapa_permissoes = MapaPermissoes()
+
+
+def _tabela_alterada(evento):
+    if evento.tabela == 'PERMISSOES_SISTEMA':
+        mapa_permissoes.invalidar()
+
+
+barramento_eventos.assinar(TABELA_ALTERADA, _tabela_alterada)
@@ -0,0 +1,286 @@
+"""
+Módulo de pool de conexões reutilizáveis com o banco de dados Firebird
+"""
+
+import threading
+import time
+from collections import deque
+
+# Códigos GDS que indicam perda da conexão (servidor reiniciado, rede caiu, etc.)
+GDSCODES_CONEXAO_PERDIDA = {
+    335544528,  # isc_shutdown
+    335544721,  # isc_network_error
+    335544726,  # isc_net_read_err
+    335544727,  # isc_net_write_err
+    335544741,  # isc_lost_db_connection
+    335544856,  # isc_att_shutdown
+}
+
+
+def erro_de_conexao(erro):
+    """
+    Verifica se uma exceção do fdb indica que a conexão foi perdida
+
+    Args:
+        erro (Exception): Exceção capturada
+
+    Returns:
+        bool: True se a conexão não pode mais ser usada
+    """
+    for arg in getattr(erro, 'args', ()):
+        if isinstance(arg, int) and arg in GDSCODES_CONEXAO_PERDIDA:
+            return True
+    mensagem = str(erro).lower()
+    return ("connection lost" in mensagem or "connection shutdown" in mensagem
+            or "error writing data to the connection" in mensagem
+            or "error reading data from the connection" in mensagem)
+
+
+class ConexaoPool:
+    """
+    Conexão emprestada do pool
+
+    Repassa todos os atributos para a conexão fdb real. Ao chamar close()
+    a conexão volta para o pool em vez de ser encerrada, de modo que o código
+    existente (get_connection() ... conn.close()) continua funcionando.
+    """
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+        self._descartar = False
+
+    def __getattr__(self, nome):
+        conn = self.__dict__.get('_conn')
+        if conn is None:
+            raise Exception("Conexão já devolvida ao pool")
+        return getattr(conn, nome)
+
+    @property
+    def closed(self):
+        return self._conn is None or self._conn.closed
+
+    def descartar(self):
+        """Marca a conexão para ser encerrada em vez de voltar ao pool"""
+        self._descartar = True
+
+    def close(self):
+        """Devolve a conexão ao pool"""
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            self._pool.devolver(conn, descartar=self._descartar)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        if exc_type is not None and erro_de_conexao(exc_value):
+            self.descartar()
+        self.close()
+        return False
+
+    def __del__(self):
+        # Rede de segurança para chamadores que esquecem de fechar a conexão
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class PoolConexoes:
+    """
+    Pool de conexões thread-safe
+
+    Mantém conexões abertas entre as consultas, limita o total de conexões
+    simultâneas, encerra conexões ociosas além do mínimo e verifica a saúde
+    da conexão antes de entregá-la, reconectando automaticamente quando o
+    Firebird foi reiniciado.
+    """
+
+    def __init__(self, fabrica, tamanho_min=1, tamanho_max=8, tempo_ocioso=300,
+                 timeout_espera=30, intervalo_verificacao=30):
+        """
+        Args:
+            fabrica (callable): Função que cria uma nova conexão fdb
+            tamanho_min (int): Conexões ociosas mantidas abertas
+            tamanho_max (int): Máximo de conexões abertas ao mesmo tempo
+            tempo_ocioso (int): Segundos até encerrar uma conexão ociosa excedente
+            timeout_espera (int): Segundos aguardando uma conexão livre
+            intervalo_verificacao (int): Ociosidade (s) a partir da qual a conexão
+                é testada antes de ser entregue
+        """
+        self.fabrica = fabrica
+        self.tamanho_min = tamanho_min
+        self.tamanho_max = tamanho_max
+        self.tempo_ocioso = tempo_ocioso
+        self.timeout_espera = timeout_espera
+        self.intervalo_verificacao = intervalo_verificacao
+
+        self._ociosas = deque()  # (conexão, momento da devolução)
+        self._total = 0
+        self._cond = threading.Condition(threading.Lock())
+        self._stats = {
+            "checkouts": 0,
+            "esperas": 0,
+            "tempo_espera": 0.0,
+            "reconexoes": 0,
+            "criadas": 0,
+            "descartadas": 0,
+            "pico_em_uso": 0,
+        }
+
+    def obter(self):
+        """
+        Empresta uma conexão do pool
+
+        Returns:
+            ConexaoPool: Conexão que volta ao pool ao ser fechada
+        """
+        conn = None
+        ultimo_uso = None
+        inicio_espera = None
+
+        with self._cond:
+            while True:
+                self._encerrar_ociosas_expiradas()
+                if self._ociosas:
+                    # LIFO: a conexão usada mais recentemente tem menos chance de estar morta
+                    conn, ultimo_uso = self._ociosas.pop()
+                    break
+                if self._total < self.tamanho_max:
+                    self._total += 1
+                    break
+
+                if inicio_espera is None:
+                    inicio_espera = time.monotonic()
+                    self._stats["esperas"] += 1
+                restante = self.timeout_espera - (time.monotonic() - inicio_espera)
+                if restante <= 0:
+                    raise Exception(
+                        f"Tempo esgotado aguardando conexão livre no pool "
+                        f"({self.tamanho_max} conexões em uso)")
+                self._cond.wait(restante)
+
+            if inicio_espera is not None:
+                self._stats["tempo_espera"] += time.monotonic() - inicio_espera
+
+        try:
+            if conn is None:
+                conn = self._nova_conexao()
+            elif not self._conexao_saudavel(conn, ultimo_uso):
+                print("Conexão do pool inválida, reconectando...")
+                self._fechar_silenciosamente(conn)
+                conn = self._nova_conexao()
+                with self._cond:
+                    self._stats["reconexoes"] += 1
+        except Exception:
+            # A vaga reservada não foi usada
+            with self._cond:
+                self._total -= 1
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self._stats["checkouts"] += 1
+            em_uso = self._total - len(self._ociosas)
+            if em_uso > self._stats["pico_em_uso"]:
+                self._stats["pico_em_uso"] = em_uso
+
+        return ConexaoPool(self, conn)
+
+    def devolver(self, conn, descartar=False):
+        """
+        Recebe uma conexão de volta, desfazendo transações não confirmadas
+
+        Args:
+            conn: Conexão fdb real
+            descartar (bool): Encerrar a conexão em vez de reutilizá-la
+        """
+        if not descartar:
+            try:
+                if conn.closed:
+                    descartar = True
+                else:
+                    # Mesmo comportamento de conn.close(): o que não foi confirmado é desfeito
+                    conn.rollback()
+            except Exception:
+                descartar = True
+
+        with self._cond:
+            if descartar:
+                self._total -= 1
+                self._stats["descartadas"] += 1
+            else:
+                self._ociosas.append((conn, time.monotonic()))
+            self._cond.notify()
+
+        if descartar:
+            self._fechar_silenciosamente(conn)
+
+    def fechar_todas(self):
+        """Encerra todas as conexões ociosas (usado no encerramento do programa)"""
+        with self._cond:
+            ociosas = list(self._ociosas)
+            self._ociosas.clear()
+            self._total -= len(ociosas)
+            self._cond.notify_all()
+        for conn, _ in ociosas:
+            self._fechar_silenciosamente(conn)
+
+    def estatisticas(self):
+        """
+        Retorna as estatísticas de uso do pool
+
+        Returns:
+            dict: Contadores de checkouts, esperas, reconexões e ocupação atual
+        """
+        with self._cond:
+            stats = dict(self._stats)
+            stats["abertas"] = self._total
+            stats["ociosas"] = len(self._ociosas)
+            stats["em_uso"] = self._total - len(self._ociosas)
+            stats["tamanho_min"] = self.tamanho_min
+            stats["tamanho_max"] = self.tamanho_max
+        return stats
+
+    def _nova_conexao(self):
+        conn = self.fabrica()
+        with self._cond:
+            self._stats["criadas"] += 1
+        return conn
+
+    def _conexao_saudavel(self, conn, ultimo_uso):
+        """Testa a conexão se ela ficou ociosa tempo suficiente para ter caído"""
+        try:
+            if conn.closed:
+                return False
+            if time.monotonic() - ultimo_uso < self.intervalo_verificacao:
+                return True
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1 FROM RDB$DATABASE")
+            cursor.fetchone()
+            cursor.close()
+            conn.rollback()
+            return True
+        except Exception as e:
+            print(f"Falha na verificação da conexão: {e}")
+            return False
+
+    def _encerrar_ociosas_expiradas(self):
+        """Encerra conexões ociosas há mais de tempo_ocioso, preservando o mínimo"""
+        agora = time.monotonic()
+        while len(self._ociosas) > self.tamanho_min:
+            conn, devolvida_em = self._ociosas[0]
+            if agora - devolvida_em < self.tempo_ocioso:
+                break
+            self._ociosas.popleft()
+            self._total -= 1
+            self._stats["descartadas"] += 1
+            self._fechar_silenciosamente(conn)
+
+    @staticmethod
+    def _fechar_silenciosamente(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
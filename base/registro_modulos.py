@@ -0,0 +1,230 @@
+"""
+Módulo do registro das telas carregadas pela janela principal
+
+Cada tela (arquivo .py de um menu) é importada uma única vez, somente quando
+é aberta pela primeira vez, e a classe da janela fica guardada. As aberturas
+seguintes reaproveitam o módulo já carregado, em vez de executar o arquivo
+novamente a cada clique no menu.
+
+O registro também mede o tempo de importação de cada tela e quais pacotes
+ela trouxe junto (ex: matplotlib no relatório de vendas). Para medir a
+inicialização inteira, use relatorio_importtime(), que executa
+python -X importtime e agrupa o tempo por subsistema:
+
+    python -m base.registro_modulos principal
+"""
+
+import os
+import sys
+import time
+import threading
+import subprocess
+import importlib
+import importlib.util
+
+
+def _raiz_aplicacao():
+    """Pasta da aplicação (onde ficam geral/, PDV/, relatorios/...)"""
+    if getattr(sys, 'frozen', False):
+        return getattr(sys, '_MEIPASS', os.path.dirname(sys.executable))
+    return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _subsistema(nome_modulo):
+    """Pacote de primeiro nível de um módulo, ou 'stdlib' para a biblioteca padrão"""
+    raiz = nome_modulo.split('.')[0]
+    if raiz in getattr(sys, 'stdlib_module_names', ()) or raiz in sys.builtin_module_names:
+        return "stdlib"
+    return raiz
+
+
+class RegistroModulos:
+    """
+    Módulos e classes das telas, importados sob demanda e guardados
+    """
+
+    def __init__(self, raiz=None):
+        self.raiz = raiz or _raiz_aplicacao()
+        self._lock = threading.RLock()
+        self._modulos = {}   # caminho relativo -> módulo
+        self._classes = {}   # (caminho relativo, classe) -> classe
+        self._tempos = {}    # caminho relativo -> {'ms': float, 'pacotes': {pacote: qtd}}
+
+    def obter_classe(self, caminho, nome_classe, nome_modulo=None):
+        """
+        Retorna a classe de uma tela, importando o módulo na primeira vez
+
+        Args:
+            caminho (str): Caminho do arquivo relativo à aplicação (ex: geral/cadastro_pessoa.py)
+            nome_classe (str): Nome da classe da janela
+            nome_modulo (str, optional): Nome usado em sys.modules. Default: caminho
+                com pontos (geral.cadastro_pessoa)
+
+        Returns:
+            type | None: Classe da janela (None se o módulo não a define)
+        """
+        chave = (self._normalizar(caminho), nome_classe)
+        with self._lock:
+            if chave not in self._classes:
+                modulo = self.obter_modulo(caminho, nome_modulo)
+                self._classes[chave] = getattr(modulo, nome_classe, None)
+            return self._classes[chave]
+
+    def obter_modulo(self, caminho, nome_modulo=None):
+        """
+        Retorna o módulo de uma tela, importando-o na primeira vez
+
+        Raises:
+            ImportError: Arquivo inexistente ou erro ao importar o módulo
+        """
+        caminho = self._normalizar(caminho)
+        with self._lock:
+            if caminho not in self._modulos:
+                self._modulos[caminho] = self._importar(caminho, nome_modulo)
+            return self._modulos[caminho]
+
+    def carregado(self, caminho):
+        return self._normalizar(caminho) in self._modulos
+
+    def descartar(self, caminho=None):
+        """Esquece um módulo (ou todos); a próxima abertura importa novamente"""
+        with self._lock:
+            if caminho is None:
+                self._modulos.clear()
+                self._classes.clear()
+                return
+            caminho = self._normalizar(caminho)
+            self._modulos.pop(caminho, None)
+            for chave in [c for c in self._classes if c[0] == caminho]:
+                del self._classes[chave]
+
+    def tempos_importacao(self):
+        """
+        Returns:
+            dict: caminho -> {'ms': float, 'pacotes': {pacote: módulos novos}}
+        """
+        with self._lock:
+            return {caminho: dict(tempo) for caminho, tempo in self._tempos.items()}
+
+    def imprimir_tempos(self):
+        """Mostra no console o tempo de importação de cada tela já aberta"""
+        tempos = sorted(self.tempos_importacao().items(), key=lambda t: -t[1]['ms'])
+        print("\n=== TEMPO DE IMPORTAÇÃO DAS TELAS ===")
+        for caminho, tempo in tempos:
+            pacotes = sorted(tempo['pacotes'].items(), key=lambda p: -p[1])
+            detalhes = ", ".join(f"{pacote} ({qtd})" for pacote, qtd in pacotes[:5])
+            print(f"{tempo['ms']:8.1f} ms  {caminho}" + (f"  <- {detalhes}" if detalhes else ""))
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _normalizar(caminho):
+        return caminho.replace('\\', '/')
+
+    def _importar(self, caminho, nome_modulo):
+        caminho_absoluto = os.path.join(self.raiz, *caminho.split('/'))
+        if not os.path.exists(caminho_absoluto):
+            raise ImportError(f"Arquivo não existe: {caminho_absoluto}")
+        nome_modulo = nome_modulo or os.path.splitext(caminho)[0].replace('/', '.')
+
+        antes = set(sys.modules)
+        inicio = time.perf_counter()
+
+        modulo = sys.modules.get(nome_modulo)
+        if modulo is None:
+            try:
+                modulo = importlib.import_module(nome_modulo)
+            except ImportError as e:
+                # Arquivo fora de um pacote importável: carregar pelo caminho
+                print(f"Importação de {nome_modulo} como pacote falhou ({e}), carregando pelo arquivo")
+                modulo = self._importar_arquivo(nome_modulo, caminho_absoluto)
+
+        ms = (time.perf_counter() - inicio) * 1000
+        pacotes = {}
+        for novo in set(sys.modules) - antes:
+            pacote = _subsistema(novo)
+            pacotes[pacote] = pacotes.get(pacote, 0) + 1
+        self._tempos[caminho] = {'ms': round(ms, 1), 'pacotes': pacotes}
+        print(f"Módulo {caminho} importado em {ms:.0f} ms ({len(set(sys.modules) - antes)} módulos novos)")
+        return modulo
+
+    @staticmethod
+    def _importar_arquivo(nome_modulo, caminho_absoluto):
+        spec = importlib.util.spec_from_file_location(nome_modulo, caminho_absoluto)
+        if not spec:
+            raise ImportError(f"Não foi possível criar spec para {caminho_absoluto}")
+        modulo = importlib.util.module_from_spec(spec)
+        sys.modules[nome_modulo] = modulo
+        try:
+            spec.loader.exec_module(modulo)
+        except Exception:
+            sys.modules.pop(nome_modulo, None)
+            raise
+        return modulo
+
+
+def relatorio_importtime(modulo="principal", python=None, limite=15):
+    """
+    Mede a importação de um módulo com python -X importtime em um processo novo
+
+    O tempo próprio (self) de cada módulo importado é somado por subsistema
+    (PyQt5, fdb, matplotlib, base, PDV, stdlib...).
+
+    Args:
+        modulo (str): Módulo a importar (ex: principal, login)
+        python (str, optional): Interpretador. Default: o atual
+        limite (int): Quantidade de módulos mais lentos listados
+
+    Returns:
+        dict: {'total_ms': float, 'subsistemas': {nome: ms}, 'modulos': [(ms, nome)]}
+    """
+    processo = subprocess.run(
+        [python or sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        cwd=_raiz_aplicacao(), capture_output=True, text=True
+    )
+
+    subsistemas = {}
+    modulos = []
+    total_us = 0
+    for linha in processo.stderr.splitlines():
+        if not linha.startswith("import time:") or "self [us]" in linha:
+            continue
+        try:
+            proprio, _cumulativo, nome = linha[len("import time:"):].split("|", 2)
+            proprio = int(proprio.strip())
+        except ValueError:
+            continue
+        nome = nome.strip()
+        total_us += proprio
+        subsistema = _subsistema(nome)
+        subsistemas[subsistema] = subsistemas.get(subsistema, 0) + proprio / 1000
+        modulos.append((proprio / 1000, nome))
+
+    modulos.sort(reverse=True)
+    relatorio = {
+        'total_ms': total_us / 1000,
+        'subsistemas': dict(sorted(subsistemas.items(), key=lambda s: -s[1])),
+        'modulos': modulos[:limite],
+    }
+
+    print(f"\n=== TEMPO DE IMPORTAÇÃO: import {modulo} ({relatorio['total_ms']:.0f} ms) ===")
+    if processo.returncode != 0:
+        ultima = processo.stderr.strip().splitlines()[-1:] or [""]
+        print(f"Aviso: a importação terminou com erro: {ultima[0]}")
+    print("\nPor subsistema:")
+    for nome, ms in relatorio['subsistemas'].items():
+        print(f"{ms:9.1f} ms  {nome}")
+    print(f"\n{limite} módulos mais lentos (tempo próprio):")
+    for ms, nome in relatorio['modulos']:
+        print(f"{ms:9.1f} ms  {nome}")
+    return relatorio
+
+
+# Criar instância global
+registro_modulos = RegistroModulos()
+
+
+if __name__ == "__main__":
+    relatorio_importtime(sys.argv[1] if len(sys.argv) > 1 else "principal")
@@ -0,0 +1,274 @@
+"""
+Módulo do resumo diário de vendas por produto (tabela VENDAS_DIARIAS_PRODUTO)
+
+Os relatórios de vendas por produto somavam, a cada consulta, todas as linhas
+de VENDAS_ITENS e VENDAS_PRODUTOS do período. A tabela VENDAS_DIARIAS_PRODUTO
+guarda essas somas já prontas, uma linha por dia e produto, de modo que um
+relatório de 12 meses lê cerca de 365 x produtos vendidos linhas.
+
+Cada venda soma seus itens ao resumo na mesma transação em que é gravada
+(acumular). Cada estação soma nas suas próprias linhas (coluna ESTACAO), para
+que duas estações vendendo o mesmo produto no mesmo dia não disputem a mesma
+linha; os relatórios somam as estações.
+
+Para refazer o resumo a partir das vendas já gravadas (bancos antigos, vendas
+canceladas ou correções manuais):
+
+    python -m base.vendas_diarias                      (todo o histórico)
+    python -m base.vendas_diarias 2024-01-01 2024-12-31
+"""
+
+import socket
+import sys
+import time
+
+TABELA = "VENDAS_DIARIAS_PRODUTO"
+ESTACAO_RECONSTRUCAO = "*"  # Linhas refeitas por reconstruir()
+CATEGORIA_PADRAO = "Geral"  # Produtos sem grupo
+
+QUERY_ACUMULAR = f"""
+    UPDATE {TABELA}
+    SET QUANTIDADE = QUANTIDADE + ?,
+        VALOR_TOTAL = VALOR_TOTAL + ?,
+        NUM_VENDAS = NUM_VENDAS + 1,
+        PRODUTO = COALESCE(?, PRODUTO),
+        CATEGORIA = COALESCE(?, CATEGORIA)
+    WHERE DATA = ? AND CODIGO_PRODUTO = ? AND ESTACAO = ?
+    RETURNING NUM_VENDAS
+    """
+
+QUERY_INSERIR = f"""
+    INSERT INTO {TABELA} (
+        DATA, CODIGO_PRODUTO, ESTACAO, PRODUTO, CATEGORIA,
+        QUANTIDADE, VALOR_TOTAL, NUM_VENDAS
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, 1)
+    """
+
+
+def _estacao():
+    try:
+        return socket.gethostname()[:50]
+    except Exception:
+        return "Estação Desconhecida"
+
+
+def _texto(valor, tamanho):
+    valor = str(valor).strip() if valor is not None else ""
+    return valor[:tamanho] or None
+
+
+def verificar_tabela():
+    """Cria a tabela VENDAS_DIARIAS_PRODUTO se ela não existir"""
+    from base.banco import execute_query
+
+    result = execute_query(
+        "SELECT COUNT(*) FROM RDB$RELATIONS WHERE RDB$RELATION_NAME = ?", (TABELA,))
+    if result and result[0][0]:
+        return False
+
+    print(f"Tabela {TABELA} não encontrada. Criando...")
+    execute_query(f"""
+    CREATE TABLE {TABELA} (
+        DATA DATE NOT NULL,
+        CODIGO_PRODUTO VARCHAR(20) NOT NULL,
+        ESTACAO VARCHAR(50) NOT NULL,
+        PRODUTO VARCHAR(100),
+        CATEGORIA VARCHAR(50),
+        QUANTIDADE DECIMAL(15,3) DEFAULT 0 NOT NULL,
+        VALOR_TOTAL DECIMAL(15,2) DEFAULT 0 NOT NULL,
+        NUM_VENDAS INTEGER DEFAULT 0 NOT NULL,
+        PRIMARY KEY (DATA, CODIGO_PRODUTO, ESTACAO)
+    )
+    """)
+    print(f"Tabela {TABELA} criada com sucesso.")
+    return True
+
+
+def acumular(data, itens):
+    """
+    Soma os itens de uma venda ao resumo diário
+
+    Deve ser chamada dentro do "with transacao()" que grava a venda: se a
+    venda for desfeita, a soma também é.
+
+    Args:
+        data (str | date): Data da venda (YYYY-MM-DD)
+        itens (list): Tuplas (código, nome, categoria, quantidade, valor total)
+    """
+    from base.banco import transacao
+
+    # Um produto repetido na venda conta como uma única venda do produto
+    agrupados = {}
+    for codigo, produto, categoria, quantidade, valor_total in itens:
+        codigo = _texto(codigo, 20)
+        if not codigo:
+            continue
+        atual = agrupados.get(codigo)
+        if atual is None:
+            agrupados[codigo] = [_texto(produto, 100), _texto(categoria, 50) or CATEGORIA_PADRAO,
+                                 float(quantidade or 0), float(valor_total or 0)]
+        else:
+            atual[2] += float(quantidade or 0)
+            atual[3] += float(valor_total or 0)
+
+    if not agrupados:
+        return
+
+    estacao = _estacao()
+    with transacao() as tx:
+        for codigo, (produto, categoria, quantidade, valor_total) in agrupados.items():
+            if tx.executar_retornando(QUERY_ACUMULAR, (
+                    quantidade, valor_total, produto, categoria, data, codigo, estacao)) is None:
+                tx.execute(QUERY_INSERIR, (
+                    data, codigo, estacao, produto, categoria, quantidade, valor_total))
+
+
+def categorias_produtos(codigos):
+    """
+    Grupo de cada produto pelo catálogo em memória
+
+    Deve ser chamada antes do "with transacao()" da venda: uma eventual
+    recarga do catálogo não prolonga a transação de gravação.
+
+    Args:
+        codigos (list): Códigos dos produtos
+
+    Returns:
+        dict: Código -> grupo do produto (ou CATEGORIA_PADRAO)
+    """
+    categorias = {}
+    try:
+        from base.catalogo_produtos import catalogo_produtos
+        for codigo in codigos:
+            if codigo in categorias:
+                continue
+            produto = catalogo_produtos.buscar_por_codigo(codigo)
+            if produto and produto[5] and str(produto[5]).strip():
+                categorias[codigo] = str(produto[5]).strip()
+    except Exception as e:
+        print(f"Aviso: grupos dos produtos não encontrados: {e}")
+    return {codigo: categorias.get(codigo, CATEGORIA_PADRAO) for codigo in codigos}
+
+
+# ----------------------------------------------------------------------
+# Reconstrução
+# ----------------------------------------------------------------------
+
+def _periodo(coluna, data_inicial, data_final, params):
+    condicoes = []
+    if data_inicial:
+        condicoes.append(f"{coluna} >= ?")
+        params.append(data_inicial)
+    if data_final:
+        condicoes.append(f"{coluna} <= ?")
+        params.append(data_final)
+    return condicoes
+
+
+def _origem_vendas_itens(data_inicial, data_final, params):
+    """SELECT do resumo a partir de VENDAS/VENDAS_ITENS (vendas do PDV)"""
+    from base.esquema import registro_esquema
+
+    vendas = registro_esquema.mapa('VENDAS')
+    itens = registro_esquema.mapa('VENDAS_ITENS')
+    produtos = registro_esquema.mapa('PRODUTOS')
+    if not (vendas.get('data_venda') and itens.get('id_venda') and itens.get('id_produto')):
+        print("Tabelas VENDAS/VENDAS_ITENS não encontradas, vendas do PDV ignoradas")
+        return None
+
+    id_produto = f"VI.{itens['id_produto']}"
+    quantidade = f"VI.{itens['quantidade'] or 'QUANTIDADE'}"
+    if itens['valor_total']:
+        valor = f"VI.{itens['valor_total']}"
+    else:
+        valor = f"{quantidade} * VI.{itens['valor_unitario'] or 'VALOR_UNITARIO'}"
+    produto = f"P.{produtos['nome_produto']}" if produtos['nome_produto'] \
+        else "CAST(NULL AS VARCHAR(100))"
+    categoria = f"NULLIF(TRIM(P.{produtos['grupo']}), '')" if produtos['grupo'] \
+        else "CAST(NULL AS VARCHAR(50))"
+    data = f"CAST(V.{vendas['data_venda']} AS DATE)"
+    id_venda = f"V.{vendas['id_venda'] or 'ID_VENDA'}"
+
+    condicoes = _periodo(f"V.{vendas['data_venda']}", data_inicial, data_final, params)
+    if vendas['status']:
+        condicoes.append(f"COALESCE(V.{vendas['status']}, '') <> 'Cancelada'")
+
+    return f"""
+        SELECT {data} AS DATA, CAST({id_produto} AS VARCHAR(20)) AS CODIGO,
+               MAX({produto}) AS PRODUTO, MAX({categoria}) AS CATEGORIA,
+               SUM({quantidade}) AS QUANTIDADE, SUM({valor}) AS VALOR_TOTAL,
+               COUNT(DISTINCT {id_venda}) AS NUM_VENDAS
+        FROM VENDAS_ITENS VI
+        JOIN VENDAS V ON {id_venda} = VI.{itens['id_venda']}
+        LEFT JOIN PRODUTOS P ON P.{produtos['codigo_produto'] or 'CODIGO'} = {id_produto}
+        {"WHERE " + " AND ".join(condicoes) if condicoes else ""}
+        GROUP BY {data}, {id_produto}"""
+
+
+def _origem_vendas_produtos(data_inicial, data_final, params):
+    """SELECT do resumo a partir de VENDAS_PRODUTOS (registrar_venda_produto)"""
+    condicoes = _periodo("DATA", data_inicial, data_final, params)
+    return f"""
+        SELECT DATA, CODIGO_PRODUTO AS CODIGO,
+               MAX(PRODUTO) AS PRODUTO, MAX(NULLIF(TRIM(CATEGORIA), '')) AS CATEGORIA,
+               SUM(QUANTIDADE) AS QUANTIDADE, SUM(VALOR_TOTAL) AS VALOR_TOTAL,
+               COUNT(*) AS NUM_VENDAS
+        FROM VENDAS_PRODUTOS
+        {"WHERE " + " AND ".join(condicoes) if condicoes else ""}
+        GROUP BY DATA, CODIGO_PRODUTO"""
+
+
+def reconstruir(data_inicial=None, data_final=None):
+    """
+    Refaz o resumo do período a partir das vendas gravadas
+
+    As linhas do período (de todas as estações) são apagadas e recalculadas
+    no Firebird, em uma única transação.
+
+    Args:
+        data_inicial (str, optional): Data inicial (YYYY-MM-DD); None = desde o início
+        data_final (str, optional): Data final (YYYY-MM-DD); None = até hoje
+
+    Returns:
+        int: Quantidade de linhas do resumo no período
+    """
+    from base.banco import transacao
+
+    try:
+        inicio = time.perf_counter()
+
+        params_origem = []
+        origens = [sql for sql in (
+            _origem_vendas_itens(data_inicial, data_final, params_origem),
+            _origem_vendas_produtos(data_inicial, data_final, params_origem),
+        ) if sql]
+
+        params_periodo = []
+        condicoes = _periodo("DATA", data_inicial, data_final, params_periodo)
+        where = "WHERE " + " AND ".join(condicoes) if condicoes else ""
+
+        with transacao() as tx:
+            tx.execute(f"DELETE FROM {TABELA} {where}", params_periodo)
+            tx.execute(f"""
+            INSERT INTO {TABELA} (
+                DATA, CODIGO_PRODUTO, ESTACAO, PRODUTO, CATEGORIA,
+                QUANTIDADE, VALOR_TOTAL, NUM_VENDAS
+            )
+            SELECT DATA, CODIGO, '{ESTACAO_RECONSTRUCAO}', MAX(PRODUTO),
+                   COALESCE(MAX(CATEGORIA), '{CATEGORIA_PADRAO}'),
+                   SUM(QUANTIDADE), SUM(VALOR_TOTAL), SUM(NUM_VENDAS)
+            FROM ({" UNION ALL ".join(origens)}) T
+            GROUP BY DATA, CODIGO
+            """, params_origem)
+            linhas = tx.execute(f"SELECT COUNT(*) FROM {TABELA} {where}", params_periodo)[0][0]
+
+        print(f"Resumo diário de vendas refeito: {linhas} linhas em "
+              f"{(time.perf_counter() - inicio) * 1000:.0f} ms")
+        return linhas
+    except Exception as e:
+        print(f"Erro ao reconstruir o resumo diário de vendas: {e}")
+        raise Exception(f"Erro ao reconstruir o resumo diário de vendas: {str(e)}")
+
+
+if __name__ == "__main__":
+    reconstruir(*sys.argv[1:3])
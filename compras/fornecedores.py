@@ -179,7 +179,7 @@ class FornecedoresWindow(QWidget):
         
         self.nome_search = QLineEdit()
         self.nome_search.setStyleSheet(search_style)
-        self.nome_search.setPlaceholderText("Digite o nome")
+        self.nome_search.setPlaceholderText("Início do nome (* busca em qualquer parte)")
         search_layout.addWidget(self.nome_search, 0, 3)
         
         # Campo CNPJ
@@ -9,7 +9,7 @@ from PyQt5.QtCore import Qt
 from PyQt5.QtPrintSupport import QPrinterInfo, QPrintDialog, QPrinter
 
 # Importar funções do banco de dados
-from base.banco import execute_query, get_usuario_logado
+from base.banco import execute_query, get_usuario_logado, proximo_id
 
 
 class ConfiguracaoImpressoraWindow(QWidget):
@@ -336,11 +336,8 @@ class ConfiguracaoImpressoraWindow(QWidget):
                     impressora, estacao, data_atual, id_usuario, nome_usuario, id_config
                 ))
             else:
-                # Gerar próximo ID manualmente
-                query_nextid = """
-                SELECT COALESCE(MAX(ID), 0) + 1 FROM CONFIGURACAO_IMPRESSORAS
-                """
-                next_id = execute_query(query_nextid)[0][0]
+                # A tabela pode ter sido criada sem trigger: obter o ID do gerador
+                next_id = proximo_id('CONFIGURACAO_IMPRESSORAS')
                 
                 # Se não existe, insere com ID explícito
                 query_insert = """
@@ -356,6 +353,10 @@ class ConfiguracaoImpressoraWindow(QWidget):
             # Atualizar o dicionário local
             self.impressoras[categoria] = impressora
             
+            # A impressora resolvida pelas estações pode ter mudado
+            from base.eventos import barramento_eventos, IMPRESSORAS_ALTERADAS
+            barramento_eventos.publicar(IMPRESSORAS_ALTERADAS)
+            
             print(f"Configuração de impressora para {categoria} salva com sucesso!")
             return True
         except Exception as e:
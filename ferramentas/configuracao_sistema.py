@@ -6,11 +6,13 @@ from PyQt5.QtGui import QFont, QCursor, QIcon, QPixmap, QColor
 from PyQt5.QtCore import Qt, QSize, QPropertyAnimation, QEasingCurve, QUrl, QTimer
 
 # Importar funções do banco de dados
-from base.banco import execute_query, get_connection
+from base.banco import execute_query, get_connection, verificacao_de_esquema
+from base.permissoes import mapa_permissoes
 
 class ConfiguracaoSistemaBackend:
     """Classe que gerencia o back-end da Configuração do Sistema"""
     
+    @verificacao_de_esquema
     def verificar_tabela_permissoes(self):
         """
         Verifica se a tabela PERMISSOES_SISTEMA existe e a cria se não existir
@@ -223,6 +225,8 @@ class ConfiguracaoSistemaBackend:
                 """
                 execute_query(query_insert, (id_funcionario, nome_funcionario, modulo, tem_acesso_str))
             
+            # O mapa em memória é relido na próxima verificação
+            mapa_permissoes.invalidar()
             return True
         except Exception as e:
             print(f"Erro ao definir permissão: {e}")
@@ -266,6 +270,8 @@ class ConfiguracaoSistemaBackend:
         """
         Verifica se um funcionário tem permissão para um módulo específico
         
+        Consulta o mapa de permissões em memória (base.permissoes), sem ir ao banco.
+        
         Args:
             id_funcionario (int): ID do funcionário
             modulo (str): Nome do módulo
@@ -274,18 +280,8 @@ class ConfiguracaoSistemaBackend:
             bool: True se o funcionário tem acesso, False caso contrário
         """
         try:
-            query = """
-            SELECT TEM_ACESSO
-            FROM PERMISSOES_SISTEMA
-            WHERE ID_FUNCIONARIO = ? AND MODULO = ?
-            """
-            resultado = execute_query(query, (id_funcionario, modulo))
-            
-            if resultado and len(resultado) > 0:
-                return resultado[0][0] == 'S'
-            
             # Se não existe registro, o acesso é negado por padrão
-            return False
+            return mapa_permissoes.tem_acesso(id_funcionario, modulo)
         except Exception as e:
             print(f"Erro ao verificar permissão: {e}")
             # Em caso de erro, negar acesso por segurança
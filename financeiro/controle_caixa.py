@@ -7,7 +7,7 @@ from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                              QRadioButton, QButtonGroup, QDoubleSpinBox, QTimeEdit,
                              QCalendarWidget) # Adicionar QCalendarWidget
 from PyQt5.QtGui import QFont, QIcon, QPixmap, QColor, QPalette # Adicionar QColor, QPalette
-from PyQt5.QtCore import Qt, QDate, QTime
+from PyQt5.QtCore import Qt, QDate, QTime, pyqtSignal
 import os
 import importlib.util
 import datetime
@@ -615,11 +615,30 @@ class FecharCaixa(QDialog):
             QMessageBox.critical(self, "Erro", f"Erro ao fechar caixa: {str(e)}")
 
 class ControleCaixaWindow(QWidget):
+    # Caixa aberto ou fechado em qualquer tela deste processo (inclusive no PDV)
+    caixas_alterados = pyqtSignal(object)
+    
     def __init__(self, parent=None):
         super().__init__(parent)
         self.initUI()
         self.carregar_dados_reais()
         
+        # A lista é recarregada pelos eventos, na thread da tela
+        from base.eventos import barramento_eventos, CAIXA_ABERTO, CAIXA_FECHADO, TABELA_ALTERADA
+        self.caixas_alterados.connect(self._tratar_evento_caixa)
+        ouvinte = self.caixas_alterados.emit
+        eventos = (CAIXA_ABERTO, CAIXA_FECHADO, TABELA_ALTERADA)
+        for evento in eventos:
+            barramento_eventos.assinar(evento, ouvinte)
+        self.destroyed.connect(lambda *_: [barramento_eventos.cancelar(evento, ouvinte)
+                                           for evento in eventos])
+    
+    def _tratar_evento_caixa(self, evento):
+        """Recarrega a lista quando um caixa é aberto ou fechado (também em outra estação)"""
+        if evento.nome == "tabela_alterada" and evento.tabela != "CAIXA_CONTROLE":
+            return
+        self.carregar_dados_reais()
+        
     def initUI(self):
         # Layout principal
         main_layout = QVBoxLayout(self)
@@ -1168,10 +1187,9 @@ class ControleCaixaWindow(QWidget):
             codigo = base.banco.obter_proximo_codigo_caixa()
             
             # Criar e exibir o diálogo de abertura de caixa
+            # A lista é recarregada pelo evento CAIXA_ABERTO
             dialogo = AbrirCaixa(codigo=codigo, tipo_operacao="Entrada", parent=self)
-            if dialogo.exec_() == QDialog.Accepted:
-                # Recarregar os dados após a abertura
-                self.carregar_dados_reais()
+            dialogo.exec_()
         
         except Exception as e:
             QMessageBox.critical(self, "Erro", f"Erro ao abrir caixa: {str(e)}")
@@ -1200,10 +1218,9 @@ class ControleCaixaWindow(QWidget):
             codigo = self.caixa_selecionado['codigo']
             
             # Criar e exibir o diálogo de fechamento de caixa
+            # A lista é recarregada pelo evento CAIXA_FECHADO
             dialogo = FecharCaixa(id_caixa=id_caixa, codigo=codigo, parent=self)
-            if dialogo.exec_() == QDialog.Accepted:
-                # Recarregar os dados após o fechamento
-                self.carregar_dados_reais()
+            dialogo.exec_()
         
         except Exception as e:
             QMessageBox.critical(self, "Erro", f"Erro ao fechar caixa: {str(e)}")
@@ -9,6 +9,7 @@ from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                            QSizePolicy, QComboBox)
 from PyQt5.QtGui import QFont, QIcon, QPixmap, QPalette, QColor
 from PyQt5.QtCore import Qt, QSize, QDate
+from base.grade_virtual import GradeVirtual, ColunaGrade
 from financeiro.ver_baixados import VerBaixadosWindow
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -22,6 +23,24 @@ JANELA_LARGURA = 800
 JANELA_ALTURA = 600
 
 # Agora definimos a classe principal de recebimento de clientes
+
+# Linhas da tabela: (código, cliente, data, parcelas, valor formatado,
+# valor numérico, data original). Os dois últimos campos servem para ordenar.
+COLUNAS_RECEBIMENTOS = [
+    ColunaGrade("Código", 0),
+    ColunaGrade("Cliente", 1, cor=lambda r: QColor("#0000FF")),
+    ColunaGrade("Data", 6, formatar=lambda r: r[2]),
+    ColunaGrade("Num. parcelas", 3),
+    ColunaGrade("Vr. Pago", 5, formatar=lambda r: r[4], cor=lambda r: QColor("#FF0000")),
+]
+
+def linha_recebimento(codigo, cliente, data, parcelas, valor, vencimento=None):
+    """Monta a tupla de uma linha da tabela de recebimentos"""
+    if isinstance(valor, str):
+        return (codigo, cliente, data, parcelas, valor, None, vencimento)
+    valor_formatado = f"R$ {valor:.2f}".replace('.', ',')
+    return (codigo, cliente, data, parcelas, valor_formatado, valor, vencimento)
+
 class RecebimentoClientesWindow(QWidget):
     def __init__(self, janela_parent=None):
         super().__init__()
@@ -344,29 +363,26 @@ class RecebimentoClientesWindow(QWidget):
         main_layout.addWidget(aviso_label)
         
         # Tabela de recebimentos
-        self.tabela = QTableWidget()
-        self.tabela.setColumnCount(5)
-        self.tabela.setHorizontalHeaderLabels(["Código", "Cliente", "Data", "Num. parcelas", "Vr. Pago"])
+        self.tabela = GradeVirtual(COLUNAS_RECEBIMENTOS)
+        self.tabela.setAlternatingRowColors(True)
         self.tabela.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeToContents)
         self.tabela.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
         self.tabela.horizontalHeader().setSectionResizeMode(2, QHeaderView.ResizeToContents)
         self.tabela.horizontalHeader().setSectionResizeMode(3, QHeaderView.ResizeToContents)
         self.tabela.horizontalHeader().setSectionResizeMode(4, QHeaderView.ResizeToContents)
-        self.tabela.verticalHeader().setVisible(False)
-        self.tabela.setEditTriggers(QAbstractItemView.NoEditTriggers)
-        self.tabela.setSelectionBehavior(QAbstractItemView.SelectRows)
         self.tabela.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 background-color: #f5f5dc;
+                alternate-background-color: #FFFFFF;
                 gridline-color: #003b57;
                 border: 1px solid #003b57;
                 border-radius: 0px;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 5px;
                 border-bottom: 1px solid #dddddd;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #0078d7;
                 color: white;
             }
@@ -447,11 +463,9 @@ class RecebimentoClientesWindow(QWidget):
             # Buscar todos os recebimentos pendentes
             recebimentos = listar_recebimentos_pendentes()
             
-            # Limpar tabela
-            self.tabela.setRowCount(0)
-            
-            # Se não houver recebimentos, não fazer nada
+            # Se não houver recebimentos, apenas limpar a tabela
             if not recebimentos:
+                self.tabela.limpar()
                 return
             
             # Dicionário para armazenar os recebimentos por código base
@@ -478,7 +492,7 @@ class RecebimentoClientesWindow(QWidget):
                 recebimentos_por_codigo[chave].append(recebimento)
             
             # Segundo passo: para cada grupo, encontrar a parcela mais baixa
-            row = 0
+            linhas = []
             for chave, lista_recebimentos in recebimentos_por_codigo.items():
                 # Ordenar por número de parcela (crescente)
                 lista_ordenada = sorted(lista_recebimentos, key=self.extrair_numero_parcela)
@@ -501,33 +515,11 @@ class RecebimentoClientesWindow(QWidget):
                 # Formatar parcelas
                 parcelas_formatado = f"{parcela_atual}/{total_parcelas}"
                 
-                # Formatar valor
-                valor_formatado = f"R$ {valor:.2f}".replace('.', ',')
-                
-                # Adicionar linha na tabela
-                self.tabela.insertRow(row)
-                self.tabela.setItem(row, 0, QTableWidgetItem(chave[0]))  # Código base
-                self.tabela.setItem(row, 1, QTableWidgetItem(cliente))  # Cliente
-                self.tabela.setItem(row, 2, QTableWidgetItem(data_formatada))  # Data
-                self.tabela.setItem(row, 3, QTableWidgetItem(parcelas_formatado))  # Parcelas
-                self.tabela.setItem(row, 4, QTableWidgetItem(valor_formatado))  # Valor
-                
-                # Aplicar cores alternadas às linhas
-                cor_linha = QColor("#f5f5dc") if row % 2 == 0 else QColor("#FFFFFF")
-                
-                for col in range(5):
-                    item = self.tabela.item(row, col)
-                    item.setBackground(cor_linha)
-                    
-                    # Destacar cliente em azul
-                    if col == 1:
-                        item.setForeground(QColor("#0000FF"))
-                    
-                    # Destacar valor em vermelho
-                    if col == 4:
-                        item.setForeground(QColor("#FF0000"))
-                
-                row += 1
+                # Adicionar linha (código base, cliente, data, parcelas, valor)
+                linhas.append(linha_recebimento(
+                    chave[0], cliente, data_formatada, parcelas_formatado, valor, vencimento))
+            
+            self.tabela.definir_linhas(linhas)
                 
         except Exception as e:
             print(f"Erro ao carregar recebimentos: {e}")
@@ -594,11 +586,9 @@ class RecebimentoClientesWindow(QWidget):
                 status="Pendente"
             )
             
-            # Limpar tabela
-            self.tabela.setRowCount(0)
-            
             # Se não houver resultados
             if not recebimentos:
+                self.tabela.limpar()
                 self.mostrar_mensagem("Informação", "Nenhum recebimento encontrado com os filtros informados.")
                 return
             
@@ -643,6 +633,7 @@ class RecebimentoClientesWindow(QWidget):
                         'cliente': cliente,
                         'codigo': codigo_base,
                         'data': vencimento_formatado,  # Usamos a data da primeira parcela
+                        'vencimento': vencimento,
                         'valor': valor,  # Usamos o valor da primeira parcela
                         'total_parcelas': total_parcelas,
                         'parcelas_atuais': [parcela_atual]  # Lista com as parcelas atuais
@@ -652,42 +643,19 @@ class RecebimentoClientesWindow(QWidget):
                     clientes_codigos[chave]['parcelas_atuais'].append(parcela_atual)
             
             # Preencher a tabela agrupada
-            row = 0
+            linhas = []
             for chave, dados in clientes_codigos.items():
-                # Adicionar nova linha
-                self.tabela.insertRow(row)
-                
                 # Calcular número de parcelas no formato "X/Y"
                 # MODIFICADO: Usar min em vez de max para pegar a primeira parcela (1/6) em vez da última (6/6)
                 parcela_atual = min(map(int, dados['parcelas_atuais']))
                 parcelas_formatado = f"{parcela_atual}/{dados['total_parcelas']}"
                 
-                # Formatar valor com R$ e duas casas decimais
-                valor_formatado = f"R$ {dados['valor']:.2f}".replace('.', ',')
-                
-                # Inserir dados
-                self.tabela.setItem(row, 0, QTableWidgetItem(dados['codigo']))  # Código
-                self.tabela.setItem(row, 1, QTableWidgetItem(dados['cliente']))  # Cliente
-                self.tabela.setItem(row, 2, QTableWidgetItem(dados['data']))  # Data
-                self.tabela.setItem(row, 3, QTableWidgetItem(parcelas_formatado))  # Parcelas
-                self.tabela.setItem(row, 4, QTableWidgetItem(valor_formatado))  # Valor
-                
-                # Aplicar cores alternadas às linhas
-                cor_linha = QColor("#f5f5dc") if row % 2 == 0 else QColor("#FFFFFF")
-                
-                for col in range(5):
-                    item = self.tabela.item(row, col)
-                    item.setBackground(cor_linha)
-                    
-                    # Destacar cliente em azul
-                    if col == 1:
-                        item.setForeground(QColor("#0000FF"))
-                    
-                    # Destacar valor em vermelho
-                    if col == 4:
-                        item.setForeground(QColor("#FF0000"))
-                
-                row += 1
+                # Inserir dados (o valor é formatado com R$ e duas casas decimais)
+                linhas.append(linha_recebimento(
+                    dados['codigo'], dados['cliente'], dados['data'], parcelas_formatado,
+                    dados['valor'], dados['vencimento']))
+            
+            self.tabela.definir_linhas(linhas)
                 
         except Exception as e:
             self.mostrar_mensagem("Erro", f"Erro ao filtrar recebimentos: {str(e)}")
@@ -704,28 +672,7 @@ class RecebimentoClientesWindow(QWidget):
         # Usar os dados da imagem 1 (com R$ e formatação decimal)
         dados = dados_imagem1
         
-        self.tabela.setRowCount(len(dados))
-        for row, (codigo, cliente, data, parcelas, valor) in enumerate(dados):
-            self.tabela.setItem(row, 0, QTableWidgetItem(codigo))
-            self.tabela.setItem(row, 1, QTableWidgetItem(cliente))
-            self.tabela.setItem(row, 2, QTableWidgetItem(data))
-            self.tabela.setItem(row, 3, QTableWidgetItem(parcelas))
-            self.tabela.setItem(row, 4, QTableWidgetItem(valor))
-            
-            # Aplicar cores alternadas às linhas
-            cor_linha = QColor("#f5f5dc") if row % 2 == 0 else QColor("#FFFFFF")
-            
-            for col in range(5):
-                item = self.tabela.item(row, col)
-                item.setBackground(cor_linha)
-                
-                # Destacar cliente em azul
-                if col == 1:
-                    item.setForeground(QColor("#0000FF"))
-                
-                # Destacar valor em vermelho
-                if col == 4:
-                    item.setForeground(QColor("#FF0000"))
+        self.tabela.definir_linhas([linha_recebimento(*linha) for linha in dados])
     
     def voltar(self):
         """Ação do botão voltar"""
@@ -748,15 +695,13 @@ class RecebimentoClientesWindow(QWidget):
     
     def excluir(self):
         """Ação do botão excluir"""
-        selected_items = self.tabela.selectedItems()
-        if not selected_items:
+        row = self.tabela.linha_atual()
+        if row < 0:
             self.mostrar_mensagem("Atenção", "Selecione um recebimento para excluir!")
             return
         
         # Obter a linha selecionada
-        row = self.tabela.currentRow()
-        codigo = self.tabela.item(row, 0).text()
-        cliente = self.tabela.item(row, 1).text()
+        codigo, cliente = self.tabela.linha(row)[:2]
         
         # Mostrar mensagem de confirmação
         msgBox = QMessageBox()
@@ -815,7 +760,7 @@ class RecebimentoClientesWindow(QWidget):
                         excluir_recebimento(id_recebimento)
                     
                     # Remover da tabela visual
-                    self.tabela.removeRow(row)
+                    self.tabela.remover_linha(row)
                     self.mostrar_mensagem("Sucesso", "Recebimento excluído com sucesso!")
                     
                     # Recarregar a tabela para garantir sincronização
@@ -839,7 +784,7 @@ class RecebimentoClientesWindow(QWidget):
                             print(f"Excluindo recebimento ID: {id_recebimento}")
                             excluir_recebimento(id_recebimento)
                         
-                        self.tabela.removeRow(row)
+                        self.tabela.remover_linha(row)
                         self.mostrar_mensagem("Sucesso", "Recebimento excluído com sucesso!")
                         self.carregar_recebimentos()
                     else:
@@ -855,16 +800,12 @@ class RecebimentoClientesWindow(QWidget):
         print("Abrindo formulário para baixa de recebimento")
         
         # Obter a linha selecionada
-        row = self.tabela.currentRow()
+        row = self.tabela.linha_atual()
         if row < 0:
             return
             
         # Obter dados da linha selecionada
-        codigo = self.tabela.item(row, 0).text()
-        cliente = self.tabela.item(row, 1).text()
-        data = self.tabela.item(row, 2).text()
-        parcelas = self.tabela.item(row, 3).text()
-        valor = self.tabela.item(row, 4).text()
+        codigo, cliente, data, parcelas, valor = self.tabela.linha(row)[:5]
         
         try:
             # Criar uma nova janela
@@ -8,6 +8,15 @@ from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                              QMessageBox, QStyle, QComboBox, QGridLayout)
 from PyQt5.QtGui import QFont, QIcon, QPixmap
 from PyQt5.QtCore import Qt
+from base.grade_virtual import GradeVirtual, ColunaGrade, FonteConsulta
+from base.filtros import aplicar, filtro_documento, somente_numeros
+
+# Colunas da tabela de pessoas (ID, NOME, TIPO_PESSOA)
+COLUNAS_PESSOAS = [
+    ColunaGrade("Código", 0, ordenar_por="ID"),
+    ColunaGrade("Nome", 1, ordenar_por="NOME"),
+    ColunaGrade("Tipo de pessoa", 2, ordenar_por="TIPO_PESSOA"),
+]
 try:
     # Importação relativa (mesmo pacote)
     from .formulario_pessoa import FormularioPessoa
@@ -354,17 +363,15 @@ class CadastroPessoa(QWidget):
         main_layout.addLayout(botoes_layout)
         
         # Tabela de pessoas
-        self.table = QTableWidget()
-        self.table.setColumnCount(3)
-        self.table.setHorizontalHeaderLabels(["Código", "Nome", "Tipo de pessoa"])
+        self.table = GradeVirtual(COLUNAS_PESSOAS)
         self.table.horizontalHeader().setStyleSheet("background-color: #fffff0;")
         self.table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 background-color: #fffff0;
                 border: 1px solid #cccccc;
                 font-size: 12px;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 5px;
             }
             QHeaderView::section {
@@ -380,12 +387,9 @@ class CadastroPessoa(QWidget):
         self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
         self.table.horizontalHeader().setSectionResizeMode(2, QHeaderView.ResizeToContents)
         
-        self.table.verticalHeader().setVisible(False)
-        self.table.setSelectionBehavior(QTableWidget.SelectRows)
         self.table.setSelectionMode(QTableWidget.SingleSelection)
-        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
         
-        self.table.itemClicked.connect(self.selecionar_pessoa)
+        self.table.clicked.connect(self.selecionar_pessoa)
         
         main_layout.addWidget(self.table, 1)  # Dar maior prioridade de espaço para a tabela
         
@@ -396,14 +400,14 @@ class CadastroPessoa(QWidget):
         self.setStyleSheet("QWidget { background-color: #043b57; }")
 
     # Método para selecionar pessoa (modificado para simplificar)
-    def selecionar_pessoa(self, item):
+    def selecionar_pessoa(self, index):
         """
         Preenche apenas o campo de código quando uma linha é selecionada
         """
-        row = item.row()
+        row = index.row()
         
         # Obter o código da linha selecionada
-        codigo = self.table.item(row, 0).text()
+        codigo = str(self.table.linha(row)[0])
         
         # Preencher apenas o campo de código que mantivemos
         self.codigo_input.setText(codigo)
@@ -420,8 +424,14 @@ class CadastroPessoa(QWidget):
         tipo = self.tipo_search.currentText()
         
         try:
-            # Limpar tabela para os novos resultados
-            self.table.setRowCount(0)
+            if nome:
+                # Nome: busca em memória, sem diferenciar acentos e tolerante a
+                # erros de digitação, ordenada pela relevância
+                total = self.table.definir_linhas(
+                    self.pesquisar_por_nome(nome, codigo, documento, tipo))
+                if total == 0:
+                    self.mostrar_mensagem("Aviso", "Nenhuma pessoa encontrada com os filtros selecionados.")
+                return
             
             # Construir consulta SQL base
             query = """
@@ -438,45 +448,48 @@ class CadastroPessoa(QWidget):
                 query += " AND ID = ?"
                 params.append(int(codigo))
                 
-            if nome:
-                query += " AND UPPER(NOME) LIKE UPPER(?)"
-                params.append(f"%{nome}%")  # Busca parcial, case-insensitive
-                
-            if documento:
-                # Remover caracteres não numéricos para busca
-                documento_limpo = ''.join(filter(str.isdigit, documento))
-                if documento_limpo:
-                    query += " AND DOCUMENTO LIKE ?"
-                    params.append(f"%{documento_limpo}%")
+            # CPF/CNPJ completo ou inicial: condição que usa o índice (ver base.filtros)
+            query = aplicar(query, params, filtro_documento("DOCUMENTO", documento))
             
             # Filtrar pelo tipo de pessoa
             if tipo != "Todos":
                 query += " AND TIPO_PESSOA = ?"
                 params.append(tipo)
             
-            # Adicionar ordenação
-            query += " ORDER BY ID"
-            
-            # Executar a consulta
-            from base.banco import execute_query
-            pessoas = execute_query(query, tuple(params) if params else None)
+            # A grade lê os resultados por página, ordenados por ID (ou pela
+            # coluna escolhida no cabeçalho)
+            total = self.table.definir_fonte(
+                FonteConsulta(query, params, ordem_padrao="ID", desempate="ID"))
             
             # Verificar se encontrou resultados
-            if pessoas and len(pessoas) > 0:
-                # Preencher a tabela com os resultados
-                self.table.setRowCount(len(pessoas))
-                
-                for row, (id_pessoa, nome, tipo_pessoa) in enumerate(pessoas):
-                    self.table.setItem(row, 0, QTableWidgetItem(str(id_pessoa)))
-                    self.table.setItem(row, 1, QTableWidgetItem(nome))
-                    self.table.setItem(row, 2, QTableWidgetItem(tipo_pessoa))
-            else:
+            if total == 0:
                 # Mensagem quando nenhuma pessoa corresponde aos filtros
                 self.mostrar_mensagem("Aviso", "Nenhuma pessoa encontrada com os filtros selecionados.")
                 
         except Exception as e:
             self.mostrar_mensagem("Erro", f"Erro ao pesquisar pessoas: {str(e)}", QMessageBox.Critical)
 
+    def pesquisar_por_nome(self, nome, codigo="", documento="", tipo="Todos"):
+        """
+        Pesquisa pelo índice de pessoas em memória e aplica os demais filtros
+        
+        Returns:
+            list: Tuplas (ID, NOME, TIPO_PESSOA) em ordem de relevância
+        """
+        from base.busca_pessoas import busca_pessoas
+        
+        documento_limpo = somente_numeros(documento)
+        linhas = []
+        for id_pessoa, nome_pessoa, tipo_pessoa, doc in busca_pessoas.pesquisar(nome.lstrip("*%")):
+            if codigo and str(id_pessoa) != codigo:
+                continue
+            if documento_limpo and not str(doc or "").startswith(documento_limpo):
+                continue
+            if tipo != "Todos" and str(tipo_pessoa or "").strip() != tipo:
+                continue
+            linhas.append((id_pessoa, nome_pessoa, tipo_pessoa))
+        return linhas
+
     def limpar_filtros(self):
         """Limpa todos os campos de pesquisa e carrega todas as pessoas novamente"""
         self.codigo_search.setCurrentIndex(-1)
@@ -664,18 +677,10 @@ class CadastroPessoa(QWidget):
             from base.banco import listar_pessoas
             pessoas = listar_pessoas()
             
-            # Limpar tabela atual
-            self.table.setRowCount(0)
+            # Exibir as pessoas na tabela
+            self.table.definir_linhas(pessoas or [])
             
-            # Adicionar pessoas na tabela
             if pessoas:
-                self.table.setRowCount(len(pessoas))
-                
-                for row, (id_pessoa, nome, tipo_pessoa) in enumerate(pessoas):
-                    self.table.setItem(row, 0, QTableWidgetItem(str(id_pessoa)))
-                    self.table.setItem(row, 1, QTableWidgetItem(nome))
-                    self.table.setItem(row, 2, QTableWidgetItem(tipo_pessoa))
-                
                 # Preencher os ComboBoxes com valores únicos
                 codigos = set()
                 nomes = set()
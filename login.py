@@ -1,13 +1,18 @@
 import sys
 import os
 import time
+
+# Início do processo, para medir o tempo até a tela de login
+INICIO_PROCESSO = time.perf_counter()
+
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                           QHBoxLayout, QPushButton, QLabel, QLineEdit, QDialog,
                           QMessageBox, QFrame, QProgressBar, QSplashScreen)
 from PyQt5.QtGui import QFont, QIcon, QPixmap, QPainter, QColor, QBrush, QLinearGradient, QMovie
 from PyQt5.QtCore import Qt, QSettings, QSize, QTimer, QThread, pyqtSignal
 from principal import MainWindow
-from base.banco import iniciar_syncthing_se_necessario, validar_codigo_licenca, validar_login, verificar_tabela_usuarios, obter_id_usuario
+from base.banco import iniciar_syncthing_se_necessario, validar_codigo_licenca
+from base.inicializacao import executar_tarefas, registrar_tempos
 
 Versao = "Versão: v0.1.3"
 
@@ -20,30 +25,27 @@ class LoadingWorker(QThread):
     def __init__(self, task_type="startup"):
         super().__init__()
         self.task_type = task_type
+        self.tempos = {}          # Tempo de cada tarefa (executar_tarefas)
+        self.tempo_total_ms = 0.0
     
     def run(self):
         if self.task_type == "startup":
             self.startup_tasks()
     
     def startup_tasks(self):
-        """Tarefas de inicialização do programa"""
-        tasks = [
-            ("Carregando módulos...", 1000),
-            ("Verificando banco de dados...", 1500),
-            ("Iniciando serviços...", 2000),
-            ("Preparando interface...", 1000),
-            ("Finalizando...", 500)
-        ]
-        
-        progress_step = 100 // len(tasks)
-        current_progress = 0
-        
-        for task_name, delay_ms in tasks:
-            self.status.emit(task_name)
-            self.msleep(delay_ms)  # Simula tempo de processamento
-            current_progress += progress_step
-            self.progress.emit(min(current_progress, 100))
+        """Tarefas de inicialização do programa (em paralelo, ver base.inicializacao)"""
+        inicio = time.perf_counter()
+        
+        def ao_iniciar(nome, texto):
+            self.status.emit(texto)
         
+        def ao_concluir(nome, sucesso, concluidas, total):
+            self.progress.emit(min(concluidas * 100 // total, 100))
+        
+        self.tempos = executar_tarefas(ao_iniciar, ao_concluir)
+        self.tempo_total_ms = (time.perf_counter() - inicio) * 1000
+        
+        self.status.emit("Finalizando...")
         self.progress.emit(100)
         self.finished.emit()
 
@@ -183,8 +185,14 @@ class SplashScreen(QWidget):
 
 
 class LoginWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, tarefas_concluidas=None):
+        """
+        Args:
+            tarefas_concluidas (set, optional): Tarefas de inicialização já
+                executadas com sucesso na tela de carregamento
+        """
         super().__init__()
+        tarefas_concluidas = tarefas_concluidas or set()
         self.setWindowTitle("MB Sistema - Login")
         self.setFixedSize(700, 500)
         
@@ -202,20 +210,25 @@ class LoginWindow(QMainWindow):
         # Configurações para salvar dados de usuário
         self.settings = QSettings("MBSistema", "Login")
 
-        # Iniciar Syncthing
-        try:
-            iniciar_syncthing_se_necessario()
-        except Exception as e:
-            print(f"Aviso: Não foi possível iniciar o Syncthing: {e}")
+        # Iniciar Syncthing (se a tela de carregamento ainda não conseguiu)
+        if "syncthing" not in tarefas_concluidas:
+            try:
+                iniciar_syncthing_se_necessario()
+            except Exception as e:
+                print(f"Aviso: Não foi possível iniciar o Syncthing: {e}")
+        else:
+            self.syncthing_iniciado = True
         
         # Configurar a interface
         self.initUI()
         
-        # Inicializar banco de dados
-        self.inicializar_bd()
+        # Inicializar banco de dados (mostra o erro se a conexão falhou)
+        if "esquema" not in tarefas_concluidas:
+            self.inicializar_bd()
         
         # Verificar e iniciar Syncthing
-        self.verificar_e_iniciar_syncthing()
+        if not self.syncthing_iniciado:
+            self.verificar_e_iniciar_syncthing()
 
         # Carregar o usuário e empresa salvos, se existirem
         self.carregar_dados_salvos()
@@ -248,7 +261,8 @@ class LoginWindow(QMainWindow):
     def inicializar_bd(self):
         """Inicializa o banco de dados e cria as tabelas necessárias"""
         try:
-            verificar_tabela_usuarios()
+            from base.migracoes import aplicar_migracoes
+            aplicar_migracoes()
             
             # Limpar arquivos de conflito ao iniciar
             try:
@@ -563,54 +577,26 @@ class LoginWindow(QMainWindow):
         self.salvar_dados(usuario, empresa)
         
         try:
-            # Verificar se o usuário está bloqueado
-            from base.banco import verificar_usuario_bloqueado
-            bloqueado, motivo = verificar_usuario_bloqueado(usuario, empresa)
-            if bloqueado:
-                self.mostrar_mensagem("Acesso Bloqueado", motivo)
+            # Usuário, bloqueio, licença, funcionário e permissões em uma consulta
+            from base.banco import iniciar_sessao, validar_codigo_licenca
+            sessao = iniciar_sessao(usuario, senha, empresa)
+            
+            if sessao.bloqueado:
+                self.mostrar_mensagem("Acesso Bloqueado", sessao.motivo_bloqueio)
                 self.restaurar_botao_login()
                 return
-                
-            # Validação no banco Firebird
-            from base.banco import validar_login, autenticar_por_funcionario, execute_query
-            from base.banco import obter_id_usuario, verificar_necessidade_codigo_licenca, validar_codigo_licenca
-            
-            # Tentar autenticar e obter informações do funcionário
-            info_funcionario = None
-            id_funcionario = None
-            usuario_id = None
-            
-            # Verificar se é um usuário padrão
-            ok = validar_login(usuario, senha, empresa)
-            
-            # Se for um funcionário com credenciais próprias
-            if not ok:
-                info_funcionario = autenticar_por_funcionario(usuario, senha)
-                if info_funcionario:
-                    ok = True
-                    id_funcionario = info_funcionario.get("id_funcionario")
-                    empresa = info_funcionario.get("empresa", empresa)
-            else:
-                # Para usuários padrão, buscar se está vinculado a algum funcionário
-                from base.banco import buscar_funcionario_por_usuario
-                func_info = buscar_funcionario_por_usuario(usuario)
-                if func_info:
-                    id_funcionario = func_info[0]
-                
-                # Obter ID do usuário para verificação de licença
-                usuario_id = obter_id_usuario(usuario, empresa)
             
-            if not ok:
+            if not sessao.autenticado:
                 self.mostrar_mensagem("Erro", "Usuário ou senha inválidos!")
                 self.restaurar_botao_login()
                 return
             
-            # Se não temos o ID do usuário ainda, buscamos agora
-            if not usuario_id:
-                usuario_id = obter_id_usuario(usuario, empresa)
+            empresa = sessao.empresa
+            id_funcionario = sessao.id_funcionario
+            usuario_id = sessao.id_usuario
             
-            # Verificar se precisa de código de licença
-            if verificar_necessidade_codigo_licenca(usuario_id):
+            # Verificar se precisa de código de licença (mensalidade vencida)
+            if sessao.precisa_codigo_licenca:
                 self.restaurar_botao_login()
                 codigo = self.solicitar_codigo_licenca(usuario_id)
                 if not codigo:
@@ -627,50 +613,6 @@ class LoginWindow(QMainWindow):
                 
                 self.mostrar_mensagem("Sucesso", "Licença ativada com sucesso!")
             
-            # Verificar mensalidade vencida (data de expiração)
-            else:
-                from datetime import datetime, date
-                query = """
-                SELECT DATA_EXPIRACAO, USUARIO_MASTER
-                FROM USUARIOS
-                WHERE USUARIO = ? AND EMPRESA = ?
-                """
-                result = execute_query(query, (usuario, empresa))
-                
-                if result and len(result) > 0:
-                    data_expiracao, usuario_master = result[0]
-                    
-                    # Verificar data de expiração deste usuário
-                    if data_expiracao and date.today() > data_expiracao:
-                        self.mostrar_mensagem("Acesso Bloqueado", 
-                                            "Mensalidade vencida. Por favor, entre em contato com o suporte.")
-                        self.restaurar_botao_login()
-                        return
-                        
-                    # Se for um usuário vinculado, verificar também o usuário master
-                    if usuario_master:
-                        query_master = """
-                        SELECT DATA_EXPIRACAO, BLOQUEADO
-                        FROM USUARIOS
-                        WHERE ID = ?
-                        """
-                        result_master = execute_query(query_master, (usuario_master,))
-                        
-                        if result_master and len(result_master) > 0:
-                            data_expiracao_master, bloqueado_master = result_master[0]
-                            
-                            if bloqueado_master and bloqueado_master.upper() == 'S':
-                                self.mostrar_mensagem("Acesso Bloqueado", 
-                                                "Conta principal bloqueada. Entre em contato com o suporte.")
-                                self.restaurar_botao_login()
-                                return
-                                
-                            if data_expiracao_master and date.today() > data_expiracao_master:
-                                self.mostrar_mensagem("Acesso Bloqueado", 
-                                                "Mensalidade da conta principal vencida. Entre em contato com o suporte.")
-                                self.restaurar_botao_login()
-                                return
-            
             # Login bem-sucedido! Abrir a janela principal diretamente
             self.open_main_window(usuario, empresa, id_funcionario)
 
@@ -785,8 +727,14 @@ def main():
     def show_login():
         nonlocal login_window
         startup_splash.close()
-        login_window = LoginWindow()
+        worker = startup_splash.worker
+        concluidas = {nome for nome, tempo in worker.tempos.items() if tempo['sucesso']}
+        login_window = LoginWindow(concluidas)
         login_window.show()
+        
+        # Registrar os tempos para acompanhar a inicialização entre versões
+        registrar_tempos(Versao, worker.tempos, worker.tempo_total_ms,
+                         (time.perf_counter() - INICIO_PROCESSO) * 1000)
     
     # Quando o carregamento inicial terminar, mostrar o login
     startup_splash.worker.finished.connect(show_login)
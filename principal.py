@@ -1,15 +1,13 @@
 #principal.py
 import sys
 import os
-import importlib.util
 import unicodedata
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                              QHBoxLayout, QPushButton, QLabel, QFrame, QAction,
                              QMenu, QToolBar, QGraphicsDropShadowEffect, QMessageBox, QDialog)
 from PyQt5.QtGui import QFont, QCursor, QIcon, QPixmap, QColor
-from PyQt5.QtCore import Qt, QSize, QPropertyAnimation, QEasingCurve, QUrl, QTimer, QRect
+from PyQt5.QtCore import Qt, QSize, QPropertyAnimation, QEasingCurve, QUrl, QTimer, QRect, pyqtSignal
 from PyQt5.QtGui import QDesktopServices
-from assistente import adicionar_assistente_ao_sistema
 
 
 class ContatosWhatsAppDialog(QDialog):
@@ -294,6 +292,9 @@ class MenuButton(QPushButton):
 
 
 class MainWindow(QMainWindow):
+    # Emitido pelos contadores da tela inicial quando uma venda ou cadastro os altera
+    contadores_alterados = pyqtSignal()
+
     def __init__(self, usuario=None, empresa=None, id_funcionario=None):
         super().__init__()
         self.usuario = usuario if usuario else "Usuário"
@@ -316,6 +317,13 @@ class MainWindow(QMainWindow):
         self.timer_atualizacao.timeout.connect(self.atualizar_contadores)
         self.timer_atualizacao.start(30000)  # 30 segundos
         
+        # Vendas e cadastros (eventos de base.eventos) atualizam os contadores
+        # na hora, sem esperar o timer
+        from base.estatisticas_painel import estatisticas_painel
+        self.contadores_alterados.connect(self.atualizar_contadores)
+        self._ouvinte_contadores = self.contadores_alterados.emit
+        estatisticas_painel.conectar(self._ouvinte_contadores)
+        
         # Configurar timer para verificar o Syncthing periodicamente
         self.timer_syncthing = QTimer(self)
         self.timer_syncthing.timeout.connect(self.verificar_syncthing)
@@ -341,12 +349,18 @@ class MainWindow(QMainWindow):
             return
             
         try:
-            # Instanciar a classe de backend da configuração do sistema
-            from ferramentas.configuracao_sistema import ConfiguracaoSistemaBackend
-            backend = ConfiguracaoSistemaBackend()
-            
-            # Carregar todas as permissões do funcionário
-            self.permissoes = backend.obter_permissoes_funcionario(self.id_funcionario)
+            # As permissões já vieram com o login (base.banco.iniciar_sessao)
+            from base.banco import obter_sessao
+            sessao = obter_sessao()
+            if sessao is not None and sessao.id_funcionario == self.id_funcionario:
+                self.permissoes = dict(sessao.permissoes)
+            else:
+                # Instanciar a classe de backend da configuração do sistema
+                from ferramentas.configuracao_sistema import ConfiguracaoSistemaBackend
+                backend = ConfiguracaoSistemaBackend()
+
+                # Carregar todas as permissões do funcionário
+                self.permissoes = backend.obter_permissoes_funcionario(self.id_funcionario)
             
             # Atualizar a visibilidade dos elementos da interface com base nas permissões
             if hasattr(self, 'pdv_button'):
@@ -592,13 +606,8 @@ class MainWindow(QMainWindow):
         # Garantir que o botão fique por cima de outros widgets
         self.botao_whatsapp.raise_()
         
-        # Importar e adicionar o assistente virtual
-        try:
-            from assistente import adicionar_assistente_ao_sistema
-            adicionar_assistente_ao_sistema(self)
-            print("Assistente Virtual carregado com sucesso!")
-        except Exception as e:
-            print(f"Erro ao carregar Assistente Virtual: {e}")
+        # Importar e adicionar o assistente virtual depois que a janela aparecer
+        QTimer.singleShot(0, self.carregar_assistente)
 
         # Criação do botão de acesso ao PDV no canto superior esquerdo
         self.pdv_button = QPushButton("Acesso ao\nPDV", self)
@@ -718,6 +727,15 @@ class MainWindow(QMainWindow):
             "PDV - Ponto de Venda":         "PDVWindow"
         }
 
+    def carregar_assistente(self):
+        """Importa e adiciona o assistente virtual (fora do caminho de abertura da janela)"""
+        try:
+            from assistente import adicionar_assistente_ao_sistema
+            adicionar_assistente_ao_sistema(self)
+            print("Assistente Virtual carregado com sucesso!")
+        except Exception as e:
+            print(f"Erro ao carregar Assistente Virtual: {e}")
+
     def abrir_janela_contatos(self):
         """Abre a janela de contatos do WhatsApp"""
         try:
@@ -765,6 +783,7 @@ class MainWindow(QMainWindow):
             return
 
         try:
+            from base.registro_modulos import registro_modulos
             pdv_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "PDV", "PDV_principal.py")
             
             if not os.path.exists(pdv_path):
@@ -780,13 +799,10 @@ class MainWindow(QMainWindow):
                     w.activateWindow()
                     return
                     
-            # Importar e abrir o módulo PDV
-            spec = importlib.util.spec_from_file_location("PDV_principal", pdv_path)
-            module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(module)
-            
+            # Importar o módulo PDV (apenas na primeira abertura)
             # Assumindo que a classe se chama PDVWindow
-            WindowClass = getattr(module, "PDVWindow", None)
+            WindowClass = registro_modulos.obter_classe(
+                os.path.join("PDV", "PDV_principal.py"), "PDVWindow", "PDV_principal")
             
             if not WindowClass:
                 print("Classe PDVWindow não encontrada no módulo PDV")
@@ -1024,21 +1040,25 @@ class MainWindow(QMainWindow):
         try:
             print("Iniciando atualização dos contadores...")
             
+            # Valores mantidos em memória (o banco só é lido quando necessário)
+            from base.estatisticas_painel import estatisticas_painel
+            contadores = estatisticas_painel.obter()
+            
             # Atualizar contador de clientes (com animação)
             if "Clientes" in self.contadores_labels:
-                novo_valor = self.obter_contagem_pessoas()
+                novo_valor = contadores['clientes']
                 self.atualizar_contador_com_animacao(self.contadores_labels["Clientes"], novo_valor)
                 print(f"Contador de Clientes atualizado: {novo_valor}")
                     
             # Atualizar contador de produtos (com animação)
             if "Produtos" in self.contadores_labels:
-                novo_valor = self.obter_contagem_produtos()
+                novo_valor = contadores['produtos']
                 self.atualizar_contador_com_animacao(self.contadores_labels["Produtos"], novo_valor)
                 print(f"Contador de Produtos atualizado: {novo_valor}")
                     
             # Atualizar contador de vendas SEM animação de cor
             if "Vendas" in self.contadores_labels:
-                novo_valor = self.obter_contagem_vendas()
+                novo_valor = contadores['vendas_dia']
                 label = self.contadores_labels["Vendas"]
                 
                 # Apenas atualizar o texto sem mudar a cor
@@ -1052,12 +1072,6 @@ class MainWindow(QMainWindow):
             import traceback
             traceback.print_exc()
 
-    # Método para garantir que o PDV atualize a tela principal
-    def forcar_atualizacao_contadores(self):
-        """Força a atualização imediata dos contadores na tela principal"""
-        print("Forçando atualização dos contadores a partir do PDV...")
-        QTimer.singleShot(100, self.atualizar_contadores) 
-
     def atualizar_contador_com_animacao(self, label, novo_valor):
         """Atualiza um contador com uma animação de destaque"""
         # Verificar se é um valor monetário (texto começa com R$)
@@ -1153,100 +1167,19 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Erro", f"Erro ao abrir WhatsApp: {str(e)}")
 
     def obter_contagem_pessoas(self):
-        """Obtém a contagem de PESSOAS do banco de dados"""
-        try:
-            from base.banco import execute_query
-            result = execute_query("SELECT COUNT(*) FROM PESSOAS")
-            return result[0][0] if result and result[0][0] else 0
-        except Exception as e:
-            print(f"Erro ao contar pessoas: {e}")
-            return 0
+        """Obtém a contagem de PESSOAS (contador da tela inicial)"""
+        from base.estatisticas_painel import estatisticas_painel
+        return estatisticas_painel.obter()['clientes']
 
     def obter_contagem_produtos(self):
-        """Obtém a contagem de PRODUTOS do banco de dados"""
-        try:
-            from base.banco import execute_query
-            result = execute_query("SELECT COUNT(*) FROM PRODUTOS")
-            return result[0][0] if result and result[0][0] else 0
-        except Exception as e:
-            print(f"Erro ao contar produtos: {e}")
-            return 0
+        """Obtém a contagem de PRODUTOS (contador da tela inicial)"""
+        from base.estatisticas_painel import estatisticas_painel
+        return estatisticas_painel.obter()['produtos']
 
     def obter_contagem_vendas(self):
-        """Obtém o valor total das vendas do dia atual"""
-        try:
-            # Importar datetime para obter a data atual
-            from datetime import datetime, date
-            
-            # Obter a data atual
-            data_atual = date.today()
-            
-            # Usar conexão direta
-            from base.banco import get_connection
-            
-            # Obter conexão e criar cursor
-            conn = get_connection()
-            cursor = conn.cursor()
-            
-            # Verificar estrutura da tabela VENDAS para identificar a coluna de data
-            cursor.execute("SELECT RDB$FIELD_NAME FROM RDB$RELATION_FIELDS WHERE RDB$RELATION_NAME = 'VENDAS'")
-            colunas = [col[0].strip() for col in cursor.fetchall()]
-            print(f"Colunas na tabela VENDAS: {colunas}")
-            
-            # Possíveis nomes para a coluna de data
-            possiveis_nomes_data = ['DATA_VENDA', 'DATA_EMISSAO', 'DATA', 'DT_VENDA', 'DT_EMISSAO', 'DATA_REGISTRO']
-            
-            # Encontrar a primeira coluna de data que existe na tabela
-            coluna_data = None
-            for nome in possiveis_nomes_data:
-                if nome in colunas:
-                    coluna_data = nome
-                    print(f"Coluna de data encontrada: {coluna_data}")
-                    break
-            
-            if not coluna_data:
-                print("AVISO: Nenhuma coluna de data encontrada. Usando todas as vendas.")
-                # Se não encontrar coluna de data, usar todas as vendas (comportamento atual)
-                cursor.execute("SELECT VALOR_TOTAL FROM VENDAS")
-            else:
-                # Usar EXTRACT para comparar apenas a data no Firebird
-                query = f"""
-                SELECT VALOR_TOTAL FROM VENDAS 
-                WHERE EXTRACT(YEAR FROM {coluna_data}) = ? 
-                AND EXTRACT(MONTH FROM {coluna_data}) = ? 
-                AND EXTRACT(DAY FROM {coluna_data}) = ?
-                """
-                params = (data_atual.year, data_atual.month, data_atual.day)
-                print(f"Executando query: {query} com parâmetros {params}")
-                cursor.execute(query, params)
-            
-            valores = cursor.fetchall()
-            
-            # Somar valores manualmente
-            total = 0.0
-            for valor in valores:
-                if valor[0] is not None:
-                    try:
-                        total += float(valor[0])
-                    except (ValueError, TypeError):
-                        print(f"Aviso: Valor inválido encontrado: {valor[0]}")
-            
-            # Fechar cursor e conexão
-            cursor.close()
-            conn.close()
-            
-            if coluna_data:
-                print(f"Valor total das vendas do dia {data_atual.strftime('%d/%m/%Y')}: {total}")
-            else:
-                print(f"Valor total de todas as vendas: {total}")
-            
-            return total
-            
-        except Exception as e:
-            print(f"Erro ao obter total de vendas: {e}")
-            import traceback
-            traceback.print_exc()
-            return 0.0
+        """Obtém o valor total das vendas do dia atual (contador da tela inicial)"""
+        from base.estatisticas_painel import estatisticas_painel
+        return estatisticas_painel.obter()['vendas_dia']
     
     def diagnosticar_banco(self):
         """Executa diagnóstico completo do banco e valores"""
@@ -1327,10 +1260,9 @@ class MainWindow(QMainWindow):
 
     def load_module_dynamically(self, module_path, class_name):
         try:
-            spec = importlib.util.spec_from_file_location("mod", module_path)
-            module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(module)
-            return getattr(module, class_name, None)
+            from base.registro_modulos import registro_modulos
+            rel = os.path.relpath(module_path, os.path.dirname(os.path.abspath(__file__)))
+            return registro_modulos.obter_classe(rel, class_name)
         except Exception as e:
             print(f"Erro ao carregar dinamicamente {module_path}: {e}")
             return None
@@ -1356,47 +1288,38 @@ class MainWindow(QMainWindow):
                 w.activateWindow()
                 return
         
+        # Cada tela é importada uma única vez (na primeira abertura) e a classe é reaproveitada
+        from base.registro_modulos import registro_modulos
+        
         # Se o módulo faz parte da lista especial, use importação direta com tratamento de erros
         if action_title in special_modules:
             try:
                 if action_title == "Fiscal NF-e, SAT, NFC-e":
                     # Importação direta para o módulo de relatório fiscal
                     rel_path = self.action_to_py_file[action_title]
-                    abs_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), rel_path)
                     
                     # Importação explícita do módulo de impressão
                     from PyQt5.QtPrintSupport import QPrinter, QPrintDialog, QPrintPreviewDialog
                     
                     # Carregamento do módulo
-                    spec = importlib.util.spec_from_file_location("relatorio_fiscal", abs_path)
-                    module = importlib.util.module_from_spec(spec)
-                    spec.loader.exec_module(module)
-                    WindowClass = getattr(module, "RelatorioFiscalWindow")
+                    WindowClass = registro_modulos.obter_classe(rel_path, "RelatorioFiscalWindow", "relatorio_fiscal")
                     
                 elif action_title == "Configuração de estação":
                     # Importação direta para configuração de impressora
                     rel_path = self.action_to_py_file[action_title]
-                    abs_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), rel_path)
                     
                     # Importação explícita do módulo de impressão
                     from PyQt5.QtPrintSupport import QPrinterInfo, QPrintDialog, QPrinter
                     
                     # Carregamento do módulo
-                    spec = importlib.util.spec_from_file_location("configuracao_impressora", abs_path)
-                    module = importlib.util.module_from_spec(spec)
-                    spec.loader.exec_module(module)
-                    WindowClass = getattr(module, "ConfiguracaoImpressoraWindow")
+                    WindowClass = registro_modulos.obter_classe(rel_path, "ConfiguracaoImpressoraWindow", "configuracao_impressora")
                     
                 elif action_title == "Relatório de Vendas de Produtos":
                     # Importação direta para o módulo de relatório de vendas
                     rel_path = self.action_to_py_file[action_title]
-                    abs_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), rel_path)
                     
                     # Carregamento do módulo
-                    spec = importlib.util.spec_from_file_location("relatorio_vendas_produtos", abs_path)
-                    module = importlib.util.module_from_spec(spec)
-                    spec.loader.exec_module(module)
-                    WindowClass = getattr(module, "RelatorioVendasWindow")
+                    WindowClass = registro_modulos.obter_classe(rel_path, "RelatorioVendasWindow", "relatorio_vendas_produtos")
                     
                     # Criar e exibir a janela
                     win = WindowClass()
@@ -1475,34 +1398,12 @@ class MainWindow(QMainWindow):
             base = ''.join(c for c in self.normalize_text(action_title) if c.isalnum())
             cls_name = base + "Window"
             
-        # Tentar importação direta (abordagem modificada para ser mais robusta)
+        # Importar o módulo (como pacote ou pelo arquivo) apenas na primeira abertura
         try:
-            # Determinando o caminho do módulo para importação
-            rel_path = rel.replace(os.sep, '.')
-            module_name = os.path.splitext(rel_path)[0]
-            
-            # Tentar importação direta como pacote primeiro
-            try:
-                module_parts = module_name.split('.')
-                if len(module_parts) > 1:
-                    package = module_parts[0]
-                    module = __import__(module_name, fromlist=[cls_name])
-                    WindowClass = getattr(module, cls_name, None)
-                else:
-                    # Fallback para importação com importlib
-                    raise ImportError("Não é um pacote")
-            except ImportError:
-                # Importação com importlib como fallback
-                spec = importlib.util.spec_from_file_location(module_name, path)
-                if not spec:
-                    raise ImportError(f"Não foi possível criar spec para {path}")
-                    
-                module = importlib.util.module_from_spec(spec)
-                spec.loader.exec_module(module)
-                WindowClass = getattr(module, cls_name, None)
+            WindowClass = registro_modulos.obter_classe(rel, cls_name)
                 
             if not WindowClass:
-                raise ImportError(f"Classe {cls_name} não encontrada no módulo {module_name}")
+                raise ImportError(f"Classe {cls_name} não encontrada no módulo {rel}")
                 
             # Criar e exibir a janela
             win = WindowClass()
@@ -1559,6 +1460,9 @@ class MainWindow(QMainWindow):
             # Parar timers
             if hasattr(self, 'timer_atualizacao'):
                 self.timer_atualizacao.stop()
+            if hasattr(self, '_ouvinte_contadores'):
+                from base.estatisticas_painel import estatisticas_painel
+                estatisticas_painel.desconectar(self._ouvinte_contadores)
             if hasattr(self, 'timer_syncthing'):
                 self.timer_syncthing.stop()
             
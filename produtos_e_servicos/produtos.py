@@ -6,8 +6,9 @@ from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                              QHBoxLayout, QPushButton, QLabel, QLineEdit,
                              QTableWidget, QTableWidgetItem, QHeaderView, QComboBox,
                              QMessageBox, QStyle, QToolButton, QGridLayout)
-from PyQt5.QtGui import QFont, QIcon
+from PyQt5.QtGui import QFont, QIcon, QColor
 from PyQt5.QtCore import Qt, QTimer, pyqtSignal
+from base.grade_virtual import GradeVirtual, ColunaGrade
 
 # Importar o módulo banco.py da pasta base
 try:
@@ -162,9 +163,10 @@ def registrar_venda_produto(data, codigo_produto, produto, categoria, quantidade
         dict: Resultado da operação incluindo ID da venda e informações de estoque
     """
     try:
-        from base.banco import execute_query
+        from base.banco import inserir_retornando_id, transacao
+        from base.vendas_diarias import acumular
         
-        # Inserir a venda
+        # Inserir a venda (o ID volta na própria instrução)
         query = """
         INSERT INTO VENDAS_PRODUTOS (
             DATA, CODIGO_PRODUTO, PRODUTO, CATEGORIA, QUANTIDADE,
@@ -172,21 +174,19 @@ def registrar_venda_produto(data, codigo_produto, produto, categoria, quantidade
         ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
         """
         
-        execute_query(query, (
-            data, codigo_produto, produto, categoria, quantidade,
-            valor_unitario, valor_total, cliente, vendedor
-        ))
-        
-        # Obter o ID da venda recém-registrada
-        query_id = "SELECT MAX(ID) FROM VENDAS_PRODUTOS"
-        result = execute_query(query_id)
-        
-        id_venda = None
-        if result and len(result) > 0 and result[0][0]:
-            id_venda = result[0][0]
-        
-        # Atualizar o estoque do produto
-        resultado_estoque = atualizar_estoque_apos_venda(codigo_produto, quantidade)
+        # A venda, o resumo diário dos relatórios e a baixa de estoque em uma
+        # única transação: sem estoque, nada é gravado
+        with transacao():
+            id_venda = inserir_retornando_id(query, (
+                data, codigo_produto, produto, categoria, quantidade,
+                valor_unitario, valor_total, cliente, vendedor
+            ))
+            acumular(data, [(codigo_produto, produto, categoria, quantidade, valor_total)])
+            
+            # Atualizar o estoque do produto (as consultas participam da transação)
+            resultado_estoque = atualizar_estoque_apos_venda(codigo_produto, quantidade)
+            if not resultado_estoque["sucesso"]:
+                raise Exception(resultado_estoque["mensagem"])
         
         # Retornar um resultado completo
         return {
@@ -203,6 +203,27 @@ def registrar_venda_produto(data, codigo_produto, produto, categoria, quantidade
             "mensagem": f"Erro ao registrar venda: {str(e)}"
         }
 
+# Limite de estoque destacado em vermelho na tabela
+LIMITE_ESTOQUE_BAIXO = 5
+
+def _estoque_baixo(produto):
+    return (produto[8] or 0) <= LIMITE_ESTOQUE_BAIXO
+
+# Colunas da tabela de produtos. Índices das tuplas: 0:ID, 1:CODIGO, 2:NOME,
+# 3:CODIGO_BARRAS, 4:MARCA, 5:GRUPO, 6:PRECO_CUSTO, 7:PRECO_VENDA, 8:QUANTIDADE_ESTOQUE
+COLUNAS_PRODUTOS = [
+    ColunaGrade("Código", 1),
+    ColunaGrade("Nome", 2),
+    ColunaGrade("Marca", 4),
+    ColunaGrade("Grupo", 5),
+    ColunaGrade("Preço de Venda", 7,
+                formatar=lambda p: f"R$ {(p[7] or 0):.2f}".replace('.', ',')),
+    ColunaGrade("Quant. Estoque", 8,
+                formatar=lambda p: str(p[8] or 0),
+                fundo=lambda p: QColor(Qt.red) if _estoque_baixo(p) else None,
+                cor=lambda p: QColor(Qt.white) if _estoque_baixo(p) else None),
+]
+
 # Classe LeitorCodigoBarras - para detectar automaticamente leituras de código de barras
 class LeitorCodigoBarras(QLineEdit):
     """
@@ -442,7 +463,7 @@ class Produtos(QWidget):
         
         self.nome_input = QLineEdit()
         self.nome_input.setStyleSheet(lineedit_style)
-        self.nome_input.setPlaceholderText("Digite o nome do produto")
+        self.nome_input.setPlaceholderText("Início do nome (* busca em qualquer parte)")
         grid_layout.addWidget(self.nome_input, 0, 3)
         
         # Linha 1: Código de Barras, Grupo e Marca
@@ -671,10 +692,10 @@ class Produtos(QWidget):
         
         main_layout.addLayout(acoes_layout)
         
-        # Tabela de Produtos
-        self.tabela = QTableWidget()
+        # Tabela de Produtos (grade virtual: células formatadas apenas quando exibidas)
+        self.tabela = GradeVirtual(COLUNAS_PRODUTOS)
         self.tabela.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 background-color: #fffff0;
                 border: 1px solid #cccccc;
                 color: black;
@@ -688,33 +709,26 @@ class Produtos(QWidget):
                 font-size: 13px;
                 height: 25px;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 2px;
                 font-size: 13px;
                 height: 20px;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #0078d7;
                 color: white;
             }
         """)
         
         # Configurar tabela
-        self.tabela.setColumnCount(6)
-        self.tabela.setHorizontalHeaderLabels(["Código", "Nome", "Marca", "Grupo", "Preço de Venda", "Quant. Estoque"])
         self.tabela.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeToContents)
         self.tabela.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
         self.tabela.horizontalHeader().setSectionResizeMode(2, QHeaderView.ResizeToContents)
         self.tabela.horizontalHeader().setSectionResizeMode(3, QHeaderView.ResizeToContents)
         self.tabela.horizontalHeader().setSectionResizeMode(4, QHeaderView.ResizeToContents)
         self.tabela.horizontalHeader().setSectionResizeMode(5, QHeaderView.ResizeToContents)
-        self.tabela.verticalHeader().setVisible(False)
-        self.tabela.setSelectionBehavior(QTableWidget.SelectRows)
         self.tabela.setSelectionMode(QTableWidget.SingleSelection)
         
-        # Importante: Desativar edição direta na tabela
-        self.tabela.setEditTriggers(QTableWidget.NoEditTriggers)
-        
         # Definir altura menor para linhas da tabela
         self.tabela.verticalHeader().setDefaultSectionSize(25)
         
@@ -748,7 +762,7 @@ class Produtos(QWidget):
         self.btn_scan.clicked.connect(self.focar_scanner)
         
         # Conectar a tabela a selecionar_item, que agora não dispara pesquisa
-        self.tabela.itemSelectionChanged.connect(self.selecionar_item)
+        self.tabela.selecao_alterada.connect(self.selecionar_item)
         
         # Configurar duplo clique na tabela para abrir o formulário de alteração
         self.tabela.doubleClicked.connect(self.alterar)
@@ -900,7 +914,7 @@ class Produtos(QWidget):
             
         try:
             # Limpar tabela para os novos resultados
-            self.tabela.setRowCount(0)
+            self.tabela.limpar()
             
             # Consulta específica por código (prioridade mais alta)
             if codigo:
@@ -937,40 +951,8 @@ class Produtos(QWidget):
             self.mostrar_mensagem("Erro", f"Erro ao pesquisar produtos: {str(e)}", QMessageBox.Critical)
     
     def preencher_tabela_com_produtos(self, produtos):
-        """Preenche a tabela com os produtos fornecidos"""
-        # Limpar tabela
-        self.tabela.setRowCount(0)
-        
-        # Preencher tabela com os produtos
-        for row, produto in enumerate(produtos):
-            self.tabela.insertRow(row)
-            
-            # Índices: 0:ID, 1:CODIGO, 2:NOME, 3:CODIGO_BARRAS, 4:MARCA, 5:GRUPO,
-            # 6:PRECO_CUSTO, 7:PRECO_VENDA, 8:QUANTIDADE_ESTOQUE
-            id_produto = produto[0]
-            codigo = produto[1]
-            nome = produto[2]
-            marca = produto[4] or ""
-            grupo = produto[5] or ""
-            preco_venda = produto[7] or 0
-            quantidade_estoque = produto[8] or 0
-            
-            # Armazenar o ID do produto no item como dado (UserRole)
-            codigo_item = QTableWidgetItem(str(codigo))
-            codigo_item.setData(Qt.UserRole, id_produto)
-            
-            self.tabela.setItem(row, 0, codigo_item)
-            self.tabela.setItem(row, 1, QTableWidgetItem(nome))
-            self.tabela.setItem(row, 2, QTableWidgetItem(marca))
-            self.tabela.setItem(row, 3, QTableWidgetItem(grupo))
-            self.tabela.setItem(row, 4, QTableWidgetItem(f"R$ {preco_venda:.2f}".replace('.', ',')))
-            
-            # Definir cor de fundo para quantidade de estoque baixo
-            estoque_item = QTableWidgetItem(str(quantidade_estoque))
-            if quantidade_estoque <= 5:  # Definir limite para estoque baixo
-                estoque_item.setBackground(Qt.red)
-                estoque_item.setForeground(Qt.white)
-            self.tabela.setItem(row, 5, estoque_item)
+        """Exibe os produtos fornecidos na grade (tuplas no formato de listar_produtos)"""
+        self.tabela.definir_linhas(produtos)
     
     def limpar_filtros(self):
         """Limpa todos os campos de pesquisa e carrega todos os produtos novamente"""
@@ -991,7 +973,7 @@ class Produtos(QWidget):
         """Carrega dados de produtos do banco de dados"""
         try:
             # Limpar tabela
-            self.tabela.setRowCount(0)
+            self.tabela.limpar()
             
             # Carregar produtos do banco de dados
             produtos = listar_produtos()
@@ -1014,8 +996,8 @@ class Produtos(QWidget):
             if selected_rows:
                 row = selected_rows[0].row()
                 
-                # Obter ID do produto armazenado no item da primeira coluna
-                id_produto = self.tabela.item(row, 0).data(Qt.UserRole)
+                # Obter ID do produto (primeiro campo da linha)
+                id_produto = self.tabela.linha(row)[0]
                 
                 # Buscar dados completos do produto no banco usando o ID
                 produto = buscar_produto_por_id(id_produto)
@@ -1065,8 +1047,9 @@ class Produtos(QWidget):
                     # Fallback para os dados da tabela
                     self.desconectar_sinais_temporariamente()
                     
-                    self.codigo_input.setText(self.tabela.item(row, 0).text())
-                    self.nome_input.setText(self.tabela.item(row, 1).text())
+                    linha = self.tabela.linha(row)
+                    self.codigo_input.setText(str(linha[1]))
+                    self.nome_input.setText(linha[2] or "")
                     self.barras_input.setText("")
                     self.marca_combo.setCurrentIndex(0)
                     self.grupo_combo.setCurrentIndex(0)
@@ -1089,8 +1072,8 @@ class Produtos(QWidget):
                 
             row = selected_rows[0].row()
             
-            # Obter ID do produto armazenado no item da primeira coluna
-            id_produto = self.tabela.item(row, 0).data(Qt.UserRole)
+            # Obter ID do produto (primeiro campo da linha)
+            id_produto = self.tabela.linha(row)[0]
             
             # Buscar os dados completos do produto no banco
             produto_db = buscar_produto_por_id(id_produto)
@@ -1187,8 +1170,7 @@ class Produtos(QWidget):
             row = selected_rows[0].row()
             
             # Obter o ID do produto para exclusão
-            id_produto = self.tabela.item(row, 0).data(Qt.UserRole)
-            nome = self.tabela.item(row, 1).text()
+            id_produto, nome = self.tabela.linha(row)[0], self.tabela.linha(row)[2]
             
             # Criar uma mensagem de confirmação personalizada com estilo
             msg_box = QMessageBox()
@@ -1231,7 +1213,7 @@ class Produtos(QWidget):
             
             if resultado:
                 # Atualizar a tabela removendo a linha
-                self.tabela.removeRow(row)
+                self.tabela.remover_linha(row)
                 
                 # Limpar os campos
                 self.desconectar_sinais_temporariamente()
@@ -9,7 +9,10 @@ from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                              QMessageBox, QFileDialog, QProgressDialog)
 from PyQt5.QtGui import QFont, QIcon, QPixmap, QColor, QPalette
 from PyQt5.QtCore import Qt, QDate, QDateTime, QThread, pyqtSignal, QTimer
-import matplotlib.pyplot as plt
+# Sem matplotlib.pyplot: o gráfico usa apenas a Figure e o canvas Qt,
+# o que evita carregar o pyplot (e seus backends) ao abrir o relatório
+from matplotlib import cm
+from matplotlib.artist import setp
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 import numpy as np
@@ -42,7 +45,7 @@ except Exception as e:
 
 # Agora importe as funções do banco de dados
 try:
-    from base.banco import (get_connection, execute_query, listar_produtos, listar_grupos)
+    from base.banco import (get_connection, listar_grupos)
 except Exception as e:
     # Registrar erro de importação no log
     try:
@@ -52,9 +55,48 @@ except Exception as e:
         pass
 
 
+LIMITE_LINHAS = 1000   # Linhas (produto, categoria, dia) exibidas na tabela
+LIMITE_GRAFICO = 10    # Produtos no gráfico
+
+
+def _sql_vendas_produtos(categoria):
+    """
+    Monta as consultas do relatório sobre o resumo diário de vendas
+    (VENDAS_DIARIAS_PRODUTO, base.vendas_diarias). As somas por dia e produto
+    já estão prontas; o Firebird só soma as estações e faz o top-N.
+
+    Returns:
+        dict: {'linhas': sql, 'grafico': sql, 'totais': sql}
+    """
+    origem = """
+            FROM VENDAS_DIARIAS_PRODUTO
+            WHERE DATA BETWEEN ? AND ?"""
+    if categoria:
+        origem += "\n              AND CATEGORIA = ?"
+
+    return {
+        'linhas': f"""
+            SELECT COALESCE(MAX(PRODUTO), 'Produto ' || CODIGO_PRODUTO), MAX(CATEGORIA), DATA, SUM(QUANTIDADE), SUM(VALOR_TOTAL)
+            {origem}
+            GROUP BY CODIGO_PRODUTO, DATA
+            ORDER BY 3 DESC, 5 DESC
+            ROWS ?""",
+        'grafico': f"""
+            SELECT COALESCE(MAX(PRODUTO), 'Produto ' || CODIGO_PRODUTO), SUM(QUANTIDADE)
+            {origem}
+            GROUP BY CODIGO_PRODUTO
+            ORDER BY 2 DESC
+            ROWS ?""",
+        'totais': f"""
+            SELECT COALESCE(SUM(VALOR_TOTAL), 0), COALESCE(SUM(QUANTIDADE), 0),
+                   COUNT(DISTINCT CODIGO_PRODUTO)
+            {origem}""",
+    }
+
+
 # Thread para carregamento de dados
 class CarregadorDadosThread(QThread):
-    dados_carregados = pyqtSignal(list)
+    dados_carregados = pyqtSignal(dict)
     erro_carregamento = pyqtSignal(str)
     
     def __init__(self, data_inicial, data_final, categoria=None):
@@ -72,67 +114,72 @@ class CarregadorDadosThread(QThread):
     
     def obter_vendas_por_periodo(self, data_inicial, data_final, categoria=None):
         """
-        Obtém as vendas da tabela VENDAS pelo período selecionado
+        Obtém as vendas do período agrupadas por produto, categoria e dia
+        
+        As somas vêm do resumo diário VENDAS_DIARIAS_PRODUTO; apenas as
+        linhas exibidas voltam para o Python.
         
         Args:
             data_inicial (str): Data inicial no formato yyyy-MM-dd
             data_final (str): Data final no formato yyyy-MM-dd
-            categoria (str, optional): Filtrar por categoria. Default None (todas)
+            categoria (str, optional): Filtrar por categoria (grupo do produto). Default None (todas)
             
         Returns:
-            list: Lista de dicionários com os dados das vendas
+            dict: {
+                'linhas': lista de dicionários (produto, categoria, data, quantidade, valor_total),
+                'grafico': lista de (produto, quantidade) dos mais vendidos,
+                'total_vendas': float, 'total_produtos': float,
+                'produtos_distintos': int, 'truncado': bool
+            }
         """
+        conn = None
         try:
-            # Usar conexão direta para evitar problemas com o driver
+            inicio = datetime.datetime.now()
+            consultas = _sql_vendas_produtos(categoria)
+            params = [data_inicial, data_final] + ([categoria] if categoria else [])
+            
+            # Uma conexão para as três consultas (mesma visão dos dados)
             conn = get_connection()
             cursor = conn.cursor()
             
-            # Consulta ajustada para a estrutura real da tabela VENDAS
-            query = """
-            SELECT 
-                'Produto ' || ID_VENDA AS produto,  -- Placeholder para produto 
-                'Geral' AS categoria,               -- Placeholder para categoria
-                DATA_VENDA as data,
-                1 as quantidade,                    -- Assumindo 1 por venda
-                VALOR_TOTAL as valor_total
-            FROM VENDAS
-            WHERE DATA_VENDA BETWEEN ? AND ?
-            """
+            cursor.execute(consultas['linhas'], params + [LIMITE_LINHAS])
+            linhas = [{
+                "produto": str(row[0]),
+                "categoria": str(row[1]),
+                "data": row[2],
+                "quantidade": float(row[3] or 0),
+                "valor_total": float(row[4] or 0)
+            } for row in cursor.fetchall()]
             
-            params = [data_inicial, data_final]
+            cursor.execute(consultas['grafico'], params + [LIMITE_GRAFICO])
+            grafico = [(str(row[0]), float(row[1] or 0)) for row in cursor.fetchall()]
             
-            # Se tiver categoria, apenas como exemplo (ajustar conforme necessário)
-            if categoria and categoria != "Geral":
-                # Neste caso iremos apenas ignorar, já que não temos categoria real
-                pass
-                
-            # Ordenar por data e limitar para melhor performance
-            query += " ORDER BY DATA_VENDA DESC"
+            cursor.execute(consultas['totais'], params)
+            total_vendas, total_produtos, produtos_distintos = cursor.fetchone()
             
-            # Executar a consulta diretamente pelo cursor
-            cursor.execute(query, params)
-            
-            # Processar resultados
-            vendas = []
-            for row in cursor.fetchall():
-                venda = {
-                    "produto": str(row[0]),           # Convertendo para string
-                    "categoria": str(row[1]),         # Convertendo para string  
-                    "data": row[2],                   # Data
-                    "quantidade": float(row[3]),      # Quantidade como float
-                    "valor_total": float(row[4]) if row[4] is not None else 0.0  # Valor como float
-                }
-                vendas.append(venda)
-                
             cursor.close()
-            conn.close()
-            return vendas
+            conn.commit()
+            
+            print(f"Relatório de vendas por produto: {len(linhas)} linhas em "
+                  f"{(datetime.datetime.now() - inicio).total_seconds() * 1000:.0f} ms")
+            return {
+                "linhas": linhas,
+                "grafico": grafico,
+                "total_vendas": float(total_vendas or 0),
+                "total_produtos": float(total_produtos or 0),
+                "produtos_distintos": int(produtos_distintos or 0),
+                "truncado": len(linhas) >= LIMITE_LINHAS
+            }
             
         except Exception as e:
             import traceback
             traceback.print_exc()
             print(f"Erro ao obter vendas: {e}")
             raise
+        finally:
+            # Devolver a conexão ao pool mesmo em caso de erro
+            if conn:
+                conn.close()
 
 # Thread para carregamento de categorias
 class CarregadorCategoriasThread(QThread):
@@ -141,8 +188,8 @@ class CarregadorCategoriasThread(QThread):
     
     def run(self):
         try:
-            # Categorias simplificadas já que provavelmente não temos a tabela grupos
-            categorias = ["Geral", "Produtos", "Serviços"]
+            # Grupos cadastrados; produtos sem grupo aparecem como "Geral"
+            categorias = [g for g in listar_grupos() if g and g != "Geral"] + ["Geral"]
             self.categorias_carregadas.emit(categorias)
         except Exception as e:
             self.erro_carregamento.emit(str(e))
@@ -194,6 +241,10 @@ class GraficoVendas(FigureCanvas):
     def atualizar_grafico(self, dados_venda):
         """
         Atualiza o gráfico com os dados de venda, com cache para evitar redesenho desnecessário
+        
+        Args:
+            dados_venda (list): Tuplas (produto, quantidade) já somadas e
+                ordenadas pelo banco (mais vendidos primeiro)
         """
         # Verificar se temos os mesmos dados que antes (usando hash)
         hash_dados = hash(str(dados_venda))
@@ -209,29 +260,17 @@ class GraficoVendas(FigureCanvas):
         
         self.axes.clear()
         
-        # Processar dados para o gráfico (agrupa por produto)
-        # Usando um método mais eficiente com dicionário
-        produtos = {}
-        for venda in dados_venda:
-            produto = venda['produto']
-            produtos[produto] = produtos.get(produto, 0) + venda['quantidade']
-        
-        # Criar gráfico de barras
-        nomes = list(produtos.keys())
-        valores = list(produtos.values())
-        
-        # Limitar a 10 produtos para melhor visualização e performance
-        if len(nomes) > 10:
-            # Usar numpy para ordenação mais rápida
-            indices = np.argsort(valores)[-10:][::-1]
-            nomes = [nomes[i] for i in indices]
-            valores = [valores[i] for i in indices]
-            self.axes.set_title('Top 10 Produtos Vendidos', color='white')
+        # O banco já devolve os mais vendidos somados e em ordem
+        nomes = [produto for produto, _ in dados_venda]
+        valores = [quantidade for _, quantidade in dados_venda]
+        
+        if len(nomes) >= LIMITE_GRAFICO:
+            self.axes.set_title(f'Top {LIMITE_GRAFICO} Produtos Vendidos', color='white')
         else:
             self.axes.set_title('Produtos Vendidos', color='white')
         
         # Criar barras com cores gradientes (simplificado)
-        cores = plt.cm.viridis(np.linspace(0, 1, len(nomes)))
+        cores = cm.viridis(np.linspace(0, 1, len(nomes)))
         barras = self.axes.bar(nomes, valores, color=cores)
         
         # Configurar eixos e rótulos
@@ -239,7 +278,7 @@ class GraficoVendas(FigureCanvas):
         self.axes.set_xlabel('Produtos', color='white')
         
         # Rotacionar rótulos do eixo X para melhor visualização
-        plt.setp(self.axes.get_xticklabels(), rotation=45, ha='right', rotation_mode='anchor')
+        setp(self.axes.get_xticklabels(), rotation=45, ha='right', rotation_mode='anchor')
         
         # Ajustar layout
         self.fig.tight_layout()
@@ -568,21 +607,17 @@ class RelatorioVendasWindow(QWidget):
         self.grafico.mostrar_placeholder("Ocorreu um erro ao carregar os dados")
     
     def atualizar_relatorio(self, dados):
-        """Atualiza a UI com os dados carregados"""
-        self.dados_filtrados = dados
+        """Atualiza a UI com os dados carregados (ver obter_vendas_por_periodo)"""
+        self.dados_filtrados = dados["linhas"]
         
         # Limpamos a tabela antes de preencher
         self.tabela.setRowCount(0)
         
-        # Variáveis para cálculo de totais
-        total_vendas = 0
-        total_produtos = 0
-        
         # Desativar sorting temporariamente para melhorar performance
         self.tabela.setSortingEnabled(False)
         
         # Usar setRowCount para pré-alocar linhas (melhora performance)
-        self.tabela.setRowCount(len(dados))
+        self.tabela.setRowCount(len(self.dados_filtrados))
         
         # Preencher a tabela com os dados - por batch para melhorar performance
         for i, venda in enumerate(self.dados_filtrados):
@@ -609,20 +644,20 @@ class RelatorioVendasWindow(QWidget):
             valor_total = venda["valor_total"]
             valor_formatado = f"R$ {valor_total:.2f}".replace('.', ',')
             self.tabela.setItem(i, 4, QTableWidgetItem(valor_formatado))
-            
-            # Acumular totais
-            total_vendas += valor_total
-            total_produtos += venda["quantidade"]
         
         # Reativar sorting
         self.tabela.setSortingEnabled(True)
         
-        # Atualizar rótulos de resumo
-        self.total_vendas_label.setText(f"Total de Vendas: R$ {total_vendas:.2f}".replace('.', ','))
-        self.total_produtos_label.setText(f"Produtos Vendidos: {total_produtos}")
+        # Totais do período inteiro, calculados no banco (mesmo se a tabela foi limitada)
+        self.total_vendas_label.setText(f"Total de Vendas: R$ {dados['total_vendas']:.2f}".replace('.', ','))
+        texto_produtos = f"Produtos Vendidos: {dados['total_produtos']:g}"
+        if dados["truncado"]:
+            texto_produtos += f" (tabela com as {LIMITE_LINHAS} linhas mais recentes)"
+        self.total_produtos_label.setText(texto_produtos)
         
         # Atualizar gráfico (com delay para melhorar responsividade)
-        QTimer.singleShot(100, lambda: self.grafico.atualizar_grafico(self.dados_filtrados))
+        grafico = dados["grafico"]
+        QTimer.singleShot(100, lambda: self.grafico.atualizar_grafico(grafico))
     
     def exportar_relatorio(self):
         """Exporta o relatório para um arquivo CSV"""